@@ -0,0 +1,93 @@
+"""
+Content scanner benchmark
+
+Compares the two case-insensitive regexes previously used by
+``SecurityService.validate_input_content`` with both engines of
+``src.services.content_scanner`` on large inputs.
+
+Usage:
+    python -m benchmarks.bench_content_scanner [--size-kb 1000] [--repeat 5]
+
+Inputs are clean email-like text (the common case, where every scanner has to
+read the whole text) and the same text with an attack at the very end.
+"""
+
+import argparse
+import random
+import re
+import time
+
+from src.services.content_scanner import create_scanner
+
+LEGACY_SQL_PATTERN = re.compile(
+    r"(union|select|insert|update|delete|drop|create|alter|exec|execute)",
+    re.IGNORECASE,
+)
+LEGACY_XSS_PATTERN = re.compile(r"(<script|javascript:|onerror=|onclick=)", re.IGNORECASE)
+
+# Vocabulary without the legacy keywords, so the legacy scan reads the whole text
+WORDS = (
+    "olá prezado equipe gostaria saber status pedido número obrigado atenciosamente "
+    "reunião amanhã relatório anexo fatura pagamento prazo entrega contrato cliente "
+    "please find attached invoice meeting schedule regards thanks support request "
+    "sistema acesso senha conta cadastro dúvida informação urgente favor retorno"
+).split()
+
+
+def legacy_scan(text):
+    return LEGACY_SQL_PATTERN.search(text) or LEGACY_XSS_PATTERN.search(text)
+
+
+def build_text(size_bytes, seed=0):
+    rng = random.Random(seed)
+    words = []
+    length = 0
+    while length < size_bytes:
+        word = rng.choice(WORDS)
+        if rng.random() < 0.05:
+            word = word.capitalize() + ("," if rng.random() < 0.5 else ".\n")
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)
+
+
+def timed(scan, text, repeat):
+    """Return the best time of ``repeat`` scans"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        scan(text)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size-kb", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    clean = build_text(args.size_kb * 1000)
+    inputs = {
+        "clean": clean,
+        "attack at end": clean + " <script>alert(1)</script>",
+    }
+    scanners = {
+        "legacy regexes": legacy_scan,
+        "regex": create_scanner("regex").scan,
+        "aho-corasick": create_scanner("aho-corasick").scan,
+    }
+
+    for label, text in inputs.items():
+        print(f"{label} ({len(text) / 1000:.0f}KB)")
+        for name, scan in scanners.items():
+            elapsed = timed(scan, text, args.repeat)
+            print(
+                f"{name:>15}: {elapsed * 1000:8.2f}ms  "
+                f"{len(text) / elapsed / 1e6:7.1f}MB/s  result={scan(text) is not None}"
+            )
+        print()
+
+
+if __name__ == "__main__":
+    main()
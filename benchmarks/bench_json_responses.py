@@ -0,0 +1,116 @@
+"""
+JSON response serialization and compression benchmark
+
+Compares the cost per response of Starlette's ``JSONResponse`` (``json.dumps``)
+with ``ORJSONResponse``, the API's default response class, and the cost and
+size of compressing the rendered body with gzip and brotli at the levels used
+by ``ResponseCompressionMiddleware``.
+
+Usage:
+    python -m benchmarks.bench_json_responses [--reply-kb 2] [--repeat 2000]
+
+Payloads are a single classification result, a list of 10 results and the
+50-line NDJSON stream of a batch (serialized line by line, as streamed).
+"""
+
+import argparse
+import gzip
+import importlib.util
+import json
+import time
+
+import orjson
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from src.config import RESPONSE_BROTLI_QUALITY, RESPONSE_GZIP_LEVEL
+
+REPLY = (
+    "Olá, agradecemos o contato. Sua solicitação foi registrada e nossa equipe "
+    "retornará em até dois dias úteis com a atualização do status do pedido. "
+)
+
+
+def build_result(reply_bytes):
+    return {
+        "category": "Produtivo",
+        "confidence": 0.93,
+        "suggested_reply": (REPLY * (reply_bytes // len(REPLY) + 1))[:reply_bytes],
+        "reasoning": "O email solicita atualização sobre um pedido em andamento.",
+    }
+
+
+def build_payloads(reply_bytes):
+    result = build_result(reply_bytes)
+    lines = [
+        {"index": i, "filename": f"email_{i}.txt", "status": "ok", "result": result}
+        for i in range(50)
+    ]
+    return {"single": result, "list of 10": [result] * 10, "ndjson x50": lines}
+
+
+def json_ndjson(lines):
+    return b"".join((json.dumps(line, ensure_ascii=False) + "\n").encode() for line in lines)
+
+
+def orjson_ndjson(lines):
+    return b"".join(orjson.dumps(line) + b"\n" for line in lines)
+
+
+def timed(function, payload, repeat):
+    """Return the best time of ``repeat`` calls and the last result"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function(payload)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def compressors():
+    levels = {f"gzip-{RESPONSE_GZIP_LEVEL}": lambda body: gzip.compress(body, RESPONSE_GZIP_LEVEL)}
+    if importlib.util.find_spec("brotli") is not None:
+        import brotli
+
+        levels[f"br-{RESPONSE_BROTLI_QUALITY}"] = lambda body: brotli.compress(
+            body, quality=RESPONSE_BROTLI_QUALITY
+        )
+    return levels
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--reply-kb", type=float, default=2, help="size of suggested_reply")
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    payloads = build_payloads(int(args.reply_kb * 1000))
+    print(f"{'payload':<12} {'serializer':<15} {'time':>10} {'size':>9}  speedup")
+    bodies = {}
+    for name, payload in payloads.items():
+        if name.startswith("ndjson"):
+            serializers = {"json.dumps": json_ndjson, "orjson": orjson_ndjson}
+        else:
+            serializers = {
+                "JSONResponse": lambda content: JSONResponse(content).body,
+                "ORJSONResponse": lambda content: ORJSONResponse(content).body,
+            }
+        timings = {}
+        for label, serialize in serializers.items():
+            timings[label], bodies[name] = timed(serialize, payload, args.repeat)
+            print(
+                f"{name:<12} {label:<15} {timings[label] * 1e6:8.1f}us {len(bodies[name]):>8}B"
+                f"  {max(timings.values()) / timings[label]:.1f}x"
+            )
+
+    print(f"\n{'payload':<12} {'encoding':<15} {'time':>10} {'size':>9}  ratio")
+    for name, body in bodies.items():
+        for label, compress in compressors().items():
+            elapsed, compressed = timed(compress, body, max(args.repeat // 10, 1))
+            print(
+                f"{name:<12} {label:<15} {elapsed * 1e6:8.1f}us {len(compressed):>8}B"
+                f"  {len(compressed) / len(body):.0%}"
+            )
+
+
+if __name__ == "__main__":
+    main()
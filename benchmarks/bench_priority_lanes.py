@@ -0,0 +1,101 @@
+"""
+Priority lanes benchmark
+
+Simulates a slow external service (fixed latency per call) shared by a bulk
+backfill and a steady trickle of interactive requests, and reports the
+interactive latency percentiles with a plain FIFO semaphore and with
+``LaneLimiter``.
+
+Usage:
+    python -m benchmarks.bench_priority_lanes [--capacity 8] [--bulk-limit 4]
+
+With a FIFO semaphore every interactive call waits behind the bulk queue;
+with lanes it only waits for the next free slot.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import statistics
+import time
+
+from src.services.lanes import LaneLimiter
+from src.services.priority import Priority
+
+
+class FifoLimiter:
+    """A semaphore that ignores priority (the baseline)"""
+
+    def __init__(self, capacity):
+        self.semaphore = asyncio.Semaphore(capacity)
+
+    @contextlib.asynccontextmanager
+    async def slot(self, priority=None):
+        async with self.semaphore:
+            yield
+
+
+async def run(limiter, args):
+    """Return the interactive latencies (seconds) and the bulk throughput (calls/s)"""
+
+    async def call(priority):
+        async with limiter.slot(priority):
+            await asyncio.sleep(args.latency)
+
+    bulk_done = 0
+
+    async def bulk_worker():
+        nonlocal bulk_done
+        while True:
+            await call(Priority.BULK)
+            bulk_done += 1
+
+    latencies = []
+
+    async def interactive():
+        started = time.perf_counter()
+        await call(Priority.INTERACTIVE)
+        latencies.append(time.perf_counter() - started)
+
+    bulk = [asyncio.create_task(bulk_worker()) for _ in range(args.bulk_workers)]
+    started = time.perf_counter()
+    requests = []
+    for _ in range(args.requests):
+        requests.append(asyncio.create_task(interactive()))
+        await asyncio.sleep(args.interval)
+    await asyncio.gather(*requests)
+    elapsed = time.perf_counter() - started
+    for task in bulk:
+        task.cancel()
+    await asyncio.gather(*bulk, return_exceptions=True)
+    return latencies, bulk_done / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--capacity", type=int, default=8)
+    parser.add_argument("--bulk-limit", type=int, default=4)
+    parser.add_argument("--bulk-workers", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--interval", type=float, default=0.01, help="between interactive calls")
+    parser.add_argument("--latency", type=float, default=0.05, help="per service call")
+    args = parser.parse_args()
+
+    print(
+        f"capacity {args.capacity}, {args.bulk_workers} bulk workers, "
+        f"{args.requests} interactive calls, {args.latency * 1000:.0f}ms per call"
+    )
+    for name, limiter in (
+        ("fifo semaphore", FifoLimiter(args.capacity)),
+        ("lanes", LaneLimiter("bench", args.capacity, args.bulk_limit)),
+    ):
+        latencies, bulk_rate = asyncio.run(run(limiter, args))
+        quantiles = statistics.quantiles(latencies, n=100)
+        print(
+            f"{name:>15}: interactive p50 {quantiles[49] * 1000:7.1f}ms  "
+            f"p95 {quantiles[94] * 1000:7.1f}ms  bulk {bulk_rate:6.1f} calls/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
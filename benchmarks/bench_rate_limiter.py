@@ -0,0 +1,115 @@
+"""
+Rate limiter benchmark
+
+Compares the bucketed sliding-window ``RateLimitStorage`` with the previous
+list-of-datetimes implementation at many distinct client IPs.
+
+Usage:
+    python -m benchmarks.bench_rate_limiter [--clients 100000] [--rounds 5]
+
+Two workloads are measured: many distinct clients with a few requests each,
+and a few hot clients with many requests each (where per-request cost of the
+list-based implementation grows with the client's history).
+"""
+
+import argparse
+import random
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from src.services.security_service import RateLimitStorage
+
+
+class LegacyRateLimitStorage:
+    """The list-based implementation replaced by ``RateLimitStorage`` (kept for comparison)"""
+
+    def __init__(self):
+        self.requests = {}
+        self.daily_requests = {}
+
+    def add_request(self, client_ip):
+        now = datetime.now()
+        self.requests.setdefault(client_ip, []).append(now)
+        self.daily_requests.setdefault(client_ip, []).append(now)
+        cutoff_time = now - timedelta(hours=1)
+        self.requests[client_ip] = [t for t in self.requests[client_ip] if t > cutoff_time]
+        self.daily_requests[client_ip] = [
+            t for t in self.daily_requests[client_ip] if t > cutoff_time
+        ]
+
+    def get_counts(self, client_ip):
+        now = datetime.now()
+        recent_cutoff = now - timedelta(minutes=5)
+        daily_cutoff = now - timedelta(hours=24)
+        recent = len([t for t in self.requests.get(client_ip, []) if t > recent_cutoff])
+        daily = len([t for t in self.daily_requests.get(client_ip, []) if t > daily_cutoff])
+        return recent, daily
+
+
+def exercise(storage, ips, rounds):
+    """Check + record each IP ``rounds`` times"""
+    for _ in range(rounds):
+        for ip in ips:
+            storage.get_counts(ip)
+            storage.add_request(ip)
+
+
+def measure(factory, ips, rounds):
+    """Return (seconds, retained bytes) for a fresh storage"""
+    storage = factory()
+    started = time.perf_counter()
+    exercise(storage, ips, rounds)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    storage = factory()
+    exercise(storage, ips, rounds)
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, retained
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=100_000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--hot-clients", type=int, default=100)
+    parser.add_argument("--hot-rounds", type=int, default=500)
+    args = parser.parse_args()
+
+    for clients, rounds in ((args.clients, args.rounds), (args.hot_clients, args.hot_rounds)):
+        compare(clients, rounds)
+        print()
+
+    ips = [f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" for i in range(args.clients)]
+    storage = RateLimitStorage()
+    for ip in ips:
+        storage.add_request(ip)
+    storage.clock = lambda: time.monotonic() + 2 * RateLimitStorage.LONG_WINDOW_SECONDS
+    started = time.perf_counter()
+    evicted = storage.evict_idle()
+    print(f"{'eviction':>15}: {time.perf_counter() - started:7.3f}s for {evicted} idle clients")
+
+
+def compare(clients, rounds):
+    """Run both implementations on ``clients`` distinct IPs, ``rounds`` requests each"""
+
+    ips = [f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" for i in range(clients)]
+    random.Random(0).shuffle(ips)
+    operations = clients * rounds
+
+    print(f"{clients} clients x {rounds} rounds ({operations} check+record ops)")
+    for name, factory in (
+        ("legacy lists", LegacyRateLimitStorage),
+        ("sliding window", RateLimitStorage),
+    ):
+        elapsed, retained = measure(factory, ips, rounds)
+        print(
+            f"{name:>15}: {elapsed:7.3f}s  {operations / elapsed / 1000:8.1f}k ops/s  "
+            f"{elapsed / operations * 1e6:6.2f}us/op  retained {retained / 1024 / 1024:7.1f}MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
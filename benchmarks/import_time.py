@@ -0,0 +1,145 @@
+"""
+Import-time and cold-start profiler
+
+Measures how long a fresh interpreter takes to import the application
+(``python -X importtime``), lists the slowest imports and checks that the
+heavy dependencies loaded lazily by ``src.services.warmup`` stay out of the
+import. With ``--serve`` it also measures the cold start of a uvicorn worker:
+the time from spawning the process to the first ``200`` from ``/health``.
+With ``--budget`` it exits with status 1 when the best import time is above
+the budget; ``tests/test_startup.py`` only checks which modules get imported.
+
+Usage:
+    python -m benchmarks.import_time [--module src.main] [--top 25] [--repeat 5] [--serve]
+                                     [--budget 1.0]
+"""
+
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+import httpx
+
+from src.services.warmup import HEAVY_MODULES
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def environment() -> dict:
+    return {**os.environ, "GEMINI_API_KEY": os.environ.get("GEMINI_API_KEY", "profile")}
+
+
+def import_seconds(module: str) -> float:
+    """Wall time of ``import module`` in a fresh interpreter"""
+    code = (
+        "import time; started = time.perf_counter(); "
+        f"import {module}; print(time.perf_counter() - started)"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT,
+        env=environment(),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return float(output.stdout.strip().splitlines()[-1])
+
+
+def import_profile(module: str) -> List[Tuple[int, int, int, str]]:
+    """
+    Run ``python -X importtime -c "import module"``.
+
+    Returns:
+        ``(self_us, cumulative_us, depth, name)`` per imported module, in import order
+    """
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        env=environment(),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    entries = []
+    for line in output.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((int(self_us), int(cumulative_us), depth, name.strip()))
+    return entries
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def cold_start_seconds(timeout: float = 60) -> float:
+    """Seconds from spawning ``uvicorn src.main:app`` to its first 200 on /health"""
+    port = free_port()
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.main:app", "--port", str(port)]
+        + ["--log-level", "warning"],
+        cwd=ROOT,
+        env=environment(),
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}") as client:
+            while time.perf_counter() - started < timeout:
+                try:
+                    if client.get("/health").status_code == 200:
+                        return time.perf_counter() - started
+                except httpx.HTTPError:
+                    pass
+                time.sleep(0.01)
+        raise RuntimeError("Application did not answer /health")
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--module", default="src.main")
+    parser.add_argument("--top", type=int, default=25, help="slowest imports to list")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--serve", action="store_true", help="also measure uvicorn cold start")
+    parser.add_argument(
+        "--budget", type=float, help="fail if the best import takes longer (seconds)"
+    )
+    args = parser.parse_args()
+
+    entries = import_profile(args.module)
+    print(f"{'self':>9} {'cumulative':>11}  module (slowest {args.top} by cumulative time)")
+    for self_us, cumulative_us, depth, name in sorted(entries, key=lambda e: -e[1])[: args.top]:
+        print(f"{self_us / 1000:7.1f}ms {cumulative_us / 1000:9.1f}ms  {'  ' * depth}{name}")
+
+    imported = {name for _, _, _, name in entries}
+    first_party = sum(self_us for self_us, _, _, name in entries if name.split(".")[0] == "src")
+    print(f"\nfirst-party modules (self time): {first_party / 1000:.1f}ms")
+    for name in HEAVY_MODULES:
+        print(f"{name:>20}: {'IMPORTED' if name in imported else 'lazy'}")
+
+    timings = [import_seconds(args.module) for _ in range(args.repeat)]
+    print(f"\nimport {args.module}: best {min(timings) * 1000:.0f}ms of {args.repeat} runs")
+
+    if args.serve:
+        starts = [cold_start_seconds() for _ in range(args.repeat)]
+        print(f"cold start to /health: best {min(starts) * 1000:.0f}ms of {args.repeat} runs")
+
+    if args.budget is not None and min(timings) > args.budget:
+        print(f"import {args.module} is over the {args.budget:.2f}s budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
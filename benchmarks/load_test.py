@@ -0,0 +1,337 @@
+"""
+End-to-end load test
+
+Starts ``src.main:app`` under uvicorn in a subprocess, pointed at the local
+stub Gemini and OCR.space servers (``benchmarks.stub_servers``), drives a
+mixed workload at a target concurrency and reports throughput, latency
+percentiles, errors and the application's peak RSS.
+
+Usage:
+    python -m benchmarks.load_test [--concurrency 16] [--requests 400]
+        [--mix txt=60,pdf=30,scanned=10] [--gemini-latency lognormal:0.8,0.3]
+        [--ocr-latency uniform:1,3] [--gemini-error-rate 0.01] [--output results.json]
+
+Workload kinds (all ``POST /api/analyze``):
+
+- ``txt``: a plain-text email
+- ``pdf``: a PDF with embedded text (pypdf extraction)
+- ``scanned``: a PDF without text (goes through OCR)
+
+The run is closed-loop: ``--concurrency`` clients each send a request as soon
+as their previous one finished, until ``--requests`` were sent or
+``--duration`` seconds elapsed. Rate limits and OCR quotas of the app are
+lifted for the run.
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+from pypdf import PdfWriter
+
+from benchmarks.stub_servers import LatencyModel, StubBehavior, StubServer, free_port
+
+EMAIL_LINES = [
+    "Prezados,",
+    "Gostaria de saber o status do chamado 4521, aberto na semana passada.",
+    "O sistema continua apresentando lentidao no fechamento do caixa.",
+    "Fico no aguardo de um retorno.",
+    "Atenciosamente, Maria",
+]
+
+
+def make_text_pdf(lines: List[str]) -> bytes:
+    """Build a one-page PDF whose text pypdf can extract"""
+    escaped = [line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") for line in lines]
+    content = "BT /F1 12 Tf 72 720 Td " + " ".join(f"({line}) Tj 0 -16 Td" for line in escaped)
+    content += " ET"
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+        "/Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+        f"<< /Length {len(content)} >>\nstream\n{content}\nendstream",
+    ]
+    output = io.BytesIO()
+    output.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(output.tell())
+        output.write(f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1"))
+    xref = output.tell()
+    output.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+    for offset in offsets:
+        output.write(f"{offset:010d} 00000 n \n".encode())
+    output.write(
+        f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    )
+    return output.getvalue()
+
+
+def make_scanned_pdf(pages: int = 1) -> bytes:
+    """Build a PDF without extractable text (forces the OCR path)"""
+    writer = PdfWriter()
+    for _ in range(pages):
+        writer.add_blank_page(width=612, height=792)
+    output = io.BytesIO()
+    writer.write(output)
+    return output.getvalue()
+
+
+WORKLOADS = {
+    "txt": ("email.txt", "text/plain", "\n".join(EMAIL_LINES).encode()),
+    "pdf": ("email.pdf", "application/pdf", make_text_pdf(EMAIL_LINES)),
+    "scanned": ("scan.pdf", "application/pdf", make_scanned_pdf()),
+}
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix = {}
+    for part in spec.split(","):
+        kind, _, weight = part.partition("=")
+        if kind not in WORKLOADS:
+            raise ValueError(f"Unknown workload kind: {kind}. Use {tuple(WORKLOADS)}")
+        mix[kind] = float(weight or 1)
+    return mix
+
+
+def app_environment(stub_url: str, data_dir: str, extra: List[str]) -> Dict[str, str]:
+    """Environment of the application under test"""
+    env = dict(os.environ)
+    env.update(
+        {
+            "GEMINI_API_KEY": "stub-key",
+            "GEMINI_API_ENDPOINT": stub_url,
+            "OCR_SPACE_API_KEY": "stub-key",
+            "OCR_SPACE_URL": f"{stub_url}/parse/image",
+            "OCR_BACKENDS": "ocrspace",
+            "DATA_DIR": data_dir,
+            "RATE_LIMIT_PER_5_MIN": "100000000",
+            "RATE_LIMIT_PER_24_HOURS": "100000000",
+            "OCR_QUOTA_PER_MINUTE": "100000000",
+            "OCR_QUOTA_PER_DAY": "100000000",
+            "LOG_LEVEL": "WARNING",
+        }
+    )
+    for item in extra:
+        key, _, value = item.partition("=")
+        env[key] = value
+    return env
+
+
+def start_app(port: int, env: Dict[str, str], workers: int) -> subprocess.Popen:
+    command = [sys.executable, "-m", "uvicorn", "src.main:app", "--host", "127.0.0.1"]
+    command += ["--port", str(port), "--log-level", "warning", "--no-access-log"]
+    if workers > 1:
+        command += ["--workers", str(workers)]
+    return subprocess.Popen(command, env=env)
+
+
+async def wait_ready(base_url: str, process: subprocess.Popen, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"Application exited with code {process.returncode}")
+            try:
+                if (await client.get("/health")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.1)
+    raise RuntimeError("Application did not become healthy")
+
+
+def peak_rss_mb(pid: int) -> Optional[float]:
+    """Peak RSS (VmHWM) of a running process, on Linux"""
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+
+async def drive(
+    base_url: str,
+    mix: Dict[str, float],
+    concurrency: int,
+    total: int,
+    duration: float,
+    timeout: float,
+    seed: int,
+) -> Tuple[List[Tuple[str, int, float]], float]:
+    """
+    Run the closed-loop workload.
+
+    Returns:
+        ``(kind, status, seconds)`` per request (status 0 = client error or
+        timeout) and the wall-clock duration
+    """
+    rng = random.Random(seed)
+    kinds, weights = list(mix), list(mix.values())
+    results: List[Tuple[str, int, float]] = []
+    sent = 0
+    started = time.perf_counter()
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+
+        async def worker():
+            nonlocal sent
+            while sent < total and time.perf_counter() - started < duration:
+                sent += 1
+                kind = rng.choices(kinds, weights)[0]
+                filename, content_type, content = WORKLOADS[kind]
+                request_started = time.perf_counter()
+                try:
+                    response = await client.post(
+                        "/api/analyze", files={"file": (filename, content, content_type)}
+                    )
+                    status = response.status_code
+                except httpx.HTTPError:
+                    status = 0
+                results.append((kind, status, time.perf_counter() - request_started))
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return results, time.perf_counter() - started
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(results: List[Tuple[str, int, float]], elapsed: float) -> Dict[str, dict]:
+    """Throughput, latency percentiles (ms) and status counts, overall and per kind"""
+    groups = defaultdict(list)
+    for kind, status, seconds in results:
+        groups["all"].append((status, seconds))
+        groups[kind].append((status, seconds))
+
+    summary = {}
+    for name, samples in groups.items():
+        latencies = [seconds for status, seconds in samples if status == 200]
+        summary[name] = {
+            "requests": len(samples),
+            "ok": len(latencies),
+            "throughput_rps": round(len(latencies) / elapsed, 2),
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+            "p90_ms": round(percentile(latencies, 0.90) * 1000, 1),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+            "max_ms": round(max(latencies, default=float("nan")) * 1000, 1),
+            "mean_ms": round(statistics.fmean(latencies) * 1000, 1) if latencies else None,
+            "statuses": dict(sorted(Counter(str(status) for status, _ in samples).items())),
+        }
+    return summary
+
+
+def print_report(summary: Dict[str, dict], elapsed: float, rss_mb: Optional[float]) -> None:
+    print(
+        f"\n{'kind':>8} {'reqs':>6} {'ok':>6} {'rps':>8} {'p50':>8} {'p90':>8} {'p99':>8}  statuses"
+    )
+    for name in ["all", *sorted(key for key in summary if key != "all")]:
+        row = summary[name]
+        print(
+            f"{name:>8} {row['requests']:>6} {row['ok']:>6} {row['throughput_rps']:>8.2f} "
+            f"{row['p50_ms']:>7.0f}ms {row['p90_ms']:>6.0f}ms {row['p99_ms']:>6.0f}ms  "
+            f"{row['statuses']}"
+        )
+    rss = f"{rss_mb:.1f}MB" if rss_mb is not None else "n/a"
+    print(f"\nwall time {elapsed:.1f}s, application peak RSS {rss}")
+
+
+async def run(args) -> dict:
+    gemini = StubBehavior(LatencyModel.parse(args.gemini_latency, seed=1), args.gemini_error_rate)
+    ocr = StubBehavior(LatencyModel.parse(args.ocr_latency, seed=2), args.ocr_error_rate)
+    stub = StubServer(gemini, ocr).start()
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+
+    with tempfile.TemporaryDirectory(prefix="autou-load-") as data_dir:
+        process = start_app(port, app_environment(stub.url, data_dir, args.env), args.workers)
+        try:
+            await wait_ready(base_url, process)
+            print(
+                f"Driving {args.requests} requests at concurrency {args.concurrency} "
+                f"(mix {args.mix}) against {base_url}"
+            )
+            results, elapsed = await drive(
+                base_url,
+                parse_mix(args.mix),
+                args.concurrency,
+                args.requests,
+                args.duration,
+                args.timeout,
+                args.seed,
+            )
+            rss_mb = peak_rss_mb(process.pid)
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+            stub.stop()
+
+    if rss_mb is None:
+        # Fora do Linux: pico de RSS dos processos filhos já encerrados (KB no Linux, bytes no macOS)
+        maxrss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+        rss_mb = maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+    summary = summarize(results, elapsed)
+    print_report(summary, elapsed, rss_mb)
+    print(
+        f"stub calls: gemini {gemini.calls} ({gemini.errors} errors), ocr {ocr.calls} ({ocr.errors} errors)"
+    )
+    return {
+        "config": {key: value for key, value in vars(args).items() if key not in ("output",)},
+        "elapsed_s": round(elapsed, 2),
+        "peak_rss_mb": round(rss_mb, 1),
+        "results": summary,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--duration", type=float, default=300, help="stop after N seconds")
+    parser.add_argument("--mix", default="txt=60,pdf=30,scanned=10")
+    parser.add_argument("--gemini-latency", default="lognormal:0.8,0.3")
+    parser.add_argument("--gemini-error-rate", type=float, default=0.0)
+    parser.add_argument("--ocr-latency", default="uniform:1,3")
+    parser.add_argument("--ocr-error-rate", type=float, default=0.0)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--timeout", type=float, default=120, help="per request, in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--env", action="append", default=[], metavar="KEY=VALUE", help="extra app settings"
+    )
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+        print(f"results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,359 @@
+"""
+Per-request CPU microbenchmarks
+
+Times the CPU-bound steps every request goes through, on synthetic inputs at
+several sizes: text cleaning, PDF text extraction, parsing of the Gemini
+response, content security validation and rate limit bookkeeping.
+
+Usage:
+    python -m benchmarks.micro run [--filter clean_text] [--output results.json]
+    python -m benchmarks.micro run --save-baseline
+    python -m benchmarks.micro compare [--baseline benchmarks/baselines/micro.json]
+        [--threshold 0.15] [--current results.json]
+
+``run`` prints the best time per operation of each case (and throughput for
+size-based cases). ``--save-baseline`` stores the results in
+``benchmarks/baselines/micro.json``, to be committed with the change that
+moved them. ``compare`` runs the suite (or loads ``--current``) and reports
+the ratio to the baseline per case; it exits with status 1 when a case is
+slower than the baseline by more than ``--threshold``.
+
+Baselines are only comparable on the same machine and Python version, which
+are recorded with them; re-save the baseline before measuring a change on
+another machine.
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from pypdf import PdfWriter
+from pypdf.generic import DecodedStreamObject, DictionaryObject, NameObject
+
+from src.services.ai_service import AIService
+from src.services.file_parser import FileParserService
+from src.services.rate_limit_backends import RateLimitStorage
+from src.services.security_service import SecurityService
+
+BASELINE_PATH = Path(__file__).parent / "baselines" / "micro.json"
+
+# Vocabulary without the security scanner's keywords, so validation reads the whole text
+WORDS = (
+    "olá prezado equipe gostaria saber status pedido número obrigado atenciosamente "
+    "reunião amanhã relatório anexo fatura pagamento prazo entrega contrato cliente "
+    "please find attached invoice meeting schedule regards thanks support request "
+    "sistema acesso senha conta cadastro dúvida informação urgente favor retorno"
+).split()
+
+SIZES = {"1KB": 1_000, "100KB": 100_000, "1MB": 990_000}
+
+# PDFs written by parse_pdf cases, removed when the suite finishes
+TEMP_FILES: List[str] = []
+
+
+@dataclass
+class Case:
+    """One benchmarked operation; ``setup`` runs once and returns the callable to time"""
+
+    name: str
+    setup: Callable[[], Callable[[], object]]
+    size_bytes: Optional[int] = None
+
+
+def build_email(size_bytes: int, seed: int = 0) -> str:
+    """Email-like text with line breaks, runs of spaces and a few control characters"""
+    rng = random.Random(seed)
+    parts = []
+    length = 0
+    while length < size_bytes:
+        word = rng.choice(WORDS)
+        roll = rng.random()
+        if roll < 0.05:
+            word += ".\n\n"
+        elif roll < 0.08:
+            word += "   \t"
+        elif roll < 0.09:
+            word += "\x0c"
+        parts.append(word)
+        length += len(word.encode()) + 1
+    return " ".join(parts)
+
+
+def build_pdf(pages: int, words_per_page: int = 300, seed: int = 0) -> bytes:
+    """A PDF with ``pages`` pages of embedded Helvetica text"""
+    rng = random.Random(seed)
+    writer = PdfWriter()
+    font = writer._add_object(
+        DictionaryObject(
+            {
+                NameObject("/Type"): NameObject("/Font"),
+                NameObject("/Subtype"): NameObject("/Type1"),
+                NameObject("/BaseFont"): NameObject("/Helvetica"),
+            }
+        )
+    )
+    ascii_words = [word for word in WORDS if word.isascii()]
+    for _ in range(pages):
+        page = writer.add_blank_page(width=612, height=792)
+        lines = []
+        words = [rng.choice(ascii_words) for _ in range(words_per_page)]
+        for start in range(0, len(words), 12):
+            lines.append(f"({' '.join(words[start : start + 12])}) Tj 0 -14 Td")
+        stream = DecodedStreamObject()
+        stream.set_data(("BT /F1 10 Tf 40 760 Td " + " ".join(lines) + " ET").encode())
+        page[NameObject("/Contents")] = writer._add_object(stream)
+        page[NameObject("/Resources")] = DictionaryObject(
+            {
+                NameObject("/Font"): DictionaryObject({NameObject("/F1"): font}),
+            }
+        )
+    output = io.BytesIO()
+    writer.write(output)
+    return output.getvalue()
+
+
+def gemini_response(reply_words: int, markdown: bool) -> str:
+    body = json.dumps(
+        {
+            "category": "Produtivo",
+            "confidence": 0.93,
+            "suggested_reply": " ".join(WORDS[i % len(WORDS)] for i in range(reply_words)),
+            "reasoning": "Solicita o status de um chamado em aberto.",
+        },
+        ensure_ascii=False,
+    )
+    return f"```json\n{body}\n```" if markdown else body
+
+
+def clean_text_case(size_bytes: int) -> Callable[[], object]:
+    text = build_email(size_bytes)
+    return lambda: FileParserService.clean_text(text)
+
+
+def validate_content_case(size_bytes: int) -> Callable[[], object]:
+    text = FileParserService.clean_text(build_email(size_bytes))
+    return lambda: SecurityService.validate_input_content(text)
+
+
+def parse_pdf_case(pages: int) -> Callable[[], object]:
+    handle, path = tempfile.mkstemp(suffix=".pdf")
+    with os.fdopen(handle, "wb") as file:
+        file.write(build_pdf(pages))
+    TEMP_FILES.append(path)
+    return lambda: FileParserService._extract_pdf_text(path)
+
+
+def parse_response_case(reply_words: int, markdown: bool) -> Callable[[], object]:
+    service = AIService.__new__(AIService)
+    text = gemini_response(reply_words, markdown)
+    return lambda: service._parse_response(text)
+
+
+def rate_limit_case(clients: int) -> Callable[[], object]:
+    """Check + record for the next of ``clients`` IPs, each with some history"""
+    storage = RateLimitStorage()
+    ips = [f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" for i in range(clients)]
+    for ip in ips * 20:
+        storage.add_request(ip)
+    position = 0
+
+    def check_and_record():
+        nonlocal position
+        ip = ips[position]
+        position = (position + 1) % clients
+        storage.get_counts(ip)
+        storage.add_request(ip)
+
+    return check_and_record
+
+
+CASES: List[Case] = [
+    *(
+        Case(f"clean_text[{label}]", lambda size=size: clean_text_case(size), size)
+        for label, size in SIZES.items()
+    ),
+    *(
+        Case(
+            f"validate_input_content[{label}]",
+            lambda size=size: validate_content_case(size),
+            size,
+        )
+        for label, size in SIZES.items()
+    ),
+    *(
+        Case(f"parse_pdf[{pages}p]", lambda pages=pages: parse_pdf_case(pages))
+        for pages in (1, 10, 50)
+    ),
+    Case("parse_response[short]", lambda: parse_response_case(20, markdown=False)),
+    Case("parse_response[markdown]", lambda: parse_response_case(20, markdown=True)),
+    Case("parse_response[long]", lambda: parse_response_case(2000, markdown=True)),
+    *(
+        Case(f"rate_limit[{clients} clients]", lambda clients=clients: rate_limit_case(clients))
+        for clients in (1, 10_000)
+    ),
+]
+
+
+def time_case(operation: Callable[[], object], repeat: int, min_time: float) -> float:
+    """Best seconds per call over ``repeat`` rounds of at least ``min_time`` seconds each"""
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            operation()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time:
+            break
+        number *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+
+    best = elapsed / number
+    for _ in range(repeat - 1):
+        started = time.perf_counter()
+        for _ in range(number):
+            operation()
+        best = min(best, (time.perf_counter() - started) / number)
+    return best
+
+
+def environment() -> dict:
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "platform": platform.platform(terse=True),
+    }
+
+
+def run_suite(name_filter: Optional[str], repeat: int, min_time: float) -> dict:
+    results = {}
+    try:
+        for case in CASES:
+            if name_filter and name_filter not in case.name:
+                continue
+            seconds = time_case(case.setup(), repeat, min_time)
+            results[case.name] = {"seconds": seconds}
+            if case.size_bytes:
+                results[case.name]["mb_per_second"] = case.size_bytes / seconds / 1e6
+            print(f"{case.name:>38}: {format_time(seconds)}" + throughput(results[case.name]))
+    finally:
+        for path in TEMP_FILES:
+            Path(path).unlink(missing_ok=True)
+        TEMP_FILES.clear()
+    return {"environment": environment(), "results": results}
+
+
+def format_time(seconds: float) -> str:
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:9.2f}ms"
+    return f"{seconds * 1e6:9.2f}us"
+
+
+def throughput(result: dict) -> str:
+    if "mb_per_second" not in result:
+        return ""
+    return f"  {result['mb_per_second']:8.1f}MB/s"
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> List[str]:
+    """
+    Print current vs baseline time per case.
+
+    Returns:
+        Names of the cases slower than the baseline by more than ``threshold``
+    """
+    if baseline["environment"] != current["environment"]:
+        print(
+            f"warning: baseline recorded on {baseline['environment']}, "
+            f"current run on {current['environment']}; ratios are not comparable"
+        )
+
+    regressions = []
+    print(f"{'case':>38} {'baseline':>11} {'current':>11}  ratio")
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            print(f"{name:>38} {'-':>11} {format_time(result['seconds'])}  (new)")
+            continue
+        ratio = result["seconds"] / before["seconds"]
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  SLOWER"
+            regressions.append(name)
+        elif ratio < 1 - threshold:
+            flag = "  faster"
+        print(
+            f"{name:>38} {format_time(before['seconds'])} {format_time(result['seconds'])}  "
+            f"{ratio:5.2f}x{flag}"
+        )
+    for name in sorted(baseline["results"].keys() - current["results"].keys()):
+        print(f"{name:>38} (missing from current run)")
+    return regressions
+
+
+def load(path: Path) -> dict:
+    with open(path) as file:
+        return json.load(file)
+
+
+def save(report: dict, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as file:
+        json.dump(report, file, indent=2, sort_keys=True)
+        file.write("\n")
+    print(f"results written to {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name in ("run", "compare"):
+        command = commands.add_parser(name)
+        command.add_argument("--filter", help="only cases whose name contains this text")
+        command.add_argument("--repeat", type=int, default=5)
+        command.add_argument("--min-time", type=float, default=0.2, help="seconds per round")
+    commands.choices["run"].add_argument("--output", type=Path)
+    commands.choices["run"].add_argument(
+        "--save-baseline", action="store_true", help=f"write the results to {BASELINE_PATH}"
+    )
+    compare_parser = commands.choices["compare"]
+    compare_parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    compare_parser.add_argument("--current", type=Path, help="results file instead of a new run")
+    compare_parser.add_argument("--threshold", type=float, default=0.15)
+    args = parser.parse_args()
+
+    if args.command == "run":
+        report = run_suite(args.filter, args.repeat, args.min_time)
+        if args.output:
+            save(report, args.output)
+        if args.save_baseline:
+            save(report, BASELINE_PATH)
+        return
+
+    baseline = load(args.baseline)
+    if args.filter:
+        baseline["results"] = {
+            name: result for name, result in baseline["results"].items() if args.filter in name
+        }
+    current = (
+        load(args.current) if args.current else run_suite(args.filter, args.repeat, args.min_time)
+    )
+    print()
+    regressions = compare(baseline, current, args.threshold)
+    if regressions:
+        print(
+            f"\n{len(regressions)} case(s) slower than baseline by more than {args.threshold:.0%}"
+        )
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
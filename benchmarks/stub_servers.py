@@ -0,0 +1,204 @@
+"""
+Stub Gemini and OCR.space servers
+
+A local HTTP server emulating the two external APIs the application calls,
+so the load test measures the application without spending API quota:
+
+- ``POST /v1beta/models/{model}:generateContent``: Gemini REST API, answering
+  with a fixed classification
+- ``POST /parse/image``: OCR.space, answering with fixed page text
+
+Each API has its own latency distribution and error rate. The server runs
+in a background thread of the calling process.
+
+Usage (standalone):
+    python -m benchmarks.stub_servers --port 9000 --gemini-latency lognormal:0.8,0.3
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import socket
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+CLASSIFICATION = {
+    "category": "Produtivo",
+    "confidence": 0.9,
+    "suggested_reply": "Recebemos sua solicitação e retornaremos em breve.",
+    "reasoning": "Solicitação de status de chamado",
+}
+OCR_TEXT = "Prezados, solicito atualização sobre o chamado 4521 aberto na semana passada."
+
+
+@dataclass
+class LatencyModel:
+    """
+    A latency distribution in seconds, parsed from ``kind:params``:
+
+    - ``const:0.5``
+    - ``uniform:0.2,1.5``
+    - ``lognormal:0.8,0.3`` (median, sigma): long right tail, like real APIs
+    - ``exp:0.5`` (mean)
+    """
+
+    kind: str = "const"
+    params: tuple = (0.0,)
+    rng: random.Random = field(default_factory=lambda: random.Random(0), repr=False)
+
+    @classmethod
+    def parse(cls, spec: str, seed: int = 0) -> "LatencyModel":
+        kind, _, raw = spec.partition(":")
+        params = tuple(float(value) for value in raw.split(",") if value)
+        expected = {"const": 1, "uniform": 2, "lognormal": 2, "exp": 1}
+        if kind not in expected or len(params) != expected[kind]:
+            raise ValueError(f"Invalid latency spec: {spec!r}")
+        return cls(kind, params, random.Random(seed))
+
+    def sample(self) -> float:
+        if self.kind == "const":
+            return self.params[0]
+        if self.kind == "uniform":
+            return self.rng.uniform(*self.params)
+        if self.kind == "lognormal":
+            median, sigma = self.params
+            return self.rng.lognormvariate(math.log(median), sigma)
+        return self.rng.expovariate(1 / self.params[0])
+
+
+@dataclass
+class StubBehavior:
+    """Latency and error rate of one emulated API"""
+
+    latency: LatencyModel = field(default_factory=LatencyModel)
+    error_rate: float = 0.0
+    calls: int = 0
+    errors: int = 0
+
+    async def respond(self, rng: random.Random) -> bool:
+        """Wait for the sampled latency; return whether this call should fail"""
+        self.calls += 1
+        await asyncio.sleep(self.latency.sample())
+        if rng.random() < self.error_rate:
+            self.errors += 1
+            return True
+        return False
+
+
+def create_stub_app(gemini: StubBehavior, ocr: StubBehavior, seed: int = 0) -> FastAPI:
+    """Build the stub application"""
+    app = FastAPI()
+    rng = random.Random(seed)
+
+    @app.post("/v1beta/models/{model_action}")
+    async def generate_content(model_action: str, request: Request):
+        await request.body()
+        if await gemini.respond(rng):
+            return JSONResponse(
+                status_code=503,
+                content={
+                    "error": {"code": 503, "message": "stub overload", "status": "UNAVAILABLE"}
+                },
+            )
+        return {
+            "candidates": [
+                {
+                    "content": {"parts": [{"text": json.dumps(CLASSIFICATION)}], "role": "model"},
+                    "finishReason": 1,
+                    "index": 0,
+                }
+            ]
+        }
+
+    @app.post("/parse/image")
+    async def parse_image(request: Request):
+        await request.body()
+        if await ocr.respond(rng):
+            return JSONResponse(status_code=500, content={"ErrorMessage": ["stub failure"]})
+        return {
+            "ParsedResults": [{"ParsedText": OCR_TEXT, "FileParseExitCode": 1}],
+            "IsErroredOnProcessing": False,
+        }
+
+    @app.get("/stats")
+    async def stats():
+        return {
+            "gemini": {"calls": gemini.calls, "errors": gemini.errors},
+            "ocr": {"calls": ocr.calls, "errors": ocr.errors},
+        }
+
+    return app
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class StubServer:
+    """Runs the stub application with uvicorn in a background thread"""
+
+    def __init__(self, gemini: StubBehavior, ocr: StubBehavior, port: Optional[int] = None):
+        self.gemini = gemini
+        self.ocr = ocr
+        self.port = port or free_port()
+        config = uvicorn.Config(
+            create_stub_app(gemini, ocr),
+            host="127.0.0.1",
+            port=self.port,
+            log_level="warning",
+            # O stub não deve ser o gargalo do teste
+            backlog=4096,
+            limit_concurrency=None,
+        )
+        self.server = uvicorn.Server(config)
+        self.thread = threading.Thread(target=self.server.run, name="stub-server", daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self) -> "StubServer":
+        self.thread.start()
+        deadline = time.monotonic() + 10
+        while not self.server.started:
+            if time.monotonic() > deadline:
+                raise RuntimeError("Stub server did not start")
+            time.sleep(0.01)
+        return self
+
+    def stop(self) -> None:
+        self.server.should_exit = True
+        self.thread.join(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--gemini-latency", default="lognormal:0.8,0.3")
+    parser.add_argument("--gemini-error-rate", type=float, default=0.0)
+    parser.add_argument("--ocr-latency", default="uniform:1,3")
+    parser.add_argument("--ocr-error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    gemini = StubBehavior(LatencyModel.parse(args.gemini_latency, seed=1), args.gemini_error_rate)
+    ocr = StubBehavior(LatencyModel.parse(args.ocr_latency, seed=2), args.ocr_error_rate)
+    server = StubServer(gemini, ocr, port=args.port).start()
+    print(f"Stub Gemini/OCR.space listening on {server.url} (Ctrl+C to stop)")
+    try:
+        server.thread.join()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
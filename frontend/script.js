@@ -10,10 +10,15 @@ const API_BASE_URL = window.location.hostname === 'localhost'
     : '/api';
 const MAX_FILE_SIZE_MB = 5;
 const MAX_TEXT_LENGTH = 1000000;
+// PDF.js (build UMD) carregado só quando um PDF é analisado; o parsing roda no worker.
+// Servido pela própria aplicação: as URLs (com hash do conteúdo) vêm do index.html
+const PDFJS_URL = document.querySelector('meta[name="pdfjs-url"]').content;
+const PDFJS_WORKER_URL = document.querySelector('meta[name="pdfjs-worker-url"]').content;
 
 // State management
 let currentFile = null;
 let lastResult = null;
+let pdfjsPromise = null;
 
 // DOM Elements
 const dropZone = document.getElementById('dropZone');
@@ -28,6 +33,7 @@ const successResult = document.getElementById('successResult');
 const errorResult = document.getElementById('errorResult');
 const rateLimitInfo = document.getElementById('rateLimitInfo');
 const rateLimitText = document.getElementById('rateLimitText');
+const browserExtract = document.getElementById('browserExtract');
 
 // Tab switching
 document.querySelectorAll('.tab-btn').forEach(btn => {
@@ -120,7 +126,7 @@ async function analyzeEmail() {
     const isUploadTab = activeTab.id === 'upload-tab';
 
     let content = null;
-    let filename = null;
+    let isFile = isUploadTab;
 
     if (isUploadTab) {
         if (!currentFile) {
@@ -128,7 +134,6 @@ async function analyzeEmail() {
             return;
         }
         content = currentFile;
-        filename = currentFile.name;
     } else {
         const text = emailText.value.trim();
         if (!text) {
@@ -146,7 +151,16 @@ async function analyzeEmail() {
     setLoadingState(true);
 
     try {
-        const response = await submitAnalysis(content, isUploadTab);
+        // Texto extraído no navegador vai como JSON; o upload fica para PDFs escaneados
+        if (isFile && browserExtract.checked) {
+            const text = await extractTextInBrowser(currentFile);
+            if (text !== null) {
+                content = text;
+                isFile = false;
+            }
+        }
+
+        const response = await submitAnalysis(content, isFile);
 
         // Display results
         displayResults(response.data);
@@ -163,22 +177,98 @@ async function analyzeEmail() {
     }
 }
 
+/**
+ * Load PDF.js on first use
+ */
+function loadPdfJs() {
+    if (!pdfjsPromise) {
+        pdfjsPromise = new Promise((resolve, reject) => {
+            const script = document.createElement('script');
+            script.src = PDFJS_URL;
+            script.onload = () => {
+                window.pdfjsLib.GlobalWorkerOptions.workerSrc = PDFJS_WORKER_URL;
+                resolve(window.pdfjsLib);
+            };
+            script.onerror = () => {
+                // Permite tentar de novo na próxima análise
+                pdfjsPromise = null;
+                reject(new Error('Falha ao carregar PDF.js'));
+            };
+            document.head.appendChild(script);
+        });
+    }
+    return pdfjsPromise;
+}
+
+/**
+ * Extract the text layer of every page of a PDF
+ */
+async function extractPdfText(file) {
+    const pdfjsLib = await loadPdfJs();
+    const pdf = await pdfjsLib.getDocument({ data: await file.arrayBuffer() }).promise;
+
+    try {
+        const pages = [];
+        for (let number = 1; number <= pdf.numPages; number++) {
+            const page = await pdf.getPage(number);
+            const textContent = await page.getTextContent();
+            pages.push(textContent.items.map(item => item.str + (item.hasEOL ? '\n' : '')).join(''));
+        }
+        return pages.join('\n');
+    } finally {
+        pdf.destroy();
+    }
+}
+
+/**
+ * Read a TXT file as UTF-8, falling back to Latin-1 (same as the server)
+ */
+async function readTextFile(file) {
+    const buffer = await file.arrayBuffer();
+    try {
+        return new TextDecoder('utf-8', { fatal: true }).decode(buffer);
+    } catch {
+        return new TextDecoder('iso-8859-1').decode(buffer);
+    }
+}
+
+/**
+ * Extract the text of a file in the browser.
+ * Returns null when the file should be uploaded instead.
+ */
+async function extractTextInBrowser(file) {
+    try {
+        const text = file.type === 'application/pdf'
+            ? await extractPdfText(file)
+            : await readTextFile(file);
+        const trimmed = text.trim();
+
+        // Sem camada de texto (PDF escaneado) ou texto acima do limite: o servidor decide
+        if (!trimmed || trimmed.length > MAX_TEXT_LENGTH) {
+            return null;
+        }
+        return trimmed;
+    } catch (error) {
+        console.warn('Extração no navegador falhou, enviando o arquivo:', error);
+        return null;
+    }
+}
+
 /**
  * Submit analysis to backend
  */
 async function submitAnalysis(content, isFile) {
-    const formData = new FormData();
+    try {
+        if (!isFile) {
+            // Texto vai como JSON: sem multipart nem arquivo temporário no servidor
+            return await axios.post(`${API_BASE_URL}/analyze/text`, { content }, {
+                timeout: 30000, // 30 seconds
+            });
+        }
 
-    if (isFile) {
+        const formData = new FormData();
         formData.append('file', content);
-    } else {
-        // For text input, we need to create a temporary text file
-        const blob = new Blob([content], { type: 'text/plain' });
-        const file = new File([blob], 'email.txt', { type: 'text/plain' });
-        formData.append('file', file);
-    }
 
-    try {
         const response = await axios.post(`${API_BASE_URL}/analyze`, formData, {
             headers: {
                 'Content-Type': 'multipart/form-data',
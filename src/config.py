@@ -3,6 +3,7 @@ Configuration Management - Simple and Straightforward
 """
 
 from os import getenv
+from pathlib import Path
 
 from dotenv import load_dotenv
 
@@ -14,13 +15,145 @@ APP_NAME = "Autou Email Classifier"
 APP_VERSION = "0.1.0"
 ENVIRONMENT = getenv("ENVIRONMENT", "development")
 DEBUG = getenv("DEBUG", "true").lower() == "true"
+# Logs: nível, formato ("json" ou "text") e fração de requisições com logs
+# DEBUG/INFO mantidos (avisos e erros sempre são mantidos)
+LOG_LEVEL = getenv("LOG_LEVEL", "INFO")
+LOG_FORMAT = getenv("LOG_FORMAT", "text").strip().lower()
+LOG_SAMPLE_RATE = float(getenv("LOG_SAMPLE_RATE", "1.0"))
+# Conteúdo dos emails nunca vai para os logs, a menos que habilitado (apenas para depuração)
+LOG_EMAIL_CONTENT = getenv("LOG_EMAIL_CONTENT", "false").lower() == "true"
+# Diretório para estado persistente (quotas, filas, histórico)
+DATA_DIR = getenv("DATA_DIR", "data")
 
 # AI Model Configuration
 GEMINI_API_KEY = getenv("GEMINI_API_KEY")
 GEMINI_MODEL = getenv("GEMINI_MODEL", "gemini-2.5-flash")
+# Endpoint alternativo da API Gemini (via REST), ex.: o stub do teste de carga
+GEMINI_API_ENDPOINT = getenv("GEMINI_API_ENDPOINT")
+# Chamadas simultâneas ao Gemini, e quantas delas o tráfego em lote pode usar
+AI_MAX_CONCURRENCY = int(getenv("AI_MAX_CONCURRENCY", "8"))
+AI_BULK_MAX_CONCURRENCY = int(getenv("AI_BULK_MAX_CONCURRENCY", "4"))
+# Chaves de API (header X-API-Key) cujo tráfego é tratado como lote (baixa prioridade)
+BULK_API_KEYS = {key.strip() for key in getenv("BULK_API_KEYS", "").split(",") if key.strip()}
 
 # OCR Configuration (opcional - apenas para PDFs escaneados)
 OCR_SPACE_API_KEY = getenv("OCR_SPACE_API_KEY")
+OCR_SPACE_URL = getenv("OCR_SPACE_URL", "https://api.ocr.space/parse/image")
+# Máximo de requisições OCR simultâneas ao dividir PDFs grandes em partes
+OCR_MAX_CONCURRENCY = int(getenv("OCR_MAX_CONCURRENCY", "4"))
+# Backends de OCR em ordem de preferência/fallback: "ocrspace", "tesseract"
+OCR_BACKENDS = [
+    name.strip().lower() for name in getenv("OCR_BACKENDS", "ocrspace").split(",") if name.strip()
+]
+# Total de requisições OCR simultâneas no processo, e quantas delas o tráfego em lote pode usar
+OCR_GLOBAL_MAX_CONCURRENCY = int(getenv("OCR_GLOBAL_MAX_CONCURRENCY", "8"))
+OCR_BULK_MAX_CONCURRENCY = int(getenv("OCR_BULK_MAX_CONCURRENCY", "4"))
+# Tesseract local (requer requirements-ocr.txt e o binário tesseract)
+OCR_TESSERACT_LANG = getenv("OCR_TESSERACT_LANG", "por")
+OCR_TESSERACT_DPI = int(getenv("OCR_TESSERACT_DPI", "300"))
+OCR_TESSERACT_WORKERS = int(getenv("OCR_TESSERACT_WORKERS", "0"))  # 0 = número de CPUs
+# Pré-processamento de PDFs escaneados antes do OCR (requer requirements-ocr.txt)
+OCR_PREPROCESS = getenv("OCR_PREPROCESS", "false").lower() == "true"
+OCR_PREPROCESS_DPI = int(getenv("OCR_PREPROCESS_DPI", "200"))
+OCR_PREPROCESS_MODE = getenv("OCR_PREPROCESS_MODE", "gray")  # gray | bilevel
+OCR_PREPROCESS_JPEG_QUALITY = int(getenv("OCR_PREPROCESS_JPEG_QUALITY", "75"))
+# Quota do OCR.space (plano gratuito: 500 requisições/dia)
+OCR_QUOTA_PER_MINUTE = int(getenv("OCR_QUOTA_PER_MINUTE", "10"))
+OCR_QUOTA_PER_DAY = int(getenv("OCR_QUOTA_PER_DAY", "500"))
+OCR_QUOTA_BULK_RESERVE = int(getenv("OCR_QUOTA_BULK_RESERVE", "50"))  # reservado p/ interativo
+OCR_QUOTA_MAX_WAIT_SECONDS = float(getenv("OCR_QUOTA_MAX_WAIT_SECONDS", "30"))
+OCR_QUOTA_STATE_FILE = getenv("OCR_QUOTA_STATE_FILE", str(Path(DATA_DIR) / "ocr_quota.db"))
+
+# Rate limiting: "memory" (por processo), "sqlite" (compartilhado entre workers
+# do mesmo host) ou "redis" (compartilhado entre hosts, requer o pacote redis)
+RATE_LIMIT_BACKEND = getenv("RATE_LIMIT_BACKEND", "memory").strip().lower()
+RATE_LIMIT_STATE_FILE = getenv("RATE_LIMIT_STATE_FILE", str(Path(DATA_DIR) / "rate_limit.db"))
+RATE_LIMIT_REDIS_URL = getenv("RATE_LIMIT_REDIS_URL", "redis://localhost:6379/0")
+# Limites por IP (cada arquivo/email de um lote conta como uma requisição)
+RATE_LIMIT_PER_5_MIN = int(getenv("RATE_LIMIT_PER_5_MIN", "10"))
+RATE_LIMIT_PER_24_HOURS = int(getenv("RATE_LIMIT_PER_24_HOURS", "100"))
+
+# Lotes (/api/analyze/batch): arquivos processados em paralelo
+BATCH_MAX_CONCURRENCY = int(getenv("BATCH_MAX_CONCURRENCY", "4"))
+BATCH_MAX_FILES = int(getenv("BATCH_MAX_FILES", "50"))
+BATCH_MAX_SIZE_MB = int(getenv("BATCH_MAX_SIZE_MB", "50"))
+
+# Jobs assíncronos (/api/jobs): persistidos em SQLite e processados em background
+JOBS_DB_FILE = getenv("JOBS_DB_FILE", str(Path(DATA_DIR) / "jobs.db"))
+JOB_WORKERS = int(getenv("JOB_WORKERS", "2"))
+JOB_MAX_ATTEMPTS = int(getenv("JOB_MAX_ATTEMPTS", "3"))
+# Job "running" sem heartbeat por JOB_LEASE_SECONDS é retomado por outro worker
+JOB_LEASE_SECONDS = float(getenv("JOB_LEASE_SECONDS", "300"))
+JOB_RETRY_DELAY_SECONDS = float(getenv("JOB_RETRY_DELAY_SECONDS", "30"))
+JOB_WEBHOOK_TIMEOUT_SECONDS = float(getenv("JOB_WEBHOOK_TIMEOUT_SECONDS", "10"))
+# Jobs concluídos ou com falha (com o arquivo enviado) são apagados após JOB_RETENTION_SECONDS
+JOB_RETENTION_SECONDS = float(getenv("JOB_RETENTION_SECONDS", "604800"))
+# Hosts aceitos em webhook_url (vazio = qualquer host com endereço público)
+WEBHOOK_ALLOWED_HOSTS = {
+    host.strip().lower() for host in getenv("WEBHOOK_ALLOWED_HOSTS", "").split(",") if host.strip()
+}
+
+# Histórico de classificações (/api/history): SQLite gravado em lotes por uma task em background
+HISTORY_ENABLED = getenv("HISTORY_ENABLED", "true").lower() == "true"
+HISTORY_DB_FILE = getenv("HISTORY_DB_FILE", str(Path(DATA_DIR) / "history.db"))
+HISTORY_BATCH_SIZE = int(getenv("HISTORY_BATCH_SIZE", "200"))
+HISTORY_FLUSH_INTERVAL_SECONDS = float(getenv("HISTORY_FLUSH_INTERVAL_SECONDS", "1"))
+# Registros aguardando gravação; acima disso os novos são descartados (e contados)
+HISTORY_MAX_PENDING = int(getenv("HISTORY_MAX_PENDING", "10000"))
+# Token exigido para consultar e exportar o histórico (Authorization: Bearer <token>);
+# vazio desativa as rotas /api/history
+HISTORY_API_TOKEN = getenv("HISTORY_API_TOKEN", "")
+
+# Admissão: requisições de análise simultâneas por processo e fila curta de espera;
+# com a fila cheia (ou após esperar ADMISSION_QUEUE_TIMEOUT_SECONDS) responde 503
+ADMISSION_MAX_IN_FLIGHT = int(getenv("ADMISSION_MAX_IN_FLIGHT", "32"))
+ADMISSION_MAX_QUEUE = int(getenv("ADMISSION_MAX_QUEUE", "16"))
+ADMISSION_QUEUE_TIMEOUT_SECONDS = float(getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", "5"))
+ADMISSION_RETRY_AFTER_SECONDS = float(getenv("ADMISSION_RETRY_AFTER_SECONDS", "5"))
+# Circuit breaker do Gemini e do OCR.space: abre após N falhas seguidas e
+# testa o serviço de novo após CIRCUIT_RESET_SECONDS
+CIRCUIT_FAILURE_THRESHOLD = int(getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_RESET_SECONDS = float(getenv("CIRCUIT_RESET_SECONDS", "30"))
+
+# Tracing por requisição: "none", "jsonl" (arquivo local) ou "otlp" (coletor OTLP/HTTP)
+TRACING_EXPORTER = getenv("TRACING_EXPORTER", "none").strip().lower()
+TRACING_SAMPLE_RATE = float(getenv("TRACING_SAMPLE_RATE", "0.05"))
+TRACING_JSONL_FILE = getenv("TRACING_JSONL_FILE", str(Path(DATA_DIR) / "traces.jsonl"))
+TRACING_OTLP_ENDPOINT = getenv("TRACING_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+TRACING_SERVICE_NAME = getenv("TRACING_SERVICE_NAME", "autou-email-classifier")
+
+# Shared HTTP client (pool de conexões reutilizado pelas chamadas externas)
+HTTP_ENABLE_HTTP2 = getenv("HTTP_ENABLE_HTTP2", "false").lower() == "true"
+HTTP_MAX_CONNECTIONS = int(getenv("HTTP_MAX_CONNECTIONS", "20"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "10"))
+HTTP_KEEPALIVE_EXPIRY = float(getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP_CONNECT_TIMEOUT = float(getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(getenv("HTTP_READ_TIMEOUT", "60"))
+HTTP_WRITE_TIMEOUT = float(getenv("HTTP_WRITE_TIMEOUT", "30"))
+HTTP_POOL_TIMEOUT = float(getenv("HTTP_POOL_TIMEOUT", "10"))
+
+# Compressão das respostas da API (gzip/brotli negociado por Accept-Encoding)
+RESPONSE_COMPRESSION_MIN_BYTES = int(getenv("RESPONSE_COMPRESSION_MIN_BYTES", "1024"))
+RESPONSE_GZIP_LEVEL = int(getenv("RESPONSE_GZIP_LEVEL", "6"))
+RESPONSE_BROTLI_QUALITY = int(getenv("RESPONSE_BROTLI_QUALITY", "4"))
+
+# Servidor de produção (gunicorn -c python:src.gunicorn_conf src.main:app)
+PORT = int(getenv("PORT", "8000"))
+# Processos workers (padrão: um por núcleo de CPU)
+WEB_CONCURRENCY = int(getenv("WEB_CONCURRENCY", "0")) or None
+# Reciclar cada worker após N requisições (0 = nunca), com variação aleatória
+# para que os workers não reiniciem todos juntos
+WORKER_MAX_REQUESTS = int(getenv("WORKER_MAX_REQUESTS", "0"))
+WORKER_MAX_REQUESTS_JITTER = int(getenv("WORKER_MAX_REQUESTS_JITTER", "100"))
+# Worker sem responder ao master por N segundos é reiniciado
+WORKER_TIMEOUT_SECONDS = int(getenv("WORKER_TIMEOUT_SECONDS", "120"))
+WORKER_KEEPALIVE_SECONDS = int(getenv("WORKER_KEEPALIVE_SECONDS", "5"))
+# No desligamento, tempo para terminar as requisições em andamento (chamadas
+# ao Gemini/OCR) e, depois, os jobs em execução
+SHUTDOWN_TIMEOUT_SECONDS = int(getenv("SHUTDOWN_TIMEOUT_SECONDS", "30"))
+# Event loop ("auto", "uvloop", "asyncio") e parser HTTP ("auto", "httptools", "h11")
+UVICORN_LOOP = getenv("UVICORN_LOOP", "auto").strip().lower()
+UVICORN_HTTP = getenv("UVICORN_HTTP", "auto").strip().lower()
 
 # Validar configuração crítica apenas em produção
 if ENVIRONMENT == "production":
@@ -0,0 +1,69 @@
+"""
+Gunicorn configuration for production
+
+Runs the app in ``WEB_CONCURRENCY`` uvicorn worker processes (one per CPU
+core by default)::
+
+    gunicorn -c python:src.gunicorn_conf src.main:app
+
+The app and the heavy modules it imports lazily (Gemini SDK, pypdf, httpx;
+see ``src.services.warmup``) are imported once in the master before forking
+(``preload_app``, ``on_starting``), so they are shared copy-on-write and
+recycled workers start without re-importing them. Network clients are not
+created before the fork: each worker opens its own in the app lifespan.
+
+On SIGTERM each worker stops accepting connections, waits up to
+``SHUTDOWN_TIMEOUT_SECONDS`` for in-flight requests (and their Gemini/OCR
+calls), then up to the same time for running jobs.
+"""
+
+import logging
+import os
+
+from src.config import (
+    PORT,
+    RATE_LIMIT_BACKEND,
+    SHUTDOWN_TIMEOUT_SECONDS,
+    WEB_CONCURRENCY,
+    WORKER_KEEPALIVE_SECONDS,
+    WORKER_MAX_REQUESTS,
+    WORKER_MAX_REQUESTS_JITTER,
+    WORKER_TIMEOUT_SECONDS,
+)
+from src.services.warmup import import_heavy_modules
+
+
+def default_workers() -> int:
+    """One worker per CPU core available to this process"""
+    if hasattr(os, "sched_getaffinity"):
+        return max(1, len(os.sched_getaffinity(0)))
+    return max(1, os.cpu_count() or 1)
+
+
+bind = f"0.0.0.0:{PORT}"
+workers = WEB_CONCURRENCY or default_workers()
+worker_class = "src.uvicorn_worker.AppUvicornWorker"
+preload_app = True
+
+max_requests = WORKER_MAX_REQUESTS
+max_requests_jitter = WORKER_MAX_REQUESTS_JITTER if WORKER_MAX_REQUESTS else 0
+timeout = WORKER_TIMEOUT_SECONDS
+keepalive = WORKER_KEEPALIVE_SECONDS
+# Drenagem das requisições + drenagem dos jobs, com folga antes do SIGKILL
+graceful_timeout = 2 * SHUTDOWN_TIMEOUT_SECONDS + 5
+
+accesslog = None
+errorlog = "-"
+
+
+def on_starting(server) -> None:
+    import_heavy_modules()
+
+
+def when_ready(server) -> None:
+    if workers > 1 and RATE_LIMIT_BACKEND == "memory":
+        logging.getLogger("gunicorn.error").warning(
+            "RATE_LIMIT_BACKEND=memory with %d workers: each worker keeps its own "
+            "rate limit counters; use RATE_LIMIT_BACKEND=sqlite to share them",
+            workers,
+        )
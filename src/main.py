@@ -1,19 +1,141 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from pathlib import Path
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import ORJSONResponse, PlainTextResponse
 
+from src.config import (
+    BULK_API_KEYS,
+    RESPONSE_BROTLI_QUALITY,
+    RESPONSE_COMPRESSION_MIN_BYTES,
+    RESPONSE_GZIP_LEVEL,
+    SHUTDOWN_TIMEOUT_SECONDS,
+)
+from src.middleware.admission import AdmissionMiddleware
+from src.middleware.compression import ResponseCompressionMiddleware
+from src.middleware.gzip_request import GzipRequestMiddleware
+from src.middleware.metrics import MetricsMiddleware
+from src.middleware.priority import PriorityMiddleware
+from src.middleware.request_guard import MULTIPART_OVERHEAD_BYTES, RequestGuardMiddleware
+from src.middleware.request_id import RequestIdMiddleware
+from src.middleware.tracing import TracingMiddleware
 from src.routes.classifier import router as classifier_router
+from src.routes.history import router as history_router
+from src.routes.jobs import router as jobs_router
+from src.services import metrics
+from src.services.admission import get_admission_controller
+from src.services.ai_service import shutdown_ai_executor
+from src.services.circuit_breaker import OPEN, circuit_snapshots
+from src.services.history_store import get_history_store, get_history_writer
+from src.services.http_client import close_http_client
+from src.services.job_store import get_job_store
+from src.services.job_worker import get_job_workers
+from src.services.lanes import get_lane_limiter
+from src.services.ocr_service import OCRService
+from src.services.security_service import SecurityService, rate_limiter
+from src.services.static_assets import StaticAssets
+from src.services.structured_logging import configure_logging, shutdown_logging
+from src.services.tracing import shutdown_tracing
+from src.services.warmup import warm_up
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start shared clients and background tasks; stop them cleanly on shutdown"""
+    configure_logging()
+    # Dependências pesadas e clientes compartilhados carregados em background:
+    # o worker já atende /health enquanto isso
+    warmup_task = asyncio.create_task(warm_up())
+    eviction_task = asyncio.create_task(rate_limiter.run_eviction())
+    get_job_workers().start()
+    get_history_writer().start()
+    yield
+    warmup_task.cancel()
+    with suppress(asyncio.CancelledError):
+        await warmup_task
+    # Requisições já drenadas pelo servidor; jobs em execução têm o mesmo prazo
+    await get_job_workers().stop(drain_timeout=SHUTDOWN_TIMEOUT_SECONDS)
+    eviction_task.cancel()
+    with suppress(asyncio.CancelledError):
+        await eviction_task
+    # Depois dos jobs, que também registram no histórico
+    await get_history_writer().stop()
+    rate_limiter.close()
+    get_job_store().close()
+    get_history_store().close()
+    await OCRService.aclose()
+    shutdown_ai_executor()
+    await close_http_client()
+    shutdown_tracing()
+    shutdown_logging()
+
 
 app = FastAPI(
     title="Autou Email Classifier",
     description="API para classificação de emails usando IA",
     version="0.1.0",
+    lifespan=lifespan,
+    # Serialização com orjson (bem mais rápida que json.dumps para os resultados)
+    default_response_class=ORJSONResponse,
+)
+
+# Lane de prioridade (interativo ou lote) usada ao disputar Gemini e OCR
+app.add_middleware(
+    PriorityMiddleware,
+    bulk_paths=("/api/analyze/batch",),
+    bulk_api_keys=BULK_API_KEYS,
+)
+
+# Tamanho máximo do corpo por rota (um arquivo, ou o lote inteiro), aplicado ao
+# corpo recebido e, em requisições gzip, também ao corpo descomprimido
+MAX_BODY_BYTES = SecurityService.MAX_FILE_SIZE_MB * 1024 * 1024 + MULTIPART_OVERHEAD_BYTES
+BODY_LIMITS = {"/api/analyze/batch": SecurityService.MAX_BATCH_SIZE_MB * 1024 * 1024}
+
+# Corpos enviados com Content-Encoding: gzip são descomprimidos (com limite de tamanho)
+app.add_middleware(
+    GzipRequestMiddleware,
+    max_decompressed_bytes=MAX_BODY_BYTES,
+    body_limits=BODY_LIMITS,
+)
+
+# Limite global de análises em andamento: excedentes esperam numa fila curta ou recebem 503
+app.add_middleware(AdmissionMiddleware, path_prefix="/api/analyze")
+
+# Rate limit, tamanho e Content-Type validados antes de ler o corpo da requisição
+app.add_middleware(
+    RequestGuardMiddleware,
+    path_prefix="/api/",
+    content_types={
+        "/api/analyze": ("multipart/form-data",),
+        "/api/analyze/text": ("application/json",),
+        "/api/analyze/batch": ("multipart/form-data",),
+        "/api/jobs": ("multipart/form-data",),
+    },
+    max_body_bytes=MAX_BODY_BYTES,
+    body_limits=BODY_LIMITS,
+)
+
+# Trace por requisição da API (amostrado; spans exportados por TRACING_EXPORTER)
+app.add_middleware(TracingMiddleware, path_prefix="/api/")
+
+# Latência, requisições em andamento e tempo de upload (expostos em /metrics)
+app.add_middleware(MetricsMiddleware)
+
+# Id de correlação (X-Request-ID) presente em todos os logs da requisição
+app.add_middleware(RequestIdMiddleware)
+
+# Respostas JSON/NDJSON comprimidas (gzip ou brotli); o stream é descarregado a cada linha
+app.add_middleware(
+    ResponseCompressionMiddleware,
+    minimum_size=RESPONSE_COMPRESSION_MIN_BYTES,
+    gzip_level=RESPONSE_GZIP_LEVEL,
+    brotli_quality=RESPONSE_BROTLI_QUALITY,
+    path_prefix="/api/",
 )
 
-# CORS middleware
+# CORS middleware (adicionado por último para envolver as respostas de erro acima)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -23,20 +145,21 @@ app.add_middleware(
 )
 
 app.include_router(classifier_router)
+app.include_router(jobs_router)
+app.include_router(history_router)
 
-# Mount static files (frontend)
-frontend_dir = Path(__file__).parent.parent / "frontend"
-if frontend_dir.exists():
-    app.mount("/static", StaticFiles(directory=str(frontend_dir)), name="static")
+# Frontend lido, com hash no nome e comprimido uma vez no startup; servido da memória
+frontend_assets = StaticAssets.from_directory(Path(__file__).parent.parent / "frontend")
+app.mount("/static", frontend_assets, name="static")
 
 
 @app.get("/")
-async def serve_frontend():
+async def serve_frontend(request: Request):
     """Serve frontend index.html"""
-    frontend_path = Path(__file__).parent.parent / "frontend" / "index.html"
-    if frontend_path.exists():
-        return FileResponse(str(frontend_path), media_type="text/html")
-    return JSONResponse(
+    response = frontend_assets.index_response(request.headers, request.method)
+    if response is not None:
+        return response
+    return ORJSONResponse(
         status_code=404,
         content={"error": "Frontend not found"},
     )
@@ -45,7 +168,53 @@ async def serve_frontend():
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=200,
         content={"status": "healthy", "version": "0.1.0"},
     )
+
+
+@app.get("/ready")
+async def readiness_check():
+    """
+    Readiness endpoint for load balancers.
+
+    Returns 503 while the instance is saturated (new analysis requests would
+    be shed). Downstream circuits are reported but do not fail readiness: an
+    outage of Gemini or OCR.space affects every instance alike.
+    """
+    admission = get_admission_controller()
+    circuits = circuit_snapshots()
+    if admission.saturated:
+        status = "saturated"
+    elif any(circuit["state"] == OPEN for circuit in circuits.values()):
+        status = "degraded"
+    else:
+        status = "ready"
+    return ORJSONResponse(
+        status_code=503 if admission.saturated else 200,
+        content={
+            "status": status,
+            "admission": admission.snapshot(),
+            "lanes": {name: get_lane_limiter(name).snapshot() for name in ("ai", "ocr")},
+            "circuits": circuits,
+        },
+    )
+
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus metrics, with admission, lane, circuit and history gauges read at scrape time"""
+    admission = get_admission_controller()
+    metrics.HISTORY_PENDING.set(get_history_writer().pending)
+    metrics.ADMISSION_IN_FLIGHT.set(admission.in_flight)
+    metrics.ADMISSION_QUEUED.set(admission.queued)
+    for service in ("ai", "ocr"):
+        for lane, usage in get_lane_limiter(service).snapshot().items():
+            metrics.LANE_IN_USE.set(usage["in_use"], service=service, lane=lane)
+            metrics.LANE_WAITING.set(usage["waiting"], service=service, lane=lane)
+    for service, circuit in circuit_snapshots().items():
+        metrics.CIRCUIT_OPEN.set(int(circuit["state"] == OPEN), service=service)
+    return PlainTextResponse(
+        metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -0,0 +1,53 @@
+"""
+Admission middleware
+
+Pure ASGI middleware that runs analysis requests under the server-wide
+``AdmissionController``: each request holds an in-flight slot until its
+response is sent, and requests that cannot get one in time are answered
+with 503 + Retry-After before their body is read.
+"""
+
+import math
+from typing import Optional
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from src.services.admission import AdmissionController, OverloadedError, get_admission_controller
+from src.services.metrics import ADMISSION_SHED
+
+
+class AdmissionMiddleware:
+    """Sheds analysis requests when the server is saturated"""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        path_prefix: str = "/api/analyze",
+        controller: Optional[AdmissionController] = None,
+    ):
+        self.app = app
+        self.path_prefix = path_prefix
+        self.controller = controller or get_admission_controller()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefix):
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await self.controller.acquire()
+        except OverloadedError as e:
+            ADMISSION_SHED.inc()
+            response = JSONResponse(
+                status_code=503,
+                content={"detail": str(e)},
+                headers={"Retry-After": str(math.ceil(e.retry_after))},
+            )
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release()
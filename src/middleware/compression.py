@@ -0,0 +1,160 @@
+"""
+Response compression middleware
+
+Pure ASGI middleware that compresses API responses with brotli (when the
+optional ``brotli`` package is installed) or gzip, negotiated from
+``Accept-Encoding``:
+
+- complete responses (JSON) are compressed when they have at least
+  ``minimum_size`` bytes
+- streamed responses (the NDJSON of ``/api/analyze/batch``) are compressed
+  chunk by chunk and flushed after each one, so every line still reaches the
+  client as soon as it is ready (Starlette's ``GZipMiddleware`` buffers them)
+
+Only JSON, NDJSON and text responses are compressed. Responses that already
+have a ``Content-Encoding`` pass through unchanged.
+"""
+
+import zlib
+from typing import Optional, Union
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.services.static_assets import brotli_available, choose_encoding
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+
+class _GzipEncoder:
+    def __init__(self, level: int):
+        # wbits=31: formato gzip (cabeçalho + CRC)
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def process(self, data: bytes, flush: bool) -> bytes:
+        compressed = self._compressor.compress(data)
+        return compressed + self._compressor.flush(zlib.Z_SYNC_FLUSH) if flush else compressed
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _BrotliEncoder:
+    def __init__(self, quality: int):
+        import brotli
+
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def process(self, data: bytes, flush: bool) -> bytes:
+        compressed = self._compressor.process(data)
+        return compressed + self._compressor.flush() if flush else compressed
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class _CompressingSender:
+    """``send`` wrapper for one response: decides on the first body chunk and encodes"""
+
+    def __init__(self, send: Send, encoding: str, middleware: "ResponseCompressionMiddleware"):
+        self.send = send
+        self.encoding = encoding
+        self.middleware = middleware
+        self.start_message: Optional[Message] = None
+        self.encoder = None
+
+    async def __call__(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            # Headers só são enviados quando o primeiro pedaço do corpo mostra
+            # se a resposta é completa ou um stream
+            self.start_message = message
+            return
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.start_message is not None:
+            start, self.start_message = self.start_message, None
+            if self.middleware.should_compress(start, body, more_body):
+                self.encoder = self.middleware.encoder(self.encoding)
+                message = self._encode(body, more_body)
+                headers = MutableHeaders(raw=start["headers"])
+                headers["Content-Encoding"] = self.encoding
+                headers.add_vary_header("Accept-Encoding")
+                if more_body:
+                    del headers["Content-Length"]
+                else:
+                    headers["Content-Length"] = str(len(message["body"]))
+            await self.send(start)
+            await self.send(message)
+            return
+
+        await self.send(message if self.encoder is None else self._encode(body, more_body))
+
+    def _encode(self, body: bytes, more_body: bool) -> Message:
+        if more_body:
+            data = self.encoder.process(body, flush=True)
+        else:
+            data = self.encoder.process(body, flush=False) + self.encoder.finish()
+        return {"type": "http.response.body", "body": data, "more_body": more_body}
+
+
+class ResponseCompressionMiddleware:
+    """Compresses JSON and NDJSON responses with the best encoding the client accepts"""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        path_prefix: str = "/api/",
+    ):
+        """
+        Args:
+            app: The wrapped ASGI application
+            minimum_size: Smallest complete response that is compressed
+            gzip_level: zlib compression level (1-9)
+            brotli_quality: brotli quality (0-11)
+            path_prefix: Only responses under this prefix are compressed
+        """
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.path_prefix = path_prefix
+        self.encodings = ["gzip", "br"] if brotli_available() else ["gzip"]
+
+    def encoder(self, encoding: str) -> Union[_GzipEncoder, _BrotliEncoder]:
+        if encoding == "br":
+            return _BrotliEncoder(self.brotli_quality)
+        return _GzipEncoder(self.gzip_level)
+
+    def should_compress(self, start: Message, body: bytes, more_body: bool) -> bool:
+        """Whether a response is worth compressing, given its first body chunk"""
+        headers = Headers(raw=start["headers"])
+        content_type = headers.get("content-type", "")
+        return (
+            "content-encoding" not in headers
+            and start["status"] not in (204, 304)
+            and content_type.startswith(COMPRESSIBLE_TYPES)
+            and (more_body or len(body) >= self.minimum_size)
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] == "HEAD"
+            or not scope["path"].startswith(self.path_prefix)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = Headers(scope=scope).get("accept-encoding", "")
+        encoding = choose_encoding(accept_encoding, self.encodings)
+        if encoding == "identity":
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, _CompressingSender(send, encoding, self))
@@ -0,0 +1,116 @@
+"""
+Gzip request middleware
+
+Pure ASGI middleware that transparently decompresses request bodies sent
+with ``Content-Encoding: gzip``. Decompression is streamed and capped, so a
+small compressed body cannot expand into an unbounded one (413), and corrupt
+data is rejected (400). The cap can differ per path, like the body limits of
+``RequestGuardMiddleware``, which only sees the compressed size.
+"""
+
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class GzipRequestMiddleware:
+    """Decompresses gzip-encoded request bodies with a size cap"""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        max_decompressed_bytes: int,
+        path_prefix: str = "/api/",
+        body_limits: Optional[Dict[str, int]] = None,
+    ):
+        """
+        Args:
+            app: The wrapped ASGI application
+            max_decompressed_bytes: Largest decompressed body accepted
+            path_prefix: Only requests under this prefix are decompressed
+            body_limits: ``max_decompressed_bytes`` overrides by request path
+        """
+        self.app = app
+        self.max_decompressed_bytes = max_decompressed_bytes
+        self.path_prefix = path_prefix
+        self.body_limits = body_limits or {}
+
+    @staticmethod
+    def _is_gzip(headers: List[Tuple[bytes, bytes]]) -> bool:
+        return any(
+            name == b"content-encoding" and value.strip().lower() == b"gzip"
+            for name, value in headers
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or not scope["path"].startswith(self.path_prefix)
+            or not self._is_gzip(scope["headers"])
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        # The app sees a plain body of unknown length. The scope is changed in
+        # place: outer middlewares read what the router stores in it (endpoint)
+        scope["headers"] = [
+            (name, value)
+            for name, value in scope["headers"]
+            if name not in (b"content-encoding", b"content-length")
+        ]
+
+        response_started = False
+
+        async def send_tracking(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            max_bytes = self.body_limits.get(scope["path"], self.max_decompressed_bytes)
+            await self.app(scope, self._decompress(receive, max_bytes), send_tracking)
+        except HTTPException as e:
+            if response_started:
+                raise
+            response = JSONResponse(status_code=e.status_code, content={"detail": e.detail})
+            await response(scope, receive, send)
+
+    @staticmethod
+    def _decompress(receive: Receive, max_bytes: int) -> Receive:
+        """Wrap ``receive`` to inflate each body chunk, up to ``max_bytes`` in total"""
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        total = 0
+
+        async def decompressing_receive() -> Message:
+            nonlocal total
+            message = await receive()
+            if message["type"] != "http.request":
+                return message
+
+            remaining = max_bytes - total
+            try:
+                # Inflate at most one byte past the cap, so bombs stop early
+                body = decompressor.decompress(message.get("body", b""), remaining + 1)
+                if not message.get("more_body", False) and len(body) <= remaining:
+                    body += decompressor.flush()
+            except zlib.error as e:
+                raise HTTPException(
+                    status_code=400, detail="Corpo gzip inválido ou corrompido"
+                ) from e
+
+            total += len(body)
+            if total > max_bytes:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"Conteúdo descomprimido muito grande. Máximo "
+                    f"{max_bytes / (1024 * 1024):.2f}MB.",
+                )
+            if not message.get("more_body", False) and not decompressor.eof:
+                raise HTTPException(status_code=400, detail="Corpo gzip incompleto")
+            return {**message, "body": body}
+
+        return decompressing_receive
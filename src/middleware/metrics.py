@@ -0,0 +1,63 @@
+"""
+Metrics middleware
+
+Pure ASGI middleware recording, for every HTTP request, its latency by
+handler, method and status, the number of requests in flight, and the
+``upload`` pipeline stage: the time spent receiving the request body.
+"""
+
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.services.metrics import (
+    HTTP_REQUEST_DURATION,
+    HTTP_REQUESTS_IN_FLIGHT,
+    STAGE_DURATION,
+)
+
+
+class MetricsMiddleware:
+    """Records request latency, in-flight requests and body upload time"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        upload_started = None
+        status = 500
+
+        async def timed_receive() -> Message:
+            nonlocal upload_started
+            if upload_started is None:
+                upload_started = time.perf_counter()
+            message = await receive()
+            if message["type"] == "http.request" and not message.get("more_body", False):
+                STAGE_DURATION.observe(time.perf_counter() - upload_started, stage="upload")
+            return message
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, timed_receive, send_with_status)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            # O roteador grava o endpoint no scope: rótulo de baixa cardinalidade
+            endpoint = scope.get("endpoint")
+            handler = getattr(endpoint, "__name__", type(endpoint).__name__) if endpoint else "none"
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - started,
+                handler=handler,
+                method=scope["method"],
+                status=str(status),
+            )
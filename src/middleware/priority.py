@@ -0,0 +1,57 @@
+"""
+Priority middleware
+
+Pure ASGI middleware that tags each request with a ``Priority`` lane
+(``src.services.priority.current_priority``), read by the lane limiters in
+front of Gemini and OCR. Requests are bulk when:
+
+- the path is a bulk endpoint (e.g. ``/api/analyze/batch``);
+- the ``X-API-Key`` header carries one of the configured bulk keys; or
+- the client asks for it with ``X-Priority: bulk`` (clients can lower their
+  priority, never raise it).
+
+Everything else is interactive.
+"""
+
+from typing import Iterable, Optional
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from src.services.priority import Priority, current_priority
+
+
+class PriorityMiddleware:
+    """Sets the request's priority lane from its path, API key or X-Priority header"""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        bulk_paths: Iterable[str] = (),
+        bulk_api_keys: Optional[Iterable[str]] = None,
+    ):
+        self.app = app
+        self.bulk_paths = tuple(bulk_paths)
+        self.bulk_api_keys = frozenset(bulk_api_keys or ())
+
+    def classify(self, scope: Scope) -> Priority:
+        """Return the lane of a request"""
+        if scope["path"].startswith(self.bulk_paths):
+            return Priority.BULK
+        headers = Headers(scope=scope)
+        if headers.get("x-api-key") in self.bulk_api_keys:
+            return Priority.BULK
+        if headers.get("x-priority", "").strip().lower() == "bulk":
+            return Priority.BULK
+        return Priority.INTERACTIVE
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = current_priority.set(self.classify(scope))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_priority.reset(token)
@@ -0,0 +1,176 @@
+"""
+Request guard middleware
+
+Pure ASGI middleware that rejects abusive or invalid API requests before the
+body is read, so rate-limited clients and oversized uploads cost neither
+bandwidth nor temporary disk space:
+
+- rate limit (429): one request is reserved in the shared ``rate_limiter``
+  up front and given back if the response is an error, so only served
+  requests count
+- declared ``Content-Length`` above the limit (413); bodies without a length
+  (chunked uploads) are counted while they stream and cut off at the limit
+- request ``Content-Type`` not accepted by the endpoint (415)
+
+Responses of guarded endpoints carry the ``X-RateLimit-*`` headers.
+"""
+
+from typing import Dict, Optional, Tuple
+
+from fastapi import HTTPException
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.services.security_service import SecurityService
+
+# Multipart boundaries and part headers on top of the file itself
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+class BodyTooLargeError(HTTPException):
+    """Raised while streaming a request body that exceeds the limit"""
+
+    def __init__(self, max_body_bytes: int):
+        super().__init__(
+            status_code=413,
+            detail=f"Requisição muito grande. Máximo {max_body_bytes / (1024 * 1024):.2f}MB.",
+        )
+
+
+class RequestGuardMiddleware:
+    """Rate-limits and validates API requests before their body is read"""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        path_prefix: str = "/api/",
+        max_body_bytes: Optional[int] = None,
+        content_types: Optional[Dict[str, Tuple[str, ...]]] = None,
+        body_limits: Optional[Dict[str, int]] = None,
+    ):
+        """
+        Args:
+            app: The wrapped ASGI application
+            path_prefix: Only ``POST`` requests under this prefix are guarded
+            max_body_bytes: Largest request body accepted (defaults to the
+                file size limit plus multipart overhead)
+            content_types: Accepted media types by request path; paths not
+                listed accept any type
+            body_limits: ``max_body_bytes`` overrides by request path
+        """
+        self.app = app
+        self.path_prefix = path_prefix
+        self.max_body_bytes = max_body_bytes or (
+            SecurityService.MAX_FILE_SIZE_MB * 1024 * 1024 + MULTIPART_OVERHEAD_BYTES
+        )
+        self.content_types = content_types or {}
+        self.body_limits = body_limits or {}
+
+    def _is_guarded(self, scope: Scope) -> bool:
+        return (
+            scope["type"] == "http"
+            and scope["method"] == "POST"
+            and scope["path"].startswith(self.path_prefix)
+        )
+
+    def _max_body_bytes(self, scope: Scope) -> int:
+        return self.body_limits.get(scope["path"], self.max_body_bytes)
+
+    def _validate_headers(self, scope: Scope, headers: Headers) -> None:
+        """
+        Check the declared size and type of the body.
+
+        Raises:
+            HTTPException: 413 or 415 if the request must be rejected
+        """
+        content_length = headers.get("content-length")
+        if content_length is not None and content_length.isdigit():
+            if int(content_length) > self._max_body_bytes(scope):
+                raise BodyTooLargeError(self._max_body_bytes(scope))
+
+        allowed = self.content_types.get(scope["path"])
+        content_type = headers.get("content-type")
+        if allowed and content_type is not None:
+            media_type = content_type.split(";", 1)[0].strip().lower()
+            if media_type not in allowed:
+                raise HTTPException(
+                    status_code=415,
+                    detail=f"Content-Type não suportado: {media_type}. Use {', '.join(allowed)}.",
+                )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if not self._is_guarded(scope):
+            await self.app(scope, receive, send)
+            return
+
+        request = Request(scope)
+        try:
+            await SecurityService.reserve_requests(request)
+            self._validate_headers(scope, request.headers)
+        except HTTPException as e:
+            await SecurityService.release_requests(request)
+            await self._reject(e, request, scope, receive, send)
+            return
+
+        await self._forward(request, scope, receive, send)
+
+    async def _forward(self, request: Request, scope: Scope, receive: Receive, send: Send) -> None:
+        """Call the app with the body limit, adding the rate limit headers to its response"""
+        response_status: Optional[int] = None
+
+        async def send_with_headers(message: Message) -> None:
+            nonlocal response_status
+            if message["type"] == "http.response.start":
+                response_status = message["status"]
+                # Requisições que falharam não contam no rate limit
+                if response_status >= 400:
+                    await SecurityService.release_requests(request)
+                headers = MutableHeaders(scope=message)
+                rate_limit_headers = await SecurityService.get_rate_limit_headers(request)
+                for name, value in rate_limit_headers.items():
+                    headers.append(name, value)
+            await send(message)
+
+        try:
+            await self.app(
+                scope, self._limit_body(receive, self._max_body_bytes(scope)), send_with_headers
+            )
+        except BodyTooLargeError as e:
+            if response_status is not None:
+                raise
+            await SecurityService.release_requests(request)
+            await self._reject(e, request, scope, receive, send)
+        except BaseException:
+            if response_status is None:
+                await SecurityService.release_requests(request)
+            raise
+
+    @staticmethod
+    def _limit_body(receive: Receive, max_body_bytes: int) -> Receive:
+        """Wrap ``receive`` to stop reading once the body exceeds the limit"""
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_body_bytes:
+                    raise BodyTooLargeError(max_body_bytes)
+            return message
+
+        return limited_receive
+
+    @staticmethod
+    async def _reject(
+        error: HTTPException, request: Request, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        """Send the error response with the rate limit headers"""
+        headers = dict(error.headers or {})
+        headers.update(await SecurityService.get_rate_limit_headers(request))
+        response = JSONResponse(
+            status_code=error.status_code, content={"detail": error.detail}, headers=headers
+        )
+        await response(scope, receive, send)
@@ -0,0 +1,47 @@
+"""
+Request ID middleware
+
+Pure ASGI middleware that gives every HTTP request a correlation id: the
+client's ``X-Request-ID`` when it is a sane token, otherwise a new one. The
+id is set on the ``request_id`` context variable (so every log record of the
+request carries it) and echoed in the ``X-Request-ID`` response header.
+"""
+
+import re
+import uuid
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.services.structured_logging import request_id
+
+# Ids enviados pelo cliente (ou por um proxy) são aceitos se forem tokens curtos
+_VALID_REQUEST_ID = re.compile(r"[A-Za-z0-9._:-]{1,128}")
+
+
+class RequestIdMiddleware:
+    """Assigns and propagates a correlation id per request"""
+
+    def __init__(self, app: ASGIApp, header: str = "X-Request-ID"):
+        self.app = app
+        self.header = header
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        value = Headers(scope=scope).get(self.header)
+        if value is None or not _VALID_REQUEST_ID.fullmatch(value):
+            value = uuid.uuid4().hex
+
+        async def send_with_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)[self.header] = value
+            await send(message)
+
+        token = request_id.set(value)
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            request_id.reset(token)
@@ -0,0 +1,42 @@
+"""
+Tracing middleware
+
+Pure ASGI middleware that starts a trace for each API request (sampled by
+``Tracer``), continuing the caller's trace when a W3C ``traceparent``
+header is sent. The pipeline's spans become children of this root span.
+"""
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.services.structured_logging import request_id
+from src.services.tracing import Tracer, get_tracer
+
+
+class TracingMiddleware:
+    """Wraps API requests in the root span of a trace"""
+
+    def __init__(self, app: ASGIApp, path_prefix: str = "/api/", tracer: Tracer = None):
+        self.app = app
+        self.path_prefix = path_prefix
+        self.tracer = tracer
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefix):
+            await self.app(scope, receive, send)
+            return
+
+        tracer = self.tracer or get_tracer()
+        with tracer.start_trace(
+            f"{scope['method']} {scope['path']}",
+            traceparent=Headers(scope=scope).get("traceparent"),
+            **{"http.method": scope["method"], "http.target": scope["path"]},
+        ) as span:
+            span.set("request_id", request_id.get())
+
+            async def send_with_status(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    span.set("http.status_code", message["status"])
+                await send(message)
+
+            await self.app(scope, receive, send_with_status)
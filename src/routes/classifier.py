@@ -1,9 +1,15 @@
+import asyncio
+from typing import AsyncIterator, List, Tuple, Union
+
+import orjson
 from fastapi import APIRouter, HTTPException, Request, UploadFile
-from pydantic import BaseModel
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 
-from src.services.ai_service import AIService
-from src.services.file_parser import FileParserService
+from src.config import BATCH_MAX_CONCURRENCY
+from src.services.pipeline import ClassificationPipeline, to_http_exception
 from src.services.security_service import SecurityService
+from src.services.tracing import get_tracer
 
 router = APIRouter(prefix="/api", tags=["classification"])
 
@@ -15,85 +21,136 @@ class ClassificationResponse(BaseModel):
     reasoning: str = ""
 
 
+class TextAnalysisRequest(BaseModel):
+    content: str = Field(..., description="Texto do email a ser classificado")
+
+
 @router.post("/analyze", response_model=ClassificationResponse)
 async def analyze_email(file: UploadFile, request: Request):
-    # Rate limiting validation
-    SecurityService.validate_rate_limit(request)
-
-    # Validar tipo de arquivo
-    allowed_types = {"application/pdf", "text/plain"}
-    if file.content_type not in allowed_types:
+    # Rate limit e tamanho da requisição são validados pelo RequestGuardMiddleware
+    try:
+        with get_tracer().span("upload.read") as span:
+            content = await file.read()
+            span.set("bytes", len(content))
+        result = await ClassificationPipeline.classify_file(
+            file.filename, file.content_type, content
+        )
+    except Exception as e:
+        raise to_http_exception(e) from e
+
+    return ClassificationResponse(**result)
+
+
+@router.post(
+    "/analyze/text",
+    response_model=Union[ClassificationResponse, List[ClassificationResponse]],
+)
+async def analyze_text(
+    payload: Union[TextAnalysisRequest, List[TextAnalysisRequest]], request: Request
+):
+    """Classify email text sent as JSON: one object or a list of objects"""
+    emails = payload if isinstance(payload, list) else [payload]
+    if not emails:
+        raise HTTPException(status_code=400, detail="Nenhum email enviado")
+    if len(emails) > SecurityService.MAX_EMAILS_PER_REQUEST:
         raise HTTPException(
             status_code=400,
-            detail=f"Tipo de arquivo não suportado. Use PDF ou TXT. Recebido: {file.content_type}",
+            detail=f"Máximo {SecurityService.MAX_EMAILS_PER_REQUEST} emails por requisição. "
+            f"Recebido: {len(emails)}",
         )
 
-    try:
-        # Salvar arquivo temporário
-        import tempfile
-        from pathlib import Path
-
-        print(f"=== DEBUG: Received file {file.filename}, content_type: {file.content_type} ===")
+    # Cada email conta como uma requisição no rate limit (devolvidas se a chamada falhar)
+    await SecurityService.reserve_requests(request, requests=len(emails))
 
-        with tempfile.NamedTemporaryFile(delete=False, suffix=Path(file.filename).suffix) as tmp:
-            content = await file.read()
+    # Emails classificados em paralelo, com o mesmo limite de concorrência do lote
+    semaphore = asyncio.Semaphore(BATCH_MAX_CONCURRENCY)
+    tasks = [asyncio.create_task(_classify_text_item(email.content, semaphore)) for email in emails]
+    try:
+        results = await asyncio.gather(*tasks)
+    except Exception as e:
+        raise to_http_exception(e) from e
+    finally:
+        # Um email falhou (ou o cliente desconectou): cancelar os demais
+        for task in tasks:
+            task.cancel()
 
-            print(f"DEBUG: File content size: {len(content)} bytes")
+    results = [ClassificationResponse(**result) for result in results]
+    return results if isinstance(payload, list) else results[0]
 
-            # Validar arquivo não vazio
-            if not content or len(content) == 0:
-                raise HTTPException(
-                    status_code=400,
-                    detail="Arquivo vazio ou sem conteúdo válido",
-                )
 
-            # Validar tamanho do arquivo
-            SecurityService.validate_file_size(len(content))
+async def _classify_text_item(content: str, semaphore: asyncio.Semaphore) -> dict:
+    """Classify one email of a text request, bounded by ``semaphore``"""
+    async with semaphore:
+        return await ClassificationPipeline.classify_text(content)
 
-            tmp.write(content)
-            tmp_path = tmp.name
-            print(f"DEBUG: Saved to temp file: {tmp_path}")
 
+async def _classify_batch_item(
+    index: int, filename: str, content_type: str, content: bytes, semaphore: asyncio.Semaphore
+) -> dict:
+    """Classify one file of a batch, turning errors into a per-item result"""
+    async with semaphore:
         try:
-            # Parse do arquivo
-            print(f"=== DEBUG: Parsing file {file.filename} ===")
-            email_content = await FileParserService.parse_file(tmp_path)
-            print(f"DEBUG: Extracted text length: {len(email_content)}")
-            print(f"DEBUG: First 500 chars: {email_content[:500]!r}")
-
-            if not email_content or len(email_content.strip()) == 0:
-                print(f"DEBUG: Text is empty after strip! Original length was {len(email_content)}")
-                raise HTTPException(
-                    status_code=400,
-                    detail="Arquivo vazio ou sem conteúdo válido",
-                )
-
-            print(f"DEBUG: Text validation passed. Length: {len(email_content)}")
-
-            # Validar conteúdo extraído para segurança
-            SecurityService.validate_input_content(email_content)
-
-            # Classificação com IA
-            ai_service = AIService()
-            result = await ai_service.classify_email(email_content)
-
-            # Record successful request for rate limiting
-            SecurityService.record_request(request)
-
-            return ClassificationResponse(**result)
-
-        finally:
-            # Limpar arquivo temporário
-            Path(tmp_path).unlink(missing_ok=True)
-
-    except HTTPException:
-        raise
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e)) from e
-    except RuntimeError as e:
-        raise HTTPException(status_code=500, detail=str(e)) from e
-    except Exception as e:
+            result = await ClassificationPipeline.classify_file(filename, content_type, content)
+        except Exception as e:
+            error = to_http_exception(e)
+            return {
+                "index": index,
+                "filename": filename,
+                "status": "error",
+                "status_code": error.status_code,
+                "error": error.detail,
+            }
+    return {
+        "index": index,
+        "filename": filename,
+        "status": "ok",
+        "result": ClassificationResponse(**result).model_dump(),
+    }
+
+
+async def _stream_batch(
+    items: List[Tuple[str, str, bytes]], request: Request
+) -> AsyncIterator[bytes]:
+    """Yield one NDJSON line per file, in completion order"""
+    semaphore = asyncio.Semaphore(BATCH_MAX_CONCURRENCY)
+    tasks = [
+        asyncio.create_task(_classify_batch_item(index, filename, content_type, content, semaphore))
+        for index, (filename, content_type, content) in enumerate(items)
+    ]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            line = await next_done
+            # Arquivos com erro não contam no rate limit
+            if line["status"] == "error":
+                await SecurityService.release_requests(request, 1)
+            yield orjson.dumps(line) + b"\n"
+    finally:
+        # Cliente desconectou: cancelar os arquivos ainda em processamento
+        for task in tasks:
+            task.cancel()
+
+
+@router.post("/analyze/batch")
+async def analyze_batch(files: List[UploadFile], request: Request):
+    """
+    Classify many files concurrently, streaming one NDJSON line per file as it finishes.
+
+    Each line has ``index`` (position in the upload), ``filename``, ``status``
+    (``ok`` or ``error``) and either ``result`` or ``status_code`` and ``error``.
+    """
+    if len(files) > SecurityService.MAX_FILES_PER_BATCH:
         raise HTTPException(
-            status_code=500,
-            detail=f"Erro ao processar arquivo: {str(e)}",
-        ) from e
+            status_code=400,
+            detail=f"Máximo {SecurityService.MAX_FILES_PER_BATCH} arquivos por lote. "
+            f"Recebido: {len(files)}",
+        )
+
+    # Cada arquivo conta como uma requisição no rate limit (devolvida se o arquivo falhar)
+    await SecurityService.reserve_requests(request, requests=len(files))
+
+    # Ler os arquivos antes de responder: os uploads são fechados quando a rota retorna
+    with get_tracer().span("upload.read", files=len(files)) as span:
+        items = [(file.filename, file.content_type, await file.read()) for file in files]
+        span.set("bytes", sum(len(content) for _, _, content in items))
+
+    return StreamingResponse(_stream_batch(items, request), media_type="application/x-ndjson")
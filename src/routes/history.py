@@ -0,0 +1,110 @@
+import asyncio
+import csv
+import io
+import secrets
+from typing import AsyncIterator, Optional
+
+import orjson
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from src.config import HISTORY_API_TOKEN
+from src.services.history_store import FIELDS, HistoryStore, get_history_store
+
+
+def require_history_token(authorization: Optional[str] = Header(None)) -> None:
+    """Allow only requests with the admin token; without a configured token the routes are off"""
+    if not HISTORY_API_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not secrets.compare_digest(
+        token.encode(), HISTORY_API_TOKEN.encode()
+    ):
+        raise HTTPException(
+            status_code=401,
+            detail="Token de acesso ao histórico inválido",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+router = APIRouter(
+    prefix="/api/history", tags=["history"], dependencies=[Depends(require_history_token)]
+)
+
+# Registros lidos do SQLite por vez na exportação
+EXPORT_PAGE_SIZE = 1000
+
+
+async def _pages(store: HistoryStore, **filters) -> AsyncIterator[list]:
+    """Yield the matching records page by page, holding one page in memory at a time"""
+    cursor = None
+    while True:
+        records, cursor = await asyncio.to_thread(
+            store.page, limit=EXPORT_PAGE_SIZE, cursor=cursor, **filters
+        )
+        if records:
+            yield records
+        if cursor is None:
+            return
+
+
+async def _export_csv(store: HistoryStore, **filters) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(FIELDS)
+    async for records in _pages(store, **filters):
+        writer.writerows(tuple(getattr(record, name) for name in FIELDS) for record in records)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+async def _export_jsonl(store: HistoryStore, **filters) -> AsyncIterator[bytes]:
+    async for records in _pages(store, **filters):
+        yield b"".join(orjson.dumps(record.to_dict()) + b"\n" for record in records)
+
+
+@router.get("")
+async def list_history(
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    since: Optional[float] = Query(None, description="Unix time (inclusive)"),
+    until: Optional[float] = Query(None, description="Unix time (exclusive)"),
+    category: Optional[str] = None,
+    content_hash: Optional[str] = None,
+):
+    """Classification history, newest first; follow ``next_cursor`` for the next page"""
+    try:
+        records, next_cursor = await asyncio.to_thread(
+            get_history_store().page,
+            limit=limit,
+            cursor=cursor,
+            since=since,
+            until=until,
+            category=category,
+            content_hash=content_hash,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail="Cursor inválido") from e
+    return {"items": [record.to_dict() for record in records], "next_cursor": next_cursor}
+
+
+@router.get("/export")
+async def export_history(
+    format: str = Query("jsonl", pattern="^(csv|jsonl)$"),
+    since: Optional[float] = Query(None, description="Unix time (inclusive)"),
+    until: Optional[float] = Query(None, description="Unix time (exclusive)"),
+    category: Optional[str] = None,
+):
+    """Stream the matching history as CSV or JSON Lines, newest first"""
+    filters = {"since": since, "until": until, "category": category}
+    if format == "csv":
+        content, media_type = _export_csv(get_history_store(), **filters), "text/csv"
+    else:
+        content, media_type = _export_jsonl(get_history_store(), **filters), "application/x-ndjson"
+    return StreamingResponse(
+        content,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="history.{format}"'},
+    )
@@ -0,0 +1,76 @@
+import asyncio
+from typing import Optional
+
+from fastapi import APIRouter, Form, HTTPException, UploadFile
+from fastapi.responses import ORJSONResponse
+
+from src.services.job_store import get_job_store
+from src.services.job_worker import get_job_workers
+from src.services.pipeline import ALLOWED_CONTENT_TYPES
+from src.services.security_service import SecurityService
+from src.services.tracing import get_tracer
+from src.services.webhook_guard import UnsafeWebhookError, validate_webhook_url
+
+router = APIRouter(prefix="/api/jobs", tags=["jobs"])
+
+
+@router.post("", status_code=202)
+async def create_job(file: UploadFile, webhook_url: Optional[str] = Form(None)):
+    """
+    Enqueue a file for background classification and return the job id immediately.
+
+    The result is available at ``GET /api/jobs/{id}`` and, if ``webhook_url``
+    is given, POSTed to it when the job finishes or fails.
+    """
+    if file.content_type not in ALLOWED_CONTENT_TYPES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Tipo de arquivo não suportado. Use PDF ou TXT. Recebido: {file.content_type}",
+        )
+    if webhook_url:
+        try:
+            await validate_webhook_url(webhook_url)
+        except UnsafeWebhookError as e:
+            raise HTTPException(status_code=400, detail=str(e)) from e
+
+    with get_tracer().span("upload.read") as span:
+        content = await file.read()
+        span.set("bytes", len(content))
+    if not content:
+        raise HTTPException(status_code=400, detail="Arquivo vazio ou sem conteúdo válido")
+    SecurityService.validate_file_size(len(content))
+
+    job = await asyncio.to_thread(
+        get_job_store().create, file.filename, file.content_type, content, webhook_url
+    )
+    get_job_workers().notify()
+
+    return ORJSONResponse(
+        status_code=202,
+        content=job.to_dict(),
+        headers={"Location": f"/api/jobs/{job.id}"},
+    )
+
+
+@router.get("/{job_id}")
+async def get_job(job_id: str):
+    """Return the status of a job, with its result or error once finished"""
+    job = await asyncio.to_thread(get_job_store().get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    return job.to_dict()
+
+
+@router.post("/{job_id}/retry", status_code=202)
+async def retry_job(job_id: str):
+    """Re-queue a failed job"""
+    store = get_job_store()
+    if not await asyncio.to_thread(store.retry, job_id):
+        job = await asyncio.to_thread(store.get, job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Job não encontrado")
+        raise HTTPException(
+            status_code=409, detail=f"Apenas jobs com falha podem ser reenviados ({job.status})"
+        )
+    get_job_workers().notify()
+    return (await asyncio.to_thread(store.get, job_id)).to_dict()
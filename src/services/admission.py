@@ -0,0 +1,137 @@
+"""
+Admission Control
+
+Server-wide limit on in-flight analysis requests. Up to ``max_in_flight``
+requests run at once; a short queue of ``max_queue`` requests waits for a
+slot, each for at most ``queue_timeout`` seconds. Anything beyond that is shed
+with ``OverloadedError`` (503 + Retry-After) before any work is done, instead
+of piling up until the client times out.
+"""
+
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, Optional
+
+from src.config import (
+    ADMISSION_MAX_IN_FLIGHT,
+    ADMISSION_MAX_QUEUE,
+    ADMISSION_QUEUE_TIMEOUT_SECONDS,
+    ADMISSION_RETRY_AFTER_SECONDS,
+)
+
+
+class OverloadedError(RuntimeError):
+    """Raised when a request is shed because the server is saturated"""
+
+    def __init__(self, retry_after: float):
+        super().__init__("Servidor sobrecarregado. Tente novamente em alguns segundos.")
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """In-flight limit with a bounded FIFO queue"""
+
+    def __init__(
+        self,
+        max_in_flight: int,
+        max_queue: int = 0,
+        queue_timeout: float = 5.0,
+        retry_after: float = 5.0,
+    ):
+        if max_in_flight < 1:
+            raise ValueError(f"max_in_flight must be at least 1 (got {max_in_flight})")
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.in_flight = 0
+        self.shed = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    @property
+    def saturated(self) -> bool:
+        """Whether a new request would be shed right now"""
+        return self.in_flight >= self.max_in_flight and self.queued >= self.max_queue
+
+    async def acquire(self) -> None:
+        """
+        Take an in-flight slot, waiting in the queue if needed.
+
+        Raises:
+            OverloadedError: If the queue is full or the wait timed out
+        """
+        if self.in_flight < self.max_in_flight and not self._waiters:
+            self.in_flight += 1
+            return
+        if self.queued >= self.max_queue:
+            self.shed += 1
+            raise OverloadedError(self.retry_after)
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._abandon(future)
+            self.shed += 1
+            raise OverloadedError(self.retry_after) from None
+        except asyncio.CancelledError:
+            self._abandon(future)
+            raise
+
+    def _abandon(self, future: asyncio.Future) -> None:
+        """Leave the queue; a slot granted in the meantime is handed back"""
+        if future.done():
+            self.release()
+        else:
+            future.cancel()
+            self._waiters.remove(future)
+
+    def release(self) -> None:
+        """Free a slot, handing it to the oldest waiter"""
+        if self._waiters:
+            # The slot passes straight to the waiter (in_flight is unchanged)
+            self._waiters.popleft().set_result(None)
+        else:
+            self.in_flight -= 1
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold an in-flight slot for the duration of the block"""
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def snapshot(self) -> Dict[str, object]:
+        """Return the load figures reported by ``/ready``"""
+        return {
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "queued": self.queued,
+            "max_queue": self.max_queue,
+            "saturation": round(self.in_flight / self.max_in_flight, 2),
+            "shed": self.shed,
+        }
+
+
+_controller: Optional[AdmissionController] = None
+
+
+def get_admission_controller() -> AdmissionController:
+    """Return the process-wide admission controller"""
+    global _controller
+    if _controller is None:
+        _controller = AdmissionController(
+            ADMISSION_MAX_IN_FLIGHT,
+            max_queue=ADMISSION_MAX_QUEUE,
+            queue_timeout=ADMISSION_QUEUE_TIMEOUT_SECONDS,
+            retry_after=ADMISSION_RETRY_AFTER_SECONDS,
+        )
+    return _controller
@@ -1,16 +1,39 @@
+import asyncio
+import contextvars
+import functools
 import json
 import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
 
-import google.generativeai as genai
-
-from src.config import GEMINI_API_KEY, GEMINI_MODEL
+from src.config import GEMINI_API_ENDPOINT, GEMINI_API_KEY, GEMINI_MODEL
+from src.services.circuit_breaker import CircuitOpenError, get_circuit_breaker
+from src.services.lanes import get_lane_limiter
+from src.services.metrics import (
+    LLM_ERRORS,
+    LLM_PROMPT_TOKENS,
+    LLM_RESPONSE_TOKENS,
+    estimate_tokens,
+    track_stage,
+)
 
 
 class AIService:
     def __init__(self, api_key: str = None, model: str = None):
+        # SDK importado só quando o serviço é criado (import leva ~1s)
+        import google.generativeai as genai
+
         self.api_key = api_key or GEMINI_API_KEY
         self.model_name = model or GEMINI_MODEL
-        genai.configure(api_key=self.api_key)
+        if GEMINI_API_ENDPOINT:
+            # Endpoint alternativo só é suportado pelo transporte REST
+            genai.configure(
+                api_key=self.api_key,
+                transport="rest",
+                client_options={"api_endpoint": GEMINI_API_ENDPOINT},
+            )
+        else:
+            genai.configure(api_key=self.api_key)
         self.client = genai.GenerativeModel(self.model_name)
 
     async def classify_email(self, email_content: str) -> dict:
@@ -20,14 +43,36 @@ class AIService:
         system_prompt = self._create_system_prompt()
         user_message = f"Classifique este email:\n\n{email_content}"
 
+        prompt = f"{system_prompt}\n\n{user_message}"
+        prompt_tokens = estimate_tokens(prompt)
+        LLM_PROMPT_TOKENS.observe(prompt_tokens)
+
         try:
-            response = self.client.generate_content(f"{system_prompt}\n\n{user_message}")
+            # Chamada bloqueante do SDK executada fora do event loop, na vaga da
+            # lane de prioridade da requisição (interativo antes de lote); com o
+            # Gemini fora do ar o circuit breaker falha rápido
+            async with get_circuit_breaker("gemini").guard(), get_lane_limiter("ai").slot():
+                with track_stage(
+                    "llm", model=self.model_name, prompt_tokens_estimated=prompt_tokens
+                ) as span:
+                    response = await _run_in_ai_executor(self.client.generate_content, prompt)
+                    response_tokens = estimate_tokens(response.text)
+                    span.set("response_tokens_estimated", response_tokens)
+            LLM_RESPONSE_TOKENS.observe(response_tokens)
 
             # Extrair JSON da resposta
-            result = self._parse_response(response.text)
+            with track_stage("parse_response", chars=len(response.text)):
+                result = self._parse_response(response.text)
             return result
 
+        except CircuitOpenError:
+            LLM_ERRORS.inc(kind="circuit_open")
+            raise
+        except ValueError as e:
+            LLM_ERRORS.inc(kind="invalid_response")
+            raise RuntimeError(f"Erro ao classificar email com Gemini: {str(e)}") from e
         except Exception as e:
+            LLM_ERRORS.inc(kind="api")
             raise RuntimeError(f"Erro ao classificar email com Gemini: {str(e)}") from e
 
     def _create_system_prompt(self) -> str:
@@ -73,3 +118,45 @@ Exemplo de resposta esperada:
 
         except json.JSONDecodeError as e:
             raise ValueError(f"JSON inválido na resposta: {str(e)}") from e
+
+
+_ai_service: Optional[AIService] = None
+_ai_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_ai_executor() -> ThreadPoolExecutor:
+    """
+    Return the threads that run the blocking Gemini calls.
+
+    One thread per slot of the ``ai`` lane: calls that take seconds never
+    occupy the default executor, which serves the quick SQLite calls
+    (rate limit, quota, jobs, history).
+    """
+    global _ai_executor
+    if _ai_executor is None:
+        _ai_executor = ThreadPoolExecutor(
+            max_workers=get_lane_limiter("ai").capacity, thread_name_prefix="gemini"
+        )
+    return _ai_executor
+
+
+async def _run_in_ai_executor(function, *args):
+    """Like ``asyncio.to_thread``, on the Gemini threads"""
+    call = functools.partial(contextvars.copy_context().run, function, *args)
+    return await asyncio.get_running_loop().run_in_executor(_get_ai_executor(), call)
+
+
+def shutdown_ai_executor() -> None:
+    """Stop the Gemini threads (calls still running finish in the background)"""
+    global _ai_executor
+    if _ai_executor is not None:
+        _ai_executor.shutdown(wait=False)
+        _ai_executor = None
+
+
+def get_ai_service() -> AIService:
+    """Return the process-wide AI service (configured once, shared by all requests)"""
+    global _ai_service
+    if _ai_service is None:
+        _ai_service = AIService()
+    return _ai_service
@@ -0,0 +1,149 @@
+"""
+Circuit Breaker
+
+Stops calling a downstream service (Gemini, OCR.space) that keeps failing, so
+requests fail fast with a retry hint instead of each waiting for its own
+timeout.
+
+- ``closed``: calls go through; consecutive failures are counted.
+- ``open``: after ``failure_threshold`` consecutive failures, calls are
+  rejected with ``CircuitOpenError`` for ``reset_seconds``.
+- ``half_open``: after that, one trial call is let through; its success
+  closes the circuit, its failure opens it again.
+"""
+
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Dict, Optional
+
+from src.config import CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_SECONDS
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(ValueError):
+    """Raised when a call is rejected because the service's circuit is open"""
+
+    def __init__(self, service: str, retry_after: float):
+        super().__init__(
+            f"Serviço {service} indisponível no momento. "
+            f"Tente novamente em {retry_after:.0f} segundos."
+        )
+        self.service = service
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Tracks the health of one downstream service"""
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_seconds: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.clock = clock
+        self.failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_progress = False
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return CLOSED
+        if self.clock() - self._opened_at < self.reset_seconds:
+            return OPEN
+        return HALF_OPEN
+
+    def check(self) -> None:
+        """
+        Check that a call would go through now, without claiming the half-open trial.
+
+        Raises:
+            CircuitOpenError: If the circuit is open, or half-open with a trial call running
+        """
+        state = self.state
+        if state == CLOSED or (state == HALF_OPEN and not self._trial_in_progress):
+            return
+        retry_after = max(1.0, self._opened_at + self.reset_seconds - self.clock())
+        raise CircuitOpenError(self.name, retry_after)
+
+    def before_call(self) -> bool:
+        """
+        Check that a call may go through.
+
+        Returns:
+            Whether the call is the trial call of a half-open circuit
+
+        Raises:
+            CircuitOpenError: If the circuit is open, or half-open with a trial call running
+        """
+        self.check()
+        if self.state == CLOSED:
+            return False
+        self._trial_in_progress = True
+        return True
+
+    def record_success(self) -> None:
+        """Close the circuit after a successful call"""
+        self.failures = 0
+        self._opened_at = None
+        self._trial_in_progress = False
+
+    def record_failure(self) -> None:
+        """Count a failed call, opening the circuit at the threshold"""
+        self.failures += 1
+        if self._trial_in_progress or self.failures >= self.failure_threshold:
+            self._opened_at = self.clock()
+        self._trial_in_progress = False
+
+    @asynccontextmanager
+    async def guard(self) -> AsyncIterator[None]:
+        """
+        Run the block as a call to the service: rejected while the circuit is
+        open, and any exception it raises counts as a failure.
+
+        Raises:
+            CircuitOpenError: If the circuit is open
+        """
+        trial = self.before_call()
+        try:
+            yield
+        except Exception:
+            self.record_failure()
+            raise
+        except BaseException:
+            # Cancelled: the call neither succeeded nor failed
+            if trial:
+                self._trial_in_progress = False
+            raise
+        self.record_success()
+
+    def snapshot(self) -> Dict[str, object]:
+        """Return the state and the consecutive failure count"""
+        return {"state": self.state, "failures": self.failures}
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_circuit_breaker(service: str) -> CircuitBreaker:
+    """Return the process-wide circuit breaker of ``service`` ("gemini" or "ocrspace")"""
+    if service not in _breakers:
+        _breakers[service] = CircuitBreaker(
+            service,
+            failure_threshold=CIRCUIT_FAILURE_THRESHOLD,
+            reset_seconds=CIRCUIT_RESET_SECONDS,
+        )
+    return _breakers[service]
+
+
+def circuit_snapshots() -> Dict[str, Dict[str, object]]:
+    """Return the snapshot of every downstream circuit"""
+    return {name: get_circuit_breaker(name).snapshot() for name in ("gemini", "ocrspace")}
@@ -0,0 +1,249 @@
+"""
+Content Scanner
+
+Scans submitted email text for attack patterns (SQL injection, scripts) in a
+single pass that evaluates every rule set at once and reports which rule
+fired.
+
+Rules are phrases such as ``"union select"`` or ``"<script"``. Matching is
+case-insensitive, a space in a phrase matches any run of whitespace, and a
+phrase that starts or ends with a letter or digit only matches at a token
+boundary, so ordinary words that merely contain a keyword ("selection",
+"updated", "dropdown") are not flagged.
+
+Two interchangeable engines implement the same semantics:
+
+- ``regex``: every phrase of every rule compiled into one prefix-factored
+  regular expression (a trie, as in Aho-Corasick), so the scan runs inside
+  the C regex engine. Used by default.
+- ``aho-corasick``: a deterministic Aho-Corasick automaton over the lowercased,
+  whitespace-normalized text. Linear in the text regardless of the number of
+  phrases, but its scan loop runs in Python, so it is several times slower
+  than ``regex`` for rule sets of this size
+  (see ``benchmarks/bench_content_scanner.py``).
+"""
+
+import re
+from abc import ABC, abstractmethod
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+@dataclass(frozen=True)
+class ScanRule:
+    """A named set of phrases that flag content as suspicious"""
+
+    name: str
+    phrases: Tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class ScanMatch:
+    """The first rule that fired while scanning a text"""
+
+    rule: str
+    #: The phrase that matched, normalized (lowercase, single spaces)
+    phrase: str
+    #: Offset of the match in the lowercased text
+    position: int
+
+
+DEFAULT_RULES = (
+    ScanRule(
+        "sql_injection",
+        (
+            "union select",
+            "union all select",
+            "select * from",
+            "drop table",
+            "drop database",
+            "truncate table",
+            "alter table",
+            "xp_cmdshell",
+            "' or '1'='1",
+            "' or 1=1",
+            '" or "1"="1',
+        ),
+    ),
+    ScanRule("xss", ("<script", "javascript:", "onerror=", "onclick=")),
+)
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+def _normalize(phrase: str) -> str:
+    """Lowercase a phrase and collapse its whitespace"""
+    return " ".join(phrase.lower().split())
+
+
+class ContentScanner(ABC):
+    """Interface implemented by every scanning engine"""
+
+    #: Name used by ``create_scanner``
+    name: str = ""
+
+    def __init__(self, rules: Sequence[ScanRule] = DEFAULT_RULES):
+        self.rules = tuple(rules)
+        #: Normalized phrase -> name of its rule
+        self.phrase_rules: Dict[str, str] = {
+            _normalize(phrase): rule.name for rule in self.rules for phrase in rule.phrases
+        }
+
+    @abstractmethod
+    def scan(self, text: str) -> Optional[ScanMatch]:
+        """
+        Find the first phrase of any rule in ``text``.
+
+        Returns:
+            The first match found, or ``None`` if the text is clean
+        """
+
+    @staticmethod
+    def _on_boundaries(text: str, start: int, end: int, phrase: str) -> bool:
+        """Check that ``text[start:end]`` (a match of ``phrase``) is not part of a longer word"""
+        if _is_word_char(phrase[0]) and start > 0 and _is_word_char(text[start - 1]):
+            return False
+        if _is_word_char(phrase[-1]) and end < len(text) and _is_word_char(text[end]):
+            return False
+        return True
+
+
+class RegexScanner(ContentScanner):
+    """
+    Scans with one regular expression compiled from a trie of every phrase.
+
+    Factoring the phrases by common prefix lets the C regex engine reject
+    most positions after one character; candidates are then checked for
+    token boundaries in Python (they are rare in legitimate text).
+    """
+
+    name = "regex"
+
+    def __init__(self, rules: Sequence[ScanRule] = DEFAULT_RULES):
+        super().__init__(rules)
+        self.pattern = re.compile(self._trie_pattern(list(self.phrase_rules)))
+
+    @classmethod
+    def _trie_pattern(cls, phrases: Sequence[str]) -> str:
+        """Build a prefix-factored regex matching any of ``phrases``"""
+        trie: Dict[str, dict] = {}
+        for phrase in phrases:
+            node = trie
+            for char in phrase:
+                node = node.setdefault(char, {})
+            node[""] = {}
+        return cls._node_pattern(trie)
+
+    @classmethod
+    def _node_pattern(cls, node: Dict[str, dict]) -> str:
+        branches = [
+            (r"\s+" if char == " " else re.escape(char)) + cls._node_pattern(child)
+            for char, child in sorted(node.items())
+            if char
+        ]
+        if not branches:
+            return ""
+        if "" in node:
+            return f"(?:{'|'.join(branches)})?"
+        if len(branches) == 1:
+            return branches[0]
+        return f"(?:{'|'.join(branches)})"
+
+    def scan(self, text: str) -> Optional[ScanMatch]:
+        lowered = text.lower()
+        position = 0
+        while True:
+            match = self.pattern.search(lowered, position)
+            if match is None:
+                return None
+            phrase = _WHITESPACE.sub(" ", match.group(0))
+            if self._on_boundaries(lowered, match.start(), match.end(), phrase):
+                return ScanMatch(
+                    rule=self.phrase_rules[phrase], phrase=phrase, position=match.start()
+                )
+            position = match.start() + 1
+
+
+class AhoCorasickScanner(ContentScanner):
+    """Scans with an Aho-Corasick automaton compiled to a transition table"""
+
+    name = "aho-corasick"
+
+    def __init__(self, rules: Sequence[ScanRule] = DEFAULT_RULES):
+        super().__init__(rules)
+        self.phrases: List[str] = list(self.phrase_rules)
+        self.transitions, self.outputs = self._build(self.phrases)
+
+    @staticmethod
+    def _build(phrases: Sequence[str]) -> Tuple[List[Dict[str, int]], List[Tuple[int, ...]]]:
+        """
+        Build the trie, failure links and a full transition table.
+
+        Returns:
+            Per-state transitions (characters absent from the table go back to
+            the root) and the indexes of the phrases ending at each state
+        """
+        goto: List[Dict[str, int]] = [{}]
+        outputs: List[List[int]] = [[]]
+        for index, phrase in enumerate(phrases):
+            state = 0
+            for char in phrase:
+                if char not in goto[state]:
+                    goto.append({})
+                    outputs.append([])
+                    goto[state][char] = len(goto) - 1
+                state = goto[state][char]
+            outputs[state].append(index)
+
+        fail = [0] * len(goto)
+        transitions: List[Dict[str, int]] = [dict(goto[0])]
+        transitions.extend({} for _ in goto[1:])
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            # Inherit the failure state's moves, then override with our own
+            transitions[state] = {**transitions[fail[state]], **goto[state]}
+            outputs[state] = outputs[state] + outputs[fail[state]]
+            for char, child in goto[state].items():
+                fail[child] = transitions[fail[state]].get(char, 0) if state else 0
+                queue.append(child)
+        return transitions, [tuple(out) for out in outputs]
+
+    def scan(self, text: str) -> Optional[ScanMatch]:
+        normalized = _WHITESPACE.sub(" ", text.lower())
+        transitions = self.transitions
+        outputs = self.outputs
+        state = 0
+        for end, char in enumerate(normalized, start=1):
+            state = transitions[state].get(char, 0)
+            if outputs[state]:
+                for index in outputs[state]:
+                    phrase = self.phrases[index]
+                    start = end - len(phrase)
+                    if self._on_boundaries(normalized, start, end, phrase):
+                        return ScanMatch(
+                            rule=self.phrase_rules[phrase], phrase=phrase, position=start
+                        )
+        return None
+
+
+SCANNERS = {scanner.name: scanner for scanner in (RegexScanner, AhoCorasickScanner)}
+
+
+def create_scanner(
+    engine: str = "regex", rules: Sequence[ScanRule] = DEFAULT_RULES
+) -> ContentScanner:
+    """
+    Instantiate a scanning engine by name.
+
+    Raises:
+        ValueError: If the engine is unknown
+    """
+    if engine not in SCANNERS:
+        raise ValueError(f"Unknown content scanner: {engine}. Use {tuple(SCANNERS)}")
+    return SCANNERS[engine](rules)
@@ -1,7 +1,12 @@
+import asyncio
+import logging
 import re
 from pathlib import Path
 
-import pypdf
+from src.services.metrics import track_stage
+from src.services.tracing import NOOP_SPAN, current_span
+
+logger = logging.getLogger(__name__)
 
 
 class FileParserService:
@@ -29,7 +34,9 @@ class FileParserService:
         if path.suffix.lower() == ".pdf":
             text = await FileParserService.parse_pdf(str(path))
         else:
-            text = FileParserService.parse_txt(str(path))
+            with track_stage("parse_txt") as span:
+                text = FileParserService.parse_txt(str(path))
+                span.set("chars", len(text))
 
         return FileParserService.clean_text(text)
 
@@ -40,35 +47,33 @@ class FileParserService:
         Falls back to OCR if no text is found (scanned PDF).
         """
         try:
-            text = ""
-            with open(file_path, "rb") as file:
-                reader = pypdf.PdfReader(file)
-                for page in reader.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
+            # Extração com pypdf é CPU-bound: roda em thread para não bloquear o event loop
+            with track_stage("parse_pdf") as span:
+                text = await asyncio.to_thread(FileParserService._extract_pdf_text, file_path)
+                span.set("chars", len(text))
 
             # If we extracted text successfully, return it
             if text and text.strip():
-                print(f"Extracted {len(text)} characters from PDF using pypdf")
+                logger.debug("Extracted %d characters from PDF using pypdf", len(text))
                 return text
 
             # No text found - PDF is likely scanned
-            print("PDF has no extractable text. Attempting OCR...")
+            logger.info("PDF has no extractable text. Attempting OCR")
 
             # Try OCR as fallback
-            from src.config import OCR_SPACE_API_KEY
             from src.services.ocr_service import OCRService
 
-            if not OCR_SPACE_API_KEY:
+            if not OCRService.is_available():
                 raise ValueError(
                     "PDF não contém texto extraível (PDF escaneado). "
-                    "Para processar PDFs escaneados, configure OCR_SPACE_API_KEY no arquivo .env. "
-                    "Obtenha uma chave grátis em: https://ocr.space/ocrapi"
+                    "Para processar PDFs escaneados, configure OCR_SPACE_API_KEY no arquivo .env "
+                    "(chave grátis em: https://ocr.space/ocrapi) ou use OCR_BACKENDS=tesseract."
                 )
 
             # Use OCR to extract text
-            text = await OCRService.extract_text_from_pdf(file_path)
+            with track_stage("ocr") as span:
+                text = await OCRService.extract_text_from_pdf(file_path)
+                span.set("chars", len(text))
             return text
 
         except Exception as e:
@@ -77,6 +82,22 @@ class FileParserService:
                 raise
             raise ValueError(f"Erro ao ler PDF: {str(e)}") from e
 
+    @staticmethod
+    def _extract_pdf_text(file_path: str) -> str:
+        """Extract the embedded text of every page with pypdf"""
+        import pypdf
+
+        text = ""
+        with open(file_path, "rb") as file:
+            reader = pypdf.PdfReader(file)
+            # O contexto (e o span do estágio) é copiado para a thread
+            current_span.get(NOOP_SPAN).set("pages", len(reader.pages))
+            for page in reader.pages:
+                page_text = page.extract_text()
+                if page_text:
+                    text += page_text + "\n"
+        return text
+
     @staticmethod
     def parse_txt(file_path: str) -> str:
         try:
@@ -0,0 +1,281 @@
+"""
+Classification History
+
+SQLite (WAL) store of every successful classification, for analytics and
+audits without re-classifying. Each record holds the SHA-256 of the
+classified text (never the text itself), the category, confidence, model,
+the pipeline and Gemini latencies and a timestamp.
+
+Requests never touch the database: ``HistoryWriter.record`` appends to an
+in-memory buffer and a background task writes it in batches, one
+transaction per batch. When the buffer is full (the disk cannot keep up)
+new records are dropped and counted in ``history_records_dropped_total``.
+
+Queries are paginated with a keyset cursor (newest first), so deep pages
+cost the same as the first one and exports read the table page by page.
+"""
+
+import asyncio
+import logging
+import sqlite3
+import threading
+from collections import deque
+from contextlib import suppress
+from dataclasses import asdict, dataclass, fields
+from pathlib import Path
+from typing import Deque, List, Optional, Tuple
+
+from src.config import (
+    HISTORY_BATCH_SIZE,
+    HISTORY_DB_FILE,
+    HISTORY_ENABLED,
+    HISTORY_FLUSH_INTERVAL_SECONDS,
+    HISTORY_MAX_PENDING,
+)
+from src.services.metrics import HISTORY_DROPPED, HISTORY_WRITTEN
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class HistoryRecord:
+    """One classification, as stored in the history"""
+
+    created_at: float
+    content_hash: str
+    source: str
+    category: str
+    confidence: float
+    model: str
+    total_ms: float
+    ai_ms: float
+    id: Optional[int] = None
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+#: Column order of the table, the queries and the CSV export
+FIELDS = tuple(field.name for field in fields(HistoryRecord))
+
+
+class HistoryStore:
+    """Persists classification records in SQLite and queries them by time and category"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database on first use"""
+        if self._conn is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # Com WAL, NORMAL só perde as últimas transações numa queda de energia
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS classifications ("
+                "id INTEGER PRIMARY KEY, created_at REAL NOT NULL, content_hash TEXT NOT NULL, "
+                "source TEXT NOT NULL, category TEXT NOT NULL, confidence REAL NOT NULL, "
+                "model TEXT NOT NULL, total_ms REAL NOT NULL, ai_ms REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS history_created ON classifications (created_at)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS history_category "
+                "ON classifications (category, created_at)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS history_content_hash ON classifications (content_hash)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def close(self) -> None:
+        """Close the database"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def insert_many(self, records: List[HistoryRecord]) -> None:
+        """Write a batch of records in a single transaction"""
+        rows = [tuple(getattr(record, name) for name in FIELDS[:-1]) for record in records]
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN")
+            try:
+                conn.executemany(
+                    f"INSERT INTO classifications ({', '.join(FIELDS[:-1])}) "
+                    f"VALUES ({', '.join('?' * (len(FIELDS) - 1))})",
+                    rows,
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    @staticmethod
+    def _parse_cursor(cursor: str) -> Tuple[float, int]:
+        created_at, _, record_id = cursor.partition("_")
+        return float(created_at), int(record_id)
+
+    def page(
+        self,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        category: Optional[str] = None,
+        content_hash: Optional[str] = None,
+    ) -> Tuple[List[HistoryRecord], Optional[str]]:
+        """
+        Return one page of records, newest first.
+
+        Args:
+            limit: Maximum number of records
+            cursor: ``next_cursor`` of the previous page
+            since: Only records created at or after this Unix time
+            until: Only records created before this Unix time
+            category: Only records of this category
+            content_hash: Only records of this text (SHA-256 hex digest)
+
+        Returns:
+            The records and the cursor of the next page (``None`` on the last page)
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        conditions, params = [], []
+        for condition, value in (
+            ("created_at >= ?", since),
+            ("created_at < ?", until),
+            ("category = ?", category),
+            ("content_hash = ?", content_hash),
+        ):
+            if value is not None:
+                conditions.append(condition)
+                params.append(value)
+        if cursor is not None:
+            created_at, record_id = self._parse_cursor(cursor)
+            conditions.append("(created_at < ? OR (created_at = ? AND id < ?))")
+            params.extend((created_at, created_at, record_id))
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._lock:
+            rows = (
+                self._connect()
+                .execute(
+                    f"SELECT {', '.join(FIELDS)} FROM classifications {where} "
+                    "ORDER BY created_at DESC, id DESC LIMIT ?",
+                    (*params, limit + 1),
+                )
+                .fetchall()
+            )
+        records = [HistoryRecord(*row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = records[-1]
+            next_cursor = f"{last.created_at!r}_{last.id}"
+        return records, next_cursor
+
+
+class HistoryWriter:
+    """Buffers records in memory and writes them to a ``HistoryStore`` in batches"""
+
+    def __init__(
+        self,
+        store: HistoryStore,
+        batch_size: int = 200,
+        flush_interval: float = 1.0,
+        max_pending: int = 10000,
+        enabled: bool = True,
+    ):
+        self.store = store
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.enabled = enabled
+        self._pending: Deque[HistoryRecord] = deque()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def record(self, record: HistoryRecord) -> None:
+        """Queue a record for writing (never blocks)"""
+        if not self.enabled:
+            return
+        if len(self._pending) >= self.max_pending:
+            HISTORY_DROPPED.inc(reason="buffer_full")
+            return
+        self._pending.append(record)
+
+    def start(self) -> None:
+        """Start the background writer on the running event loop"""
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run(), name="history-writer")
+
+    async def stop(self) -> None:
+        """Stop the background writer and write what is still buffered"""
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+        await self.flush()
+
+    async def flush(self) -> int:
+        """
+        Write every buffered record, in batches of ``batch_size``.
+
+        Returns:
+            The number of records written
+        """
+        written = 0
+        while self._pending:
+            batch = [self._pending.popleft() for _ in range(min(self.batch_size, self.pending))]
+            try:
+                await asyncio.to_thread(self.store.insert_many, batch)
+            except Exception:
+                logger.exception("Failed to write %d history records", len(batch))
+                HISTORY_DROPPED.inc(len(batch), reason="write_error")
+                continue
+            HISTORY_WRITTEN.inc(len(batch))
+            written += len(batch)
+        return written
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+
+_store: Optional[HistoryStore] = None
+_writer: Optional[HistoryWriter] = None
+
+
+def get_history_store() -> HistoryStore:
+    """Return the process-wide history store"""
+    global _store
+    if _store is None:
+        _store = HistoryStore(HISTORY_DB_FILE)
+    return _store
+
+
+def get_history_writer() -> HistoryWriter:
+    """Return the process-wide history writer"""
+    global _writer
+    if _writer is None:
+        _writer = HistoryWriter(
+            get_history_store(),
+            batch_size=HISTORY_BATCH_SIZE,
+            flush_interval=HISTORY_FLUSH_INTERVAL_SECONDS,
+            max_pending=HISTORY_MAX_PENDING,
+            enabled=HISTORY_ENABLED,
+        )
+    return _writer
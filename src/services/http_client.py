@@ -0,0 +1,89 @@
+"""
+Shared HTTP client
+
+A single pooled ``httpx.AsyncClient`` shared by every outbound call the
+application makes (currently the OCR.space API). Reusing the client keeps
+connections alive between requests, so DNS, TCP and TLS setup are paid once
+per connection instead of once per call.
+
+The client is opened by the FastAPI lifespan warm-up and closed on
+shutdown. It is also created lazily on first use, so services keep working
+in tests and scripts that never run the lifespan. ``httpx`` itself is only
+imported when the client is built.
+"""
+
+import importlib.util
+import logging
+from typing import TYPE_CHECKING, Optional
+
+from src.config import (
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_ENABLE_HTTP2,
+    HTTP_KEEPALIVE_EXPIRY,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    HTTP_POOL_TIMEOUT,
+    HTTP_READ_TIMEOUT,
+    HTTP_WRITE_TIMEOUT,
+)
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+_client: Optional["httpx.AsyncClient"] = None
+
+
+def _http2_available() -> bool:
+    """Check whether the optional ``h2`` package needed for HTTP/2 is installed."""
+    return importlib.util.find_spec("h2") is not None
+
+
+def build_http_client() -> "httpx.AsyncClient":
+    """
+    Build a new pooled client from the configured limits and timeouts.
+
+    Returns:
+        A configured ``httpx.AsyncClient``
+    """
+    import httpx
+
+    http2 = HTTP_ENABLE_HTTP2
+    if http2 and not _http2_available():
+        logger.warning("HTTP_ENABLE_HTTP2 is set but 'h2' is not installed; using HTTP/1.1")
+        http2 = False
+
+    timeout = httpx.Timeout(
+        connect=HTTP_CONNECT_TIMEOUT,
+        read=HTTP_READ_TIMEOUT,
+        write=HTTP_WRITE_TIMEOUT,
+        pool=HTTP_POOL_TIMEOUT,
+    )
+    limits = httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+    )
+    return httpx.AsyncClient(timeout=timeout, limits=limits, http2=http2)
+
+
+def get_http_client() -> "httpx.AsyncClient":
+    """
+    Return the shared client, creating it on first use.
+
+    Returns:
+        The process-wide ``httpx.AsyncClient``
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = build_http_client()
+    return _client
+
+
+async def close_http_client() -> None:
+    """Close the shared client and release its pooled connections."""
+    global _client
+    if _client is not None:
+        client, _client = _client, None
+        await client.aclose()
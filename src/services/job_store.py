@@ -0,0 +1,331 @@
+"""
+Job Store
+
+SQLite persistence for asynchronous classification jobs (``/api/jobs``).
+Jobs survive restarts and are shared by every worker process on the host.
+
+A job goes ``queued`` -> ``running`` -> ``done`` or ``failed``. Workers claim
+a job with a lease: if the worker dies (crash, restart), the job is claimed
+again once the lease expires, unless it already used ``max_attempts`` (a
+file that kills its worker must not be retried forever), in which case it
+fails. Transient failures are re-queued with a delay until ``max_attempts``
+is reached; failed jobs can be retried by hand.
+
+Finished jobs drop their file content; failed ones keep it for manual
+retries until ``purge_finished`` deletes jobs older than the retention time.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Optional
+
+from src.config import JOB_LEASE_SECONDS, JOB_MAX_ATTEMPTS, JOB_RETENTION_SECONDS, JOBS_DB_FILE
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+@dataclass
+class Job:
+    """A classification job and its outcome"""
+
+    id: str
+    status: str
+    filename: str
+    content_type: str
+    content: Optional[bytes]
+    webhook_url: Optional[str]
+    attempts: int
+    created_at: float
+    updated_at: float
+    run_after: float = 0.0
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    status_code: Optional[int] = None
+
+    def to_dict(self) -> dict:
+        """Public representation (without the file content)"""
+        data = {
+            "id": self.id,
+            "status": self.status,
+            "filename": self.filename,
+            "attempts": self.attempts,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
+        if self.result is not None:
+            data["result"] = self.result
+        if self.error is not None:
+            data["error"] = self.error
+            data["status_code"] = self.status_code
+        return data
+
+
+class JobStore:
+    """Persists jobs in SQLite and hands them out to workers"""
+
+    COLUMNS = (
+        "id, status, filename, content_type, content, webhook_url, attempts, "
+        "created_at, updated_at, run_after, result, error, status_code"
+    )
+
+    def __init__(
+        self,
+        path: str,
+        max_attempts: int = 3,
+        lease_seconds: float = 300.0,
+        retention_seconds: float = 7 * 24 * 3600.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self.retention_seconds = retention_seconds
+        self.clock = clock
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database on first use"""
+        if self._conn is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, status TEXT NOT NULL, filename TEXT NOT NULL, "
+                "content_type TEXT NOT NULL, content BLOB, webhook_url TEXT, "
+                "attempts INTEGER NOT NULL DEFAULT 0, created_at REAL NOT NULL, "
+                "updated_at REAL NOT NULL, run_after REAL NOT NULL DEFAULT 0, "
+                "result TEXT, error TEXT, status_code INTEGER)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, run_after)")
+            self._conn = conn
+        return self._conn
+
+    def close(self) -> None:
+        """Close the database"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    @staticmethod
+    def _to_job(row: tuple) -> Job:
+        (
+            job_id,
+            status,
+            filename,
+            content_type,
+            content,
+            webhook_url,
+            attempts,
+            created_at,
+            updated_at,
+            run_after,
+            result,
+            error,
+            status_code,
+        ) = row
+        return Job(
+            id=job_id,
+            status=status,
+            filename=filename,
+            content_type=content_type,
+            content=content,
+            webhook_url=webhook_url,
+            attempts=attempts,
+            created_at=created_at,
+            updated_at=updated_at,
+            run_after=run_after,
+            result=json.loads(result) if result else None,
+            error=error,
+            status_code=status_code,
+        )
+
+    def create(
+        self,
+        filename: str,
+        content_type: str,
+        content: bytes,
+        webhook_url: Optional[str] = None,
+    ) -> Job:
+        """Enqueue a new job"""
+        now = self.clock()
+        job = Job(
+            id=uuid.uuid4().hex,
+            status=QUEUED,
+            filename=filename,
+            content_type=content_type,
+            content=content,
+            webhook_url=webhook_url,
+            attempts=0,
+            created_at=now,
+            updated_at=now,
+        )
+        with self._lock:
+            self._connect().execute(
+                "INSERT INTO jobs (id, status, filename, content_type, content, webhook_url, "
+                "attempts, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, 0, ?, ?)",
+                (job.id, QUEUED, filename, content_type, content, webhook_url, now, now),
+            )
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Return a job by id, or ``None`` if it does not exist"""
+        with self._lock:
+            row = (
+                self._connect()
+                .execute(f"SELECT {self.COLUMNS} FROM jobs WHERE id = ?", (job_id,))
+                .fetchone()
+            )
+        return self._to_job(row) if row else None
+
+    def claim_next(self) -> Optional[Job]:
+        """
+        Atomically take the oldest runnable job and mark it running.
+
+        Runnable jobs are queued ones whose retry delay has passed, and running
+        ones whose lease expired (their worker died) with attempts left.
+        Expired ones without attempts left are marked failed.
+
+        Returns:
+            The claimed job, or ``None`` if there is nothing to run
+        """
+        now = self.clock()
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, error = ?, status_code = 500, updated_at = ? "
+                    "WHERE status = ? AND updated_at < ? AND attempts >= ?",
+                    (
+                        FAILED,
+                        f"Processamento interrompido {self.max_attempts} vezes",
+                        now,
+                        RUNNING,
+                        now - self.lease_seconds,
+                        self.max_attempts,
+                    ),
+                )
+                row = conn.execute(
+                    f"SELECT {self.COLUMNS} FROM jobs "
+                    "WHERE (status = ? AND run_after <= ?) "
+                    "OR (status = ? AND updated_at < ? AND attempts < ?) "
+                    "ORDER BY created_at LIMIT 1",
+                    (QUEUED, now, RUNNING, now - self.lease_seconds, self.max_attempts),
+                ).fetchone()
+                if row is None:
+                    conn.execute("COMMIT")
+                    return None
+                job = self._to_job(row)
+                conn.execute(
+                    "UPDATE jobs SET status = ?, attempts = attempts + 1, updated_at = ? "
+                    "WHERE id = ?",
+                    (RUNNING, now, job.id),
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        job.status = RUNNING
+        job.attempts += 1
+        job.updated_at = now
+        return job
+
+    def heartbeat(self, job_id: str) -> None:
+        """Renew the lease of a running job"""
+        with self._lock:
+            self._connect().execute(
+                "UPDATE jobs SET updated_at = ? WHERE id = ? AND status = ?",
+                (self.clock(), job_id, RUNNING),
+            )
+
+    def complete(self, job_id: str, result: dict) -> None:
+        """Store the result of a finished job (its file content is dropped)"""
+        with self._lock:
+            self._connect().execute(
+                "UPDATE jobs SET status = ?, result = ?, content = NULL, error = NULL, "
+                "status_code = NULL, updated_at = ? WHERE id = ?",
+                (DONE, json.dumps(result, ensure_ascii=False), self.clock(), job_id),
+            )
+
+    def fail(
+        self,
+        job: Job,
+        error: str,
+        status_code: int,
+        retryable: bool,
+        retry_after: float = 0.0,
+    ) -> str:
+        """
+        Record a failed attempt.
+
+        Retryable failures are re-queued after ``retry_after`` seconds while
+        attempts remain; otherwise the job fails for good.
+
+        Returns:
+            The new status of the job
+        """
+        now = self.clock()
+        status = QUEUED if retryable and job.attempts < self.max_attempts else FAILED
+        with self._lock:
+            self._connect().execute(
+                "UPDATE jobs SET status = ?, error = ?, status_code = ?, run_after = ?, "
+                "updated_at = ? WHERE id = ?",
+                (status, error, status_code, now + retry_after, now, job.id),
+            )
+        return status
+
+    def retry(self, job_id: str) -> bool:
+        """
+        Re-queue a failed job with a fresh set of attempts.
+
+        Returns:
+            Whether the job was failed (and is now queued)
+        """
+        with self._lock:
+            cursor = self._connect().execute(
+                "UPDATE jobs SET status = ?, attempts = 0, run_after = 0, error = NULL, "
+                "status_code = NULL, updated_at = ? WHERE id = ? AND status = ?",
+                (QUEUED, self.clock(), job_id, FAILED),
+            )
+        return cursor.rowcount == 1
+
+    def purge_finished(self) -> int:
+        """
+        Delete done and failed jobs not updated within the retention time.
+
+        Returns:
+            Number of jobs deleted
+        """
+        with self._lock:
+            cursor = self._connect().execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?",
+                (DONE, FAILED, self.clock() - self.retention_seconds),
+            )
+        return cursor.rowcount
+
+
+_store: Optional[JobStore] = None
+
+
+def get_job_store() -> JobStore:
+    """Return the process-wide job store"""
+    global _store
+    if _store is None:
+        _store = JobStore(
+            JOBS_DB_FILE,
+            max_attempts=JOB_MAX_ATTEMPTS,
+            lease_seconds=JOB_LEASE_SECONDS,
+            retention_seconds=JOB_RETENTION_SECONDS,
+        )
+    return _store
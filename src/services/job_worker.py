@@ -0,0 +1,218 @@
+"""
+Job Worker Pool
+
+Background workers that run queued jobs through the classification pipeline
+(parse -> OCR -> classify) and deliver the outcome to the job's webhook.
+
+Workers run as asyncio tasks in the application process and share the
+pipeline's clients. Job work runs with bulk priority, so it yields OCR quota
+to interactive requests. Transient errors (OCR quota, AI or network
+failures) are retried with a delay; invalid input fails the job right away.
+A separate task deletes finished jobs past their retention time.
+"""
+
+import asyncio
+import logging
+from contextlib import suppress
+from typing import List, Optional
+
+from src.config import JOB_RETRY_DELAY_SECONDS, JOB_WEBHOOK_TIMEOUT_SECONDS, JOB_WORKERS
+from src.services.circuit_breaker import CircuitOpenError
+from src.services.http_client import get_http_client
+from src.services.job_store import DONE, QUEUED, Job, JobStore, get_job_store
+from src.services.ocr_backends import OCRTransportError
+from src.services.ocr_quota import OCRQuotaExceededError
+from src.services.pipeline import ClassificationPipeline, to_http_exception
+from src.services.priority import Priority, current_priority
+from src.services.structured_logging import request_id
+from src.services.tracing import get_tracer
+from src.services.webhook_guard import validate_webhook_url
+
+logger = logging.getLogger(__name__)
+
+
+class JobWorkerPool:
+    """A bounded pool of asyncio workers processing jobs from a ``JobStore``"""
+
+    def __init__(
+        self,
+        store: JobStore,
+        workers: int = 2,
+        poll_interval: float = 5.0,
+        retry_delay: float = 30.0,
+        purge_interval: float = 3600.0,
+    ):
+        self.store = store
+        self.workers = workers
+        #: Longest idle wait before checking the store again (jobs from other processes)
+        self.poll_interval = poll_interval
+        self.retry_delay = retry_delay
+        self.purge_interval = purge_interval
+        self._tasks: List[asyncio.Task] = []
+        self._purge_task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+
+    def start(self) -> None:
+        """Start the workers on the running event loop"""
+        if self._tasks:
+            return
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._tasks = [
+            asyncio.create_task(self._run(), name=f"job-worker-{index}")
+            for index in range(self.workers)
+        ]
+        self._purge_task = asyncio.create_task(self._purge(), name="job-purge")
+        logger.info("Started %d job workers", self.workers)
+
+    async def stop(self, drain_timeout: float = 0) -> None:
+        """
+        Stop the workers.
+
+        Idle workers stop right away; jobs in progress get up to
+        ``drain_timeout`` seconds to finish. Jobs still running after that are
+        cancelled and picked up again after their lease expires.
+        """
+        purge_task, self._purge_task = self._purge_task, None
+        if purge_task is not None:
+            purge_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await purge_task
+        tasks, self._tasks = self._tasks, []
+        if not tasks:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        if drain_timeout > 0:
+            _, pending = await asyncio.wait(tasks, timeout=drain_timeout)
+            if pending:
+                logger.warning(
+                    "Cancelling %d jobs still running after shutdown timeout", len(pending)
+                )
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            with suppress(asyncio.CancelledError):
+                await task
+
+    def notify(self) -> None:
+        """Wake an idle worker (called when a job is enqueued)"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            if await self.process_next():
+                continue
+            if self._stopping:
+                break
+            self._wakeup.clear()
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+
+    async def _purge(self) -> None:
+        """Delete finished jobs past their retention time, periodically"""
+        while True:
+            try:
+                purged = await asyncio.to_thread(self.store.purge_finished)
+            except Exception:
+                logger.exception("Failed to purge finished jobs")
+            else:
+                if purged:
+                    logger.info("Purged %d finished jobs", purged)
+            await asyncio.sleep(self.purge_interval)
+
+    async def process_next(self) -> bool:
+        """
+        Claim and run one job.
+
+        Returns:
+            Whether a job was processed
+        """
+        job = await asyncio.to_thread(self.store.claim_next)
+        if job is None:
+            return False
+
+        # Logs do job correlacionados pelo id do job
+        token = request_id.set(f"job-{job.id}")
+        heartbeat = asyncio.create_task(self._heartbeat(job.id))
+        try:
+            with get_tracer().start_trace("job", job_id=job.id, attempt=job.attempts):
+                await self._process(job)
+        finally:
+            heartbeat.cancel()
+            request_id.reset(token)
+        return True
+
+    async def _heartbeat(self, job_id: str) -> None:
+        """Renew the job's lease while it runs"""
+        while True:
+            await asyncio.sleep(self.store.lease_seconds / 3)
+            await asyncio.to_thread(self.store.heartbeat, job_id)
+
+    async def _process(self, job: Job) -> None:
+        logger.info("Running job %s, attempt %d", job.id, job.attempts)
+        token = current_priority.set(Priority.BULK)
+        try:
+            result = await ClassificationPipeline.classify_file(
+                job.filename, job.content_type, job.content or b""
+            )
+        except Exception as e:
+            error = to_http_exception(e)
+            retry_after = (
+                e.retry_after
+                if isinstance(e, (OCRQuotaExceededError, CircuitOpenError))
+                else self.retry_delay
+            )
+            # Erros do cliente (4xx) não mudam numa nova tentativa; falhas de rede
+            # e timeouts do OCR (reportados como 400 nas rotas síncronas) sim
+            retryable = error.status_code >= 500 or isinstance(e, OCRTransportError)
+            status = await asyncio.to_thread(
+                self.store.fail,
+                job,
+                str(error.detail),
+                error.status_code,
+                retryable,
+                retry_after,
+            )
+            logger.warning("Job %s attempt %d failed (%s): %s", job.id, job.attempts, status, e)
+        else:
+            await asyncio.to_thread(self.store.complete, job.id, result)
+            status = DONE
+            logger.info("Job %s done", job.id)
+        finally:
+            current_priority.reset(token)
+
+        if job.webhook_url and status != QUEUED:
+            await self._deliver_webhook(job.id, job.webhook_url)
+
+    async def _deliver_webhook(self, job_id: str, url: str) -> None:
+        """POST the final job state to its webhook (failures are logged, not retried)"""
+        job = await asyncio.to_thread(self.store.get, job_id)
+        try:
+            # Revalidado na entrega: o DNS pode ter mudado desde o envio do job
+            await validate_webhook_url(url)
+            response = await get_http_client().post(
+                url,
+                json=job.to_dict(),
+                timeout=JOB_WEBHOOK_TIMEOUT_SECONDS,
+                follow_redirects=False,
+            )
+            if response.status_code >= 400:
+                logger.warning("Webhook for job %s returned %d", job_id, response.status_code)
+        except Exception as e:
+            logger.warning("Webhook for job %s failed: %s", job_id, e)
+
+
+_pool: Optional[JobWorkerPool] = None
+
+
+def get_job_workers() -> JobWorkerPool:
+    """Return the process-wide job worker pool"""
+    global _pool
+    if _pool is None:
+        _pool = JobWorkerPool(
+            get_job_store(), workers=JOB_WORKERS, retry_delay=JOB_RETRY_DELAY_SECONDS
+        )
+    return _pool
@@ -0,0 +1,127 @@
+"""
+Priority lanes
+
+Admission control in front of the slow external services (Gemini, OCR). Each
+service has a pool of ``capacity`` concurrent calls shared by two lanes:
+
+- interactive work may use every slot and is always admitted first;
+- bulk work may hold at most ``bulk_limit`` slots and only gets a slot when
+  no interactive call is waiting.
+
+So a backfill can soak up the spare capacity without ever making a user of
+the web UI wait behind it. The lane of a call is the ``current_priority`` of
+its context (set per request by ``PriorityMiddleware`` and by job workers).
+"""
+
+import asyncio
+import heapq
+import itertools
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from src.config import (
+    AI_BULK_MAX_CONCURRENCY,
+    AI_MAX_CONCURRENCY,
+    OCR_BULK_MAX_CONCURRENCY,
+    OCR_GLOBAL_MAX_CONCURRENCY,
+)
+from src.services.priority import Priority, current_priority
+
+
+class LaneLimiter:
+    """Concurrency limiter with a strict-priority interactive lane and a capped bulk lane"""
+
+    def __init__(self, name: str, capacity: int, bulk_limit: int):
+        if capacity < 1:
+            raise ValueError(f"Lane capacity must be at least 1 (got {capacity} for {name})")
+        self.name = name
+        self.capacity = capacity
+        self.bulk_limit = max(0, min(bulk_limit, capacity))
+        self._in_use: Dict[Priority, int] = {priority: 0 for priority in Priority}
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+
+    def _can_admit(self, priority: Priority) -> bool:
+        if sum(self._in_use.values()) >= self.capacity:
+            return False
+        return priority == Priority.INTERACTIVE or self._in_use[priority] < self.bulk_limit
+
+    async def acquire(self, priority: Optional[Priority] = None) -> Priority:
+        """
+        Wait for a slot in the lane of ``priority`` (defaults to the current context's).
+
+        Returns:
+            The lane the slot was taken in (pass it to ``release``)
+        """
+        priority = current_priority.get() if priority is None else Priority(priority)
+        # Only queue behind waiters of the same or a higher priority
+        ahead = self._waiters and self._waiters[0][0] <= priority
+        if not ahead and self._can_admit(priority):
+            self._in_use[priority] += 1
+            return priority
+
+        future = asyncio.get_running_loop().create_future()
+        entry = (int(priority), next(self._sequence), future)
+        heapq.heappush(self._waiters, entry)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted right as we were cancelled: hand the slot back
+                self.release(priority)
+            elif entry in self._waiters:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+            raise
+        return priority
+
+    def release(self, priority: Priority) -> None:
+        """Free a slot and admit waiters in priority order"""
+        self._in_use[priority] -= 1
+        while self._waiters:
+            lane, _, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            # Interactive waiters sort first, so a blocked head blocks everyone behind it
+            if not self._can_admit(Priority(lane)):
+                break
+            heapq.heappop(self._waiters)
+            self._in_use[Priority(lane)] += 1
+            future.set_result(None)
+
+    @asynccontextmanager
+    async def slot(self, priority: Optional[Priority] = None) -> AsyncIterator[None]:
+        """Hold a slot for the duration of the block"""
+        lane = await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release(lane)
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        """Return slots in use and waiters per lane"""
+        waiting = {priority: 0 for priority in Priority}
+        for lane, _, future in self._waiters:
+            if not future.done():
+                waiting[Priority(lane)] += 1
+        return {
+            priority.name.lower(): {"in_use": self._in_use[priority], "waiting": waiting[priority]}
+            for priority in Priority
+        }
+
+
+_limiters: Dict[str, LaneLimiter] = {}
+
+LANE_SETTINGS = {
+    "ai": (AI_MAX_CONCURRENCY, AI_BULK_MAX_CONCURRENCY),
+    "ocr": (OCR_GLOBAL_MAX_CONCURRENCY, OCR_BULK_MAX_CONCURRENCY),
+}
+
+
+def get_lane_limiter(service: str) -> LaneLimiter:
+    """Return the process-wide limiter of ``service`` ("ai" or "ocr")"""
+    if service not in _limiters:
+        capacity, bulk_limit = LANE_SETTINGS[service]
+        _limiters[service] = LaneLimiter(service, capacity, bulk_limit)
+    return _limiters[service]
@@ -0,0 +1,253 @@
+"""
+Metrics
+
+A small in-process metrics registry rendered in the Prometheus text format
+on ``/metrics``. Counters, gauges and histograms are plain dicts keyed by
+label values, so recording a sample costs a dict lookup and an addition (no
+locks: updates happen on the event loop thread).
+
+Pipeline stages are timed with ``track_stage``, which records the stage
+latency histogram and the gauge of work in flight per stage, and opens the
+stage's tracing span.
+"""
+
+import bisect
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+from src.services.tracing import get_tracer
+
+LabelValues = Tuple[str, ...]
+
+# Latências de milissegundos (parse de TXT) a minutos (OCR de PDFs grandes)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+TOKEN_BUCKETS = (64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        f'{name}="{_escape(str(value))}"' for name, value in zip(names, values, strict=False)
+    )
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """Base class: a named metric family with fixed label names"""
+
+    type = ""
+
+    def __init__(self, name: str, description: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(labels)
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.type}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    """A value that only goes up"""
+
+    type = "counter"
+
+    def __init__(self, name: str, description: str, labels: Sequence[str] = ()):
+        super().__init__(name, description, labels)
+        self.values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def get(self, **labels: str) -> float:
+        return self.values.get(self._key(labels), 0)
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+            for key, value in sorted(self.values.items())
+        ]
+
+
+class Gauge(Counter):
+    """A value that goes up and down"""
+
+    type = "gauge"
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        self.values[self._key(labels)] = value
+
+
+class Histogram(Metric):
+    """Counts observations in cumulative buckets, with their sum and count"""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, description, labels)
+        self.buckets = tuple(sorted(buckets))
+        #: Label values -> (per-bucket counts, the last one being +Inf), sum
+        self.values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        series = self.values.get(key)
+        if series is None:
+            series = self.values[key] = ([0] * (len(self.buckets) + 1), [0.0])
+        counts, total = series
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        total[0] += value
+
+    def count(self, **labels: str) -> int:
+        series = self.values.get(self._key(labels))
+        return sum(series[0]) if series else 0
+
+    def samples(self) -> List[str]:
+        lines = []
+        bucket_names = (*self.label_names, "le")
+        for key, (counts, total) in sorted(self.values.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts, strict=False):
+                cumulative += count
+                labels = _format_labels(bucket_names, (*key, _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total[0])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    """The set of metrics exposed on ``/metrics``"""
+
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, description: str, labels: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, description, labels))
+
+    def gauge(self, name: str, description: str, labels: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, description, labels))
+
+    def histogram(
+        self,
+        name: str,
+        description: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, description, labels, buckets))
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format"""
+        return "\n".join(metric.render() for metric in self.metrics.values()) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUEST_DURATION = REGISTRY.histogram(
+    "http_request_duration_seconds", "HTTP request latency", ("handler", "method", "status")
+)
+HTTP_REQUESTS_IN_FLIGHT = REGISTRY.gauge("http_requests_in_flight", "HTTP requests being served")
+STAGE_DURATION = REGISTRY.histogram(
+    "pipeline_stage_duration_seconds", "Latency of each classification pipeline stage", ("stage",)
+)
+STAGE_IN_FLIGHT = REGISTRY.gauge(
+    "pipeline_stage_in_flight", "Work in progress in each pipeline stage", ("stage",)
+)
+STAGE_ERRORS = REGISTRY.counter(
+    "pipeline_stage_errors_total", "Pipeline stages that raised an error", ("stage",)
+)
+OCR_REQUESTS = REGISTRY.counter(
+    "ocr_requests_total", "OCR recognition calls by backend and outcome", ("backend", "outcome")
+)
+LLM_ERRORS = REGISTRY.counter("llm_errors_total", "Failed Gemini classifications", ("kind",))
+LLM_PROMPT_TOKENS = REGISTRY.histogram(
+    "llm_prompt_tokens_estimated", "Estimated tokens per Gemini prompt", buckets=TOKEN_BUCKETS
+)
+LLM_RESPONSE_TOKENS = REGISTRY.histogram(
+    "llm_response_tokens_estimated", "Estimated tokens per Gemini response", buckets=TOKEN_BUCKETS
+)
+ADMISSION_IN_FLIGHT = REGISTRY.gauge("admission_in_flight", "Analysis requests admitted")
+ADMISSION_QUEUED = REGISTRY.gauge("admission_queued", "Analysis requests waiting for admission")
+ADMISSION_SHED = REGISTRY.counter("admission_shed_total", "Analysis requests shed with 503")
+LANE_IN_USE = REGISTRY.gauge(
+    "lane_slots_in_use", "Downstream call slots in use", ("service", "lane")
+)
+LANE_WAITING = REGISTRY.gauge(
+    "lane_waiting", "Downstream calls waiting for a slot", ("service", "lane")
+)
+CIRCUIT_OPEN = REGISTRY.gauge(
+    "circuit_open", "Whether a downstream circuit is open (1) or not (0)", ("service",)
+)
+HISTORY_WRITTEN = REGISTRY.counter(
+    "history_records_written_total", "Classifications written to the history store"
+)
+HISTORY_DROPPED = REGISTRY.counter(
+    "history_records_dropped_total", "Classifications not recorded in the history", ("reason",)
+)
+HISTORY_PENDING = REGISTRY.gauge(
+    "history_records_pending", "Classifications waiting to be written to the history"
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count of a text (about 4 characters per token)"""
+    return (len(text) + 3) // 4
+
+
+@contextmanager
+def track_stage(stage: str, **attributes: Any) -> Iterator[Any]:
+    """
+    Time a pipeline stage, count it as in flight while it runs and trace it.
+
+    Yields:
+        The stage's span (a no-op span when the request is not sampled), to
+        annotate with sizes and counts
+    """
+    STAGE_IN_FLIGHT.inc(stage=stage)
+    started = time.perf_counter()
+    try:
+        with get_tracer().span(stage, **attributes) as span:
+            yield span
+    except Exception:
+        STAGE_ERRORS.inc(stage=stage)
+        raise
+    finally:
+        STAGE_DURATION.observe(time.perf_counter() - started, stage=stage)
+        STAGE_IN_FLIGHT.dec(stage=stage)
@@ -0,0 +1,345 @@
+"""
+OCR Backends
+
+``OCRService`` delegates recognition to one of these backends, selected by the
+``OCR_BACKENDS`` setting (a comma-separated list that is also the fallback
+order):
+
+- ``ocrspace``: the OCR.space HTTP API (remote, 1MB per request, calls admitted
+  by the quota scheduler in ``src.services.ocr_quota`` and guarded by a
+  circuit breaker)
+- ``tesseract``: local Tesseract, rendering and recognizing pages in a process
+  pool. Requires the optional packages in ``requirements-ocr.txt`` and the
+  ``tesseract`` binary with the configured language data.
+"""
+
+import asyncio
+import importlib.util
+import io
+import logging
+import multiprocessing
+import os
+import shutil
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Optional
+
+from src.config import (
+    OCR_SPACE_API_KEY,
+    OCR_SPACE_URL,
+    OCR_TESSERACT_DPI,
+    OCR_TESSERACT_LANG,
+    OCR_TESSERACT_WORKERS,
+)
+from src.services.circuit_breaker import get_circuit_breaker
+from src.services.http_client import get_http_client
+from src.services.ocr_preprocess import render_page
+from src.services.ocr_quota import get_quota_scheduler
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+
+class OCRTransportError(ValueError):
+    """Raised when the OCR service times out, cannot be reached or answers with a server error"""
+
+
+class OCRBackend(ABC):
+    """Interface implemented by every OCR backend"""
+
+    #: Name used in the ``OCR_BACKENDS`` setting
+    name: str = ""
+    #: Largest PDF accepted in a single ``recognize`` call (``None`` = unlimited)
+    max_request_bytes: Optional[int] = None
+
+    @abstractmethod
+    def check_available(self) -> None:
+        """
+        Check that the backend is configured and its dependencies are present.
+
+        Raises:
+            ValueError: Describing why the backend cannot be used
+        """
+
+    def is_available(self) -> bool:
+        """Return whether the backend can be used"""
+        try:
+            self.check_available()
+        except ValueError:
+            return False
+        return True
+
+    async def check_capacity(self, requests: int) -> None:
+        """
+        Check that the backend can still serve ``requests`` calls.
+
+        Called before a document is sent, so a request that would run out of
+        quota halfway through fails before spending any calls.
+
+        Raises:
+            ValueError: If the backend cannot serve that many calls
+        """
+        return None
+
+    async def acquire_quota(self) -> None:
+        """
+        Wait until the backend may send one more ``recognize`` call.
+
+        Called before the call takes a slot of the ``ocr`` lane, so a request
+        waiting for quota does not hold a slot another request could use.
+
+        Raises:
+            ValueError: If the call cannot be admitted
+        """
+        return None
+
+    @abstractmethod
+    async def recognize(self, content: bytes, filename: str) -> str:
+        """
+        Recognize the text of a PDF.
+
+        Args:
+            content: PDF content, at most ``max_request_bytes`` long
+            filename: File name of the PDF
+
+        Returns:
+            Text of all pages in page order (may be empty for blank pages)
+
+        Raises:
+            ValueError: If recognition fails
+        """
+
+    async def aclose(self) -> None:
+        """Release resources held by the backend"""
+        return None
+
+
+class OCRSpaceBackend(OCRBackend):
+    """OCR backend using the OCR.space API"""
+
+    name = "ocrspace"
+    BASE_URL = OCR_SPACE_URL
+    MAX_FILE_SIZE_MB = 1.0  # Free tier limit (per request)
+    max_request_bytes = int(MAX_FILE_SIZE_MB * 1024 * 1024)
+
+    def check_available(self) -> None:
+        """
+        Validate that OCR API key is configured.
+
+        Raises:
+            ValueError: If API key is missing
+        """
+        if not OCR_SPACE_API_KEY:
+            raise ValueError(
+                "OCR_SPACE_API_KEY not configured. "
+                "Get a free API key at https://ocr.space/ocrapi"
+            )
+
+    async def _send_request(self, content: bytes, filename: str) -> "httpx.Response":
+        """
+        Send OCR request to API using the shared pooled HTTP client.
+
+        Args:
+            content: PDF content to recognize
+            filename: File name reported to the API
+
+        Returns:
+            API response
+
+        Raises:
+            ValueError: On timeout or network errors
+        """
+        import httpx
+
+        try:
+            client = get_http_client()
+            files = {"file": (filename, content, "application/pdf")}
+            data = {
+                "apikey": OCR_SPACE_API_KEY,
+                "language": "por",  # Portuguese
+                "isOverlayRequired": False,
+                "detectOrientation": True,
+                "scale": True,  # Auto-scale for better accuracy
+            }
+
+            logger.info("Sending PDF to OCR.space API for processing")
+            response = await client.post(self.BASE_URL, files=files, data=data)
+            return response
+
+        except httpx.TimeoutException as e:
+            logger.error("OCR request timed out")
+            raise OCRTransportError(
+                "OCR request timed out. The file may be too large or complex."
+            ) from e
+        except httpx.HTTPError as e:
+            logger.error("Network error during OCR: %s", e)
+            raise OCRTransportError(f"Network error during OCR: {str(e)}") from e
+
+    @staticmethod
+    def _parse_response(response: "httpx.Response") -> str:
+        """
+        Parse and validate OCR API response.
+
+        Args:
+            response: API response
+
+        Returns:
+            Extracted text of all pages in the response, in page order
+
+        Raises:
+            ValueError: If response is invalid or contains errors
+        """
+        # Check response status
+        if response.status_code != 200:
+            logger.error("OCR API returned status %d", response.status_code)
+            raise ValueError(f"OCR API returned status {response.status_code}: {response.text}")
+
+        # Parse response
+        result = response.json()
+
+        # Check for API errors
+        if result.get("IsErroredOnProcessing", False):
+            # Error occurred
+            error_msg = result.get("ErrorMessage", ["Unknown error"])
+            error_details = result.get("ErrorDetails", "")
+            logger.error("OCR processing error: %s", error_msg)
+            raise ValueError(f"OCR processing error: {error_msg}. Details: {error_details}")
+
+        # Success - extract text (one ParsedResult per page)
+        parsed_results = result.get("ParsedResults", [])
+        if not parsed_results:
+            logger.warning("OCR API returned no results")
+            raise ValueError("OCR API returned no results")
+
+        text = "\n".join(page.get("ParsedText", "") for page in parsed_results)
+        logger.info("OCR extracted %d characters from PDF", len(text))
+        return text
+
+    async def check_capacity(self, requests: int) -> None:
+        # Transação SQLite: fora do event loop
+        await asyncio.to_thread(get_quota_scheduler().check_capacity, requests)
+
+    async def acquire_quota(self) -> None:
+        # Com o circuito aberto a chamada falharia: não gastar cota com ela
+        get_circuit_breaker(self.name).check()
+        await get_quota_scheduler().acquire()
+
+    async def recognize(self, content: bytes, filename: str) -> str:
+        # Cota já obtida em acquire_quota. Falhas de rede e erros 5xx contam para
+        # o circuit breaker; erros do arquivo enviado (resposta 200 com erro de
+        # processamento) não
+        async with get_circuit_breaker(self.name).guard():
+            response = await self._send_request(content, filename)
+            if response.status_code >= 500:
+                raise OCRTransportError(f"OCR API returned status {response.status_code}")
+        return self._parse_response(response)
+
+
+def _recognize_page(content: bytes, page_index: int, dpi: int, lang: str) -> str:
+    """
+    Render one PDF page and run Tesseract on it.
+
+    Runs inside a worker process, so it only takes and returns picklable values.
+    """
+    import pypdfium2
+    import pytesseract
+
+    document = pypdfium2.PdfDocument(content)
+    try:
+        image = render_page(document, page_index, dpi)
+    finally:
+        document.close()
+    return pytesseract.image_to_string(image, lang=lang)
+
+
+class TesseractBackend(OCRBackend):
+    """Local OCR backend rendering pages with pdfium and recognizing them with Tesseract"""
+
+    name = "tesseract"
+    REQUIRED_PACKAGES = ("pypdfium2", "pytesseract", "PIL")
+
+    def __init__(self, workers: int = 0, dpi: int = 300, lang: str = "por"):
+        self.workers = workers or os.cpu_count() or 1
+        self.dpi = dpi
+        self.lang = lang
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def check_available(self) -> None:
+        """
+        Validate that the optional packages and the tesseract binary are installed.
+
+        Raises:
+            ValueError: If a dependency is missing
+        """
+        missing = [pkg for pkg in self.REQUIRED_PACKAGES if importlib.util.find_spec(pkg) is None]
+        if missing:
+            raise ValueError(
+                f"Tesseract OCR backend requires {', '.join(missing)}. "
+                "Install them with: pip install -r requirements-ocr.txt"
+            )
+        if shutil.which("tesseract") is None:
+            raise ValueError("Tesseract OCR backend requires the 'tesseract' binary on PATH")
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Create the worker pool on first use"""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    @staticmethod
+    def _count_pages(content: bytes) -> int:
+        import pypdf
+
+        return len(pypdf.PdfReader(io.BytesIO(content)).pages)
+
+    async def recognize(self, content: bytes, filename: str) -> str:
+        try:
+            page_count = await asyncio.to_thread(self._count_pages, content)
+        except Exception as e:
+            raise ValueError(f"Could not read PDF for OCR: {str(e)}") from e
+
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        logger.info("Recognizing %d pages locally with %d workers", page_count, self.workers)
+        try:
+            pages = await asyncio.gather(
+                *(
+                    loop.run_in_executor(
+                        executor, _recognize_page, content, index, self.dpi, self.lang
+                    )
+                    for index in range(page_count)
+                )
+            )
+        except Exception as e:
+            logger.error("Local OCR failed: %s", e)
+            raise ValueError(f"Local OCR failed: {str(e)}") from e
+
+        text = "\n".join(pages)
+        logger.info("Tesseract extracted %d characters from PDF", len(text))
+        return text
+
+    async def aclose(self) -> None:
+        if self._executor is not None:
+            executor, self._executor = self._executor, None
+            await asyncio.to_thread(executor.shutdown, True, cancel_futures=True)
+
+
+def create_backend(name: str) -> OCRBackend:
+    """
+    Instantiate a backend by its ``OCR_BACKENDS`` name.
+
+    Raises:
+        ValueError: If the name is unknown
+    """
+    if name == OCRSpaceBackend.name:
+        return OCRSpaceBackend()
+    if name == TesseractBackend.name:
+        return TesseractBackend(
+            workers=OCR_TESSERACT_WORKERS, dpi=OCR_TESSERACT_DPI, lang=OCR_TESSERACT_LANG
+        )
+    raise ValueError(f"Unknown OCR backend: {name}")
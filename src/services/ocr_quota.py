@@ -0,0 +1,287 @@
+"""
+OCR Quota Scheduler
+
+Tracks OCR.space usage against per-minute and per-day quotas so scanned
+uploads fail early with a clear signal instead of spending calls that the API
+would reject.
+
+- Usage counters are stored in SQLite, so they survive restarts and are shared
+  by every worker process on the host.
+- Requests waiting for per-minute capacity are served in priority order
+  (interactive before bulk). Interactive work waits up to
+  ``OCR_QUOTA_MAX_WAIT_SECONDS``; bulk work is rejected immediately with a
+  retry hint so the caller can defer it.
+- Part of the daily quota (``OCR_QUOTA_BULK_RESERVE``) is kept for interactive
+  work only.
+- The SQLite transactions run in a worker thread, so a worker waiting for the
+  database lock held by another process never blocks the event loop.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.config import (
+    OCR_QUOTA_BULK_RESERVE,
+    OCR_QUOTA_MAX_WAIT_SECONDS,
+    OCR_QUOTA_PER_DAY,
+    OCR_QUOTA_PER_MINUTE,
+    OCR_QUOTA_STATE_FILE,
+)
+from src.services.priority import Priority, current_priority
+
+logger = logging.getLogger(__name__)
+
+
+class OCRQuotaExceededError(ValueError):
+    """Raised when an OCR request cannot be served within the configured quota"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class OCRQuotaScheduler:
+    """Admits OCR requests within per-minute and per-day quotas, by priority"""
+
+    def __init__(
+        self,
+        state_path: str,
+        per_minute: int,
+        per_day: int,
+        bulk_reserve: int = 0,
+        max_wait_seconds: float = 30.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.state_path = state_path
+        self.per_minute = per_minute
+        self.per_day = per_day
+        self.bulk_reserve = bulk_reserve
+        self.max_wait_seconds = max_wait_seconds
+        self.clock = clock
+        #: Longest single sleep while waiting, so waiters notice new minutes
+        self.poll_interval = 1.0
+
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._waiters: List[Tuple[int, int]] = []
+        self._sequence = itertools.count()
+        self._condition: Optional[asyncio.Condition] = None
+        self._condition_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    # --- Persistence ---
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the state database on first use"""
+        if self._conn is None:
+            Path(self.state_path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.state_path, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS ocr_quota ("
+                "window TEXT PRIMARY KEY, period TEXT NOT NULL, count INTEGER NOT NULL)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def close(self) -> None:
+        """Close the state database"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _periods(self, now: float) -> Dict[str, str]:
+        """Return the current minute and UTC day identifiers"""
+        return {
+            "minute": str(int(now // 60)),
+            "day": time.strftime("%Y-%m-%d", time.gmtime(now)),
+        }
+
+    @staticmethod
+    def _read_counts(conn: sqlite3.Connection, periods: Dict[str, str]) -> Dict[str, int]:
+        """Read usage of the current windows (counters from older periods count as 0)"""
+        counts = {"minute": 0, "day": 0}
+        for window, period, count in conn.execute("SELECT window, period, count FROM ocr_quota"):
+            if window in counts and periods[window] == period:
+                counts[window] = count
+        return counts
+
+    # --- Limits ---
+
+    def _daily_limit(self, priority: Priority) -> int:
+        if priority == Priority.INTERACTIVE:
+            return self.per_day
+        return max(0, self.per_day - self.bulk_reserve)
+
+    def _seconds_until_next_day(self, now: float) -> float:
+        return 86400 - (now % 86400)
+
+    def _check_daily(self, used: int, requests: int, priority: Priority, now: float) -> None:
+        """
+        Raise if the daily quota cannot fit ``requests`` more calls.
+
+        Raises:
+            OCRQuotaExceededError: With the time until the daily quota resets
+        """
+        limit = self._daily_limit(priority)
+        if used + requests > limit:
+            retry_after = self._seconds_until_next_day(now)
+            logger.warning("OCR daily quota exhausted for %s work", priority.name.lower())
+            raise OCRQuotaExceededError(
+                f"OCR daily quota exhausted ({used}/{limit} requests used"
+                f"{' by bulk work' if priority == Priority.BULK else ''}). "
+                f"Try again in {retry_after / 3600:.1f} hours.",
+                retry_after=retry_after,
+            )
+
+    def check_capacity(self, requests: int = 1, priority: Optional[Priority] = None) -> None:
+        """
+        Check that the daily quota can still fit ``requests`` calls, without consuming it.
+
+        Raises:
+            OCRQuotaExceededError: If the daily quota is insufficient
+        """
+        priority = current_priority.get() if priority is None else priority
+        now = self.clock()
+        with self._lock:
+            counts = self._read_counts(self._connect(), self._periods(now))
+        self._check_daily(counts["day"], requests, priority, now)
+
+    def _try_consume(self, priority: Priority) -> Optional[float]:
+        """
+        Atomically consume one request if both windows have capacity.
+
+        Returns:
+            ``None`` if the request was admitted, otherwise the seconds until
+            the per-minute window resets
+
+        Raises:
+            OCRQuotaExceededError: If the daily quota is exhausted
+        """
+        now = self.clock()
+        periods = self._periods(now)
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                counts = self._read_counts(conn, periods)
+                self._check_daily(counts["day"], 1, priority, now)
+                if counts["minute"] >= self.per_minute:
+                    conn.execute("COMMIT")
+                    return 60 - (now % 60)
+                conn.executemany(
+                    "INSERT INTO ocr_quota (window, period, count) VALUES (?, ?, ?) "
+                    "ON CONFLICT(window) DO UPDATE SET period = excluded.period, "
+                    "count = excluded.count",
+                    [(window, periods[window], counts[window] + 1) for window in periods],
+                )
+                conn.execute("COMMIT")
+                return None
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def usage(self) -> Dict[str, int]:
+        """Return current usage and limits of both windows"""
+        now = self.clock()
+        with self._lock:
+            counts = self._read_counts(self._connect(), self._periods(now))
+        return {
+            "minute_used": counts["minute"],
+            "minute_limit": self.per_minute,
+            "day_used": counts["day"],
+            "day_limit": self.per_day,
+            "queued": len(self._waiters),
+        }
+
+    # --- Scheduling ---
+
+    def _get_condition(self) -> asyncio.Condition:
+        """Return the condition for the running loop (tests run several loops)"""
+        loop = asyncio.get_running_loop()
+        if self._condition is None or self._condition_loop is not loop:
+            self._condition = asyncio.Condition()
+            self._condition_loop = loop
+        return self._condition
+
+    def _max_wait(self, priority: Priority) -> float:
+        return self.max_wait_seconds if priority == Priority.INTERACTIVE else 0.0
+
+    async def acquire(self, priority: Optional[Priority] = None) -> None:
+        """
+        Wait for quota to send one OCR request.
+
+        Args:
+            priority: Priority of the request (defaults to the current context's)
+
+        Raises:
+            OCRQuotaExceededError: If the daily quota is exhausted, or the
+                per-minute quota does not free up within the allowed wait
+        """
+        priority = current_priority.get() if priority is None else priority
+        condition = self._get_condition()
+        ticket = (int(priority), next(self._sequence))
+        deadline = self.clock() + self._max_wait(priority)
+        heapq.heappush(self._waiters, ticket)
+
+        try:
+            async with condition:
+                while True:
+                    retry_after = None
+                    if self._waiters[0] == ticket:
+                        # BEGIN IMMEDIATE pode esperar por outro worker: fora do event loop
+                        retry_after = await asyncio.to_thread(self._try_consume, priority)
+                        if retry_after is None:
+                            return
+                    else:
+                        # Someone with higher priority (or earlier) is ahead
+                        retry_after = 60 - (self.clock() % 60)
+
+                    remaining = deadline - self.clock()
+                    if retry_after > remaining and self._waiters[0] == ticket:
+                        raise OCRQuotaExceededError(
+                            f"OCR per-minute quota exhausted ({self.per_minute} requests/minute). "
+                            f"Try again in {retry_after:.0f} seconds.",
+                            retry_after=retry_after,
+                        )
+                    if remaining <= 0:
+                        raise OCRQuotaExceededError(
+                            "OCR quota busy serving higher priority requests. Try again later.",
+                            retry_after=retry_after,
+                        )
+
+                    timeout = max(0.0, min(retry_after, remaining, self.poll_interval))
+                    try:
+                        await asyncio.wait_for(condition.wait(), timeout=timeout)
+                    except asyncio.TimeoutError:
+                        pass
+        finally:
+            if ticket in self._waiters:
+                self._waiters.remove(ticket)
+                heapq.heapify(self._waiters)
+            async with condition:
+                condition.notify_all()
+
+
+_scheduler: Optional[OCRQuotaScheduler] = None
+
+
+def get_quota_scheduler() -> OCRQuotaScheduler:
+    """Return the process-wide OCR.space quota scheduler"""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = OCRQuotaScheduler(
+            state_path=OCR_QUOTA_STATE_FILE,
+            per_minute=OCR_QUOTA_PER_MINUTE,
+            per_day=OCR_QUOTA_PER_DAY,
+            bulk_reserve=OCR_QUOTA_BULK_RESERVE,
+            max_wait_seconds=OCR_QUOTA_MAX_WAIT_SECONDS,
+        )
+    return _scheduler
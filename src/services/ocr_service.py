@@ -1,44 +1,148 @@
 """
-OCR Service using OCR.space API
+OCR Service
 
 This service provides OCR capabilities for scanned PDFs that don't have
-extractable text. Uses the free OCR.space API.
-
-Free tier limitations:
-- 25,000 requests/month
-- 500 requests/day
-- 1MB file size limit
+extractable text. Recognition is delegated to the backends configured in
+``OCR_BACKENDS`` (see ``src.services.ocr_backends``), tried in order until
+one succeeds.
+
+Scanned pages can optionally be downsampled and recompressed first
+(``OCR_PREPROCESS``). PDFs still larger than a backend's per-request limit
+(1MB on the OCR.space free tier) are split into page ranges that fit, sent
+concurrently and merged back in page order.
 """
 
+import asyncio
+import io
 import logging
+from dataclasses import dataclass
 from pathlib import Path
+from typing import TYPE_CHECKING, List, Optional
+
+from src.config import (
+    OCR_BACKENDS,
+    OCR_MAX_CONCURRENCY,
+    OCR_PREPROCESS,
+    OCR_PREPROCESS_DPI,
+    OCR_PREPROCESS_JPEG_QUALITY,
+    OCR_PREPROCESS_MODE,
+)
+from src.services.lanes import get_lane_limiter
+from src.services.metrics import OCR_REQUESTS
+from src.services.ocr_backends import OCRBackend, create_backend
+from src.services.ocr_preprocess import PDFPreprocessor
+from src.services.tracing import NOOP_SPAN, current_span, get_tracer
+
+if TYPE_CHECKING:
+    import pypdf
+
+logger = logging.getLogger(__name__)
 
-import httpx
 
-from src.config import OCR_SPACE_API_KEY
+@dataclass
+class PageRange:
+    """A contiguous range of PDF pages (0-based, end exclusive) serialized as a PDF"""
 
-logger = logging.getLogger(__name__)
+    start: int
+    end: int
+    content: bytes
 
 
 class OCRService:
-    """Service for performing OCR on PDF files using OCR.space API"""
+    """Service for performing OCR on PDF files through pluggable backends"""
+
+    MAX_TOTAL_FILE_SIZE_MB = 10.0  # Same limit as FileParserService
+
+    _backends: Optional[List[OCRBackend]] = None
+
+    @staticmethod
+    def get_backends() -> List[OCRBackend]:
+        """
+        Return the configured backends in fallback order, creating them on first use.
 
-    BASE_URL = "https://api.ocr.space/parse/image"
-    MAX_FILE_SIZE_MB = 1.0  # Free tier limit
+        Returns:
+            Backends listed in ``OCR_BACKENDS``
+        """
+        if OCRService._backends is None:
+            OCRService._backends = [create_backend(name) for name in OCR_BACKENDS]
+        return OCRService._backends
 
     @staticmethod
-    def _validate_api_key() -> None:
+    def _available_backends() -> List[OCRBackend]:
         """
-        Validate that OCR API key is configured.
+        Return the configured backends that can currently be used.
 
         Raises:
-            ValueError: If API key is missing
+            ValueError: If none of the configured backends is available
         """
-        if not OCR_SPACE_API_KEY:
+        available = []
+        errors = []
+        for backend in OCRService.get_backends():
+            try:
+                backend.check_available()
+                available.append(backend)
+            except ValueError as e:
+                errors.append(e)
+
+        if not available:
+            if len(errors) == 1:
+                raise errors[0]
             raise ValueError(
-                "OCR_SPACE_API_KEY not configured. "
-                "Get a free API key at https://ocr.space/ocrapi"
+                "No OCR backend available: " + "; ".join(str(error) for error in errors)
+            )
+        return available
+
+    @staticmethod
+    def get_preprocessor() -> Optional[PDFPreprocessor]:
+        """
+        Return the configured preprocessor, or ``None`` when preprocessing is off.
+
+        Preprocessing is skipped with a warning if its optional packages are missing.
+        """
+        if not OCR_PREPROCESS:
+            return None
+        if not PDFPreprocessor.is_available():
+            logger.warning(
+                "OCR_PREPROCESS is enabled but pypdfium2/Pillow are not installed; "
+                "install requirements-ocr.txt. Sending PDFs unchanged."
             )
+            return None
+        return PDFPreprocessor(
+            target_dpi=OCR_PREPROCESS_DPI,
+            color_mode=OCR_PREPROCESS_MODE,
+            jpeg_quality=OCR_PREPROCESS_JPEG_QUALITY,
+        )
+
+    @staticmethod
+    async def _preprocess(content: bytes) -> bytes:
+        """
+        Downsample and recompress a scanned PDF if preprocessing is enabled.
+
+        Failures fall back to the original content, since preprocessing is an
+        optimization and the backends can still handle the original PDF.
+        """
+        preprocessor = OCRService.get_preprocessor()
+        if preprocessor is None:
+            return content
+        try:
+            result = await asyncio.to_thread(preprocessor.process, content)
+        except Exception as e:
+            logger.warning("OCR preprocessing failed, sending original PDF: %s", e)
+            return content
+        return result.content
+
+    @staticmethod
+    def is_available() -> bool:
+        """Return whether at least one configured backend can be used"""
+        return any(backend.is_available() for backend in OCRService.get_backends())
+
+    @staticmethod
+    async def aclose() -> None:
+        """Release resources held by the backends (worker pools)"""
+        if OCRService._backends is not None:
+            backends, OCRService._backends = OCRService._backends, None
+            for backend in backends:
+                await backend.aclose()
 
     @staticmethod
     def _validate_file_exists(file_path: str) -> Path:
@@ -62,7 +166,10 @@ class OCRService:
     @staticmethod
     def _validate_file_size(path: Path) -> None:
         """
-        Validate that file is within size limits.
+        Validate that file is within the total size limit.
+
+        Files above the per-request limit are split into page ranges, so only
+        the overall document size is checked here.
 
         Args:
             path: Path to the file
@@ -71,89 +178,100 @@ class OCRService:
             ValueError: If file exceeds size limit
         """
         file_size_mb = path.stat().st_size / (1024 * 1024)
-        if file_size_mb > OCRService.MAX_FILE_SIZE_MB:
+        if file_size_mb > OCRService.MAX_TOTAL_FILE_SIZE_MB:
             raise ValueError(
                 f"File too large for OCR ({file_size_mb:.2f}MB). "
-                f"OCR.space free tier has {OCRService.MAX_FILE_SIZE_MB}MB limit. "
-                "Consider compressing the PDF or upgrading API plan."
+                f"Maximum supported size is {OCRService.MAX_TOTAL_FILE_SIZE_MB}MB."
             )
 
     @staticmethod
-    async def _send_ocr_request(file_path: str, path: Path) -> httpx.Response:
+    def _write_pages(reader: "pypdf.PdfReader", start: int, end: int) -> bytes:
         """
-        Send OCR request to API.
+        Serialize pages ``start`` to ``end`` (exclusive) as a standalone PDF.
 
         Args:
-            file_path: Path to the file
-            path: Path object for the file
+            reader: Source PDF reader
+            start: First page index
+            end: Page index after the last page
 
         Returns:
-            API response
-
-        Raises:
-            ValueError: On timeout or network errors
+            PDF bytes containing only the selected pages
         """
-        try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                with open(file_path, "rb") as f:
-                    files = {"file": (path.name, f, "application/pdf")}
-                    data = {
-                        "apikey": OCR_SPACE_API_KEY,
-                        "language": "por",  # Portuguese
-                        "isOverlayRequired": False,
-                        "detectOrientation": True,
-                        "scale": True,  # Auto-scale for better accuracy
-                    }
-
-                    logger.info("Sending PDF to OCR.space API for processing")
-                    response = await client.post(OCRService.BASE_URL, files=files, data=data)
-            return response
-
-        except httpx.TimeoutException as e:
-            logger.error("OCR request timed out")
-            raise ValueError("OCR request timed out. The file may be too large or complex.") from e
-        except httpx.HTTPError as e:
-            logger.error(f"Network error during OCR: {e}")
-            raise ValueError(f"Network error during OCR: {str(e)}") from e
+        import pypdf
+
+        writer = pypdf.PdfWriter()
+        for index in range(start, end):
+            writer.add_page(reader.pages[index])
+        buffer = io.BytesIO()
+        writer.write(buffer)
+        return buffer.getvalue()
 
     @staticmethod
-    def _parse_ocr_response(response: httpx.Response) -> str:
+    def _split_pdf(content: bytes, max_bytes: int) -> List[PageRange]:
         """
-        Parse and validate OCR API response.
+        Split a PDF into page ranges that each fit within ``max_bytes``.
+
+        Pages are packed greedily using their standalone sizes, which
+        over-estimate the combined size because shared resources are counted
+        once per page. Any range that still ends up too large is halved.
 
         Args:
-            response: API response
+            content: PDF file content
+            max_bytes: Maximum size of each serialized range
 
         Returns:
-            Extracted text
+            Page ranges in page order
 
         Raises:
-            ValueError: If response is invalid or contains errors
+            ValueError: If the PDF cannot be read or a single page exceeds the limit
         """
-        # Check response status
-        if response.status_code != 200:
-            logger.error(f"OCR API returned status {response.status_code}")
-            raise ValueError(f"OCR API returned status {response.status_code}: {response.text}")
-
-        # Parse response
-        result = response.json()
+        import pypdf
 
-        # Check for API errors
-        if result.get("IsErroredOnProcessing", False):
-            # Error occurred
-            error_msg = result.get("ErrorMessage", ["Unknown error"])
-            error_details = result.get("ErrorDetails", "")
-            logger.error(f"OCR processing error: {error_msg}")
-            raise ValueError(f"OCR processing error: {error_msg}. Details: {error_details}")
-
-        # Success - extract text
-        parsed_results = result.get("ParsedResults", [])
-        if not parsed_results:
-            logger.warning("OCR API returned no results")
-            raise ValueError("OCR API returned no results")
+        try:
+            reader = pypdf.PdfReader(io.BytesIO(content))
+            page_count = len(reader.pages)
+        except Exception as e:
+            raise ValueError(f"Could not split PDF for OCR: {str(e)}") from e
+
+        page_sizes = []
+        for index in range(page_count):
+            size = len(OCRService._write_pages(reader, index, index + 1))
+            if size > max_bytes:
+                raise ValueError(
+                    f"Page {index + 1} is too large for OCR ({size / (1024 * 1024):.2f}MB). "
+                    f"The OCR backend accepts at most {max_bytes / (1024 * 1024):.2f}MB per request."
+                )
+            page_sizes.append(size)
+
+        bounds = []
+        start, total = 0, 0
+        for index, size in enumerate(page_sizes):
+            if index > start and total + size > max_bytes:
+                bounds.append((start, index))
+                start, total = index, 0
+            total += size
+        if page_count:
+            bounds.append((start, page_count))
+
+        ranges: List[PageRange] = []
+        while bounds:
+            start, end = bounds.pop(0)
+            data = OCRService._write_pages(reader, start, end)
+            if len(data) > max_bytes and end - start > 1:
+                middle = (start + end) // 2
+                bounds[:0] = [(start, middle), (middle, end)]
+                continue
+            ranges.append(PageRange(start=start, end=end, content=data))
+        return ranges
 
-        text = parsed_results[0].get("ParsedText", "")
+    @staticmethod
+    def _validate_extracted_text(text: str) -> None:
+        """
+        Validate that OCR produced some text.
 
+        Raises:
+            ValueError: If the text is empty or whitespace only
+        """
         if not text or not text.strip():
             logger.warning("OCR could not extract any text from PDF")
             raise ValueError(
@@ -161,13 +279,84 @@ class OCRService:
                 "The PDF may be blank or image quality is too low."
             )
 
-        logger.info(f"OCR extracted {len(text)} characters from PDF")
+    @staticmethod
+    async def _recognize(backend: OCRBackend, content: bytes, filename: str, **attributes) -> str:
+        """Send one OCR request, holding a slot of the ``ocr`` lane while it runs"""
+        # Esperar pela cota antes de ocupar a lane: a espera pode levar até um minuto
+        await backend.acquire_quota()
+        async with get_lane_limiter("ocr").slot():
+            with get_tracer().span("ocr.request", bytes=len(content), **attributes):
+                return await backend.recognize(content, filename)
+
+    @staticmethod
+    async def _extract_text_from_ranges(
+        backend: OCRBackend, ranges: List[PageRange], filename: str
+    ) -> str:
+        """
+        OCR page ranges concurrently and merge their text in page order.
+
+        Args:
+            backend: Backend used to recognize each range
+            ranges: Page ranges produced by ``_split_pdf``
+            filename: Original file name, used to name each range
+
+        Returns:
+            Merged text of all ranges
+        """
+        semaphore = asyncio.Semaphore(OCR_MAX_CONCURRENCY)
+        stem = Path(filename).stem
+
+        async def recognize(page_range: PageRange) -> str:
+            name = f"{stem}_p{page_range.start + 1}-{page_range.end}.pdf"
+            async with semaphore:
+                return await OCRService._recognize(
+                    backend,
+                    page_range.content,
+                    name,
+                    first_page=page_range.start + 1,
+                    pages=page_range.end - page_range.start,
+                )
+
+        logger.info(
+            "Sending %d page ranges to OCR (concurrency %d)", len(ranges), OCR_MAX_CONCURRENCY
+        )
+        tasks = [asyncio.create_task(recognize(page_range)) for page_range in ranges]
+        try:
+            texts = await asyncio.gather(*tasks)
+        finally:
+            # Uma faixa falhou: o texto seria descartado, não gastar cota com as demais
+            for task in tasks:
+                task.cancel()
+        return "\n".join(texts)
+
+    @staticmethod
+    async def _extract_with_backend(backend: OCRBackend, content: bytes, filename: str) -> str:
+        """
+        Extract text with a single backend, splitting the PDF if it exceeds the backend limit.
+
+        Raises:
+            ValueError: If extraction fails or produces no text
+        """
+        max_bytes = backend.max_request_bytes
+        if max_bytes is None or len(content) <= max_bytes:
+            await backend.check_capacity(1)
+            text = await OCRService._recognize(backend, content, filename)
+        else:
+            ranges = await asyncio.to_thread(OCRService._split_pdf, content, max_bytes)
+            current_span.get(NOOP_SPAN).set("ranges", len(ranges))
+            await backend.check_capacity(len(ranges))
+            text = await OCRService._extract_text_from_ranges(backend, ranges, filename)
+
+        OCRService._validate_extracted_text(text)
         return text
 
     @staticmethod
     async def extract_text_from_pdf(file_path: str) -> str:
         """
-        Extract text from a PDF file using OCR.space API.
+        Extract text from a PDF file using the configured OCR backends.
+
+        Backends are tried in ``OCR_BACKENDS`` order; the next one is used
+        when a backend fails.
 
         Args:
             file_path: Path to the PDF file
@@ -176,22 +365,32 @@ class OCRService:
             Extracted text from the PDF
 
         Raises:
-            ValueError: If OCR extraction fails or API key is missing
+            ValueError: If OCR extraction fails or no backend is available
             FileNotFoundError: If file doesn't exist
         """
         # Validate preconditions
-        OCRService._validate_api_key()
+        backends = OCRService._available_backends()
         path = OCRService._validate_file_exists(file_path)
         OCRService._validate_file_size(path)
-
-        # Send request and parse response
-        try:
-            response = await OCRService._send_ocr_request(file_path, path)
-            return OCRService._parse_ocr_response(response)
-        except ValueError:
-            # Re-raise ValueError as-is (already handled)
-            raise
-        except Exception as e:
-            # Catch any unexpected errors
-            logger.exception("Unexpected error during OCR")
-            raise ValueError(f"Unexpected error during OCR: {str(e)}") from e
+        content = await OCRService._preprocess(path.read_bytes())
+
+        last_error: Optional[ValueError] = None
+        for attempt, backend in enumerate(backends, start=1):
+            try:
+                with get_tracer().span(
+                    "ocr.backend", backend=backend.name, attempt=attempt, bytes=len(content)
+                ):
+                    text = await OCRService._extract_with_backend(backend, content, path.name)
+                OCR_REQUESTS.inc(backend=backend.name, outcome="ok")
+                return text
+            except ValueError as e:
+                last_error = e
+            except Exception as e:
+                # Catch any unexpected errors
+                logger.exception("Unexpected error during OCR")
+                last_error = ValueError(f"Unexpected error during OCR: {str(e)}")
+                last_error.__cause__ = e
+            OCR_REQUESTS.inc(backend=backend.name, outcome="error")
+            logger.warning("OCR backend '%s' failed: %s", backend.name, last_error)
+
+        raise last_error
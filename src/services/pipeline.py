@@ -0,0 +1,167 @@
+"""
+Classification pipeline
+
+The steps shared by every way of submitting an email (file upload, batch
+upload, JSON text): file parsing, text cleaning, security validation and
+classification. Successful classifications are recorded in the history.
+"""
+
+import asyncio
+import hashlib
+import logging
+import math
+import tempfile
+import time
+from pathlib import Path
+
+from fastapi import HTTPException
+
+from src.services.ai_service import get_ai_service
+from src.services.circuit_breaker import CircuitOpenError
+from src.services.file_parser import FileParserService
+from src.services.history_store import HistoryRecord, get_history_writer
+from src.services.ocr_quota import OCRQuotaExceededError
+from src.services.security_service import SecurityService
+from src.services.structured_logging import loggable_content
+from src.services.tracing import get_tracer
+
+logger = logging.getLogger(__name__)
+
+ALLOWED_CONTENT_TYPES = {"application/pdf", "text/plain"}
+
+
+def _write_temp_file(content: bytes, suffix: str) -> str:
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+        tmp.write(content)
+        return tmp.name
+
+
+def to_http_exception(error: Exception) -> HTTPException:
+    """Map pipeline errors to the HTTP error reported to the client"""
+    if isinstance(error, HTTPException):
+        return error
+    if isinstance(error, (OCRQuotaExceededError, CircuitOpenError)):
+        return HTTPException(
+            status_code=503,
+            detail=str(error),
+            headers={"Retry-After": str(math.ceil(error.retry_after))},
+        )
+    if isinstance(error, ValueError):
+        return HTTPException(status_code=400, detail=str(error))
+    if isinstance(error, RuntimeError):
+        return HTTPException(status_code=500, detail=str(error))
+    return HTTPException(status_code=500, detail=f"Erro ao processar arquivo: {str(error)}")
+
+
+class ClassificationPipeline:
+    @staticmethod
+    def prepare_text(text: str, clean: bool = True) -> str:
+        """
+        Clean and validate email text before classification.
+
+        Args:
+            text: Email text
+            clean: Whether to normalize the text (already done by ``FileParserService.parse_file``)
+
+        Returns:
+            The text to classify
+
+        Raises:
+            ValueError: If the text is empty
+            HTTPException: If the text is too long or contains suspicious content
+        """
+        if clean:
+            text = FileParserService.clean_text(text)
+        if not text or not text.strip():
+            raise ValueError("Conteúdo do email não pode estar vazio")
+
+        SecurityService.validate_input_content(text)
+        return text
+
+    @staticmethod
+    async def classify_text(text: str, clean: bool = True) -> dict:
+        """
+        Run the whole pipeline on email text.
+
+        Returns:
+            The classification (category, confidence, suggested_reply, reasoning)
+
+        Raises:
+            ValueError: If the text is empty or the AI response is invalid
+            HTTPException: If the text fails security validation
+            CircuitOpenError: If Gemini is failing
+            RuntimeError: If the AI service fails
+        """
+        return await ClassificationPipeline._classify(text, clean, "text", time.perf_counter())
+
+    @staticmethod
+    async def _classify(text: str, clean: bool, source: str, started: float) -> dict:
+        """Classify prepared text and record the result in the history"""
+        prepared = ClassificationPipeline.prepare_text(text, clean=clean)
+        logger.debug("Classifying email text %s", loggable_content(prepared))
+        ai_service = get_ai_service()
+        ai_started = time.perf_counter()
+        result = await ai_service.classify_email(prepared)
+        finished = time.perf_counter()
+
+        # Só enfileirado: a gravação em SQLite acontece em background
+        get_history_writer().record(
+            HistoryRecord(
+                created_at=time.time(),
+                content_hash=hashlib.sha256(prepared.encode()).hexdigest(),
+                source=source,
+                category=result["category"],
+                confidence=result["confidence"],
+                model=ai_service.model_name,
+                total_ms=(finished - started) * 1000,
+                ai_ms=(finished - ai_started) * 1000,
+            )
+        )
+        return result
+
+    @staticmethod
+    async def classify_file(filename: str, content_type: str, content: bytes) -> dict:
+        """
+        Parse an uploaded PDF or TXT file and classify its text.
+
+        Args:
+            filename: Uploaded file name (its extension selects the parser)
+            content_type: Uploaded file content type
+            content: File content
+
+        Returns:
+            The classification (category, confidence, suggested_reply, reasoning)
+
+        Raises:
+            HTTPException: If the file type, size or content is invalid
+            ValueError: If the file cannot be parsed
+            OCRQuotaExceededError: If a scanned PDF cannot be OCR'd within quota
+            CircuitOpenError: If Gemini or OCR.space is failing
+            RuntimeError: If the AI service fails
+        """
+        started = time.perf_counter()
+        if content_type not in ALLOWED_CONTENT_TYPES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Tipo de arquivo não suportado. Use PDF ou TXT. Recebido: {content_type}",
+            )
+        if not content:
+            raise HTTPException(status_code=400, detail="Arquivo vazio ou sem conteúdo válido")
+        SecurityService.validate_file_size(len(content))
+
+        logger.debug("Parsing upload (%s, %d bytes)", content_type, len(content))
+        with get_tracer().span("temp_file.write", bytes=len(content)):
+            tmp_path = await asyncio.to_thread(
+                _write_temp_file, content, Path(filename or "").suffix
+            )
+        try:
+            email_content = await FileParserService.parse_file(tmp_path)
+        finally:
+            Path(tmp_path).unlink(missing_ok=True)
+
+        if not email_content or not email_content.strip():
+            raise HTTPException(status_code=400, detail="Arquivo vazio ou sem conteúdo válido")
+
+        # Texto já limpo pelo parser
+        source = "pdf" if content_type == "application/pdf" else "txt"
+        return await ClassificationPipeline._classify(email_content, False, source, started)
@@ -0,0 +1,23 @@
+"""
+Request priority
+
+Work is tagged as interactive (a user waiting on the web UI or a single API
+call) or bulk (batch uploads, background jobs). The priority of the work in
+progress is kept in a context variable, so services deep in the pipeline can
+read it without threading it through every call.
+"""
+
+from contextvars import ContextVar
+from enum import IntEnum
+
+
+class Priority(IntEnum):
+    """Priority of a unit of work; lower values are served first"""
+
+    INTERACTIVE = 0
+    BULK = 1
+
+
+current_priority: ContextVar[Priority] = ContextVar(
+    "current_priority", default=Priority.INTERACTIVE
+)
@@ -0,0 +1,579 @@
+"""
+Rate Limit Backends
+
+Storage for the per-client request counters behind ``SecurityService``,
+selected by the ``RATE_LIMIT_BACKEND`` setting:
+
+- ``memory``: counters in process memory. Fastest, but each worker process
+  has its own counters (N workers allow N times the configured limits) and
+  they reset on restart.
+- ``sqlite``: counters in a SQLite database in WAL mode
+  (``RATE_LIMIT_STATE_FILE``), shared by every worker on the host and kept
+  across restarts.
+- ``redis``: counters in Redis (``RATE_LIMIT_REDIS_URL``), shared by every
+  node. Requires the ``redis`` package.
+
+All backends count requests in the same time buckets. Checking a client
+against the limits and recording its requests is a single atomic operation
+(``try_add_requests``), so concurrent requests from one client, even on
+different workers, can never go over a limit together; requests that end up
+not counting (failed classifications) are taken back with ``remove_requests``.
+
+The ``sqlite`` and ``redis`` backends block on I/O (``blocking``), so their
+methods are called from a worker thread, never on the event loop.
+"""
+
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+from src.config import RATE_LIMIT_REDIS_URL, RATE_LIMIT_STATE_FILE
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitBackend(ABC):
+    """Interface implemented by every rate limit backend"""
+
+    #: Name used in the ``RATE_LIMIT_BACKEND`` setting
+    name: str = ""
+
+    SHORT_WINDOW_SECONDS = 5 * 60
+    SHORT_BUCKET_SECONDS = 10
+    LONG_WINDOW_SECONDS = 24 * 60 * 60
+    LONG_BUCKET_SECONDS = 15 * 60
+
+    #: Whether the backend does blocking I/O and must be called off the event loop
+    blocking = False
+
+    @abstractmethod
+    def add_request(self, client_ip: str) -> None:
+        """Record a request for client IP"""
+
+    @abstractmethod
+    def get_counts(self, client_ip: str) -> Tuple[int, int]:
+        """Get request counts for the 5-minute and 24-hour windows"""
+
+    @abstractmethod
+    def try_add_requests(
+        self, client_ip: str, requests: int, short_limit: int, long_limit: int
+    ) -> Tuple[bool, int, int]:
+        """
+        Record ``requests`` requests for client IP unless that exceeds a limit, atomically.
+
+        Returns:
+            Whether the requests were recorded and the 5-minute and 24-hour
+            counts after the call
+        """
+
+    @abstractmethod
+    def remove_requests(self, client_ip: str, requests: int) -> None:
+        """Take back requests recorded by ``try_add_requests``"""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Forget all clients"""
+
+    def evict_idle(self) -> int:
+        """
+        Remove counters that fell out of both windows.
+
+        Returns:
+            Number of clients (or stored entries) evicted
+        """
+        return 0
+
+    def close(self) -> None:
+        """Release resources held by the backend"""
+        return None
+
+    def _bucket_ranges(self, now: float) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+        """Return the first and current bucket index of the short and long windows"""
+        short = int(now // self.SHORT_BUCKET_SECONDS)
+        long = int(now // self.LONG_BUCKET_SECONDS)
+        return (
+            (short - self.SHORT_WINDOW_SECONDS // self.SHORT_BUCKET_SECONDS, short),
+            (long - self.LONG_WINDOW_SECONDS // self.LONG_BUCKET_SECONDS, long),
+        )
+
+    async def run_eviction(self, interval_seconds: float = 60.0) -> None:
+        """Evict idle clients periodically (runs until cancelled)"""
+        while True:
+            await asyncio.sleep(interval_seconds)
+            if self.blocking:
+                evicted = await asyncio.to_thread(self.evict_idle)
+            else:
+                evicted = self.evict_idle()
+            if evicted:
+                logger.info("Evicted %d idle entries from %s rate limiter", evicted, self.name)
+
+
+class SlidingWindowCounter:
+    """
+    Request counter over a sliding time window, kept as fixed-size buckets.
+
+    Each bucket holds the number of requests in ``bucket_seconds``; buckets
+    are stored flat as ``[index, count, index, count, ...]`` to keep memory per
+    client small. Adding and counting are O(1) amortized: expired buckets are
+    skipped from the left and a running total is kept. A request is counted
+    for at least ``window_seconds`` and at most one bucket longer, so limits
+    are never under-enforced.
+    """
+
+    __slots__ = ("window_buckets", "bucket_seconds", "buckets", "head", "total")
+
+    COMPACT_AFTER = 32  # Skipped list items before the list is compacted
+
+    def __init__(self, window_seconds: int, bucket_seconds: int):
+        self.window_buckets = window_seconds // bucket_seconds
+        self.bucket_seconds = bucket_seconds
+        self.buckets: List[int] = []
+        self.head = 0
+        self.total = 0
+
+    def _expire(self, now: float) -> int:
+        """Drop buckets outside the window and return the current bucket index"""
+        current = int(now // self.bucket_seconds)
+        oldest = current - self.window_buckets
+        buckets = self.buckets
+        head = self.head
+        while head < len(buckets) and buckets[head] < oldest:
+            self.total -= buckets[head + 1]
+            head += 2
+        if head == len(buckets):
+            buckets.clear()
+            head = 0
+        elif head >= self.COMPACT_AFTER:
+            del buckets[:head]
+            head = 0
+        self.head = head
+        return current
+
+    def add(self, now: float, count: int = 1) -> None:
+        current = self._expire(now)
+        buckets = self.buckets
+        if buckets and buckets[-2] == current:
+            buckets[-1] += count
+        else:
+            buckets.append(current)
+            buckets.append(count)
+        self.total += count
+
+    def remove(self, count: int) -> None:
+        """Take back up to ``count`` requests from the newest buckets"""
+        buckets = self.buckets
+        index = len(buckets) - 2
+        while count and index >= self.head:
+            taken = min(count, buckets[index + 1])
+            buckets[index + 1] -= taken
+            self.total -= taken
+            count -= taken
+            index -= 2
+
+    def count(self, now: float) -> int:
+        self._expire(now)
+        return self.total
+
+    def count_since(self, now: float, seconds: float) -> int:
+        """Count requests in the last ``seconds`` (at bucket granularity)"""
+        oldest = int(now // self.bucket_seconds) - int(seconds // self.bucket_seconds)
+        buckets = self.buckets
+        return sum(
+            buckets[i + 1] for i in range(self.head, len(buckets), 2) if buckets[i] >= oldest
+        )
+
+
+class ClientRateState:
+    """Per-client counters for both rate limit windows"""
+
+    __slots__ = ("short", "long", "last_seen")
+
+    def __init__(self, storage: "RateLimitStorage"):
+        self.short = SlidingWindowCounter(
+            storage.SHORT_WINDOW_SECONDS, storage.SHORT_BUCKET_SECONDS
+        )
+        self.long = SlidingWindowCounter(storage.LONG_WINDOW_SECONDS, storage.LONG_BUCKET_SECONDS)
+        self.last_seen = 0.0
+
+
+class RateLimitStorage(RateLimitBackend):
+    """
+    In-memory rate limit counters for the 5-minute and 24-hour windows.
+
+    Counters live in process memory, so each worker process has its own;
+    use the ``sqlite`` or ``redis`` backend when running several workers.
+
+    Uses monotonic time and bucketed sliding windows, so every operation is
+    O(1) amortized and memory per client is bounded by the number of buckets.
+    Clients are kept in least-recently-seen order, so idle ones (no requests
+    in the last 24 hours) are evicted without scanning the active ones.
+    """
+
+    name = "memory"
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self.clients: "OrderedDict[str, ClientRateState]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.clients)
+
+    def clear(self) -> None:
+        self.clients.clear()
+
+    def add_request(self, client_ip: str, requests: int = 1) -> None:
+        now = self.clock()
+        state = self.clients.get(client_ip)
+        if state is None:
+            state = self.clients[client_ip] = ClientRateState(self)
+        else:
+            self.clients.move_to_end(client_ip)
+        state.short.add(now, requests)
+        state.long.add(now, requests)
+        state.last_seen = now
+
+    def try_add_requests(
+        self, client_ip: str, requests: int, short_limit: int, long_limit: int
+    ) -> Tuple[bool, int, int]:
+        # Sem await entre a leitura e a escrita: atômico dentro do event loop
+        recent, daily = self.get_counts(client_ip)
+        if recent + requests > short_limit or daily + requests > long_limit:
+            return False, recent, daily
+        self.add_request(client_ip, requests)
+        return True, recent + requests, daily + requests
+
+    def remove_requests(self, client_ip: str, requests: int) -> None:
+        state = self.clients.get(client_ip)
+        if state is not None:
+            state.short.remove(requests)
+            state.long.remove(requests)
+
+    def get_counts(self, client_ip: str) -> Tuple[int, int]:
+        state = self.clients.get(client_ip)
+        if state is None:
+            return 0, 0
+        now = self.clock()
+        return state.short.count(now), state.long.count(now)
+
+    def get_recent_requests(self, client_ip: str, minutes: int = 5) -> int:
+        """Get count of requests in last N minutes (up to 5)"""
+        state = self.clients.get(client_ip)
+        if state is None:
+            return 0
+        now = self.clock()
+        if minutes * 60 >= self.SHORT_WINDOW_SECONDS:
+            return state.short.count(now)
+        return state.short.count_since(now, minutes * 60)
+
+    def get_daily_requests(self, client_ip: str) -> int:
+        """Get count of requests in last 24 hours"""
+        state = self.clients.get(client_ip)
+        if state is None:
+            return 0
+        return state.long.count(self.clock())
+
+    def evict_idle(self) -> int:
+        cutoff = self.clock() - self.LONG_WINDOW_SECONDS - self.LONG_BUCKET_SECONDS
+        evicted = 0
+        while self.clients:
+            client_ip, state = next(iter(self.clients.items()))
+            if state.last_seen > cutoff:
+                break
+            del self.clients[client_ip]
+            evicted += 1
+        return evicted
+
+
+class SQLiteRateLimitBackend(RateLimitBackend):
+    """
+    Rate limit counters in a SQLite database shared by the workers of a host.
+
+    Uses WAL mode with ``synchronous=NORMAL`` so writers never block readers
+    and commits skip the fsync; a check or record takes tens of microseconds.
+    ``try_add_requests`` reads and writes in one ``BEGIN IMMEDIATE``
+    transaction, which takes the write lock first, so workers checking the
+    same client are serialized.
+    """
+
+    name = "sqlite"
+    blocking = True
+
+    def __init__(self, state_path: str, clock: Callable[[], float] = time.time):
+        self.state_path = state_path
+        # Wall clock time: bucket indexes must agree between processes
+        self.clock = clock
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the state database on first use"""
+        if self._conn is None:
+            Path(self.state_path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.state_path, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limit ("
+                "client TEXT NOT NULL, window TEXT NOT NULL, bucket INTEGER NOT NULL, "
+                "count INTEGER NOT NULL, PRIMARY KEY (client, window, bucket)) WITHOUT ROWID"
+            )
+            self._conn = conn
+        return self._conn
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def add_request(self, client_ip: str) -> None:
+        (_, short), (_, long) = self._bucket_ranges(self.clock())
+        with self._lock:
+            self._connect().execute(
+                "INSERT INTO rate_limit (client, window, bucket, count) "
+                "VALUES (?, 'short', ?, 1), (?, 'long', ?, 1) "
+                "ON CONFLICT (client, window, bucket) DO UPDATE SET count = count + 1",
+                (client_ip, short, client_ip, long),
+            )
+
+    @staticmethod
+    def _counts(
+        conn: sqlite3.Connection, client_ip: str, short_start: int, long_start: int
+    ) -> Tuple[int, int]:
+        row = conn.execute(
+            "SELECT "
+            "COALESCE(SUM(CASE WHEN window = 'short' AND bucket >= ? THEN count END), 0), "
+            "COALESCE(SUM(CASE WHEN window = 'long' AND bucket >= ? THEN count END), 0) "
+            "FROM rate_limit WHERE client = ?",
+            (short_start, long_start, client_ip),
+        ).fetchone()
+        return row[0], row[1]
+
+    def get_counts(self, client_ip: str) -> Tuple[int, int]:
+        (short_start, _), (long_start, _) = self._bucket_ranges(self.clock())
+        with self._lock:
+            return self._counts(self._connect(), client_ip, short_start, long_start)
+
+    def try_add_requests(
+        self, client_ip: str, requests: int, short_limit: int, long_limit: int
+    ) -> Tuple[bool, int, int]:
+        (short_start, short), (long_start, long) = self._bucket_ranges(self.clock())
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                recent, daily = self._counts(conn, client_ip, short_start, long_start)
+                allowed = recent + requests <= short_limit and daily + requests <= long_limit
+                if allowed:
+                    conn.execute(
+                        "INSERT INTO rate_limit (client, window, bucket, count) "
+                        "VALUES (?, 'short', ?, ?), (?, 'long', ?, ?) "
+                        "ON CONFLICT (client, window, bucket) "
+                        "DO UPDATE SET count = count + excluded.count",
+                        (client_ip, short, requests, client_ip, long, requests),
+                    )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        if not allowed:
+            return False, recent, daily
+        return True, recent + requests, daily + requests
+
+    def remove_requests(self, client_ip: str, requests: int) -> None:
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = conn.execute(
+                    "SELECT window, bucket, count FROM rate_limit "
+                    "WHERE client = ? ORDER BY bucket DESC",
+                    (client_ip,),
+                ).fetchall()
+                remaining = {"short": requests, "long": requests}
+                updates = []
+                for window, bucket, count in rows:
+                    taken = min(remaining[window], count)
+                    if taken:
+                        updates.append((taken, client_ip, window, bucket))
+                        remaining[window] -= taken
+                conn.executemany(
+                    "UPDATE rate_limit SET count = count - ? "
+                    "WHERE client = ? AND window = ? AND bucket = ?",
+                    updates,
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def clear(self) -> None:
+        with self._lock:
+            self._connect().execute("DELETE FROM rate_limit")
+
+    def evict_idle(self) -> int:
+        (short_start, _), (long_start, _) = self._bucket_ranges(self.clock())
+        with self._lock:
+            cursor = self._connect().execute(
+                "DELETE FROM rate_limit WHERE (window = 'short' AND bucket < ?) "
+                "OR (window = 'long' AND bucket < ?)",
+                (short_start, long_start),
+            )
+        return cursor.rowcount
+
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """
+    Rate limit counters in Redis, shared by every node.
+
+    Each time bucket is a counter key that expires with its window, so Redis
+    evicts idle clients by itself. Recording a request is one ``MULTI``
+    pipeline; checking a client is one ``MGET`` over the window's buckets.
+
+    ``try_add_requests`` increments the current buckets and reads both
+    windows in the same ``MULTI`` transaction, so each caller sees the
+    counts including its own requests and those recorded before it; when
+    that exceeds a limit the increment is taken back. Concurrent callers can
+    be rejected together, but never admitted over the limit.
+    """
+
+    name = "redis"
+    blocking = True
+
+    def __init__(
+        self,
+        client=None,
+        url: str = "redis://localhost:6379/0",
+        prefix: str = "ratelimit",
+        clock: Callable[[], float] = time.time,
+    ):
+        self.url = url
+        self.prefix = prefix
+        self.clock = clock
+        self._client = client
+
+    def _get_client(self):
+        """Connect to Redis on first use"""
+        if self._client is None:
+            try:
+                import redis
+            except ImportError as e:
+                raise ValueError(
+                    "Redis rate limit backend requires the 'redis' package. "
+                    "Install it with: pip install redis"
+                ) from e
+            self._client = redis.Redis.from_url(self.url)
+        return self._client
+
+    def close(self) -> None:
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+    def _key(self, client_ip: str, window: str, bucket: int) -> str:
+        return f"{self.prefix}:{window}:{client_ip}:{bucket}"
+
+    def _increment(self, client_ip: str, requests: int, short: int, long: int):
+        """Queue the increments of the current buckets in a ``MULTI`` pipeline"""
+        pipe = self._get_client().pipeline(transaction=True)
+        for window, bucket, ttl in (
+            ("short", short, self.SHORT_WINDOW_SECONDS + self.SHORT_BUCKET_SECONDS),
+            ("long", long, self.LONG_WINDOW_SECONDS + self.LONG_BUCKET_SECONDS),
+        ):
+            key = self._key(client_ip, window, bucket)
+            pipe.incrby(key, requests)
+            pipe.expire(key, ttl)
+        return pipe
+
+    def _window_keys(
+        self, client_ip: str, ranges: Tuple[Tuple[int, int], Tuple[int, int]]
+    ) -> Tuple[List[str], int]:
+        """Keys of every bucket of both windows and how many belong to the short one"""
+        (short_start, short), (long_start, long) = ranges
+        keys = [self._key(client_ip, "short", b) for b in range(short_start, short + 1)]
+        short_keys = len(keys)
+        keys += [self._key(client_ip, "long", b) for b in range(long_start, long + 1)]
+        return keys, short_keys
+
+    @staticmethod
+    def _sums(values: List[int], short_keys: int) -> Tuple[int, int]:
+        # Remoções concorrentes podem deixar um bucket abaixo de zero por um instante
+        return max(0, sum(values[:short_keys])), max(0, sum(values[short_keys:]))
+
+    def add_request(self, client_ip: str) -> None:
+        (_, short), (_, long) = self._bucket_ranges(self.clock())
+        self._increment(client_ip, 1, short, long).execute()
+
+    def get_counts(self, client_ip: str) -> Tuple[int, int]:
+        keys, short_keys = self._window_keys(client_ip, self._bucket_ranges(self.clock()))
+        values = [int(value or 0) for value in self._get_client().mget(keys)]
+        return self._sums(values, short_keys)
+
+    def try_add_requests(
+        self, client_ip: str, requests: int, short_limit: int, long_limit: int
+    ) -> Tuple[bool, int, int]:
+        ranges = self._bucket_ranges(self.clock())
+        (_, short), (_, long) = ranges
+        keys, short_keys = self._window_keys(client_ip, ranges)
+        pipe = self._increment(client_ip, requests, short, long)
+        pipe.mget(keys)
+        values = [int(value or 0) for value in pipe.execute()[-1]]
+        recent, daily = self._sums(values, short_keys)
+        if recent <= short_limit and daily <= long_limit:
+            return True, recent, daily
+        self._decrement(client_ip, requests, short, long)
+        return False, recent - requests, daily - requests
+
+    def _decrement(self, client_ip: str, requests: int, short: int, long: int) -> None:
+        pipe = self._get_client().pipeline(transaction=True)
+        pipe.decrby(self._key(client_ip, "short", short), requests)
+        pipe.decrby(self._key(client_ip, "long", long), requests)
+        pipe.execute()
+
+    def remove_requests(self, client_ip: str, requests: int) -> None:
+        # Descontar dos buckets mais novos com contagem, como os outros backends: o
+        # bucket atual pode ser posterior ao da reserva (e não ter a chave nem TTL)
+        keys, short_keys = self._window_keys(client_ip, self._bucket_ranges(self.clock()))
+        values = [int(value or 0) for value in self._get_client().mget(keys)]
+        pipe = self._get_client().pipeline(transaction=True)
+        for window_keys, window_values in (
+            (keys[:short_keys], values[:short_keys]),
+            (keys[short_keys:], values[short_keys:]),
+        ):
+            remaining = requests
+            for key, count in zip(reversed(window_keys), reversed(window_values), strict=True):
+                if not remaining:
+                    break
+                taken = min(remaining, count)
+                if taken > 0:
+                    pipe.decrby(key, taken)
+                    remaining -= taken
+        pipe.execute()
+
+    def clear(self) -> None:
+        client = self._get_client()
+        keys = list(client.scan_iter(match=f"{self.prefix}:*"))
+        if keys:
+            client.delete(*keys)
+
+
+def create_rate_limit_backend(name: str) -> RateLimitBackend:
+    """
+    Instantiate a backend by its ``RATE_LIMIT_BACKEND`` name.
+
+    Raises:
+        ValueError: If the name is unknown
+    """
+    if name == RateLimitStorage.name:
+        return RateLimitStorage()
+    if name == SQLiteRateLimitBackend.name:
+        return SQLiteRateLimitBackend(RATE_LIMIT_STATE_FILE)
+    if name == RedisRateLimitBackend.name:
+        return RedisRateLimitBackend(url=RATE_LIMIT_REDIS_URL)
+    raise ValueError(f"Unknown rate limit backend: {name}")
@@ -1,70 +1,54 @@
-import re
-from datetime import datetime, timedelta
-from typing import Dict
+import asyncio
+import logging
+from typing import Any, Callable, Optional
 
 from fastapi import HTTPException, Request
 
+from src.config import (
+    BATCH_MAX_FILES,
+    BATCH_MAX_SIZE_MB,
+    RATE_LIMIT_BACKEND,
+    RATE_LIMIT_PER_5_MIN,
+    RATE_LIMIT_PER_24_HOURS,
+)
+from src.services.content_scanner import create_scanner
+from src.services.rate_limit_backends import (
+    RateLimitBackend,
+    RateLimitStorage,
+    create_rate_limit_backend,
+)
 
-class RateLimitStorage:
-    def __init__(self):
-        self.requests: Dict[str, list] = {}
-        self.daily_requests: Dict[str, list] = {}
+__all__ = ["RateLimitBackend", "RateLimitStorage", "SecurityService", "rate_limiter"]
 
-    def add_request(self, client_ip: str) -> None:
-        """Record a request for client IP"""
-        now = datetime.now()
+logger = logging.getLogger(__name__)
 
-        if client_ip not in self.requests:
-            self.requests[client_ip] = []
-        if client_ip not in self.daily_requests:
-            self.daily_requests[client_ip] = []
+# Global rate limit storage (shared across workers unless the backend is "memory")
+rate_limiter: RateLimitBackend = create_rate_limit_backend(RATE_LIMIT_BACKEND)
 
-        self.requests[client_ip].append(now)
-        self.daily_requests[client_ip].append(now)
 
-        # Cleanup old requests (older than 1 hour)
-        cutoff_time = now - timedelta(hours=1)
-        self.requests[client_ip] = [t for t in self.requests[client_ip] if t > cutoff_time]
-        self.daily_requests[client_ip] = [
-            t for t in self.daily_requests[client_ip] if t > cutoff_time
-        ]
-
-    def get_recent_requests(self, client_ip: str, minutes: int = 5) -> int:
-        """Get count of requests in last N minutes"""
-        if client_ip not in self.requests:
-            return 0
-
-        now = datetime.now()
-        cutoff = now - timedelta(minutes=minutes)
-        return len([t for t in self.requests[client_ip] if t > cutoff])
-
-    def get_daily_requests(self, client_ip: str) -> int:
-        """Get count of requests in last 24 hours"""
-        if client_ip not in self.daily_requests:
-            return 0
-
-        now = datetime.now()
-        cutoff = now - timedelta(hours=24)
-        return len([t for t in self.daily_requests[client_ip] if t > cutoff])
-
-
-# Global rate limit storage
-rate_limiter = RateLimitStorage()
+async def _call_rate_limiter(method: Callable[..., Any], *args: Any) -> Any:
+    """Call a ``rate_limiter`` method, in a worker thread if the backend blocks on I/O"""
+    if rate_limiter.blocking:
+        return await asyncio.to_thread(method, *args)
+    return method(*args)
 
 
 class SecurityService:
     # Limits configuration
-    REQUESTS_PER_5_MIN = 10
-    REQUESTS_PER_24_HOURS = 100
+    REQUESTS_PER_5_MIN = RATE_LIMIT_PER_5_MIN
+    REQUESTS_PER_24_HOURS = RATE_LIMIT_PER_24_HOURS
     MAX_FILE_SIZE_MB = 5
+    MAX_FILES_PER_BATCH = BATCH_MAX_FILES  # Arquivos por chamada a /api/analyze/batch
+    MAX_BATCH_SIZE_MB = BATCH_MAX_SIZE_MB  # Tamanho total de um lote
+    MAX_EMAILS_PER_REQUEST = 10  # Emails por chamada a /api/analyze/text
     REQUEST_TIMEOUT_SECONDS = 30
 
-    # Patterns for basic security validation
-    SQL_INJECTION_PATTERN = re.compile(
-        r"(union|select|insert|update|delete|drop|create|alter|exec|execute)",
-        re.IGNORECASE,
-    )
-    XSS_PATTERN = re.compile(r"(<script|javascript:|onerror=|onclick=)", re.IGNORECASE)
+    # Single-pass scanner for basic security validation (see content_scanner.DEFAULT_RULES)
+    CONTENT_SCANNER = create_scanner("regex")
+    SCAN_REJECTION_MESSAGES = {
+        "sql_injection": "Conteúdo contém padrões suspeitos. Envie um email legítimo.",
+        "xss": "Conteúdo contém scripts. Envie um email legítimo.",
+    }
 
     @staticmethod
     def get_client_ip(request: Request) -> str:
@@ -74,31 +58,59 @@ class SecurityService:
         return request.client.host if request.client else "unknown"
 
     @staticmethod
-    def validate_rate_limit(request: Request) -> None:
-        """Check rate limiting for client IP"""
+    async def reserve_requests(request: Request, requests: int = 1) -> None:
+        """
+        Check the rate limit and record ``requests`` requests for the client IP, atomically.
+
+        Requests already reserved for the same HTTP request (by the
+        ``RequestGuardMiddleware``) count towards ``requests``, so routes that
+        make several classifications reserve only the difference. Reserved
+        requests that end up not being served are taken back with
+        ``release_requests``.
+
+        Raises:
+            HTTPException: 429 if the requests would exceed a limit
+        """
+        reserved = getattr(request.state, "rate_limit_reserved", 0)
+        if requests <= reserved:
+            return
         client_ip = SecurityService.get_client_ip(request)
 
+        allowed, recent_requests, daily_requests = await _call_rate_limiter(
+            rate_limiter.try_add_requests,
+            client_ip,
+            requests - reserved,
+            SecurityService.REQUESTS_PER_5_MIN,
+            SecurityService.REQUESTS_PER_24_HOURS,
+        )
+        if allowed:
+            request.state.rate_limit_reserved = requests
+            return
+
         # Check 5-minute limit
-        recent_requests = rate_limiter.get_recent_requests(client_ip, minutes=5)
-        if recent_requests >= SecurityService.REQUESTS_PER_5_MIN:
+        if recent_requests + requests - reserved > SecurityService.REQUESTS_PER_5_MIN:
             raise HTTPException(
                 status_code=429,
                 detail=f"Muitas requisições. Máximo {SecurityService.REQUESTS_PER_5_MIN} requisições a cada 5 minutos. Tente novamente mais tarde.",
             )
 
         # Check 24-hour limit
-        daily_requests = rate_limiter.get_daily_requests(client_ip)
-        if daily_requests >= SecurityService.REQUESTS_PER_24_HOURS:
-            raise HTTPException(
-                status_code=429,
-                detail=f"Limite diário excedido. Máximo {SecurityService.REQUESTS_PER_24_HOURS} requisições por 24 horas.",
-            )
+        raise HTTPException(
+            status_code=429,
+            detail=f"Limite diário excedido. Máximo {SecurityService.REQUESTS_PER_24_HOURS} requisições por 24 horas.",
+        )
 
     @staticmethod
-    def record_request(request: Request) -> None:
-        """Record a successful request for rate limiting"""
-        client_ip = SecurityService.get_client_ip(request)
-        rate_limiter.add_request(client_ip)
+    async def release_requests(request: Request, requests: Optional[int] = None) -> None:
+        """Take back ``requests`` reserved requests (all of them by default) that were not served"""
+        reserved = getattr(request.state, "rate_limit_reserved", 0)
+        requests = reserved if requests is None else min(requests, reserved)
+        if requests <= 0:
+            return
+        request.state.rate_limit_reserved = reserved - requests
+        await _call_rate_limiter(
+            rate_limiter.remove_requests, SecurityService.get_client_ip(request), requests
+        )
 
     @staticmethod
     def validate_file_size(file_size_bytes: int) -> None:
@@ -120,26 +132,27 @@ class SecurityService:
                 detail="Conteúdo muito longo. Máximo 1MB de texto.",
             )
 
-        # Basic SQL injection check
-        if SecurityService.SQL_INJECTION_PATTERN.search(content):
-            raise HTTPException(
-                status_code=400,
-                detail="Conteúdo contém padrões suspeitos. Envie um email legítimo.",
+        # Basic SQL injection and XSS checks, in a single pass
+        match = SecurityService.CONTENT_SCANNER.scan(content)
+        if match is not None:
+            logger.warning(
+                "Rejected content: rule %s matched %r at position %d",
+                match.rule,
+                match.phrase,
+                match.position,
             )
-
-        # Basic XSS check
-        if SecurityService.XSS_PATTERN.search(content):
             raise HTTPException(
                 status_code=400,
-                detail="Conteúdo contém scripts. Envie um email legítimo.",
+                detail=SecurityService.SCAN_REJECTION_MESSAGES.get(
+                    match.rule, "Conteúdo contém padrões suspeitos. Envie um email legítimo."
+                ),
             )
 
     @staticmethod
-    def get_rate_limit_headers(request: Request) -> dict:
+    async def get_rate_limit_headers(request: Request) -> dict:
         """Generate rate limit headers for response"""
         client_ip = SecurityService.get_client_ip(request)
-        recent = rate_limiter.get_recent_requests(client_ip, minutes=5)
-        daily = rate_limiter.get_daily_requests(client_ip)
+        recent, daily = await _call_rate_limiter(rate_limiter.get_counts, client_ip)
 
         return {
             "X-RateLimit-Limit-5min": str(SecurityService.REQUESTS_PER_5_MIN),
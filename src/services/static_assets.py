@@ -0,0 +1,317 @@
+"""
+Static frontend assets
+
+The frontend files are read, fingerprinted and compressed once, when the
+application starts, and then served from memory:
+
+- every asset except ``index.html`` gets a content-hashed URL
+  (``/static/script.3f9a1c2b.js``) cached as ``immutable`` for a year; the
+  references in ``index.html`` are rewritten to those URLs
+- ``index.html`` and the original, unhashed URLs are served with
+  ``no-cache``, so browsers revalidate them on each use
+- every response carries a strong ``ETag`` (one per encoding) and
+  ``If-None-Match`` is answered with ``304 Not Modified``
+- gzip and, when the optional ``brotli`` package is installed, brotli
+  variants are precompressed and picked from ``Accept-Encoding``
+
+Nothing touches the disk on the request path. Compressing at maximum
+quality takes ~100ms, so startup uses fast settings unless the variants were
+built ahead of time (the Docker image does this)::
+
+    python -m src.services.static_assets frontend
+
+which writes ``<file>.gz``/``<file>.br`` next to each file. They are used
+only if they decompress to the current content.
+"""
+
+import gzip
+import hashlib
+import importlib.util
+import logging
+import mimetypes
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from starlette.datastructures import Headers
+from starlette.responses import PlainTextResponse, Response
+from starlette.types import Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+INDEX = "index.html"
+URL_PREFIX = "/static/"
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+# Abaixo disso a compressão não compensa os headers extras
+MIN_COMPRESS_BYTES = 256
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml")
+# Qualidade no startup (rápida) e no build (máxima)
+FAST_QUALITY = {"gzip": 6, "br": 5}
+MAX_QUALITY = {"gzip": 9, "br": 11}
+SUFFIXES = {"gzip": ".gz", "br": ".br"}
+
+
+def brotli_available() -> bool:
+    """Check whether the optional ``brotli`` package is installed"""
+    return importlib.util.find_spec("brotli") is not None
+
+
+@dataclass
+class StaticAsset:
+    """One file, with its precompressed variants keyed by content coding"""
+
+    name: str
+    media_type: str
+    digest: str
+    variants: Dict[str, bytes] = field(default_factory=dict)
+
+    @property
+    def hashed_name(self) -> str:
+        path = Path(self.name)
+        return f"{path.stem}.{self.digest[:8]}{path.suffix}"
+
+    def etag(self, encoding: str) -> str:
+        suffix = "" if encoding == "identity" else f"-{encoding}"
+        return f'"{self.digest[:16]}{suffix}"'
+
+
+def _encode(content: bytes, encoding: str, quality: int) -> bytes:
+    if encoding == "br":
+        import brotli
+
+        return brotli.compress(content, quality=quality)
+    return gzip.compress(content, compresslevel=quality, mtime=0)
+
+
+def _decode(content: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        import brotli
+
+        return brotli.decompress(content)
+    return gzip.decompress(content)
+
+
+def _compress(
+    content: bytes,
+    media_type: str,
+    encodings: List[str],
+    quality: Dict[str, int],
+    prebuilt: Dict[str, bytes],
+) -> Dict[str, bytes]:
+    """
+    Build the variants of ``content``, reusing ``prebuilt`` ones that are still valid.
+
+    Variants that are not smaller than the original are dropped.
+    """
+    variants = {"identity": content}
+    if len(content) < MIN_COMPRESS_BYTES or not media_type.startswith(COMPRESSIBLE_TYPES):
+        return variants
+    for encoding in encodings:
+        compressed = prebuilt.get(encoding)
+        try:
+            if compressed is None or _decode(compressed, encoding) != content:
+                compressed = _encode(content, encoding, quality[encoding])
+        except Exception:
+            compressed = _encode(content, encoding, quality[encoding])
+        if len(compressed) < len(content):
+            variants[encoding] = compressed
+    return variants
+
+
+def _is_source(path: Path) -> bool:
+    """Whether ``path`` is a frontend file (not hidden, not a precompressed variant)"""
+    return path.is_file() and not path.name.startswith(".") and path.suffix not in SUFFIXES.values()
+
+
+def _load_asset(
+    path: Path, media_type: str, content: bytes, encodings: List[str], quality: Dict[str, int]
+) -> StaticAsset:
+    prebuilt = {}
+    for encoding in encodings:
+        prebuilt_path = path.with_name(path.name + SUFFIXES[encoding])
+        if prebuilt_path.is_file():
+            prebuilt[encoding] = prebuilt_path.read_bytes()
+    return StaticAsset(
+        name=path.name,
+        media_type=media_type,
+        digest=hashlib.sha256(content).hexdigest(),
+        variants=_compress(content, media_type, encodings, quality, prebuilt),
+    )
+
+
+def _accepted_encodings(accept_encoding: str) -> Dict[str, float]:
+    """Parse ``Accept-Encoding`` into ``{coding: q}``"""
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip()] = quality
+    return accepted
+
+
+def choose_encoding(accept_encoding: str, available: List[str]) -> str:
+    """
+    Pick the best precompressed variant the client accepts.
+
+    Brotli is preferred over gzip; ``identity`` is used when neither is acceptable.
+    """
+    accepted = _accepted_encodings(accept_encoding)
+    for encoding in ("br", "gzip"):
+        if encoding in available and accepted.get(encoding, accepted.get("*", 0)) > 0:
+            return encoding
+    return "identity"
+
+
+def _etag_matches(if_none_match: str, asset: StaticAsset) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # Comparação fraca (RFC 9110 13.1.2): ignora o prefixo W/
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return any(asset.etag(encoding) in tags for encoding in asset.variants)
+
+
+class StaticAssets:
+    """
+    In-memory catalog and ASGI app for the frontend files.
+
+    Mount it at ``/static`` and serve ``index_response`` at ``/``.
+    """
+
+    def __init__(self, assets: Dict[str, StaticAsset], index: Optional[StaticAsset]):
+        self.index = index
+        # Nome original e nome com hash -> (asset, Cache-Control)
+        self._routes: Dict[str, tuple] = {}
+        for asset in assets.values():
+            self._routes[asset.name] = (asset, REVALIDATE)
+            self._routes[asset.hashed_name] = (asset, IMMUTABLE)
+
+    @classmethod
+    def from_directory(
+        cls,
+        directory: Path,
+        use_brotli: Optional[bool] = None,
+        quality: Optional[Dict[str, int]] = None,
+    ) -> "StaticAssets":
+        """
+        Load, fingerprint and compress every file in ``directory``.
+
+        A missing directory gives an empty catalog (``index`` is ``None``).
+
+        Args:
+            directory: Frontend directory
+            use_brotli: Build brotli variants (default: if ``brotli`` is installed)
+            quality: Compression level per encoding (default: ``FAST_QUALITY``)
+        """
+        if use_brotli is None:
+            use_brotli = brotli_available()
+            if not use_brotli:
+                logger.info("brotli not installed; static assets are served with gzip only")
+        encodings = ["gzip", "br"] if use_brotli else ["gzip"]
+        quality = quality or FAST_QUALITY
+
+        assets: Dict[str, StaticAsset] = {}
+        index_path: Optional[Path] = None
+        sources = sorted(directory.iterdir()) if directory.is_dir() else []
+        for path in filter(_is_source, sources):
+            if path.name == INDEX:
+                index_path = path
+                continue
+            media_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+            assets[path.name] = _load_asset(path, media_type, path.read_bytes(), encodings, quality)
+
+        index = None
+        if index_path is not None:
+            # Referências aos assets reescritas para as URLs com hash
+            index_html = index_path.read_bytes()
+            for asset in assets.values():
+                index_html = index_html.replace(
+                    f"{URL_PREFIX}{asset.name}".encode(),
+                    f"{URL_PREFIX}{asset.hashed_name}".encode(),
+                )
+            index = _load_asset(index_path, "text/html", index_html, encodings, quality)
+        return cls(assets, index)
+
+    def write_precompressed(self, directory: Path) -> List[Path]:
+        """
+        Write the compressed variants next to the files in ``directory``.
+
+        Returns:
+            The written files
+        """
+        written = []
+        assets = {asset.name: asset for asset, _ in self._routes.values()}
+        if self.index is not None:
+            assets[INDEX] = self.index
+        for name, asset in assets.items():
+            for encoding, content in asset.variants.items():
+                if encoding == "identity":
+                    continue
+                path = directory / (name + SUFFIXES[encoding])
+                path.write_bytes(content)
+                written.append(path)
+        return written
+
+    def url_for(self, name: str) -> str:
+        """Return the content-hashed URL of an asset"""
+        asset, _ = self._routes[name]
+        return f"{URL_PREFIX}{asset.hashed_name}"
+
+    @staticmethod
+    def build_response(
+        asset: StaticAsset, cache_control: str, headers: Headers, method: str = "GET"
+    ) -> Response:
+        """Response for ``asset`` honoring ``Accept-Encoding`` and ``If-None-Match``"""
+        encoding = choose_encoding(headers.get("accept-encoding", ""), list(asset.variants))
+        response_headers = {
+            "ETag": asset.etag(encoding),
+            "Cache-Control": cache_control,
+            "Vary": "Accept-Encoding",
+        }
+        if _etag_matches(headers.get("if-none-match", ""), asset):
+            return Response(status_code=304, headers=response_headers)
+
+        if encoding != "identity":
+            response_headers["Content-Encoding"] = encoding
+        body = asset.variants[encoding]
+        response_headers["Content-Length"] = str(len(body))
+        return Response(
+            content=b"" if method == "HEAD" else body,
+            media_type=asset.media_type,
+            headers=response_headers,
+        )
+
+    def index_response(self, headers: Headers, method: str = "GET") -> Optional[Response]:
+        """Response for ``index.html``, or ``None`` if the frontend is missing"""
+        if self.index is None:
+            return None
+        return self.build_response(self.index, REVALIDATE, headers, method)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        method = scope["method"]
+        route = self._routes.get(scope["path"].lstrip("/"))
+        if method not in ("GET", "HEAD"):
+            response = PlainTextResponse("Method Not Allowed", status_code=405)
+        elif route is None:
+            response = PlainTextResponse("Not Found", status_code=404)
+        else:
+            asset, cache_control = route
+            response = self.build_response(asset, cache_control, Headers(scope=scope), method)
+        await response(scope, receive, send)
+
+
+if __name__ == "__main__":
+    # Pré-compressão em qualidade máxima (executada no build da imagem)
+    frontend = Path(sys.argv[1] if len(sys.argv) > 1 else "frontend")
+    catalog = StaticAssets.from_directory(frontend, quality=MAX_QUALITY)
+    for written in catalog.write_precompressed(frontend):
+        sys.stdout.write(f"{written} ({written.stat().st_size} bytes)\n")
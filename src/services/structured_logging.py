@@ -0,0 +1,153 @@
+"""
+Structured Logging
+
+Logging setup for the application:
+
+- Records are formatted lazily (``logger.info("... %s", value)``), and both
+  formatting and writing happen on a ``QueueListener`` thread: the event loop
+  only enqueues the record and never blocks on stdout.
+- Every record carries the ``request_id`` of the request (or job) it belongs
+  to, set by ``RequestIdMiddleware`` and the job workers.
+- ``LOG_FORMAT=json`` emits one JSON object per line; ``text`` is readable
+  in a terminal.
+- DEBUG/INFO records are sampled per request (``LOG_SAMPLE_RATE``): a request
+  keeps all or none of its records. Warnings and errors are always kept.
+- Email content is never logged unless ``LOG_EMAIL_CONTENT`` is enabled; log
+  it through ``loggable_content``.
+"""
+
+import json
+import logging
+import logging.handlers
+import queue
+import zlib
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Optional
+
+from src.config import LOG_EMAIL_CONTENT, LOG_FORMAT, LOG_LEVEL, LOG_SAMPLE_RATE
+
+request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+# Atributos padrão de LogRecord; o resto veio de extra={...} e vai para o JSON
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class RequestIdFilter(logging.Filter):
+    """Adds the current ``request_id`` to every record"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps a fraction of DEBUG/INFO records, chosen per request.
+
+    The decision hashes the request id, so a sampled request keeps its whole
+    trail. Records outside a request are sampled individually.
+    """
+
+    def __init__(self, rate: float = 1.0):
+        super().__init__()
+        self.rate = max(0.0, min(1.0, rate))
+        self._threshold = int(self.rate * 0xFFFFFFFF)
+        self._counter = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or self.rate >= 1.0:
+            return True
+        key = getattr(record, "request_id", None) or request_id.get()
+        if key is None:
+            self._counter += 1
+            key = str(self._counter)
+        return zlib.crc32(key.encode()) <= self._threshold
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            data["request_id"] = record.request_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and key != "request_id":
+                data[key] = value
+        if record.exc_info:
+            data["exception"] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s"
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Enqueues records as they are: message formatting happens on the writer thread"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def loggable_content(text: str) -> str:
+    """Return ``text`` for logging if content logging is enabled, else just its size"""
+    if LOG_EMAIL_CONTENT:
+        return text
+    return f"<{len(text)} chars>"
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[_DeferredQueueHandler] = None
+
+
+def configure_logging(
+    level: str = LOG_LEVEL,
+    fmt: str = LOG_FORMAT,
+    sample_rate: float = LOG_SAMPLE_RATE,
+    stream=None,
+) -> logging.handlers.QueueListener:
+    """
+    Route the root logger through a queue to a background writer thread.
+
+    Calling it again replaces the previous configuration.
+
+    Returns:
+        The started queue listener (stopped by ``shutdown_logging``)
+    """
+    global _listener, _queue_handler
+    shutdown_logging()
+
+    output = logging.StreamHandler(stream)
+    output.setFormatter(JsonFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT))
+
+    # Filtros rodam no handler da fila, no contexto da requisição
+    record_queue: queue.SimpleQueue = queue.SimpleQueue()
+    _queue_handler = _DeferredQueueHandler(record_queue)
+    _queue_handler.addFilter(RequestIdFilter())
+    _queue_handler.addFilter(SamplingFilter(sample_rate))
+    _listener = logging.handlers.QueueListener(record_queue, output)
+
+    root = logging.getLogger()
+    root.setLevel(level.upper())
+    root.addHandler(_queue_handler)
+    _listener.start()
+    return _listener
+
+
+def shutdown_logging() -> None:
+    """Flush pending records and detach the queue handler"""
+    global _listener, _queue_handler
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
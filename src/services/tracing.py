@@ -0,0 +1,442 @@
+"""
+Tracing
+
+Request-scoped tracing for the classification pipeline: a trace is started
+per API request (``TracingMiddleware``) or job, and each pipeline step runs
+in a child span annotated with sizes, page counts and attempts. Finished
+traces are handed to a background thread that sends them to the configured
+exporter:
+
+- ``jsonl``: one JSON object per span appended to a local file, for offline
+  analysis (``TRACING_JSONL_FILE``)
+- ``otlp``: OTLP/HTTP JSON to a collector (``TRACING_OTLP_ENDPOINT``), e.g.
+  the OpenTelemetry Collector, Jaeger or Tempo
+
+Traces are sampled when they start (``TRACING_SAMPLE_RATE``, or the sampled
+flag of an incoming W3C ``traceparent`` header). Spans of unsampled traces
+are a shared no-op object, so instrumented code costs one context variable
+lookup per span.
+"""
+
+import json
+import logging
+import queue
+import random
+import secrets
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from src.config import (
+    TRACING_EXPORTER,
+    TRACING_JSONL_FILE,
+    TRACING_OTLP_ENDPOINT,
+    TRACING_SAMPLE_RATE,
+    TRACING_SERVICE_NAME,
+)
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+
+class Span:
+    """A timed operation of a trace"""
+
+    recording = True
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent_id: Optional[str],
+        trace: "_Trace",
+        attributes: Optional[Dict[str, Any]] = None,
+    ):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.status = "ok"
+        self.error: Optional[str] = None
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self._trace = trace
+
+    def set(self, key: str, value: Any) -> None:
+        """Annotate the span"""
+        self.attributes[key] = value
+
+    def end(self) -> None:
+        self.end_ns = time.time_ns()
+        self._trace.finish(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    """The span of unsampled traces: annotations are dropped"""
+
+    recording = False
+    trace_id = None
+    span_id = None
+
+    def set(self, key: str, value: Any) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+current_span: ContextVar[Any] = ContextVar("current_span", default=None)
+
+
+class _Trace:
+    """Collects the finished spans of a trace until its root span ends"""
+
+    def __init__(self, on_complete: Callable[[List[Span]], None]):
+        self.spans: List[Span] = []
+        self.on_complete = on_complete
+        self.root: Optional[Span] = None
+
+    def finish(self, span: Span) -> None:
+        self.spans.append(span)
+        if span is self.root:
+            self.on_complete(self.spans)
+
+
+def parse_traceparent(header: Optional[str]) -> Optional[Tuple[str, str, bool]]:
+    """
+    Parse a W3C ``traceparent`` header.
+
+    Returns:
+        ``(trace_id, parent_span_id, sampled)``, or ``None`` if the header is absent or invalid
+    """
+    if not header:
+        return None
+    parts = header.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        flags = int(parts[3], 16)
+        int(parts[1], 16)
+        int(parts[2], 16)
+    except ValueError:
+        return None
+    if parts[1] == "0" * 32 or parts[2] == "0" * 16:
+        return None
+    return parts[1], parts[2], bool(flags & 1)
+
+
+class SpanExporter(ABC):
+    """Destination of finished spans (called from the exporter thread)"""
+
+    @abstractmethod
+    def export(self, spans: List[Span]) -> None:
+        """Send a batch of spans"""
+
+    def shutdown(self) -> None:
+        """Release resources"""
+        return None
+
+
+class JsonlSpanExporter(SpanExporter):
+    """Appends one JSON object per span to a local file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    def export(self, spans: List[Span]) -> None:
+        if self._file is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+        for span in spans:
+            self._file.write(json.dumps(span.to_dict(), ensure_ascii=False, default=str) + "\n")
+        self._file.flush()
+
+    def shutdown(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class OTLPHttpSpanExporter(SpanExporter):
+    """Sends spans to an OTLP/HTTP collector in the OTLP JSON encoding"""
+
+    def __init__(
+        self,
+        endpoint: str,
+        service_name: str = "autou-email-classifier",
+        timeout: float = 5.0,
+        client: Optional["httpx.Client"] = None,
+    ):
+        import httpx
+
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.client = client or httpx.Client(timeout=timeout)
+
+    def _encode_span(self, span: Span) -> Dict[str, Any]:
+        data = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            # 2 = SERVER (raiz do trace local), 1 = INTERNAL
+            "kind": 2 if span is span._trace.root else 1,
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns),
+            "attributes": [
+                {"key": key, "value": _otlp_value(value)} for key, value in span.attributes.items()
+            ],
+            "status": {"code": 2, "message": span.error or ""}
+            if span.status == "error"
+            else {"code": 1},
+        }
+        if span.parent_id:
+            data["parentSpanId"] = span.parent_id
+        return data
+
+    def encode(self, spans: List[Span]) -> Dict[str, Any]:
+        """Build the ``ExportTraceServiceRequest`` JSON body"""
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [
+                            {"key": "service.name", "value": {"stringValue": self.service_name}}
+                        ]
+                    },
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": "src.services.tracing"},
+                            "spans": [self._encode_span(span) for span in spans],
+                        }
+                    ],
+                }
+            ]
+        }
+
+    def export(self, spans: List[Span]) -> None:
+        import httpx
+
+        try:
+            response = self.client.post(self.endpoint, json=self.encode(spans))
+            if response.status_code >= 400:
+                logger.warning("OTLP exporter got status %d", response.status_code)
+        except httpx.HTTPError as e:
+            logger.warning("OTLP export failed: %s", e)
+
+    def shutdown(self) -> None:
+        self.client.close()
+
+
+class BatchSpanProcessor:
+    """Exports finished traces in batches from a background thread"""
+
+    def __init__(
+        self,
+        exporter: SpanExporter,
+        max_queue: int = 2048,
+        batch_size: int = 512,
+        flush_interval: float = 2.0,
+    ):
+        self.exporter = exporter
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def on_trace_end(self, spans: List[Span]) -> None:
+        """Queue a finished trace (dropped if the exporter cannot keep up)"""
+        if self._thread is None:
+            self._start()
+        try:
+            self._queue.put_nowait(spans)
+        except queue.Full:
+            self.dropped += 1
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            batch: List[Span] = []
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    spans = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if spans is None:
+                    stopping = True
+                    break
+                batch.extend(spans)
+            if batch:
+                try:
+                    self.exporter.export(batch)
+                except Exception:
+                    logger.exception("Span export failed")
+
+    def shutdown(self) -> None:
+        """Export what is queued, stop the thread and the exporter"""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+        self.exporter.shutdown()
+
+
+class Tracer:
+    """Starts traces and spans"""
+
+    def __init__(
+        self,
+        processor: Optional[BatchSpanProcessor] = None,
+        sample_rate: float = 0.0,
+        random_source: Callable[[], float] = random.random,
+    ):
+        self.processor = processor
+        self.sample_rate = sample_rate
+        self.random = random_source
+
+    def _sampled(self, parent: Optional[Tuple[str, str, bool]]) -> bool:
+        if self.processor is None:
+            return False
+        if parent is not None:
+            return parent[2]
+        return self.random() < self.sample_rate
+
+    @contextmanager
+    def start_trace(
+        self, name: str, traceparent: Optional[str] = None, **attributes: Any
+    ) -> Iterator[Any]:
+        """
+        Run the block in the root span of a new trace (or a continued remote trace).
+
+        Args:
+            name: Span name
+            traceparent: Incoming W3C ``traceparent`` header, if any
+            attributes: Initial span attributes
+        """
+        parent = parse_traceparent(traceparent)
+        if not self._sampled(parent):
+            token = current_span.set(NOOP_SPAN)
+            try:
+                yield NOOP_SPAN
+            finally:
+                current_span.reset(token)
+            return
+
+        trace = _Trace(self.processor.on_trace_end)
+        trace_id, parent_id = parent[:2] if parent else (secrets.token_hex(16), None)
+        trace.root = Span(name, trace_id, parent_id, trace, attributes)
+        with self._run_span(trace.root) as span:
+            yield span
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Any]:
+        """Run the block in a child span of the current span (no-op outside a sampled trace)"""
+        parent = current_span.get()
+        if parent is None or not parent.recording:
+            yield NOOP_SPAN
+            return
+        span = Span(name, parent.trace_id, parent.span_id, parent._trace, attributes)
+        with self._run_span(span) as span:
+            yield span
+
+    @staticmethod
+    @contextmanager
+    def _run_span(span: Span) -> Iterator[Span]:
+        token = current_span.set(span)
+        try:
+            yield span
+        except Exception as e:
+            span.status = "error"
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        except BaseException:
+            span.status = "cancelled"
+            raise
+        finally:
+            current_span.reset(token)
+            span.end()
+
+    def shutdown(self) -> None:
+        if self.processor is not None:
+            self.processor.shutdown()
+
+
+def create_span_exporter(name: str) -> Optional[SpanExporter]:
+    """
+    Instantiate the exporter selected by ``TRACING_EXPORTER``.
+
+    Returns:
+        The exporter, or ``None`` when tracing is disabled ("none")
+
+    Raises:
+        ValueError: If the exporter is unknown
+    """
+    if name in ("", "none"):
+        return None
+    if name == "jsonl":
+        return JsonlSpanExporter(TRACING_JSONL_FILE)
+    if name == "otlp":
+        return OTLPHttpSpanExporter(TRACING_OTLP_ENDPOINT, TRACING_SERVICE_NAME)
+    raise ValueError(f"Unknown tracing exporter: {name}. Use none, jsonl or otlp")
+
+
+_tracer: Optional[Tracer] = None
+
+
+def get_tracer() -> Tracer:
+    """Return the process-wide tracer"""
+    global _tracer
+    if _tracer is None:
+        exporter = create_span_exporter(TRACING_EXPORTER)
+        _tracer = Tracer(
+            BatchSpanProcessor(exporter) if exporter else None,
+            sample_rate=TRACING_SAMPLE_RATE,
+        )
+    return _tracer
+
+
+def shutdown_tracing() -> None:
+    """Flush pending spans and stop the exporter"""
+    global _tracer
+    if _tracer is not None:
+        _tracer.shutdown()
+        _tracer = None
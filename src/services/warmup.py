@@ -0,0 +1,61 @@
+"""
+Startup warm-up
+
+The heavy dependencies (Gemini SDK, pypdf, httpx) are imported where they are
+used, so importing ``src.main`` only pays for FastAPI and the application's
+own modules and a new worker answers ``/health`` and static files right away.
+
+``warm_up`` runs in the background during the lifespan startup: it imports
+those modules in a thread and then creates the shared clients, so the first
+analysis does not pay for them either. Under gunicorn the master imports them
+before forking (``src.gunicorn_conf``), which makes the warm-up instant.
+"""
+
+import asyncio
+import importlib
+import logging
+import time
+from typing import Dict
+
+from src.services.ai_service import get_ai_service
+from src.services.http_client import get_http_client
+from src.services.ocr_service import OCRService
+
+logger = logging.getLogger(__name__)
+
+HEAVY_MODULES = ("google.generativeai", "pypdf", "httpx")
+
+
+def import_heavy_modules() -> Dict[str, float]:
+    """
+    Import the heavy dependencies.
+
+    Returns:
+        Seconds spent importing each module (0 if it was already imported)
+    """
+    timings = {}
+    for name in HEAVY_MODULES:
+        started = time.perf_counter()
+        importlib.import_module(name)
+        timings[name] = time.perf_counter() - started
+    return timings
+
+
+async def warm_up() -> None:
+    """Import the heavy dependencies off the event loop, then create the shared clients"""
+    started = time.perf_counter()
+    try:
+        timings = await asyncio.to_thread(import_heavy_modules)
+        # Clientes criados no event loop: get_* não são thread-safe
+        get_http_client()
+        get_ai_service()
+        OCRService.get_backends()
+    except Exception:
+        # Os clientes são criados sob demanda de qualquer forma
+        logger.exception("Startup warm-up failed")
+        return
+    logger.info(
+        "Warm-up done in %.2fs (%s)",
+        time.perf_counter() - started,
+        ", ".join(f"{name} {seconds:.2f}s" for name, seconds in timings.items()),
+    )
@@ -0,0 +1,62 @@
+"""
+Webhook URL validation
+
+Job webhooks are URLs chosen by the (unauthenticated) client and called by
+the server, so they must not reach the server's own network: loopback,
+private, link-local (cloud metadata at 169.254.169.254), shared and reserved
+addresses are rejected. The host is resolved and every address it resolves
+to is checked, when the job is submitted and again right before delivery,
+so a DNS record changed in between (DNS rebinding) is caught too.
+
+With ``WEBHOOK_ALLOWED_HOSTS`` set, only those hosts are accepted (their
+addresses are still checked).
+"""
+
+import asyncio
+import ipaddress
+import socket
+from typing import List
+from urllib.parse import urlparse
+
+from src.config import WEBHOOK_ALLOWED_HOSTS
+
+
+class UnsafeWebhookError(ValueError):
+    """Raised for webhook URLs the server must not call"""
+
+
+async def _resolve(host: str, port: int) -> List[str]:
+    """Every address ``host`` resolves to"""
+    infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    return [info[4][0] for info in infos]
+
+
+def _is_public(address: str) -> bool:
+    ip = ipaddress.ip_address(address.split("%", 1)[0])
+    if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+async def validate_webhook_url(url: str) -> None:
+    """
+    Check that ``url`` is an http(s) URL whose host resolves only to public addresses.
+
+    Raises:
+        UnsafeWebhookError: If the URL is invalid, not allowed or points to a
+            non-public address
+    """
+    parsed = urlparse(url)
+    if parsed.scheme not in ("http", "https") or not parsed.hostname:
+        raise UnsafeWebhookError("webhook_url deve ser uma URL http(s)")
+    host = parsed.hostname.lower()
+    if WEBHOOK_ALLOWED_HOSTS and host not in WEBHOOK_ALLOWED_HOSTS:
+        raise UnsafeWebhookError(f"Host do webhook não permitido: {host}")
+
+    try:
+        port = parsed.port or (443 if parsed.scheme == "https" else 80)
+        addresses = await _resolve(host, port)
+    except (OSError, ValueError) as e:
+        raise UnsafeWebhookError(f"Host do webhook não resolvido: {host}") from e
+    if not addresses or not all(_is_public(address) for address in addresses):
+        raise UnsafeWebhookError(f"Host do webhook aponta para um endereço não público: {host}")
@@ -0,0 +1,20 @@
+"""
+Uvicorn worker for gunicorn
+
+``uvicorn.workers.UvicornWorker`` with the event loop and HTTP parser taken
+from ``UVICORN_LOOP``/``UVICORN_HTTP`` and a bounded graceful shutdown, so
+in-flight requests are drained on SIGTERM (see ``src.gunicorn_conf``).
+"""
+
+from uvicorn.workers import UvicornWorker
+
+from src.config import SHUTDOWN_TIMEOUT_SECONDS, UVICORN_HTTP, UVICORN_LOOP
+
+
+class AppUvicornWorker(UvicornWorker):
+    CONFIG_KWARGS = {"loop": UVICORN_LOOP, "http": UVICORN_HTTP}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Requisições em andamento têm até SHUTDOWN_TIMEOUT_SECONDS para terminar
+        self.config.timeout_graceful_shutdown = SHUTDOWN_TIMEOUT_SECONDS
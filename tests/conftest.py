@@ -0,0 +1,21 @@
+"""
+Shared test configuration
+"""
+
+import os
+import tempfile
+
+import pytest
+
+# Estado persistente (quotas, filas, histórico) fora do repositório durante os testes
+os.environ.setdefault("DATA_DIR", tempfile.mkdtemp(prefix="autou-tests-"))
+
+
+@pytest.fixture(autouse=True)
+def reset_circuit_breakers():
+    """Start every test with closed circuits (failing mocks would otherwise open them)"""
+    from src.services import circuit_breaker
+
+    circuit_breaker._breakers.clear()
+    yield
+    circuit_breaker._breakers.clear()
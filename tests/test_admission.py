@@ -0,0 +1,114 @@
+"""
+Tests for admission control and the admission middleware
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from src.middleware.admission import AdmissionMiddleware
+from src.services.admission import AdmissionController, OverloadedError
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+class TestAdmissionController:
+    """Test cases for AdmissionController"""
+
+    async def test_queues_then_admits(self):
+        """Test that a request over the limit waits for a released slot"""
+        controller = AdmissionController(max_in_flight=1, max_queue=1, queue_timeout=1)
+        await controller.acquire()
+        waiter = asyncio.create_task(controller.acquire())
+        await settle()
+        assert controller.snapshot()["queued"] == 1
+
+        controller.release()
+        await waiter
+
+        assert controller.in_flight == 1
+        assert controller.queued == 0
+
+    async def test_sheds_when_queue_full(self):
+        """Test that requests beyond the queue are rejected immediately"""
+        controller = AdmissionController(
+            max_in_flight=1, max_queue=1, queue_timeout=1, retry_after=7
+        )
+        await controller.acquire()
+        waiter = asyncio.create_task(controller.acquire())
+        await settle()
+        assert controller.saturated
+
+        with pytest.raises(OverloadedError) as exc_info:
+            await controller.acquire()
+        assert exc_info.value.retry_after == 7
+        assert controller.shed == 1
+        waiter.cancel()
+
+    async def test_sheds_after_queue_timeout(self):
+        """Test that a queued request gives up after the timeout"""
+        controller = AdmissionController(max_in_flight=1, max_queue=1, queue_timeout=0.01)
+        await controller.acquire()
+
+        with pytest.raises(OverloadedError):
+            await controller.acquire()
+
+        assert controller.queued == 0
+        controller.release()
+        assert controller.in_flight == 0
+
+    async def test_cancelled_waiter_leaves_queue(self):
+        """Test that a cancelled request leaves no waiter or slot behind"""
+        controller = AdmissionController(max_in_flight=1, max_queue=2, queue_timeout=1)
+        await controller.acquire()
+        waiter = asyncio.create_task(controller.acquire())
+        await settle()
+
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        controller.release()
+
+        assert controller.snapshot()["in_flight"] == 0
+        assert controller.queued == 0
+
+    def test_rejects_zero_limit(self):
+        """Test that at least one request must be admitted"""
+        with pytest.raises(ValueError):
+            AdmissionController(max_in_flight=0)
+
+
+class TestAdmissionMiddleware:
+    """Test cases for AdmissionMiddleware"""
+
+    async def test_sheds_with_retry_after(self):
+        """Test that saturated analysis requests get 503 with Retry-After"""
+        release = asyncio.Event()
+
+        async def slow_app(scope, receive, send):
+            await release.wait()
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"ok"})
+
+        controller = AdmissionController(max_in_flight=1, max_queue=0, retry_after=3)
+        app = AdmissionMiddleware(slow_app, controller=controller)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            first = asyncio.create_task(client.post("/api/analyze"))
+            await settle()
+
+            shed = await client.post("/api/analyze/text")
+            # Outras rotas não passam pela admissão
+            release.set()
+            other = await client.get("/health")
+            admitted = await first
+
+        assert shed.status_code == 503
+        assert shed.headers["retry-after"] == "3"
+        assert admitted.status_code == 200
+        assert other.status_code == 200
+        assert controller.in_flight == 0
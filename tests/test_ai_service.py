@@ -3,11 +3,14 @@ Tests for AIService
 """
 
 import os
+import threading
 from unittest.mock import MagicMock, patch
 
 import pytest
 
-from src.services.ai_service import AIService
+from src.services.ai_service import AIService, _get_ai_executor, get_ai_service
+from src.services.circuit_breaker import CircuitOpenError, get_circuit_breaker
+from src.services.lanes import get_lane_limiter
 
 # Configurar variáveis de ambiente para testes
 os.environ["GEMINI_API_KEY"] = "test-key-12345"
@@ -34,6 +37,24 @@ class TestAIService:
         assert service.api_key is not None
         assert service.model_name is not None
 
+    def test_init_with_custom_endpoint(self):
+        """Test that GEMINI_API_ENDPOINT switches the SDK to REST on that endpoint"""
+        with (
+            patch("src.services.ai_service.GEMINI_API_ENDPOINT", "http://127.0.0.1:9000"),
+            patch("google.generativeai.configure") as configure,
+        ):
+            AIService(api_key="custom-key")
+
+        configure.assert_called_once_with(
+            api_key="custom-key",
+            transport="rest",
+            client_options={"api_endpoint": "http://127.0.0.1:9000"},
+        )
+
+    def test_get_ai_service_is_shared(self):
+        """Test that the shared AI service is created once"""
+        assert get_ai_service() is get_ai_service()
+
     def test_create_system_prompt(self, ai_service):
         """Test system prompt creation"""
         prompt = ai_service._create_system_prompt()
@@ -109,6 +130,24 @@ class TestAIService:
             assert result["confidence"] == 0.92
             assert "Obrigado" in result["suggested_reply"]
 
+    async def test_classify_email_uses_dedicated_threads(self, ai_service):
+        """Test that Gemini calls run on their own threads, not the default executor"""
+        mock_response = MagicMock()
+        mock_response.text = (
+            '{"category": "importante", "confidence": 0.9, "suggested_reply": "Ok"}'
+        )
+        threads = []
+
+        def generate_content(prompt):
+            threads.append(threading.current_thread().name)
+            return mock_response
+
+        with patch.object(ai_service.client, "generate_content", side_effect=generate_content):
+            await ai_service.classify_email("Test email content")
+
+        assert threads[0].startswith("gemini")
+        assert _get_ai_executor()._max_workers == get_lane_limiter("ai").capacity
+
     @pytest.mark.asyncio
     async def test_classify_email_api_error(self, ai_service):
         """Test handling of API errors"""
@@ -120,6 +159,22 @@ class TestAIService:
             with pytest.raises(RuntimeError, match="Erro ao classificar"):
                 await ai_service.classify_email("Test email")
 
+    @pytest.mark.asyncio
+    async def test_classify_email_fails_fast_when_circuit_open(self, ai_service):
+        """Test that repeated API errors open the circuit and later calls skip Gemini"""
+        breaker = get_circuit_breaker("gemini")
+        with patch.object(
+            ai_service.client, "generate_content", side_effect=Exception("API Error")
+        ) as generate:
+            for _ in range(breaker.failure_threshold):
+                with pytest.raises(RuntimeError):
+                    await ai_service.classify_email("Test email")
+
+            with pytest.raises(CircuitOpenError):
+                await ai_service.classify_email("Test email")
+
+        assert generate.call_count == breaker.failure_threshold
+
     def test_parse_response_type_validation(self, ai_service):
         """Test type validation in response parsing"""
         # Invalid category type
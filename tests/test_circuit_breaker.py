@@ -0,0 +1,128 @@
+"""
+Tests for the circuit breaker
+"""
+
+import asyncio
+
+import pytest
+
+from src.services.circuit_breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+    circuit_snapshots,
+    get_circuit_breaker,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker("gemini", failure_threshold=3, reset_seconds=30, clock=clock)
+
+
+async def fail(breaker):
+    with pytest.raises(RuntimeError):
+        async with breaker.guard():
+            raise RuntimeError("boom")
+
+
+class TestCircuitBreaker:
+    """Test cases for CircuitBreaker"""
+
+    async def test_opens_after_consecutive_failures(self, breaker):
+        """Test that the circuit opens at the failure threshold"""
+        await fail(breaker)
+        await fail(breaker)
+        assert breaker.state == CLOSED
+
+        await fail(breaker)
+        assert breaker.state == OPEN
+
+        with pytest.raises(CircuitOpenError) as exc_info:
+            async with breaker.guard():
+                pass
+        assert exc_info.value.retry_after == 30
+
+    async def test_success_resets_failures(self, breaker):
+        """Test that a success clears the consecutive failure count"""
+        await fail(breaker)
+        await fail(breaker)
+        async with breaker.guard():
+            pass
+        await fail(breaker)
+
+        assert breaker.state == CLOSED
+        assert breaker.failures == 1
+
+    async def test_half_open_trial_success_closes(self, breaker, clock):
+        """Test that one trial call is allowed after the reset time and closes the circuit"""
+        for _ in range(3):
+            await fail(breaker)
+        clock.now += 30
+        assert breaker.state == HALF_OPEN
+
+        assert breaker.before_call() is True
+        # Only one trial call at a time
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+
+        breaker.record_success()
+        assert breaker.state == CLOSED
+
+    async def test_check_does_not_claim_trial(self, breaker, clock):
+        """Test that check rejects an open circuit but leaves the half-open trial free"""
+        for _ in range(3):
+            await fail(breaker)
+        with pytest.raises(CircuitOpenError):
+            breaker.check()
+
+        clock.now += 30
+        breaker.check()
+        assert breaker.before_call() is True
+        with pytest.raises(CircuitOpenError):
+            breaker.check()
+
+    async def test_half_open_trial_failure_reopens(self, breaker, clock):
+        """Test that a failed trial call opens the circuit again"""
+        for _ in range(3):
+            await fail(breaker)
+        clock.now += 30
+
+        await fail(breaker)
+        assert breaker.state == OPEN
+
+    async def test_cancelled_trial_allows_another(self, breaker, clock):
+        """Test that a cancelled trial call does not block the circuit half-open forever"""
+        for _ in range(3):
+            await fail(breaker)
+        clock.now += 30
+
+        with pytest.raises(asyncio.CancelledError):
+            async with breaker.guard():
+                raise asyncio.CancelledError()
+
+        assert breaker.before_call() is True
+
+    def test_snapshots(self):
+        """Test that every downstream circuit is reported"""
+        get_circuit_breaker("gemini").record_failure()
+
+        snapshots = circuit_snapshots()
+
+        assert snapshots["gemini"] == {"state": CLOSED, "failures": 1}
+        assert snapshots["ocrspace"] == {"state": CLOSED, "failures": 0}
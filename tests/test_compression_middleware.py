@@ -0,0 +1,143 @@
+"""
+Tests for the response compression middleware
+"""
+
+import asyncio
+import gzip
+import zlib
+
+import orjson
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from src.middleware.compression import ResponseCompressionMiddleware
+
+LINES = [{"index": i, "status": "ok", "reply": "Obrigado pelo contato. " * 10} for i in range(3)]
+LARGE = {"items": ["resultado da classificação"] * 100}
+
+
+def build_app():
+    app = FastAPI(default_response_class=ORJSONResponse)
+
+    @app.get("/api/large")
+    async def large():
+        return LARGE
+
+    @app.get("/api/small")
+    async def small():
+        return {"status": "ok"}
+
+    @app.get("/api/encoded")
+    async def encoded():
+        body = gzip.compress(b"x" * 2000)
+        return Response(body, media_type="application/json", headers={"Content-Encoding": "gzip"})
+
+    @app.get("/api/binary")
+    async def binary():
+        return Response(b"\x00" * 2000, media_type="application/pdf")
+
+    @app.get("/api/stream")
+    async def stream():
+        async def lines():
+            for line in LINES:
+                yield orjson.dumps(line) + b"\n"
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    @app.get("/outside")
+    async def outside():
+        return LARGE
+
+    return app
+
+
+@pytest.fixture
+def client():
+    return TestClient(ResponseCompressionMiddleware(build_app(), minimum_size=1024))
+
+
+class TestResponseCompressionMiddleware:
+    """Test cases for ResponseCompressionMiddleware"""
+
+    def test_compresses_large_json_with_gzip(self, client):
+        """Test that a JSON response above the threshold is gzip-compressed"""
+        response = client.get("/api/large", headers={"Accept-Encoding": "gzip"})
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert int(response.headers["content-length"]) < len(orjson.dumps(LARGE))
+        assert response.json() == LARGE
+
+    def test_prefers_brotli(self, client):
+        """Test that brotli is used when installed and accepted"""
+        pytest.importorskip("brotli")
+        response = client.get("/api/large", headers={"Accept-Encoding": "gzip, br"})
+        assert response.headers["content-encoding"] == "br"
+        assert response.json() == LARGE
+
+    def test_small_response_not_compressed(self, client):
+        """Test that responses below the threshold are sent as-is"""
+        response = client.get("/api/small", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in response.headers
+        assert response.json() == {"status": "ok"}
+
+    def test_identity_when_not_accepted(self, client):
+        """Test that nothing is compressed without an acceptable encoding"""
+        response = client.get("/api/large", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in response.headers
+
+    def test_skips_already_encoded_and_binary(self, client):
+        """Test that encoded and non-text responses pass through unchanged"""
+        encoded = client.get("/api/encoded", headers={"Accept-Encoding": "gzip"})
+        binary = client.get("/api/binary", headers={"Accept-Encoding": "gzip"})
+
+        assert encoded.content == b"x" * 2000
+        assert "content-encoding" not in binary.headers
+
+    def test_only_under_path_prefix(self, client):
+        """Test that routes outside the prefix are not compressed"""
+        response = client.get("/outside", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in response.headers
+
+    def test_stream_round_trip(self, client):
+        """Test that a compressed NDJSON stream decodes to the original lines"""
+        response = client.get("/api/stream", headers={"Accept-Encoding": "gzip"})
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert "content-length" not in response.headers
+        assert [orjson.loads(line) for line in response.text.splitlines()] == LINES
+
+    async def test_stream_chunks_are_flushed(self):
+        """Test that each compressed chunk decodes to a complete line as it arrives"""
+        middleware = ResponseCompressionMiddleware(build_app(), minimum_size=1024)
+        scope = {
+            "type": "http",
+            "method": "GET",
+            "path": "/api/stream",
+            "raw_path": b"/api/stream",
+            "root_path": "",
+            "scheme": "http",
+            "query_string": b"",
+            "headers": [(b"accept-encoding", b"gzip")],
+            "server": ("testserver", 80),
+            "client": ("testclient", 50000),
+        }
+        sent = []
+
+        async def receive():
+            # Cliente conectado até o fim do stream
+            await asyncio.Event().wait()
+
+        async def send(message):
+            sent.append(message)
+
+        await middleware(scope, receive, send)
+
+        decoder = zlib.decompressobj(31)
+        chunks = [m["body"] for m in sent if m["type"] == "http.response.body"]
+        decoded = [decoder.decompress(chunk) for chunk in chunks]
+        lines = [line for line in decoded if line]
+        assert [orjson.loads(line) for line in lines] == LINES
+        assert decoder.eof
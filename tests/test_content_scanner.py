@@ -0,0 +1,82 @@
+"""
+Tests for the content scanner engines
+"""
+
+import pytest
+
+from src.services.content_scanner import (
+    AhoCorasickScanner,
+    RegexScanner,
+    ScanRule,
+    create_scanner,
+)
+
+
+@pytest.fixture(params=["regex", "aho-corasick"])
+def scanner(request):
+    return create_scanner(request.param)
+
+
+class TestContentScanner:
+    """Behaviour shared by every engine"""
+
+    @pytest.mark.parametrize(
+        "text",
+        [
+            "Olá, gostaria de saber o status do meu pedido. Obrigado!",
+            "Please review the selection and the updated dropdown before Friday.",
+            "A seleção foi atualizada; delete o arquivo antigo e crie um novo.",
+            "Segue a tabela: drop-off às 10h, truncated values na planilha.",
+            "",
+        ],
+    )
+    def test_clean_text(self, scanner, text):
+        """Test that ordinary text containing SQL keywords is not flagged"""
+        assert scanner.scan(text) is None
+
+    @pytest.mark.parametrize(
+        "text, rule, phrase",
+        [
+            ("SELECT * FROM users; DROP TABLE emails; --", "sql_injection", "select * from"),
+            ("id=1 UNION\n\t SELECT password", "sql_injection", "union select"),
+            ("login: admin' OR '1'='1", "sql_injection", "' or '1'='1"),
+            ("<script>alert('hacked')</script>", "xss", "<script"),
+            ('<a href="JavaScript:void(0)">', "xss", "javascript:"),
+            ('<img src=x onerror="alert(1)">', "xss", "onerror="),
+        ],
+    )
+    def test_reports_rule_and_phrase(self, scanner, text, rule, phrase):
+        """Test that attacks are flagged with the rule and phrase that fired"""
+        match = scanner.scan(text)
+
+        assert match is not None
+        assert match.rule == rule
+        assert match.phrase == phrase
+
+    def test_requires_token_boundaries(self, scanner):
+        """Test that phrases embedded in longer words do not match"""
+        assert scanner.scan("redrop tables") is None
+        assert scanner.scan("x drop table") is not None
+
+    def test_reports_first_match(self, scanner):
+        """Test that the earliest match in the text is reported"""
+        match = scanner.scan("hello <script> then drop table x")
+
+        assert match.rule == "xss"
+        assert match.position == 6
+
+    def test_custom_rules(self):
+        """Test that engines accept custom rule sets"""
+        rules = [ScanRule("spam", ("free money", "act now"))]
+        for engine in (RegexScanner(rules), AhoCorasickScanner(rules)):
+            assert engine.scan("Get FREE   money today").rule == "spam"
+            assert engine.scan("select * from users") is None
+
+
+class TestCreateScanner:
+    """Test cases for engine selection"""
+
+    def test_unknown_engine(self):
+        """Test that an unknown engine is rejected"""
+        with pytest.raises(ValueError, match="Unknown content scanner"):
+            create_scanner("hyperscan")
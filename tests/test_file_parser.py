@@ -169,7 +169,10 @@ class TestFileParserService:
 
         with patch("pypdf.PdfReader", return_value=mock_reader):
             # Ensure OCR is not available
-            with patch.dict("src.config.__dict__", {"OCR_SPACE_API_KEY": None}):
+            with patch(
+                "src.services.ocr_service.OCRService.is_available",
+                return_value=False,
+            ):
                 with pytest.raises(ValueError, match="PDF não contém texto extraível"):
                     await FileParserService.parse_pdf(temp_pdf_file)
 
@@ -186,7 +189,10 @@ class TestFileParserService:
 
         with patch("pypdf.PdfReader", return_value=mock_reader):
             # Make OCR available
-            with patch.dict("src.config.__dict__", {"OCR_SPACE_API_KEY": "test_key"}):
+            with patch(
+                "src.services.ocr_service.OCRService.is_available",
+                return_value=True,
+            ):
                 # Mock successful OCR extraction
                 mock_ocr_result = AsyncMock(return_value="OCR extracted text")
                 with patch(
@@ -0,0 +1,48 @@
+"""
+Tests for the production server configuration
+"""
+
+import logging
+from unittest.mock import patch
+
+import pytest
+
+from src import gunicorn_conf
+from src.config import UVICORN_HTTP, UVICORN_LOOP
+
+
+class TestGunicornConf:
+    """Test cases for src.gunicorn_conf"""
+
+    def test_default_workers_match_available_cores(self):
+        """Test that one worker per available core is used by default"""
+        with patch("src.gunicorn_conf.os.sched_getaffinity", return_value={0, 1, 2}, create=True):
+            assert gunicorn_conf.default_workers() == 3
+
+    def test_app_is_preloaded_with_app_worker(self):
+        """Test that the app is imported before forking and served by the tuned worker"""
+        assert gunicorn_conf.preload_app is True
+        assert gunicorn_conf.worker_class == "src.uvicorn_worker.AppUvicornWorker"
+        assert gunicorn_conf.workers >= 1
+
+    def test_graceful_timeout_covers_request_and_job_drain(self):
+        """Test that the master waits for both drain phases before killing a worker"""
+        assert gunicorn_conf.graceful_timeout > 2 * gunicorn_conf.SHUTDOWN_TIMEOUT_SECONDS
+
+    def test_warns_about_per_worker_rate_limits(self, caplog):
+        """Test that in-memory rate limits with several workers are reported"""
+        with (
+            patch.object(gunicorn_conf, "workers", 4),
+            patch.object(gunicorn_conf, "RATE_LIMIT_BACKEND", "memory"),
+            caplog.at_level(logging.WARNING, logger="gunicorn.error"),
+        ):
+            gunicorn_conf.when_ready(None)
+
+        assert "RATE_LIMIT_BACKEND=memory" in caplog.text
+
+    def test_worker_uses_configured_loop_and_http(self):
+        """Test the uvicorn worker's event loop and HTTP parser settings (requires gunicorn)"""
+        pytest.importorskip("gunicorn")
+        from src.uvicorn_worker import AppUvicornWorker
+
+        assert AppUvicornWorker.CONFIG_KWARGS == {"loop": UVICORN_LOOP, "http": UVICORN_HTTP}
@@ -0,0 +1,130 @@
+"""
+Tests for the gzip request middleware
+"""
+
+import gzip
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.middleware.gzip_request import GzipRequestMiddleware
+
+
+async def echo_app(scope, receive, send):
+    """ASGI app that echoes the request body and its content-encoding header"""
+    body = b""
+    more_body = True
+    while more_body:
+        message = await receive()
+        body += message.get("body", b"")
+        more_body = message.get("more_body", False)
+    encoding = dict(scope["headers"]).get(b"content-encoding", b"none")
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"x-encoding", encoding)],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+@pytest.fixture
+def client():
+    return TestClient(GzipRequestMiddleware(echo_app, max_decompressed_bytes=1000))
+
+
+class TestGzipRequestMiddleware:
+    """Test cases for GzipRequestMiddleware"""
+
+    def test_decompresses_gzip_body(self, client):
+        """Test that the app receives the decompressed body without the encoding header"""
+        response = client.post(
+            "/api/echo",
+            content=gzip.compress('{"content": "Olá"}'.encode()),
+            headers={"content-encoding": "gzip"},
+        )
+
+        assert response.status_code == 200
+        assert response.content == '{"content": "Olá"}'.encode()
+        assert response.headers["x-encoding"] == "none"
+
+    def test_scope_changes_reach_outer_middleware(self):
+        """Test that the scope set by inner apps (e.g. the routed endpoint) is seen outside"""
+        seen = {}
+
+        async def routing_app(scope, receive, send):
+            scope["endpoint"] = routing_app
+            await echo_app(scope, receive, send)
+
+        async def outer(scope, receive, send):
+            await GzipRequestMiddleware(routing_app, max_decompressed_bytes=1000)(
+                scope, receive, send
+            )
+            seen["endpoint"] = scope.get("endpoint")
+
+        response = TestClient(outer).post(
+            "/api/echo", content=gzip.compress(b"x"), headers={"content-encoding": "gzip"}
+        )
+
+        assert response.status_code == 200
+        assert seen["endpoint"] is routing_app
+
+    def test_decompresses_streamed_body(self, client):
+        """Test decompression of a body sent in several chunks"""
+        compressed = gzip.compress(b"abc" * 300)
+
+        def chunks():
+            for i in range(0, len(compressed), 7):
+                yield compressed[i : i + 7]
+
+        response = client.post("/api/echo", content=chunks(), headers={"content-encoding": "gzip"})
+
+        assert response.content == b"abc" * 300
+
+    def test_passes_through_plain_body(self, client):
+        """Test that bodies without gzip encoding are untouched"""
+        response = client.post("/api/echo", content=b"plain")
+
+        assert response.content == b"plain"
+
+    def test_rejects_decompression_bomb(self, client):
+        """Test that bodies expanding past the cap are rejected"""
+        response = client.post(
+            "/api/echo",
+            content=gzip.compress(b"\0" * 1_000_000),
+            headers={"content-encoding": "gzip"},
+        )
+
+        assert response.status_code == 413
+
+    def test_per_path_limits(self):
+        """Test that the decompressed size cap can be raised for specific paths"""
+        client = TestClient(
+            GzipRequestMiddleware(
+                echo_app, max_decompressed_bytes=1000, body_limits={"/api/batch": 5000}
+            )
+        )
+        body = gzip.compress(b"a" * 3000)
+        headers = {"content-encoding": "gzip"}
+
+        assert client.post("/api/echo", content=body, headers=headers).status_code == 413
+        assert client.post("/api/batch", content=body, headers=headers).status_code == 200
+
+    def test_rejects_corrupt_body(self, client):
+        """Test that invalid gzip data is rejected"""
+        response = client.post(
+            "/api/echo", content=b"not gzip at all", headers={"content-encoding": "gzip"}
+        )
+
+        assert response.status_code == 400
+
+    def test_rejects_truncated_body(self, client):
+        """Test that an incomplete gzip stream is rejected"""
+        response = client.post(
+            "/api/echo",
+            content=gzip.compress(b"hello world")[:-6],
+            headers={"content-encoding": "gzip"},
+        )
+
+        assert response.status_code == 400
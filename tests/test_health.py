@@ -6,6 +6,7 @@ import pytest
 from fastapi.testclient import TestClient
 
 from src.main import app
+from src.services.circuit_breaker import get_circuit_breaker
 
 
 @pytest.fixture
@@ -26,3 +27,57 @@ def test_root_endpoint(client):
     response = client.get("/")
     assert response.status_code == 200
     assert response.headers["content-type"] == "text/html; charset=utf-8"
+
+
+def test_ready_reports_load(client):
+    """Teste do endpoint de readiness"""
+    response = client.get("/ready")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "ready"
+    assert data["admission"]["in_flight"] == 0
+    assert set(data["circuits"]) == {"gemini", "ocrspace"}
+    assert set(data["lanes"]) == {"ai", "ocr"}
+
+
+def test_ready_reports_open_circuit(client):
+    """Teste do readiness com o circuito do Gemini aberto"""
+    breaker = get_circuit_breaker("gemini")
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+
+    response = client.get("/ready")
+    assert response.status_code == 200
+    assert response.json()["status"] == "degraded"
+    assert response.json()["circuits"]["gemini"]["state"] == "open"
+
+
+def test_metrics_endpoint(client):
+    """Teste do endpoint de métricas no formato Prometheus"""
+    client.get("/health")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE pipeline_stage_duration_seconds histogram" in response.text
+    assert 'http_request_duration_seconds_count{handler="health_check"' in response.text
+    assert 'circuit_open{service="gemini"} 0' in response.text
+
+
+def test_root_serves_precompressed_index(client):
+    """Teste do index.html comprimido, com ETag e revalidação"""
+    response = client.get("/", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["cache-control"] == "no-cache"
+
+    cached = client.get("/", headers={"If-None-Match": response.headers["etag"]})
+    assert cached.status_code == 304
+
+
+def test_static_script_has_hashed_url(client):
+    """Teste do script.js servido com URL com hash e cache imutável"""
+    html = client.get("/").text
+    url = html.split('<script src="/static/script.')[1].split('"')[0]
+    response = client.get(f"/static/script.{url}")
+    assert response.status_code == 200
+    assert "immutable" in response.headers["cache-control"]
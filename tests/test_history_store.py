@@ -0,0 +1,185 @@
+"""
+Tests for the classification history store and its background writer
+"""
+
+import hashlib
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from src.services import metrics
+from src.services.history_store import HistoryRecord, HistoryStore, HistoryWriter
+from src.services.pipeline import ClassificationPipeline
+
+
+def make_record(created_at, category="importante", content="email"):
+    return HistoryRecord(
+        created_at=created_at,
+        content_hash=hashlib.sha256(content.encode()).hexdigest(),
+        source="text",
+        category=category,
+        confidence=0.9,
+        model="gemini-test",
+        total_ms=120.0,
+        ai_ms=100.0,
+    )
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = HistoryStore(str(tmp_path / "history.db"))
+    yield store
+    store.close()
+
+
+class TestHistoryStore:
+    """Test cases for HistoryStore"""
+
+    def test_insert_and_page_newest_first(self, store):
+        """Test that records are returned newest first with their ids"""
+        store.insert_many([make_record(1000.0), make_record(1002.0), make_record(1001.0)])
+
+        records, next_cursor = store.page()
+
+        assert [record.created_at for record in records] == [1002.0, 1001.0, 1000.0]
+        assert all(record.id is not None for record in records)
+        assert next_cursor is None
+
+    def test_cursor_pagination(self, store):
+        """Test that following next_cursor visits every record once, including ties"""
+        store.insert_many([make_record(1000.0 + i // 2) for i in range(7)])
+
+        seen, cursor = [], None
+        while True:
+            records, cursor = store.page(limit=3, cursor=cursor)
+            seen.extend(record.id for record in records)
+            if cursor is None:
+                break
+
+        assert sorted(seen) == list(range(1, 8))
+        assert len(seen) == len(set(seen))
+
+    def test_filters(self, store):
+        """Test filtering by time range, category and content hash"""
+        store.insert_many(
+            [
+                make_record(1000.0, "spam"),
+                make_record(1010.0, "importante", content="outro"),
+                make_record(1020.0, "importante"),
+            ]
+        )
+        content_hash = hashlib.sha256(b"outro").hexdigest()
+
+        assert len(store.page(since=1010.0)[0]) == 2
+        assert len(store.page(until=1010.0)[0]) == 1
+        assert [r.created_at for r in store.page(category="importante")[0]] == [1020.0, 1010.0]
+        assert [r.created_at for r in store.page(content_hash=content_hash)[0]] == [1010.0]
+
+    def test_invalid_cursor(self, store):
+        """Test that a malformed cursor raises ValueError"""
+        with pytest.raises(ValueError):
+            store.page(cursor="abc")
+
+    def test_persists_across_connections(self, tmp_path):
+        """Test that records survive reopening the database"""
+        path = str(tmp_path / "history.db")
+        first = HistoryStore(path)
+        first.insert_many([make_record(1000.0)])
+        first.close()
+
+        second = HistoryStore(path)
+        assert len(second.page()[0]) == 1
+        second.close()
+
+
+class TestHistoryWriter:
+    """Test cases for HistoryWriter"""
+
+    async def test_flush_writes_in_batches(self, store):
+        """Test that buffered records are written in batches of batch_size"""
+        writer = HistoryWriter(store, batch_size=2)
+        for i in range(5):
+            writer.record(make_record(1000.0 + i))
+
+        with patch.object(store, "insert_many", wraps=store.insert_many) as insert:
+            assert await writer.flush() == 5
+
+        assert [len(call.args[0]) for call in insert.call_args_list] == [2, 2, 1]
+        assert writer.pending == 0
+
+    async def test_drops_when_buffer_full(self, store):
+        """Test that records beyond max_pending are dropped and counted"""
+        writer = HistoryWriter(store, max_pending=2)
+        dropped = metrics.HISTORY_DROPPED.get(reason="buffer_full")
+
+        for i in range(3):
+            writer.record(make_record(1000.0 + i))
+
+        assert writer.pending == 2
+        assert metrics.HISTORY_DROPPED.get(reason="buffer_full") == dropped + 1
+
+    async def test_write_error_drops_batch(self, store):
+        """Test that a failed batch is counted as dropped and does not stop the writer"""
+        writer = HistoryWriter(store)
+        writer.record(make_record(1000.0))
+        dropped = metrics.HISTORY_DROPPED.get(reason="write_error")
+
+        with patch.object(store, "insert_many", side_effect=OSError("disk full")):
+            assert await writer.flush() == 0
+
+        assert metrics.HISTORY_DROPPED.get(reason="write_error") == dropped + 1
+        assert writer.pending == 0
+
+    async def test_stop_flushes_pending(self, store):
+        """Test that stopping the writer writes what is still buffered"""
+        writer = HistoryWriter(store, flush_interval=60)
+        writer.start()
+        writer.record(make_record(1000.0))
+
+        await writer.stop()
+
+        assert len(store.page()[0]) == 1
+
+    def test_disabled_writer_ignores_records(self, store):
+        """Test that nothing is buffered when the history is disabled"""
+        writer = HistoryWriter(store, enabled=False)
+        writer.record(make_record(1000.0))
+        assert writer.pending == 0
+
+
+class TestPipelineHistory:
+    """Test cases for the history records of the classification pipeline"""
+
+    async def test_classification_is_recorded(self, store):
+        """Test that a classification queues a record with the text hash and latencies"""
+        writer = HistoryWriter(store)
+        result = {"category": "importante", "confidence": 0.8, "suggested_reply": "Ok"}
+        with (
+            patch("src.services.pipeline.get_history_writer", return_value=writer),
+            patch(
+                "src.services.ai_service.AIService.classify_email",
+                new_callable=AsyncMock,
+                return_value=result,
+            ),
+        ):
+            await ClassificationPipeline.classify_text("Olá, preciso de ajuda com o pedido")
+
+        assert writer.pending == 1
+        await writer.flush()
+        record = store.page()[0][0]
+        assert record.source == "text"
+        assert record.category == "importante"
+        assert record.confidence == 0.8
+        assert len(record.content_hash) == 64
+        assert record.total_ms >= record.ai_ms >= 0
+
+    async def test_failed_classification_not_recorded(self, store):
+        """Test that failures do not produce history records"""
+        writer = HistoryWriter(store)
+        with (
+            patch("src.services.pipeline.get_history_writer", return_value=writer),
+            pytest.raises(ValueError),
+        ):
+            await ClassificationPipeline.classify_text("   ")
+
+        assert writer.pending == 0
@@ -0,0 +1,65 @@
+"""
+Tests for the shared HTTP client
+"""
+
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from src.services import http_client
+from src.services.http_client import build_http_client, close_http_client, get_http_client
+
+
+class TestHTTPClient:
+    """Test cases for the pooled HTTP client lifecycle"""
+
+    @pytest.fixture(autouse=True)
+    async def reset_client(self):
+        """Ensure every test starts and ends without a shared client"""
+        await close_http_client()
+        yield
+        await close_http_client()
+
+    async def test_get_http_client_is_shared(self):
+        """Test that repeated calls return the same pooled client"""
+        first = get_http_client()
+        second = get_http_client()
+        assert isinstance(first, httpx.AsyncClient)
+        assert first is second
+
+    async def test_close_http_client(self):
+        """Test that closing releases the client and a new one is created afterwards"""
+        client = get_http_client()
+        await close_http_client()
+        assert client.is_closed
+        assert http_client._client is None
+        assert get_http_client() is not client
+
+    async def test_close_http_client_without_client(self):
+        """Test that closing is a no-op when no client was created"""
+        await close_http_client()
+        assert http_client._client is None
+
+    async def test_build_http_client_uses_separate_timeouts(self):
+        """Test that connect and read timeouts come from configuration"""
+        with (
+            patch.object(http_client, "HTTP_CONNECT_TIMEOUT", 2.5),
+            patch.object(http_client, "HTTP_READ_TIMEOUT", 45.0),
+        ):
+            client = build_http_client()
+        try:
+            assert client.timeout.connect == 2.5
+            assert client.timeout.read == 45.0
+        finally:
+            await client.aclose()
+
+    async def test_build_http_client_http2_without_h2(self):
+        """Test fallback to HTTP/1.1 when h2 is not installed"""
+        with (
+            patch.object(http_client, "HTTP_ENABLE_HTTP2", True),
+            patch.object(http_client, "_http2_available", return_value=False),
+            patch("httpx.AsyncClient") as mock_client,
+        ):
+            build_http_client()
+        assert mock_client.call_args.kwargs["http2"] is False
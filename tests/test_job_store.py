@@ -0,0 +1,159 @@
+"""
+Tests for the SQLite job store
+"""
+
+import pytest
+
+from src.services.job_store import DONE, FAILED, QUEUED, RUNNING, JobStore
+
+
+class FakeClock:
+    """Manually advanced clock"""
+
+    def __init__(self, now=1_700_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def store(tmp_path, clock):
+    store = JobStore(str(tmp_path / "jobs.db"), max_attempts=2, lease_seconds=60, clock=clock)
+    yield store
+    store.close()
+
+
+class TestJobStore:
+    """Test cases for JobStore"""
+
+    def test_create_and_get(self, store):
+        """Test that a created job is queued and readable"""
+        job = store.create("email.txt", "text/plain", b"conteudo", "https://example.com/hook")
+
+        loaded = store.get(job.id)
+        assert loaded.status == QUEUED
+        assert loaded.content == b"conteudo"
+        assert loaded.webhook_url == "https://example.com/hook"
+        assert store.get("missing") is None
+
+    def test_claim_in_creation_order(self, store, clock):
+        """Test that workers claim the oldest job first, once"""
+        first = store.create("a.txt", "text/plain", b"a")
+        clock.now += 1
+        store.create("b.txt", "text/plain", b"b")
+
+        claimed = store.claim_next()
+        assert claimed.id == first.id
+        assert claimed.status == RUNNING
+        assert claimed.attempts == 1
+        assert store.claim_next().filename == "b.txt"
+        assert store.claim_next() is None
+
+    def test_complete_drops_content(self, store):
+        """Test that finished jobs keep the result but not the file"""
+        job = store.create("a.txt", "text/plain", b"a")
+        store.claim_next()
+
+        store.complete(job.id, {"category": "importante"})
+
+        loaded = store.get(job.id)
+        assert loaded.status == DONE
+        assert loaded.result == {"category": "importante"}
+        assert loaded.content is None
+        assert loaded.to_dict()["result"] == {"category": "importante"}
+
+    def test_retryable_failure_requeued_after_delay(self, store, clock):
+        """Test that transient failures are retried after the delay, up to max attempts"""
+        job = store.create("a.txt", "text/plain", b"a")
+
+        claimed = store.claim_next()
+        assert store.fail(claimed, "AI down", 500, retryable=True, retry_after=30) == QUEUED
+        assert store.claim_next() is None  # Ainda no atraso
+
+        clock.now += 31
+        claimed = store.claim_next()
+        assert claimed.attempts == 2
+        assert store.fail(claimed, "AI down", 500, retryable=True) == FAILED
+        assert store.get(job.id).error == "AI down"
+
+    def test_permanent_failure(self, store):
+        """Test that non-retryable failures fail the job immediately"""
+        store.create("a.txt", "text/plain", b"a")
+
+        claimed = store.claim_next()
+
+        assert store.fail(claimed, "vazio", 400, retryable=False) == FAILED
+
+    def test_expired_lease_is_reclaimed(self, store, clock):
+        """Test that a job whose worker died is claimed again after the lease"""
+        job = store.create("a.txt", "text/plain", b"a")
+        store.claim_next()
+
+        clock.now += 30
+        store.heartbeat(job.id)
+        clock.now += 40
+        assert store.claim_next() is None  # Heartbeat renovou o lease
+
+        clock.now += 30
+        assert store.claim_next().id == job.id
+
+    def test_expired_lease_fails_without_attempts_left(self, store, clock):
+        """Test that a job that keeps losing its worker fails after max attempts"""
+        job = store.create("a.txt", "text/plain", b"a")
+        store.claim_next()
+        clock.now += 61
+        assert store.claim_next().attempts == 2
+
+        clock.now += 61
+        assert store.claim_next() is None
+
+        loaded = store.get(job.id)
+        assert loaded.status == FAILED
+        assert loaded.attempts == 2
+        assert loaded.status_code == 500
+
+    def test_purge_finished(self, store, clock):
+        """Test that only finished jobs older than the retention time are deleted"""
+        done = store.create("a.txt", "text/plain", b"a")
+        failed = store.create("b.txt", "text/plain", b"b")
+        queued = store.create("c.txt", "text/plain", b"c")
+        store.complete(store.claim_next().id, {"category": "importante"})
+        store.fail(store.claim_next(), "vazio", 400, retryable=False)
+
+        assert store.purge_finished() == 0
+        clock.now += store.retention_seconds + 1
+        assert store.purge_finished() == 2
+
+        assert store.get(done.id) is None
+        assert store.get(failed.id) is None
+        assert store.get(queued.id).status == QUEUED
+
+    def test_manual_retry(self, store):
+        """Test that only failed jobs can be re-queued by hand"""
+        job = store.create("a.txt", "text/plain", b"a")
+        assert store.retry(job.id) is False
+
+        store.fail(store.claim_next(), "vazio", 400, retryable=False)
+        assert store.retry(job.id) is True
+
+        loaded = store.get(job.id)
+        assert loaded.status == QUEUED
+        assert loaded.attempts == 0
+        assert loaded.error is None
+
+    def test_jobs_survive_reopen(self, tmp_path, clock):
+        """Test that jobs persist across restarts"""
+        path = str(tmp_path / "jobs.db")
+        store = JobStore(path, clock=clock)
+        job = store.create("a.txt", "text/plain", b"a")
+        store.close()
+
+        reopened = JobStore(path, clock=clock)
+        assert reopened.claim_next().id == job.id
+        reopened.close()
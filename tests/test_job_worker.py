@@ -0,0 +1,212 @@
+"""
+Tests for the background job worker pool
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from src.services.job_store import DONE, FAILED, QUEUED, JobStore
+from src.services.job_worker import JobWorkerPool
+from src.services.ocr_backends import OCRTransportError
+from src.services.ocr_quota import OCRQuotaExceededError
+from src.services.priority import Priority, current_priority
+
+CLASSIFICATION = {"category": "importante", "confidence": 0.9, "suggested_reply": "Ok"}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"), max_attempts=3)
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def pool(store):
+    return JobWorkerPool(store, workers=2, poll_interval=0.05, retry_delay=0)
+
+
+class TestJobWorkerPool:
+    """Test cases for JobWorkerPool"""
+
+    async def test_process_next_completes_job(self, store, pool):
+        """Test that a job runs through the pipeline with bulk priority"""
+        priorities = []
+
+        async def classify(filename, content_type, content):
+            priorities.append(current_priority.get())
+            return CLASSIFICATION
+
+        job = store.create("a.txt", "text/plain", b"email")
+        with patch(
+            "src.services.pipeline.ClassificationPipeline.classify_file",
+            new=AsyncMock(side_effect=classify),
+        ):
+            assert await pool.process_next() is True
+
+        assert store.get(job.id).status == DONE
+        assert store.get(job.id).result == CLASSIFICATION
+        assert priorities == [Priority.BULK]
+        assert current_priority.get() == Priority.INTERACTIVE
+        assert await pool.process_next() is False
+
+    async def test_server_errors_are_retried(self, store, pool):
+        """Test that 5xx failures re-queue the job"""
+        job = store.create("a.txt", "text/plain", b"email")
+        with patch(
+            "src.services.pipeline.ClassificationPipeline.classify_file",
+            new=AsyncMock(side_effect=RuntimeError("Gemini indisponível")),
+        ):
+            await pool.process_next()
+
+        loaded = store.get(job.id)
+        assert loaded.status == QUEUED
+        assert loaded.status_code == 500
+
+    async def test_quota_errors_retry_after_hint(self, store, pool):
+        """Test that OCR quota errors are retried after the quota's retry hint"""
+        job = store.create("scan.pdf", "application/pdf", b"%PDF")
+        with patch(
+            "src.services.pipeline.ClassificationPipeline.classify_file",
+            new=AsyncMock(side_effect=OCRQuotaExceededError("quota", retry_after=120)),
+        ):
+            await pool.process_next()
+
+        loaded = store.get(job.id)
+        assert loaded.status == QUEUED
+        assert loaded.status_code == 503
+        assert loaded.run_after >= loaded.updated_at + 119
+
+    async def test_ocr_transport_errors_are_retried(self, store, pool):
+        """Test that OCR timeouts and network errors re-queue the job"""
+        job = store.create("scan.pdf", "application/pdf", b"%PDF")
+        with patch(
+            "src.services.pipeline.ClassificationPipeline.classify_file",
+            new=AsyncMock(side_effect=OCRTransportError("OCR request timed out.")),
+        ):
+            await pool.process_next()
+
+        loaded = store.get(job.id)
+        assert loaded.status == QUEUED
+        assert loaded.error == "OCR request timed out."
+
+    async def test_client_errors_fail_immediately(self, store, pool):
+        """Test that invalid input fails the job without retries"""
+        job = store.create("a.txt", "text/plain", b"email")
+        with patch(
+            "src.services.pipeline.ClassificationPipeline.classify_file",
+            new=AsyncMock(side_effect=ValueError("Conteúdo inválido")),
+        ):
+            await pool.process_next()
+
+        loaded = store.get(job.id)
+        assert loaded.status == FAILED
+        assert loaded.error == "Conteúdo inválido"
+
+    async def test_webhook_receives_final_state(self, store, pool):
+        """Test that the webhook gets the finished job"""
+        client = MagicMock()
+        client.post = AsyncMock(return_value=MagicMock(status_code=200))
+        job = store.create("a.txt", "text/plain", b"email", "https://example.com/hook")
+
+        with (
+            patch(
+                "src.services.pipeline.ClassificationPipeline.classify_file",
+                new=AsyncMock(return_value=CLASSIFICATION),
+            ),
+            patch("src.services.job_worker.get_http_client", return_value=client),
+            patch(
+                "src.services.webhook_guard._resolve",
+                new=AsyncMock(return_value=["93.184.216.34"]),
+            ),
+        ):
+            await pool.process_next()
+
+        url = client.post.await_args.args[0]
+        payload = client.post.await_args.kwargs["json"]
+        assert url == "https://example.com/hook"
+        assert payload["id"] == job.id
+        assert payload["status"] == DONE
+        assert payload["result"] == CLASSIFICATION
+
+    async def test_webhook_revalidated_at_delivery(self, store, pool):
+        """Test that a webhook host now resolving to an internal address is not called"""
+        client = MagicMock()
+        client.post = AsyncMock(return_value=MagicMock(status_code=200))
+        store.create("a.txt", "text/plain", b"email", "https://example.com/hook")
+
+        with (
+            patch(
+                "src.services.pipeline.ClassificationPipeline.classify_file",
+                new=AsyncMock(return_value=CLASSIFICATION),
+            ),
+            patch("src.services.job_worker.get_http_client", return_value=client),
+            patch("src.services.webhook_guard._resolve", new=AsyncMock(return_value=["127.0.0.1"])),
+        ):
+            await pool.process_next()
+
+        client.post.assert_not_awaited()
+
+    async def test_workers_pick_up_enqueued_jobs(self, store, pool):
+        """Test that started workers process jobs in the background until stopped"""
+        with patch(
+            "src.services.pipeline.ClassificationPipeline.classify_file",
+            new=AsyncMock(return_value=CLASSIFICATION),
+        ):
+            pool.start()
+            jobs = [store.create(f"{i}.txt", "text/plain", b"email") for i in range(3)]
+            pool.notify()
+            for _ in range(50):
+                if all(store.get(job.id).status == DONE for job in jobs):
+                    break
+                await asyncio.sleep(0.02)
+            await pool.stop()
+
+        assert [store.get(job.id).status for job in jobs] == [DONE, DONE, DONE]
+
+    async def test_purges_finished_jobs(self, store, pool):
+        """Test that the pool purges finished jobs when it starts"""
+        with patch.object(store, "purge_finished", return_value=0) as purge_finished:
+            pool.start()
+            await asyncio.sleep(0.02)
+            await pool.stop()
+
+        purge_finished.assert_called_once()
+
+    async def test_stop_drains_running_job(self, store, pool):
+        """Test that stop lets a running job finish within the drain timeout"""
+        started = asyncio.Event()
+
+        async def slow_classify(*args):
+            started.set()
+            await asyncio.sleep(0.1)
+            return CLASSIFICATION
+
+        with patch("src.services.pipeline.ClassificationPipeline.classify_file", new=slow_classify):
+            job = store.create("email.txt", "text/plain", b"email")
+            pool.start()
+            await asyncio.wait_for(started.wait(), timeout=2)
+            await pool.stop(drain_timeout=5)
+
+        assert store.get(job.id).status == DONE
+
+    async def test_stop_cancels_jobs_after_drain_timeout(self, store, pool):
+        """Test that jobs still running after the drain timeout are cancelled"""
+        started = asyncio.Event()
+
+        async def stuck_classify(*args):
+            started.set()
+            await asyncio.sleep(60)
+
+        with patch(
+            "src.services.pipeline.ClassificationPipeline.classify_file", new=stuck_classify
+        ):
+            job = store.create("email.txt", "text/plain", b"email")
+            pool.start()
+            await asyncio.wait_for(started.wait(), timeout=2)
+            await asyncio.wait_for(pool.stop(drain_timeout=0.05), timeout=2)
+
+        # Continua "running" e é retomado após o lease
+        assert store.get(job.id).status != DONE
@@ -0,0 +1,147 @@
+"""
+Tests for the priority lane limiter
+"""
+
+import asyncio
+
+import pytest
+
+from src.services.lanes import LaneLimiter, get_lane_limiter
+from src.services.priority import Priority, current_priority
+
+
+async def settle():
+    """Let woken tasks run"""
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+class TestLaneLimiter:
+    """Test cases for LaneLimiter"""
+
+    async def test_admits_up_to_capacity(self):
+        """Test that calls beyond capacity wait for a free slot"""
+        limiter = LaneLimiter("test", capacity=2, bulk_limit=2)
+        await limiter.acquire(Priority.INTERACTIVE)
+        await limiter.acquire(Priority.INTERACTIVE)
+
+        waiter = asyncio.create_task(limiter.acquire(Priority.INTERACTIVE))
+        await settle()
+        assert not waiter.done()
+
+        limiter.release(Priority.INTERACTIVE)
+        await settle()
+        assert waiter.done()
+        assert limiter.snapshot()["interactive"] == {"in_use": 2, "waiting": 0}
+
+    async def test_bulk_is_capped(self):
+        """Test that bulk calls never hold more than bulk_limit slots"""
+        limiter = LaneLimiter("test", capacity=4, bulk_limit=1)
+        await limiter.acquire(Priority.BULK)
+
+        bulk = asyncio.create_task(limiter.acquire(Priority.BULK))
+        await settle()
+        assert not bulk.done()
+
+        # Interactive still gets the remaining slots
+        await asyncio.wait_for(limiter.acquire(Priority.INTERACTIVE), timeout=1)
+        assert limiter.snapshot() == {
+            "interactive": {"in_use": 1, "waiting": 0},
+            "bulk": {"in_use": 1, "waiting": 1},
+        }
+
+        limiter.release(Priority.BULK)
+        await settle()
+        assert bulk.done()
+
+    async def test_interactive_waiters_go_first(self):
+        """Test that a freed slot goes to interactive waiters before older bulk waiters"""
+        limiter = LaneLimiter("test", capacity=1, bulk_limit=1)
+        await limiter.acquire(Priority.INTERACTIVE)
+        order = []
+
+        async def worker(priority, label):
+            await limiter.acquire(priority)
+            order.append(label)
+            limiter.release(priority)
+
+        tasks = [asyncio.create_task(worker(Priority.BULK, "bulk-1"))]
+        await settle()
+        tasks.append(asyncio.create_task(worker(Priority.BULK, "bulk-2")))
+        await settle()
+        tasks.append(asyncio.create_task(worker(Priority.INTERACTIVE, "interactive")))
+        await settle()
+
+        limiter.release(Priority.INTERACTIVE)
+        await asyncio.gather(*tasks)
+
+        assert order == ["interactive", "bulk-1", "bulk-2"]
+
+    async def test_new_calls_queue_behind_waiters(self):
+        """Test that a new bulk call cannot jump ahead of a waiting interactive call"""
+        limiter = LaneLimiter("test", capacity=2, bulk_limit=2)
+        await limiter.acquire(Priority.INTERACTIVE)
+        await limiter.acquire(Priority.INTERACTIVE)
+        interactive = asyncio.create_task(limiter.acquire(Priority.INTERACTIVE))
+        await settle()
+
+        limiter.release(Priority.INTERACTIVE)
+        bulk = asyncio.create_task(limiter.acquire(Priority.BULK))
+        await settle()
+
+        assert interactive.done()
+        assert not bulk.done()
+        bulk.cancel()
+
+    async def test_cancelled_waiter_is_removed(self):
+        """Test that cancelling a waiting call leaves no slot or waiter behind"""
+        limiter = LaneLimiter("test", capacity=1, bulk_limit=1)
+        await limiter.acquire(Priority.INTERACTIVE)
+        waiter = asyncio.create_task(limiter.acquire(Priority.BULK))
+        await settle()
+
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        limiter.release(Priority.INTERACTIVE)
+
+        assert limiter.snapshot() == {
+            "interactive": {"in_use": 0, "waiting": 0},
+            "bulk": {"in_use": 0, "waiting": 0},
+        }
+
+    async def test_cancelled_after_grant_releases_slot(self):
+        """Test that a call cancelled right after being granted hands its slot back"""
+        limiter = LaneLimiter("test", capacity=1, bulk_limit=1)
+        await limiter.acquire(Priority.INTERACTIVE)
+        waiter = asyncio.create_task(limiter.acquire(Priority.INTERACTIVE))
+        await settle()
+
+        limiter.release(Priority.INTERACTIVE)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+        assert limiter.snapshot()["interactive"]["in_use"] == 0
+
+    async def test_slot_uses_context_priority(self):
+        """Test that slot() takes the lane from current_priority"""
+        limiter = LaneLimiter("test", capacity=2, bulk_limit=1)
+        token = current_priority.set(Priority.BULK)
+        try:
+            async with limiter.slot():
+                assert limiter.snapshot()["bulk"]["in_use"] == 1
+        finally:
+            current_priority.reset(token)
+
+        assert limiter.snapshot()["bulk"]["in_use"] == 0
+
+    def test_rejects_zero_capacity(self):
+        """Test that a limiter needs at least one slot"""
+        with pytest.raises(ValueError):
+            LaneLimiter("test", capacity=0, bulk_limit=0)
+
+    def test_get_lane_limiter_is_shared(self):
+        """Test that each service has one process-wide limiter"""
+        assert get_lane_limiter("ai") is get_lane_limiter("ai")
+        assert get_lane_limiter("ai") is not get_lane_limiter("ocr")
@@ -0,0 +1,122 @@
+"""
+Tests for the metrics registry and the metrics middleware
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.middleware.metrics import MetricsMiddleware
+from src.services.metrics import (
+    HTTP_REQUEST_DURATION,
+    STAGE_DURATION,
+    STAGE_ERRORS,
+    STAGE_IN_FLIGHT,
+    Registry,
+    estimate_tokens,
+    track_stage,
+)
+
+
+class TestRegistry:
+    """Test cases for the metric types and the text format"""
+
+    def test_counter_render(self):
+        """Test counter samples with labels, sorted and escaped"""
+        registry = Registry()
+        counter = registry.counter("requests_total", "Requests", ("outcome",))
+        counter.inc(outcome="ok")
+        counter.inc(2, outcome="ok")
+        counter.inc(outcome='bad "one"')
+
+        assert registry.render() == (
+            "# HELP requests_total Requests\n"
+            "# TYPE requests_total counter\n"
+            'requests_total{outcome="bad \\"one\\""} 1\n'
+            'requests_total{outcome="ok"} 3\n'
+        )
+
+    def test_gauge(self):
+        """Test that gauges go up, down and can be set"""
+        registry = Registry()
+        gauge = registry.gauge("in_flight", "In flight")
+        gauge.inc()
+        gauge.inc()
+        gauge.dec()
+        assert gauge.get() == 1
+
+        gauge.set(7)
+        assert "in_flight 7" in registry.render()
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test histogram bucket, sum and count samples"""
+        registry = Registry()
+        histogram = registry.histogram("latency_seconds", "Latency", ("stage",), buckets=(0.1, 1))
+        histogram.observe(0.05, stage="ocr")
+        histogram.observe(0.5, stage="ocr")
+        histogram.observe(3.0, stage="ocr")
+
+        lines = registry.render().splitlines()
+
+        assert 'latency_seconds_bucket{stage="ocr",le="0.1"} 1' in lines
+        assert 'latency_seconds_bucket{stage="ocr",le="1"} 2' in lines
+        assert 'latency_seconds_bucket{stage="ocr",le="+Inf"} 3' in lines
+        assert 'latency_seconds_sum{stage="ocr"} 3.55' in lines
+        assert 'latency_seconds_count{stage="ocr"} 3' in lines
+
+    def test_duplicate_name_rejected(self):
+        """Test that a metric name can only be registered once"""
+        registry = Registry()
+        registry.counter("requests_total", "Requests")
+        with pytest.raises(ValueError):
+            registry.gauge("requests_total", "Requests")
+
+    def test_estimate_tokens(self):
+        """Test the rough token estimate"""
+        assert estimate_tokens("") == 0
+        assert estimate_tokens("abcd") == 1
+        assert estimate_tokens("abcde") == 2
+
+
+class TestTrackStage:
+    """Test cases for track_stage"""
+
+    def test_records_latency(self):
+        """Test that a stage is timed and no longer in flight afterwards"""
+        before = STAGE_DURATION.count(stage="test_ok")
+        with track_stage("test_ok"):
+            assert STAGE_IN_FLIGHT.get(stage="test_ok") == 1
+
+        assert STAGE_DURATION.count(stage="test_ok") == before + 1
+        assert STAGE_IN_FLIGHT.get(stage="test_ok") == 0
+
+    def test_counts_errors(self):
+        """Test that a failing stage is timed and counted as an error"""
+        errors = STAGE_ERRORS.get(stage="test_error")
+        with pytest.raises(ValueError):
+            with track_stage("test_error"):
+                raise ValueError("boom")
+
+        assert STAGE_ERRORS.get(stage="test_error") == errors + 1
+        assert STAGE_IN_FLIGHT.get(stage="test_error") == 0
+
+
+class TestMetricsMiddleware:
+    """Test cases for MetricsMiddleware"""
+
+    def test_records_request_and_upload(self):
+        """Test that request latency and body upload time are recorded"""
+
+        async def app(scope, receive, send):
+            await receive()
+            await send({"type": "http.response.start", "status": 201, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+
+        requests = HTTP_REQUEST_DURATION.count(handler="none", method="POST", status="201")
+        uploads = STAGE_DURATION.count(stage="upload")
+
+        TestClient(MetricsMiddleware(app)).post("/api/analyze", content=b"x" * 100)
+
+        assert HTTP_REQUEST_DURATION.count(handler="none", method="POST", status="201") == (
+            requests + 1
+        )
+        assert STAGE_DURATION.count(stage="upload") == uploads + 1
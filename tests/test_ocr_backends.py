@@ -0,0 +1,243 @@
+"""
+Tests for OCR Backends
+"""
+
+from unittest.mock import AsyncMock, Mock, patch
+
+import httpx
+import pytest
+
+from src.services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from src.services.ocr_backends import (
+    OCRSpaceBackend,
+    OCRTransportError,
+    TesseractBackend,
+    create_backend,
+)
+
+
+class TestOCRSpaceBackend:
+    """Test cases for the OCR.space backend"""
+
+    @pytest.fixture
+    def backend(self):
+        return OCRSpaceBackend()
+
+    @pytest.fixture
+    def mock_error_response(self):
+        """Mock error OCR API response"""
+        return {
+            "IsErroredOnProcessing": True,
+            "ErrorMessage": ["OCR processing failed"],
+            "ErrorDetails": "Image quality too low",
+        }
+
+    # --- Validation Tests ---
+
+    def test_check_available_missing_api_key(self, backend):
+        """Test validation fails when API key is missing"""
+        with patch("src.services.ocr_backends.OCR_SPACE_API_KEY", None):
+            with pytest.raises(ValueError, match="OCR_SPACE_API_KEY not configured"):
+                backend.check_available()
+            assert not backend.is_available()
+
+    def test_check_available_with_api_key(self, backend):
+        """Test validation succeeds when API key is present"""
+        with patch("src.services.ocr_backends.OCR_SPACE_API_KEY", "test_key"):
+            # Should not raise
+            backend.check_available()
+            assert backend.is_available()
+
+    def test_max_request_bytes(self, backend):
+        """Test that the free tier 1MB limit is exposed to OCRService"""
+        assert backend.max_request_bytes == 1024 * 1024
+
+    # --- API Request Tests ---
+
+    @pytest.mark.asyncio
+    async def test_send_request_success(self, backend):
+        """Test successful OCR API request"""
+        with patch("src.services.ocr_backends.OCR_SPACE_API_KEY", "test_key"):
+            mock_response = Mock(spec=httpx.Response)
+            mock_response.status_code = 200
+
+            with patch("src.services.ocr_backends.get_http_client") as mock_client:
+                mock_client.return_value.post = AsyncMock(return_value=mock_response)
+
+                response = await backend._send_request(b"%PDF-1.4\n%EOF\n", "test.pdf")
+
+                assert response.status_code == 200
+                files = mock_client.return_value.post.call_args.kwargs["files"]
+                assert files["file"][0] == "test.pdf"
+
+    @pytest.mark.asyncio
+    async def test_send_request_timeout(self, backend):
+        """Test OCR request timeout handling"""
+        with patch("src.services.ocr_backends.get_http_client") as mock_client:
+            mock_client.return_value.post = AsyncMock(side_effect=httpx.TimeoutException("Timeout"))
+
+            with pytest.raises(OCRTransportError, match="OCR request timed out"):
+                await backend._send_request(b"%PDF", "test.pdf")
+
+    @pytest.mark.asyncio
+    async def test_send_request_network_error(self, backend):
+        """Test OCR request network error handling"""
+        with patch("src.services.ocr_backends.get_http_client") as mock_client:
+            mock_client.return_value.post = AsyncMock(
+                side_effect=httpx.ConnectError("Connection failed")
+            )
+
+            with pytest.raises(OCRTransportError, match="Network error during OCR"):
+                await backend._send_request(b"%PDF", "test.pdf")
+
+    async def test_acquire_quota_open_circuit_spends_no_quota(self, backend):
+        """Test that an open circuit rejects the call before OCR quota is acquired"""
+        breaker = CircuitBreaker("ocrspace", failure_threshold=1)
+        breaker.record_failure()
+        scheduler = Mock(acquire=AsyncMock())
+
+        with (
+            patch("src.services.ocr_backends.get_circuit_breaker", return_value=breaker),
+            patch("src.services.ocr_backends.get_quota_scheduler", return_value=scheduler),
+            pytest.raises(CircuitOpenError),
+        ):
+            await backend.acquire_quota()
+
+        scheduler.acquire.assert_not_called()
+
+    # --- Response Parsing Tests ---
+
+    def test_parse_response_success(self):
+        """Test parsing successful OCR response"""
+        mock_response = Mock(spec=httpx.Response)
+        mock_response.status_code = 200
+        mock_response.json.return_value = {
+            "IsErroredOnProcessing": False,
+            "ParsedResults": [{"ParsedText": "This is extracted text from OCR"}],
+        }
+
+        text = OCRSpaceBackend._parse_response(mock_response)
+        assert text == "This is extracted text from OCR"
+
+    def test_parse_response_multiple_pages(self):
+        """Test that all pages in a response are returned"""
+        mock_response = Mock(spec=httpx.Response)
+        mock_response.status_code = 200
+        mock_response.json.return_value = {
+            "IsErroredOnProcessing": False,
+            "ParsedResults": [{"ParsedText": "page 1"}, {"ParsedText": "page 2"}],
+        }
+
+        assert OCRSpaceBackend._parse_response(mock_response) == "page 1\npage 2"
+
+    def test_parse_response_http_error(self):
+        """Test parsing response with HTTP error status"""
+        mock_response = Mock(spec=httpx.Response)
+        mock_response.status_code = 500
+        mock_response.text = "Internal Server Error"
+
+        with pytest.raises(ValueError, match="OCR API returned status 500"):
+            OCRSpaceBackend._parse_response(mock_response)
+
+    def test_parse_response_processing_error(self, mock_error_response):
+        """Test parsing response with OCR processing error"""
+        mock_response = Mock(spec=httpx.Response)
+        mock_response.status_code = 200
+        mock_response.json.return_value = mock_error_response
+
+        with pytest.raises(ValueError, match="OCR processing error"):
+            OCRSpaceBackend._parse_response(mock_response)
+
+    def test_parse_response_no_results(self):
+        """Test parsing response with no results"""
+        mock_response = Mock(spec=httpx.Response)
+        mock_response.status_code = 200
+        mock_response.json.return_value = {
+            "IsErroredOnProcessing": False,
+            "ParsedResults": [],
+        }
+
+        with pytest.raises(ValueError, match="OCR API returned no results"):
+            OCRSpaceBackend._parse_response(mock_response)
+
+    def test_parse_response_blank_page(self):
+        """Test that blank pages are returned as empty text"""
+        mock_response = Mock(spec=httpx.Response)
+        mock_response.status_code = 200
+        mock_response.json.return_value = {
+            "IsErroredOnProcessing": False,
+            "ParsedResults": [{"ParsedText": ""}],
+        }
+
+        assert OCRSpaceBackend._parse_response(mock_response) == ""
+
+
+class TestTesseractBackend:
+    """Test cases for the local Tesseract backend"""
+
+    def test_default_workers_use_all_cores(self):
+        """Test that 0 workers means one worker per CPU"""
+        with patch("src.services.ocr_backends.os.cpu_count", return_value=8):
+            backend = TesseractBackend(workers=0)
+        assert backend.workers == 8
+        assert backend.max_request_bytes is None
+
+    def test_check_available_missing_packages(self):
+        """Test that missing optional packages are reported"""
+        backend = TesseractBackend()
+        with patch("src.services.ocr_backends.importlib.util.find_spec", return_value=None):
+            with pytest.raises(ValueError, match="requirements-ocr.txt"):
+                backend.check_available()
+
+    def test_check_available_missing_binary(self):
+        """Test that a missing tesseract binary is reported"""
+        backend = TesseractBackend()
+        with (
+            patch("src.services.ocr_backends.importlib.util.find_spec", return_value=object()),
+            patch("src.services.ocr_backends.shutil.which", return_value=None),
+        ):
+            with pytest.raises(ValueError, match="'tesseract' binary"):
+                backend.check_available()
+
+    @pytest.mark.asyncio
+    async def test_recognize_merges_pages_in_order(self):
+        """Test that every page is recognized in the pool and merged in order"""
+        backend = TesseractBackend(workers=2, dpi=150, lang="por")
+        calls = []
+
+        class InlineExecutor:
+            def submit(self, fn, *args):
+                import concurrent.futures
+
+                calls.append(args)
+                future = concurrent.futures.Future()
+                future.set_result(f"page {args[1] + 1}")
+                return future
+
+        with (
+            patch.object(TesseractBackend, "_count_pages", return_value=3),
+            patch.object(backend, "_get_executor", return_value=InlineExecutor()),
+        ):
+            text = await backend.recognize(b"%PDF", "scan.pdf")
+
+        assert text == "page 1\npage 2\npage 3"
+        assert [args[1:] for args in calls] == [(0, 150, "por"), (1, 150, "por"), (2, 150, "por")]
+
+    @pytest.mark.asyncio
+    async def test_recognize_invalid_pdf(self):
+        """Test that unreadable PDFs raise ValueError"""
+        backend = TesseractBackend()
+        with pytest.raises(ValueError, match="Could not read PDF"):
+            await backend.recognize(b"not a pdf", "scan.pdf")
+
+
+class TestCreateBackend:
+    """Test cases for backend selection by name"""
+
+    def test_create_known_backends(self):
+        assert isinstance(create_backend("ocrspace"), OCRSpaceBackend)
+        assert isinstance(create_backend("tesseract"), TesseractBackend)
+
+    def test_create_unknown_backend(self):
+        with pytest.raises(ValueError, match="Unknown OCR backend"):
+            create_backend("abbyy")
@@ -0,0 +1,90 @@
+"""
+Tests for OCR preprocessing
+"""
+
+import io
+
+import pytest
+
+from src.services.ocr_preprocess import PDFPreprocessor
+
+Image = pytest.importorskip("PIL.Image")
+pytest.importorskip("pypdfium2")
+
+
+class TestPDFPreprocessor:
+    """Test cases for PDFPreprocessor"""
+
+    @pytest.fixture
+    def scanned_pdf(self):
+        """Create a 2-page 'scan': noisy color images embedded at 600dpi"""
+        import random
+
+        from PIL import ImageDraw
+
+        rng = random.Random(42)
+        pages = []
+        for _ in range(2):
+            image = Image.new("RGB", (1240, 1754), (245, 240, 230))
+            draw = ImageDraw.Draw(image)
+            for y in range(60, 1700, 40):
+                draw.text((60, y), "Prezados, segue o relatorio mensal", fill=(10, 10, 10))
+            for _ in range(4000):
+                x, y = rng.randrange(1240), rng.randrange(1754)
+                image.putpixel((x, y), (rng.randrange(256), rng.randrange(256), 200))
+            pages.append(image)
+
+        buffer = io.BytesIO()
+        pages[0].save(
+            buffer, "PDF", save_all=True, append_images=pages[1:], resolution=600, quality=95
+        )
+        return buffer.getvalue()
+
+    def test_invalid_color_mode(self):
+        """Test that unknown color modes are rejected"""
+        with pytest.raises(ValueError, match="Unknown OCR preprocessing mode"):
+            PDFPreprocessor(color_mode="sepia")
+
+    def test_is_available(self):
+        """Test availability when the imaging packages are installed"""
+        assert PDFPreprocessor.is_available()
+
+    @pytest.mark.parametrize("color_mode", ["gray", "bilevel"])
+    def test_process_shrinks_scanned_pdf(self, scanned_pdf, color_mode):
+        """Test that a high-dpi color scan becomes a smaller PDF with the same pages"""
+        import pypdfium2
+
+        result = PDFPreprocessor(target_dpi=150, color_mode=color_mode).process(scanned_pdf)
+
+        assert result.applied
+        assert result.pages == 2
+        assert result.original_bytes == len(scanned_pdf)
+        assert result.output_bytes == len(result.content)
+        assert result.bytes_saved > 0
+        assert result.seconds >= 0
+        assert len(pypdfium2.PdfDocument(result.content)) == 2
+
+    def test_process_keeps_original_when_not_smaller(self):
+        """Test that lean PDFs are sent unchanged"""
+        from pypdf import PdfWriter
+
+        # Uma página vazia sem imagens tem ~0.5KB; rasterizada a 300dpi vira um
+        # JPEG de 2550x3300 pixels, sempre maior
+        writer = PdfWriter()
+        writer.add_blank_page(width=612, height=792)
+        buffer = io.BytesIO()
+        writer.write(buffer)
+        content = buffer.getvalue()
+
+        result = PDFPreprocessor(target_dpi=300).process(content)
+
+        assert not result.applied
+        assert result.content == content
+        assert result.pages == 1
+        assert result.output_bytes == result.original_bytes == len(content)
+        assert result.bytes_saved == 0
+
+    def test_process_invalid_pdf(self):
+        """Test that unreadable PDFs raise ValueError"""
+        with pytest.raises(ValueError, match="Could not render PDF"):
+            PDFPreprocessor().process(b"not a pdf")
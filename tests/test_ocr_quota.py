@@ -0,0 +1,200 @@
+"""
+Tests for the OCR quota scheduler
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from src.services.ocr_quota import OCRQuotaExceededError, OCRQuotaScheduler
+from src.services.priority import Priority, current_priority
+
+
+class FakeClock:
+    """Manually advanced clock"""
+
+    def __init__(self, now=1_700_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestOCRQuotaScheduler:
+    """Test cases for OCRQuotaScheduler"""
+
+    @pytest.fixture
+    def clock(self):
+        # Start at the beginning of a minute
+        return FakeClock(1_700_000_040.0)
+
+    @pytest.fixture
+    def make_scheduler(self, tmp_path, clock):
+        created = []
+
+        def factory(**kwargs):
+            options = {
+                "state_path": str(tmp_path / "quota.db"),
+                "per_minute": 2,
+                "per_day": 5,
+                "bulk_reserve": 2,
+                "max_wait_seconds": 0.5,
+                "clock": clock,
+            }
+            options.update(kwargs)
+            scheduler = OCRQuotaScheduler(**options)
+            scheduler.poll_interval = 0.01
+            created.append(scheduler)
+            return scheduler
+
+        yield factory
+        for scheduler in created:
+            scheduler.close()
+
+    async def test_acquire_counts_usage(self, make_scheduler):
+        """Test that admitted requests are counted in both windows"""
+        scheduler = make_scheduler()
+        await scheduler.acquire()
+        await scheduler.acquire()
+
+        usage = scheduler.usage()
+        assert usage["minute_used"] == 2
+        assert usage["day_used"] == 2
+
+    async def test_usage_persists_across_restarts(self, make_scheduler):
+        """Test that counters survive a new scheduler on the same state file"""
+        scheduler = make_scheduler()
+        await scheduler.acquire()
+        scheduler.close()
+
+        restarted = make_scheduler()
+        assert restarted.usage()["day_used"] == 1
+
+    async def test_minute_window_resets(self, make_scheduler, clock):
+        """Test that the per-minute counter resets on a new minute"""
+        scheduler = make_scheduler()
+        await scheduler.acquire()
+        await scheduler.acquire()
+
+        clock.now += 60
+        assert scheduler.usage()["minute_used"] == 0
+        await scheduler.acquire()
+        assert scheduler.usage()["day_used"] == 3
+
+    async def test_bulk_rejected_when_minute_full(self, make_scheduler):
+        """Test that bulk work is rejected immediately with a retry hint"""
+        scheduler = make_scheduler()
+        await scheduler.acquire()
+        await scheduler.acquire()
+
+        with pytest.raises(OCRQuotaExceededError, match="per-minute") as exc_info:
+            await scheduler.acquire(Priority.BULK)
+        assert 0 < exc_info.value.retry_after <= 60
+
+    async def test_interactive_waits_for_next_minute(self, make_scheduler, clock):
+        """Test that interactive work waits for capacity instead of failing"""
+        scheduler = make_scheduler(max_wait_seconds=120)
+        await scheduler.acquire()
+        await scheduler.acquire()
+
+        waiter = asyncio.create_task(scheduler.acquire(Priority.INTERACTIVE))
+        await asyncio.sleep(0.05)
+        assert not waiter.done()
+
+        clock.now += 60
+        await asyncio.wait_for(waiter, timeout=1)
+        assert scheduler.usage()["minute_used"] == 1
+
+    async def test_interactive_rejected_when_wait_too_long(self, make_scheduler):
+        """Test that interactive work fails fast when the wait exceeds the limit"""
+        scheduler = make_scheduler(max_wait_seconds=1)
+        await scheduler.acquire()
+        await scheduler.acquire()
+
+        with pytest.raises(OCRQuotaExceededError, match="per-minute"):
+            await scheduler.acquire(Priority.INTERACTIVE)
+
+    async def test_interactive_served_before_bulk(self, make_scheduler, clock):
+        """Test that queued interactive work is admitted before bulk work"""
+        scheduler = make_scheduler(per_minute=1, per_day=100, max_wait_seconds=120)
+        await scheduler.acquire()
+
+        order = []
+
+        async def run(priority, label):
+            await scheduler.acquire(priority)
+            order.append(label)
+
+        first = asyncio.create_task(run(Priority.INTERACTIVE, "first"))
+        await asyncio.sleep(0.02)
+        second = asyncio.create_task(run(Priority.INTERACTIVE, "second"))
+        await asyncio.sleep(0.02)
+
+        clock.now += 60
+        await asyncio.wait_for(first, timeout=1)
+        with pytest.raises(OCRQuotaExceededError):
+            await scheduler.acquire(Priority.BULK)
+
+        clock.now += 60
+        await asyncio.wait_for(second, timeout=1)
+        assert order == ["first", "second"]
+
+    async def test_daily_quota_exhausted(self, make_scheduler, clock):
+        """Test that the daily quota rejects work until the next UTC day"""
+        scheduler = make_scheduler(per_minute=100)
+        for _ in range(5):
+            await scheduler.acquire()
+
+        with pytest.raises(OCRQuotaExceededError, match="daily quota") as exc_info:
+            await scheduler.acquire()
+        assert 0 < exc_info.value.retry_after <= 86400
+
+    async def test_bulk_cannot_use_interactive_reserve(self, make_scheduler):
+        """Test that bulk work stops before the reserved part of the daily quota"""
+        scheduler = make_scheduler(per_minute=100)
+        for _ in range(3):
+            await scheduler.acquire(Priority.BULK)
+
+        with pytest.raises(OCRQuotaExceededError, match="bulk"):
+            await scheduler.acquire(Priority.BULK)
+        # Interactive work can still use the reserve
+        await scheduler.acquire(Priority.INTERACTIVE)
+
+    async def test_priority_from_context(self, make_scheduler):
+        """Test that the priority defaults to the current context"""
+        scheduler = make_scheduler()
+        await scheduler.acquire()
+        await scheduler.acquire()
+
+        token = current_priority.set(Priority.BULK)
+        try:
+            with pytest.raises(OCRQuotaExceededError):
+                await scheduler.acquire()
+        finally:
+            current_priority.reset(token)
+
+    def test_check_capacity_rejects_early(self, make_scheduler):
+        """Test that multi-request documents are rejected before spending calls"""
+        scheduler = make_scheduler()
+        scheduler.check_capacity(5)
+        with pytest.raises(OCRQuotaExceededError, match="daily quota"):
+            scheduler.check_capacity(6)
+        assert scheduler.usage()["day_used"] == 0
+
+    async def test_database_not_touched_on_event_loop(self, make_scheduler, monkeypatch):
+        """Test that the quota transaction runs in a worker thread"""
+        scheduler = make_scheduler()
+        threads = []
+        try_consume = scheduler._try_consume
+
+        def recording_try_consume(priority):
+            threads.append(threading.get_ident())
+            return try_consume(priority)
+
+        monkeypatch.setattr(scheduler, "_try_consume", recording_try_consume)
+
+        await scheduler.acquire()
+
+        assert threads and threads[0] != threading.get_ident()
+        assert scheduler.usage()["day_used"] == 1
@@ -3,17 +3,58 @@ Tests for OCR Service
 """
 
 from pathlib import Path
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, Mock, patch
 
 import httpx
 import pytest
 
-from src.services.ocr_service import OCRService
+from src.services.lanes import get_lane_limiter
+from src.services.ocr_backends import OCRBackend, OCRSpaceBackend
+from src.services.ocr_quota import OCRQuotaExceededError, OCRQuotaScheduler
+from src.services.ocr_service import OCRService, PageRange
+
+
+class FakeBackend(OCRBackend):
+    """In-memory backend used to test OCRService orchestration"""
+
+    def __init__(self, name="fake", text="fake text", available=True, max_request_bytes=None):
+        self.name = name
+        self.text = text
+        self.available = available
+        self.max_request_bytes = max_request_bytes
+        self.calls = []
+
+    def check_available(self) -> None:
+        if not self.available:
+            raise ValueError(f"{self.name} not available")
+
+    async def recognize(self, content: bytes, filename: str) -> str:
+        self.calls.append(filename)
+        if isinstance(self.text, Exception):
+            raise self.text
+        return self.text
 
 
 class TestOCRService:
     """Test cases for OCRService"""
 
+    @pytest.fixture(autouse=True)
+    def reset_backends(self):
+        """Recreate backends from configuration for every test"""
+        OCRService._backends = None
+        yield
+        OCRService._backends = None
+
+    @pytest.fixture(autouse=True)
+    def quota_scheduler(self, tmp_path):
+        """Use an isolated, generous OCR.space quota for every test"""
+        scheduler = OCRQuotaScheduler(
+            state_path=str(tmp_path / "quota.db"), per_minute=1000, per_day=1000
+        )
+        with patch("src.services.ocr_backends.get_quota_scheduler", return_value=scheduler):
+            yield scheduler
+        scheduler.close()
+
     @pytest.fixture
     def temp_pdf_file(self, tmp_path):
         """Create a temporary PDF file for testing"""
@@ -24,12 +65,25 @@ class TestOCRService:
 
     @pytest.fixture
     def large_pdf_file(self, tmp_path):
-        """Create a large PDF file (over 1MB) for testing"""
+        """Create a file over the 10MB total OCR limit for testing"""
         pdf_file = tmp_path / "large.pdf"
-        # Create a file larger than 1MB
-        pdf_file.write_bytes(b"x" * (2 * 1024 * 1024))  # 2MB
+        pdf_file.write_bytes(b"x" * (11 * 1024 * 1024))  # 11MB
         return str(pdf_file)
 
+    @pytest.fixture
+    def multipage_pdf_bytes(self):
+        """Create a valid 6-page PDF in memory"""
+        import io
+
+        from pypdf import PdfWriter
+
+        writer = PdfWriter()
+        for _ in range(6):
+            writer.add_blank_page(width=200, height=200)
+        buffer = io.BytesIO()
+        writer.write(buffer)
+        return buffer.getvalue()
+
     @pytest.fixture
     def mock_success_response(self):
         """Mock successful OCR API response"""
@@ -38,29 +92,8 @@ class TestOCRService:
             "ParsedResults": [{"ParsedText": "This is extracted text from OCR"}],
         }
 
-    @pytest.fixture
-    def mock_error_response(self):
-        """Mock error OCR API response"""
-        return {
-            "IsErroredOnProcessing": True,
-            "ErrorMessage": ["OCR processing failed"],
-            "ErrorDetails": "Image quality too low",
-        }
-
     # --- Validation Tests ---
 
-    def test_validate_api_key_missing(self):
-        """Test validation fails when API key is missing"""
-        with patch("src.services.ocr_service.OCR_SPACE_API_KEY", None):
-            with pytest.raises(ValueError, match="OCR_SPACE_API_KEY not configured"):
-                OCRService._validate_api_key()
-
-    def test_validate_api_key_present(self):
-        """Test validation succeeds when API key is present"""
-        with patch("src.services.ocr_service.OCR_SPACE_API_KEY", "test_key"):
-            # Should not raise
-            OCRService._validate_api_key()
-
     def test_validate_file_exists(self, temp_pdf_file):
         """Test file existence validation succeeds"""
         path = OCRService._validate_file_exists(temp_pdf_file)
@@ -84,159 +117,367 @@ class TestOCRService:
         with pytest.raises(ValueError, match="File too large for OCR"):
             OCRService._validate_file_size(path)
 
-    # --- API Request Tests ---
+    def test_validate_extracted_text_empty(self):
+        """Test that empty OCR output is rejected"""
+        with pytest.raises(ValueError, match="OCR could not extract any text"):
+            OCRService._validate_extracted_text("")
+
+    def test_validate_extracted_text_whitespace_only(self):
+        """Test that whitespace-only OCR output is rejected"""
+        with pytest.raises(ValueError, match="OCR could not extract any text"):
+            OCRService._validate_extracted_text("   \n  \n  ")
+
+    # --- Backend Selection Tests ---
+
+    def test_get_backends_from_config(self):
+        """Test that backends are created in OCR_BACKENDS order"""
+        with patch("src.services.ocr_service.OCR_BACKENDS", ["tesseract", "ocrspace"]):
+            names = [backend.name for backend in OCRService.get_backends()]
+        assert names == ["tesseract", "ocrspace"]
+
+    def test_is_available(self):
+        """Test availability reflects the configured backends"""
+        OCRService._backends = [FakeBackend(available=False), FakeBackend(available=True)]
+        assert OCRService.is_available()
+
+        OCRService._backends = [FakeBackend(available=False)]
+        assert not OCRService.is_available()
 
     @pytest.mark.asyncio
-    async def test_send_ocr_request_success(self, temp_pdf_file):
-        """Test successful OCR API request"""
-        with patch("src.services.ocr_service.OCR_SPACE_API_KEY", "test_key"):
-            mock_response = Mock(spec=httpx.Response)
-            mock_response.status_code = 200
-            mock_response.json.return_value = {
-                "IsErroredOnProcessing": False,
-                "ParsedResults": [{"ParsedText": "Test"}],
-            }
+    async def test_extract_text_falls_back_to_next_backend(self, temp_pdf_file):
+        """Test that a failing backend falls back to the next one"""
+        failing = FakeBackend(name="first", text=ValueError("quota exceeded"))
+        working = FakeBackend(name="second", text="fallback text")
+        OCRService._backends = [failing, working]
+
+        text = await OCRService.extract_text_from_pdf(temp_pdf_file)
 
-            with patch("httpx.AsyncClient") as mock_client:
-                mock_client.return_value.__aenter__.return_value.post.return_value = mock_response
+        assert text == "fallback text"
+        assert failing.calls and working.calls
 
-                response = await OCRService._send_ocr_request(temp_pdf_file, Path(temp_pdf_file))
+    @pytest.mark.asyncio
+    async def test_extract_text_skips_unavailable_backend(self, temp_pdf_file):
+        """Test that unavailable backends are never called"""
+        unavailable = FakeBackend(name="first", available=False)
+        working = FakeBackend(name="second", text="local text")
+        OCRService._backends = [unavailable, working]
 
-                assert response.status_code == 200
+        assert await OCRService.extract_text_from_pdf(temp_pdf_file) == "local text"
+        assert not unavailable.calls
 
     @pytest.mark.asyncio
-    async def test_send_ocr_request_timeout(self, temp_pdf_file):
-        """Test OCR request timeout handling"""
-        with patch("src.services.ocr_service.OCR_SPACE_API_KEY", "test_key"):
-            with patch("httpx.AsyncClient") as mock_client:
-                mock_client.return_value.__aenter__.return_value.post.side_effect = (
-                    httpx.TimeoutException("Timeout")
-                )
+    async def test_extract_text_all_backends_fail(self, temp_pdf_file):
+        """Test that the last error is raised when every backend fails"""
+        OCRService._backends = [
+            FakeBackend(name="first", text=ValueError("first failed")),
+            FakeBackend(name="second", text=ValueError("second failed")),
+        ]
 
-                with pytest.raises(ValueError, match="OCR request timed out"):
-                    await OCRService._send_ocr_request(temp_pdf_file, Path(temp_pdf_file))
+        with pytest.raises(ValueError, match="second failed"):
+            await OCRService.extract_text_from_pdf(temp_pdf_file)
 
     @pytest.mark.asyncio
-    async def test_send_ocr_request_network_error(self, temp_pdf_file):
-        """Test OCR request network error handling"""
-        with patch("src.services.ocr_service.OCR_SPACE_API_KEY", "test_key"):
-            with patch("httpx.AsyncClient") as mock_client:
-                mock_client.return_value.__aenter__.return_value.post.side_effect = (
-                    httpx.ConnectError("Connection failed")
-                )
+    async def test_extract_text_no_backend_available(self, temp_pdf_file):
+        """Test the error when no configured backend is available"""
+        OCRService._backends = [
+            FakeBackend(name="first", available=False),
+            FakeBackend(name="second", available=False),
+        ]
 
-                with pytest.raises(ValueError, match="Network error during OCR"):
-                    await OCRService._send_ocr_request(temp_pdf_file, Path(temp_pdf_file))
+        with pytest.raises(ValueError, match="No OCR backend available"):
+            await OCRService.extract_text_from_pdf(temp_pdf_file)
 
-    # --- Response Parsing Tests ---
+    @pytest.mark.asyncio
+    async def test_aclose_releases_backends(self):
+        """Test that closing releases backends so they are recreated on next use"""
+        backend = FakeBackend()
+        backend.aclose = AsyncMock()
+        OCRService._backends = [backend]
 
-    def test_parse_ocr_response_success(self, mock_success_response):
-        """Test parsing successful OCR response"""
-        mock_response = Mock(spec=httpx.Response)
-        mock_response.status_code = 200
-        mock_response.json.return_value = mock_success_response
+        await OCRService.aclose()
 
-        text = OCRService._parse_ocr_response(mock_response)
-        assert text == "This is extracted text from OCR"
+        backend.aclose.assert_awaited_once()
+        assert OCRService._backends is None
 
-    def test_parse_ocr_response_http_error(self):
-        """Test parsing response with HTTP error status"""
-        mock_response = Mock(spec=httpx.Response)
-        mock_response.status_code = 500
-        mock_response.text = "Internal Server Error"
+    # --- Preprocessing Tests ---
 
-        with pytest.raises(ValueError, match="OCR API returned status 500"):
-            OCRService._parse_ocr_response(mock_response)
+    @pytest.mark.asyncio
+    async def test_preprocess_disabled(self):
+        """Test that content is unchanged when preprocessing is off"""
+        with patch("src.services.ocr_service.OCR_PREPROCESS", False):
+            assert await OCRService._preprocess(b"%PDF") == b"%PDF"
 
-    def test_parse_ocr_response_processing_error(self, mock_error_response):
-        """Test parsing response with OCR processing error"""
-        mock_response = Mock(spec=httpx.Response)
-        mock_response.status_code = 200
-        mock_response.json.return_value = mock_error_response
+    @pytest.mark.asyncio
+    async def test_preprocess_replaces_content(self):
+        """Test that the recompressed PDF is sent when preprocessing is on"""
+        from src.services.ocr_preprocess import PreprocessResult
 
-        with pytest.raises(ValueError, match="OCR processing error"):
-            OCRService._parse_ocr_response(mock_response)
+        result = PreprocessResult(b"small", 100, 5, 1, 0.01, True)
+        preprocessor = Mock()
+        preprocessor.process.return_value = result
 
-    def test_parse_ocr_response_no_results(self):
-        """Test parsing response with no results"""
-        mock_response = Mock(spec=httpx.Response)
-        mock_response.status_code = 200
-        mock_response.json.return_value = {
-            "IsErroredOnProcessing": False,
-            "ParsedResults": [],
-        }
+        with patch.object(OCRService, "get_preprocessor", return_value=preprocessor):
+            assert await OCRService._preprocess(b"x" * 100) == b"small"
 
-        with pytest.raises(ValueError, match="OCR API returned no results"):
-            OCRService._parse_ocr_response(mock_response)
+    @pytest.mark.asyncio
+    async def test_preprocess_failure_sends_original(self):
+        """Test that a preprocessing failure falls back to the original PDF"""
+        preprocessor = Mock()
+        preprocessor.process.side_effect = ValueError("Could not render PDF")
+
+        with patch.object(OCRService, "get_preprocessor", return_value=preprocessor):
+            assert await OCRService._preprocess(b"%PDF") == b"%PDF"
+
+    def test_get_preprocessor_missing_packages(self):
+        """Test that preprocessing is skipped when its packages are missing"""
+        with (
+            patch("src.services.ocr_service.OCR_PREPROCESS", True),
+            patch(
+                "src.services.ocr_service.PDFPreprocessor.is_available",
+                return_value=False,
+            ),
+        ):
+            assert OCRService.get_preprocessor() is None
+
+    # --- PDF Splitting Tests ---
+
+    def test_split_pdf_ranges_fit_limit(self, multipage_pdf_bytes):
+        """Test that split ranges cover every page in order and fit the limit"""
+        max_bytes = 800
+        ranges = OCRService._split_pdf(multipage_pdf_bytes, max_bytes)
+
+        assert len(multipage_pdf_bytes) > max_bytes
+        assert len(ranges) > 1
+        assert ranges[0].start == 0
+        assert ranges[-1].end == 6
+        for previous, current in zip(ranges, ranges[1:], strict=False):
+            assert previous.end == current.start
+        assert all(len(page_range.content) <= max_bytes for page_range in ranges)
+
+    def test_split_pdf_single_range_when_small(self, multipage_pdf_bytes):
+        """Test that a PDF under the limit stays in one range"""
+        ranges = OCRService._split_pdf(multipage_pdf_bytes, 10**6)
+        assert [(r.start, r.end) for r in ranges] == [(0, 6)]
+
+    def test_split_pdf_page_too_large(self, multipage_pdf_bytes):
+        """Test that a single page above the limit is rejected"""
+        with pytest.raises(ValueError, match="Page 1 is too large for OCR"):
+            OCRService._split_pdf(multipage_pdf_bytes, 50)
+
+    def test_split_pdf_invalid_pdf(self):
+        """Test that unreadable PDFs raise ValueError"""
+        with pytest.raises(ValueError, match="Could not split PDF"):
+            OCRService._split_pdf(b"x" * 2048, 1024)
 
-    def test_parse_ocr_response_empty_text(self):
-        """Test parsing response with empty text"""
-        mock_response = Mock(spec=httpx.Response)
-        mock_response.status_code = 200
-        mock_response.json.return_value = {
-            "IsErroredOnProcessing": False,
-            "ParsedResults": [{"ParsedText": ""}],
-        }
+    @pytest.mark.asyncio
+    async def test_extract_text_from_ranges_merges_in_page_order(self):
+        """Test that concurrent results are merged in page order"""
+        import asyncio
 
-        with pytest.raises(ValueError, match="OCR could not extract any text"):
-            OCRService._parse_ocr_response(mock_response)
+        ranges = [PageRange(0, 2, b"a"), PageRange(2, 4, b"b"), PageRange(4, 5, b"c")]
+        delays = {b"a": 0.03, b"b": 0.01, b"c": 0.0}
 
-    def test_parse_ocr_response_whitespace_only(self):
-        """Test parsing response with whitespace-only text"""
-        mock_response = Mock(spec=httpx.Response)
-        mock_response.status_code = 200
-        mock_response.json.return_value = {
-            "IsErroredOnProcessing": False,
-            "ParsedResults": [{"ParsedText": "   \n  \n  "}],
-        }
+        class DelayedBackend(FakeBackend):
+            async def recognize(self, content, filename):
+                await asyncio.sleep(delays[content])
+                return content.decode()
 
-        with pytest.raises(ValueError, match="OCR could not extract any text"):
-            OCRService._parse_ocr_response(mock_response)
+        text = await OCRService._extract_text_from_ranges(DelayedBackend(), ranges, "scan.pdf")
 
-    # --- Integration Tests ---
+        assert text == "a\nb\nc"
+
+    @pytest.mark.asyncio
+    async def test_extract_text_from_ranges_respects_concurrency(self):
+        """Test that no more than OCR_MAX_CONCURRENCY requests run at once"""
+        import asyncio
+
+        ranges = [PageRange(i, i + 1, b"x") for i in range(6)]
+        active = 0
+        peak = 0
+
+        class CountingBackend(FakeBackend):
+            async def recognize(self, content, filename):
+                nonlocal active, peak
+                active += 1
+                peak = max(peak, active)
+                await asyncio.sleep(0.01)
+                active -= 1
+                return "text"
+
+        with patch("src.services.ocr_service.OCR_MAX_CONCURRENCY", 2):
+            await OCRService._extract_text_from_ranges(CountingBackend(), ranges, "scan.pdf")
+
+        assert peak == 2
+
+    @pytest.mark.asyncio
+    async def test_extract_text_from_ranges_cancels_on_failure(self):
+        """Test that a failing range cancels the ranges still running or waiting"""
+        import asyncio
+
+        ranges = [PageRange(i, i + 1, bytes([i])) for i in range(4)]
+        started = []
+        cancelled = []
+
+        class FailingBackend(FakeBackend):
+            async def recognize(self, content, filename):
+                started.append(content)
+                if content == bytes([0]):
+                    raise ValueError("OCR processing error")
+                try:
+                    await asyncio.sleep(1)
+                except asyncio.CancelledError:
+                    cancelled.append(content)
+                    raise
+                return "text"
+
+        with patch("src.services.ocr_service.OCR_MAX_CONCURRENCY", 2):
+            with pytest.raises(ValueError, match="OCR processing error"):
+                await OCRService._extract_text_from_ranges(FailingBackend(), ranges, "scan.pdf")
+            await asyncio.sleep(0)
+
+        # Faixas em andamento canceladas; a última, ainda na fila, nem é enviada
+        assert bytes([3]) not in started
+        assert sorted(cancelled) == started[1:]
+
+    @pytest.mark.asyncio
+    async def test_extract_with_backend_single_request_holds_ocr_lane(self):
+        """Test that a PDF sent in a single request holds an OCR lane slot"""
+        in_use = []
+
+        class LaneBackend(FakeBackend):
+            async def recognize(self, content, filename):
+                snapshot = get_lane_limiter("ocr").snapshot()
+                in_use.append(sum(lane["in_use"] for lane in snapshot.values()))
+                return "text"
+
+        text = await OCRService._extract_with_backend(LaneBackend(), b"%PDF-1.4\n", "a.pdf")
+
+        assert text == "text"
+        assert in_use == [1]
+        assert all(lane["in_use"] == 0 for lane in get_lane_limiter("ocr").snapshot().values())
+
+    @pytest.mark.asyncio
+    async def test_quota_wait_does_not_hold_ocr_lane(self):
+        """Test that quota is acquired before the OCR lane slot is taken"""
+        in_use = []
+
+        class QuotaBackend(FakeBackend):
+            async def acquire_quota(self):
+                snapshot = get_lane_limiter("ocr").snapshot()
+                in_use.append(sum(lane["in_use"] for lane in snapshot.values()))
+
+        text = await OCRService._extract_with_backend(QuotaBackend(), b"%PDF-1.4\n", "a.pdf")
+
+        assert text == "fake text"
+        assert in_use == [0]
+
+    # --- Integration Tests (OCR.space backend) ---
 
     @pytest.mark.asyncio
     async def test_extract_text_from_pdf_success(self, temp_pdf_file, mock_success_response):
         """Test complete successful OCR extraction flow"""
-        with patch("src.services.ocr_service.OCR_SPACE_API_KEY", "test_key"):
+        with patch("src.services.ocr_backends.OCR_SPACE_API_KEY", "test_key"):
             mock_response = Mock(spec=httpx.Response)
             mock_response.status_code = 200
             mock_response.json.return_value = mock_success_response
 
-            with patch("httpx.AsyncClient") as mock_client:
-                mock_client.return_value.__aenter__.return_value.post.return_value = mock_response
+            with patch("src.services.ocr_backends.get_http_client") as mock_client:
+                mock_client.return_value.post = AsyncMock(return_value=mock_response)
 
                 text = await OCRService.extract_text_from_pdf(temp_pdf_file)
                 assert text == "This is extracted text from OCR"
 
+    @pytest.mark.asyncio
+    async def test_extract_text_from_pdf_splits_large_file(self, tmp_path, multipage_pdf_bytes):
+        """Test that files above the per-request limit are split and merged"""
+        pdf_file = tmp_path / "scan.pdf"
+        pdf_file.write_bytes(multipage_pdf_bytes)
+
+        mock_response = Mock(spec=httpx.Response)
+        mock_response.status_code = 200
+        mock_response.json.return_value = {
+            "IsErroredOnProcessing": False,
+            "ParsedResults": [{"ParsedText": "chunk"}],
+        }
+
+        with (
+            patch("src.services.ocr_backends.OCR_SPACE_API_KEY", "test_key"),
+            patch.object(OCRSpaceBackend, "max_request_bytes", 1000),
+            patch("src.services.ocr_backends.get_http_client") as mock_client,
+        ):
+            mock_client.return_value.post = AsyncMock(return_value=mock_response)
+            text = await OCRService.extract_text_from_pdf(str(pdf_file))
+
+        calls = mock_client.return_value.post.await_count
+        assert calls > 1
+        assert text == "\n".join(["chunk"] * calls)
+
+    @pytest.mark.asyncio
+    async def test_extract_text_from_pdf_empty_text(self, temp_pdf_file):
+        """Test OCR extraction fails when no text is recognized"""
+        mock_response = Mock(spec=httpx.Response)
+        mock_response.status_code = 200
+        mock_response.json.return_value = {
+            "IsErroredOnProcessing": False,
+            "ParsedResults": [{"ParsedText": "   "}],
+        }
+
+        with (
+            patch("src.services.ocr_backends.OCR_SPACE_API_KEY", "test_key"),
+            patch("src.services.ocr_backends.get_http_client") as mock_client,
+        ):
+            mock_client.return_value.post = AsyncMock(return_value=mock_response)
+            with pytest.raises(ValueError, match="OCR could not extract any text"):
+                await OCRService.extract_text_from_pdf(temp_pdf_file)
+
+    @pytest.mark.asyncio
+    async def test_extract_text_from_pdf_quota_checked_before_sending(
+        self, tmp_path, multipage_pdf_bytes, quota_scheduler
+    ):
+        """Test that a split document is rejected early if the quota cannot fit it"""
+        pdf_file = tmp_path / "scan.pdf"
+        pdf_file.write_bytes(multipage_pdf_bytes)
+        quota_scheduler.per_day = 1
+
+        with (
+            patch("src.services.ocr_backends.OCR_SPACE_API_KEY", "test_key"),
+            patch.object(OCRSpaceBackend, "max_request_bytes", 1000),
+            patch("src.services.ocr_backends.get_http_client") as mock_client,
+        ):
+            mock_client.return_value.post = AsyncMock()
+            with pytest.raises(OCRQuotaExceededError, match="daily quota"):
+                await OCRService.extract_text_from_pdf(str(pdf_file))
+
+        mock_client.return_value.post.assert_not_awaited()
+
     @pytest.mark.asyncio
     async def test_extract_text_from_pdf_no_api_key(self, temp_pdf_file):
         """Test OCR extraction fails without API key"""
-        with patch("src.services.ocr_service.OCR_SPACE_API_KEY", None):
+        with patch("src.services.ocr_backends.OCR_SPACE_API_KEY", None):
             with pytest.raises(ValueError, match="OCR_SPACE_API_KEY not configured"):
                 await OCRService.extract_text_from_pdf(temp_pdf_file)
 
     @pytest.mark.asyncio
     async def test_extract_text_from_pdf_file_not_found(self):
         """Test OCR extraction fails for nonexistent file"""
-        with patch("src.services.ocr_service.OCR_SPACE_API_KEY", "test_key"):
+        with patch("src.services.ocr_backends.OCR_SPACE_API_KEY", "test_key"):
             with pytest.raises(FileNotFoundError):
                 await OCRService.extract_text_from_pdf("/nonexistent/file.pdf")
 
     @pytest.mark.asyncio
     async def test_extract_text_from_pdf_file_too_large(self, large_pdf_file):
         """Test OCR extraction fails for oversized file"""
-        with patch("src.services.ocr_service.OCR_SPACE_API_KEY", "test_key"):
+        with patch("src.services.ocr_backends.OCR_SPACE_API_KEY", "test_key"):
             with pytest.raises(ValueError, match="File too large for OCR"):
                 await OCRService.extract_text_from_pdf(large_pdf_file)
 
     @pytest.mark.asyncio
     async def test_extract_text_from_pdf_timeout(self, temp_pdf_file):
         """Test OCR extraction handles timeout"""
-        with patch("src.services.ocr_service.OCR_SPACE_API_KEY", "test_key"):
-            with patch("httpx.AsyncClient") as mock_client:
-                mock_client.return_value.__aenter__.return_value.post.side_effect = (
-                    httpx.TimeoutException("Timeout")
+        with patch("src.services.ocr_backends.OCR_SPACE_API_KEY", "test_key"):
+            with patch("src.services.ocr_backends.get_http_client") as mock_client:
+                mock_client.return_value.post = AsyncMock(
+                    side_effect=httpx.TimeoutException("Timeout")
                 )
 
                 with pytest.raises(ValueError, match="OCR request timed out"):
@@ -245,10 +486,10 @@ class TestOCRService:
     @pytest.mark.asyncio
     async def test_extract_text_from_pdf_network_error(self, temp_pdf_file):
         """Test OCR extraction handles network errors"""
-        with patch("src.services.ocr_service.OCR_SPACE_API_KEY", "test_key"):
-            with patch("httpx.AsyncClient") as mock_client:
-                mock_client.return_value.__aenter__.return_value.post.side_effect = (
-                    httpx.ConnectError("Connection failed")
+        with patch("src.services.ocr_backends.OCR_SPACE_API_KEY", "test_key"):
+            with patch("src.services.ocr_backends.get_http_client") as mock_client:
+                mock_client.return_value.post = AsyncMock(
+                    side_effect=httpx.ConnectError("Connection failed")
                 )
 
                 with pytest.raises(ValueError, match="Network error during OCR"):
@@ -257,10 +498,10 @@ class TestOCRService:
     @pytest.mark.asyncio
     async def test_extract_text_from_pdf_unexpected_error(self, temp_pdf_file):
         """Test OCR extraction handles unexpected errors"""
-        with patch("src.services.ocr_service.OCR_SPACE_API_KEY", "test_key"):
-            with patch("httpx.AsyncClient") as mock_client:
-                mock_client.return_value.__aenter__.return_value.post.side_effect = RuntimeError(
-                    "Unexpected error"
+        with patch("src.services.ocr_backends.OCR_SPACE_API_KEY", "test_key"):
+            with patch("src.services.ocr_backends.get_http_client") as mock_client:
+                mock_client.return_value.post = AsyncMock(
+                    side_effect=RuntimeError("Unexpected error")
                 )
 
                 with pytest.raises(ValueError, match="Unexpected error during OCR"):
@@ -0,0 +1,57 @@
+"""
+Tests for the priority middleware
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.middleware.priority import PriorityMiddleware
+from src.services.priority import Priority, current_priority
+
+
+async def priority_app(scope, receive, send):
+    """ASGI app that answers with the priority of the request"""
+    priority = current_priority.get().name.lower().encode()
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": priority})
+
+
+@pytest.fixture
+def client():
+    return TestClient(
+        PriorityMiddleware(
+            priority_app, bulk_paths=("/api/analyze/batch",), bulk_api_keys={"backfill-key"}
+        )
+    )
+
+
+class TestPriorityMiddleware:
+    """Test cases for PriorityMiddleware"""
+
+    def test_interactive_by_default(self, client):
+        """Test that ordinary requests are interactive"""
+        assert client.post("/api/analyze").text == "interactive"
+
+    def test_bulk_path(self, client):
+        """Test that bulk endpoints run in the bulk lane"""
+        assert client.post("/api/analyze/batch").text == "bulk"
+
+    def test_bulk_api_key(self, client):
+        """Test that configured API keys run in the bulk lane"""
+        response = client.post("/api/analyze", headers={"X-API-Key": "backfill-key"})
+        assert response.text == "bulk"
+
+        response = client.post("/api/analyze", headers={"X-API-Key": "other-key"})
+        assert response.text == "interactive"
+
+    def test_client_can_lower_priority(self, client):
+        """Test that X-Priority: bulk moves a request to the bulk lane"""
+        assert client.post("/api/analyze", headers={"X-Priority": "Bulk"}).text == "bulk"
+        assert (
+            client.post("/api/analyze", headers={"X-Priority": "interactive"}).text == "interactive"
+        )
+
+    def test_priority_is_reset(self, client):
+        """Test that the lane does not leak out of the request"""
+        client.post("/api/analyze/batch")
+        assert current_priority.get() == Priority.INTERACTIVE
@@ -0,0 +1,310 @@
+"""
+Tests for the rate limit backends (memory, SQLite and Redis)
+"""
+
+import fnmatch
+
+import pytest
+
+from src.services.rate_limit_backends import (
+    RateLimitStorage,
+    RedisRateLimitBackend,
+    SQLiteRateLimitBackend,
+    create_rate_limit_backend,
+)
+
+
+class FakeClock:
+    """Manually advanced clock"""
+
+    def __init__(self, now=1_700_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class FakeRedis:
+    """In-process stand-in for the subset of redis-py used by the backend"""
+
+    def __init__(self):
+        self.data = {}
+        self.ttls = {}
+        self.round_trips = 0
+
+    def incrby(self, key, amount):
+        self.data[key] = int(self.data.get(key, 0)) + amount
+        return self.data[key]
+
+    def decrby(self, key, amount):
+        return self.incrby(key, -amount)
+
+    def expire(self, key, seconds):
+        self.ttls[key] = seconds
+        return True
+
+    def values(self, keys):
+        return [
+            None if self.data.get(key) is None else str(self.data[key]).encode() for key in keys
+        ]
+
+    def mget(self, keys):
+        self.round_trips += 1
+        return self.values(keys)
+
+    def scan_iter(self, match):
+        return [key for key in self.data if fnmatch.fnmatch(key, match)]
+
+    def delete(self, *keys):
+        self.round_trips += 1
+        for key in keys:
+            self.data.pop(key, None)
+            self.ttls.pop(key, None)
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self, transaction)
+
+    def close(self):
+        pass
+
+
+class FakePipeline:
+    """Queues commands and applies them together on ``execute``"""
+
+    def __init__(self, redis, transaction):
+        self.redis = redis
+        self.transaction = transaction
+        self.commands = []
+
+    def incrby(self, key, amount):
+        self.commands.append(("incrby", key, amount))
+
+    def decrby(self, key, amount):
+        self.commands.append(("decrby", key, amount))
+
+    def expire(self, key, seconds):
+        self.commands.append(("expire", key, seconds))
+
+    def mget(self, keys):
+        self.commands.append(("values", keys))
+
+    def execute(self):
+        self.redis.round_trips += 1
+        return [getattr(self.redis, name)(*args) for name, *args in self.commands]
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def backend_and_clock(request, tmp_path):
+    """Every backend, driven by a fake clock"""
+    clock = FakeClock()
+    if request.param == "memory":
+        backend = RateLimitStorage(clock=clock)
+    elif request.param == "sqlite":
+        backend = SQLiteRateLimitBackend(str(tmp_path / "rate_limit.db"), clock=clock)
+    else:
+        backend = RedisRateLimitBackend(client=FakeRedis(), clock=clock)
+    yield backend, clock
+    backend.close()
+
+
+class TestRateLimitBackends:
+    """Behaviour shared by every backend"""
+
+    def test_counts_requests_per_client(self, backend_and_clock):
+        """Test that requests are counted in both windows, per client"""
+        backend, _ = backend_and_clock
+        for _ in range(3):
+            backend.add_request("10.0.0.1")
+        backend.add_request("10.0.0.2")
+
+        assert backend.get_counts("10.0.0.1") == (3, 3)
+        assert backend.get_counts("10.0.0.2") == (1, 1)
+        assert backend.get_counts("10.0.0.3") == (0, 0)
+
+    def test_short_window_expires(self, backend_and_clock):
+        """Test that requests leave the 5-minute window but stay in the 24-hour one"""
+        backend, clock = backend_and_clock
+        backend.add_request("10.0.0.1")
+
+        clock.now += 4 * 60
+        backend.add_request("10.0.0.1")
+        assert backend.get_counts("10.0.0.1") == (2, 2)
+
+        clock.now += 2 * 60
+        assert backend.get_counts("10.0.0.1") == (1, 2)
+
+    def test_long_window_expires(self, backend_and_clock):
+        """Test that requests older than the 24-hour window are no longer counted"""
+        backend, clock = backend_and_clock
+        backend.add_request("10.0.0.1")
+
+        clock.now += 24 * 60 * 60 + 30 * 60
+        assert backend.get_counts("10.0.0.1") == (0, 0)
+
+    def test_try_add_requests_enforces_limits(self, backend_and_clock):
+        """Test that requests are recorded only while they fit both limits"""
+        backend, _ = backend_and_clock
+
+        assert backend.try_add_requests("10.0.0.1", 3, 4, 100) == (True, 3, 3)
+        assert backend.try_add_requests("10.0.0.1", 2, 4, 100) == (False, 3, 3)
+        assert backend.try_add_requests("10.0.0.1", 1, 4, 100) == (True, 4, 4)
+        assert backend.try_add_requests("10.0.0.1", 1, 100, 4) == (False, 4, 4)
+        assert backend.get_counts("10.0.0.1") == (4, 4)
+
+    def test_remove_requests(self, backend_and_clock):
+        """Test that removed requests free room in both windows"""
+        backend, clock = backend_and_clock
+        backend.try_add_requests("10.0.0.1", 2, 10, 10)
+        clock.now += 60
+        backend.try_add_requests("10.0.0.1", 1, 10, 10)
+
+        backend.remove_requests("10.0.0.1", 2)
+
+        assert backend.get_counts("10.0.0.1") == (1, 1)
+
+    def test_remove_requests_in_later_bucket(self, backend_and_clock):
+        """Test that a release after the bucket changed never drives the counts below zero"""
+        backend, clock = backend_and_clock
+        backend.try_add_requests("10.0.0.1", 1, 10, 10)
+        clock.now += 60
+
+        backend.remove_requests("10.0.0.1", 1)
+        backend.remove_requests("10.0.0.1", 1)
+
+        assert backend.get_counts("10.0.0.1") == (0, 0)
+        assert backend.try_add_requests("10.0.0.1", 2, 2, 10) == (True, 2, 2)
+        assert backend.try_add_requests("10.0.0.1", 1, 2, 10)[0] is False
+
+    def test_clear(self, backend_and_clock):
+        """Test that clear forgets every client"""
+        backend, _ = backend_and_clock
+        backend.add_request("10.0.0.1")
+
+        backend.clear()
+
+        assert backend.get_counts("10.0.0.1") == (0, 0)
+
+
+class TestSQLiteRateLimitBackend:
+    """Test cases for the SQLite backend"""
+
+    def test_counters_shared_between_instances(self, tmp_path):
+        """Test that workers using the same file share counters"""
+        path = str(tmp_path / "rate_limit.db")
+        clock = FakeClock()
+        worker_a = SQLiteRateLimitBackend(path, clock=clock)
+        worker_b = SQLiteRateLimitBackend(path, clock=clock)
+
+        worker_a.add_request("10.0.0.1")
+        worker_b.add_request("10.0.0.1")
+
+        assert worker_a.get_counts("10.0.0.1") == (2, 2)
+        assert worker_b.get_counts("10.0.0.1") == (2, 2)
+        worker_a.close()
+        worker_b.close()
+
+    def test_concurrent_workers_never_exceed_limit(self, tmp_path):
+        """Test that workers checking the same client at once admit at most the limit"""
+        from concurrent.futures import ThreadPoolExecutor
+
+        path = str(tmp_path / "rate_limit.db")
+        clock = FakeClock()
+        workers = [SQLiteRateLimitBackend(path, clock=clock) for _ in range(4)]
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(
+                pool.map(
+                    lambda i: workers[i % 4].try_add_requests("10.0.0.1", 1, 10, 100), range(40)
+                )
+            )
+
+        assert sum(allowed for allowed, _, _ in results) == 10
+        assert workers[0].get_counts("10.0.0.1") == (10, 10)
+        for worker in workers:
+            worker.close()
+
+    def test_counters_survive_restart(self, tmp_path):
+        """Test that counters persist after the backend is reopened"""
+        path = str(tmp_path / "rate_limit.db")
+        clock = FakeClock()
+        backend = SQLiteRateLimitBackend(path, clock=clock)
+        backend.add_request("10.0.0.1")
+        backend.close()
+
+        reopened = SQLiteRateLimitBackend(path, clock=clock)
+        assert reopened.get_counts("10.0.0.1") == (1, 1)
+        reopened.close()
+
+    def test_evict_idle_removes_expired_buckets(self, tmp_path):
+        """Test that eviction deletes buckets outside their window only"""
+        clock = FakeClock()
+        backend = SQLiteRateLimitBackend(str(tmp_path / "rate_limit.db"), clock=clock)
+        backend.add_request("10.0.0.1")
+
+        clock.now += 10 * 60
+        assert backend.evict_idle() == 1  # Only the short-window bucket
+        assert backend.get_counts("10.0.0.1") == (0, 1)
+
+        clock.now += 24 * 60 * 60
+        assert backend.evict_idle() == 1
+        backend.close()
+
+
+class TestRedisRateLimitBackend:
+    """Test cases for the Redis backend"""
+
+    def test_one_round_trip_per_operation(self):
+        """Test that recording and checking each take a single round trip"""
+        redis = FakeRedis()
+        backend = RedisRateLimitBackend(client=redis, clock=FakeClock())
+
+        backend.add_request("10.0.0.1")
+        assert redis.round_trips == 1
+        backend.get_counts("10.0.0.1")
+        assert redis.round_trips == 2
+
+    def test_rejected_requests_are_taken_back(self):
+        """Test that a rejected check leaves the counters as they were"""
+        redis = FakeRedis()
+        backend = RedisRateLimitBackend(client=redis, clock=FakeClock())
+        backend.try_add_requests("10.0.0.1", 2, 2, 100)
+
+        assert backend.try_add_requests("10.0.0.1", 1, 2, 100) == (False, 2, 2)
+        assert backend.get_counts("10.0.0.1") == (2, 2)
+
+    def test_keys_expire_with_their_window(self):
+        """Test that bucket keys get a TTL covering their window"""
+        redis = FakeRedis()
+        backend = RedisRateLimitBackend(client=redis, prefix="rl", clock=FakeClock())
+
+        backend.add_request("10.0.0.1")
+
+        ttls = {key.split(":")[1]: ttl for key, ttl in redis.ttls.items()}
+        assert ttls["short"] >= RedisRateLimitBackend.SHORT_WINDOW_SECONDS
+        assert ttls["long"] >= RedisRateLimitBackend.LONG_WINDOW_SECONDS
+
+    def test_clear_only_removes_own_prefix(self):
+        """Test that clear leaves unrelated keys alone"""
+        redis = FakeRedis()
+        redis.data["other"] = 1
+        backend = RedisRateLimitBackend(client=redis, prefix="rl", clock=FakeClock())
+        backend.add_request("10.0.0.1")
+
+        backend.clear()
+
+        assert list(redis.data) == ["other"]
+
+
+class TestCreateRateLimitBackend:
+    """Test cases for backend selection"""
+
+    def test_create_known_backends(self):
+        """Test that each configured name maps to its backend"""
+        assert isinstance(create_rate_limit_backend("memory"), RateLimitStorage)
+        assert isinstance(create_rate_limit_backend("sqlite"), SQLiteRateLimitBackend)
+        assert isinstance(create_rate_limit_backend("redis"), RedisRateLimitBackend)
+
+    def test_create_unknown_backend(self):
+        """Test that an unknown name is rejected"""
+        with pytest.raises(ValueError, match="Unknown rate limit backend"):
+            create_rate_limit_backend("memcached")
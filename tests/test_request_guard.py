@@ -0,0 +1,156 @@
+"""
+Tests for the request guard middleware
+"""
+
+import io
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+os.environ.setdefault("GEMINI_API_KEY", "test-key-12345")
+
+from src.main import app  # noqa: E402
+from src.middleware.request_guard import RequestGuardMiddleware  # noqa: E402
+from src.services.security_service import SecurityService, rate_limiter  # noqa: E402
+
+
+class RecordingApp:
+    """ASGI app that reads the whole body and records whether it was called"""
+
+    def __init__(self):
+        self.called = False
+        self.body = b""
+
+    async def __call__(self, scope, receive, send):
+        self.called = True
+        more_body = True
+        while more_body:
+            message = await receive()
+            self.body += message.get("body", b"")
+            more_body = message.get("more_body", False)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+
+@pytest.fixture(autouse=True)
+def reset_rate_limiter():
+    rate_limiter.clear()
+    yield
+    rate_limiter.clear()
+
+
+@pytest.fixture
+def inner_app():
+    return RecordingApp()
+
+
+@pytest.fixture
+def guarded(inner_app):
+    middleware = RequestGuardMiddleware(
+        inner_app,
+        max_body_bytes=100,
+        content_types={"/api/upload": ("multipart/form-data",)},
+    )
+    return TestClient(middleware)
+
+
+class TestRequestGuardMiddleware:
+    """Test cases for RequestGuardMiddleware"""
+
+    def test_allows_valid_request_and_adds_headers(self, guarded, inner_app):
+        """Test that valid requests reach the app with rate limit headers"""
+        response = guarded.post("/api/other", content=b"hello")
+
+        assert response.status_code == 200
+        assert inner_app.body == b"hello"
+        assert response.headers["X-RateLimit-Limit-5min"] == "10"
+        assert response.headers["X-RateLimit-Remaining-24h"] == "99"
+        assert rate_limiter.get_counts("testclient") == (1, 1)
+
+    def test_failed_request_not_counted(self, inner_app):
+        """Test that the reserved request is given back when the app responds with an error"""
+
+        async def failing_app(scope, receive, send):
+            await send({"type": "http.response.start", "status": 400, "headers": []})
+            await send({"type": "http.response.body", "body": b"bad"})
+
+        client = TestClient(RequestGuardMiddleware(failing_app))
+        response = client.post("/api/other", content=b"hello")
+
+        assert response.status_code == 400
+        assert response.headers["X-RateLimit-Remaining-5min"] == "10"
+        assert rate_limiter.get_counts("testclient") == (0, 0)
+
+    def test_rate_limited_before_body_is_read(self, guarded, inner_app):
+        """Test that a rate-limited client is rejected without calling the app"""
+        for _ in range(SecurityService.REQUESTS_PER_5_MIN):
+            rate_limiter.add_request("testclient")
+
+        response = guarded.post("/api/other", content=b"hello")
+
+        assert response.status_code == 429
+        assert "Muitas requisições" in response.json()["detail"]
+        assert response.headers["X-RateLimit-Remaining-5min"] == "0"
+        assert not inner_app.called
+
+    def test_rejects_declared_oversized_body(self, guarded, inner_app):
+        """Test that a Content-Length above the limit is rejected upfront"""
+        response = guarded.post("/api/other", content=b"x" * 101)
+
+        assert response.status_code == 413
+        assert not inner_app.called
+
+    def test_rejects_oversized_streamed_body(self, guarded, inner_app):
+        """Test that a body without Content-Length is cut off at the limit"""
+
+        def chunks():
+            for _ in range(10):
+                yield b"x" * 20
+
+        response = guarded.post("/api/other", content=chunks())
+
+        assert response.status_code == 413
+        assert len(inner_app.body) <= 100
+
+    def test_rejects_unsupported_content_type(self, guarded, inner_app):
+        """Test that an endpoint's accepted content types are enforced"""
+        response = guarded.post(
+            "/api/upload", content=b"{}", headers={"content-type": "application/json"}
+        )
+
+        assert response.status_code == 415
+        assert not inner_app.called
+
+    def test_ignores_unguarded_requests(self, guarded, inner_app):
+        """Test that GET requests and paths outside the prefix are not guarded"""
+        for _ in range(SecurityService.REQUESTS_PER_5_MIN):
+            rate_limiter.add_request("testclient")
+
+        assert guarded.get("/api/other").status_code == 200
+        response = guarded.post("/health", content=b"x" * 200)
+        assert response.status_code == 200
+        assert "X-RateLimit-Limit-5min" not in response.headers
+
+
+class TestRequestGuardIntegration:
+    """Test the middleware as installed on the application"""
+
+    def test_analyze_rate_limited_with_headers(self):
+        """Test that /api/analyze rejects rate-limited clients with 429 and headers"""
+        client = TestClient(app)
+        for _ in range(SecurityService.REQUESTS_PER_5_MIN):
+            rate_limiter.add_request("testclient")
+
+        files = {"file": ("test.txt", io.BytesIO(b"Email de teste"), "text/plain")}
+        response = client.post("/api/analyze", files=files)
+
+        assert response.status_code == 429
+        assert response.headers["X-RateLimit-Remaining-5min"] == "0"
+
+    def test_analyze_rejects_non_multipart(self):
+        """Test that /api/analyze only accepts multipart uploads"""
+        client = TestClient(app)
+        response = client.post("/api/analyze", json={"content": "Email"})
+
+        assert response.status_code == 415
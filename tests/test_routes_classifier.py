@@ -123,3 +123,302 @@ class TestClassifierRoutes:
 
             assert response.status_code == 500
             assert "API Error" in response.json()["detail"]
+
+    def test_analyze_ocr_quota_exceeded(self):
+        """Test that an exhausted OCR quota returns 503 with Retry-After"""
+        from src.services.ocr_quota import OCRQuotaExceededError
+
+        files = {"file": ("scan.pdf", io.BytesIO(b"%PDF-1.4\n%EOF\n"), "application/pdf")}
+
+        with patch(
+            "src.services.file_parser.FileParserService.parse_file",
+            new_callable=AsyncMock,
+        ) as mock_parse:
+            mock_parse.side_effect = OCRQuotaExceededError("OCR daily quota exhausted", 90.5)
+
+            response = client.post("/api/analyze", files=files)
+
+            assert response.status_code == 503
+            assert response.headers["retry-after"] == "91"
+            assert "quota" in response.json()["detail"]
+
+
+class TestAnalyzeTextRoute:
+    """Test cases for the JSON text endpoint"""
+
+    CLASSIFICATION = {
+        "category": "importante",
+        "confidence": 0.9,
+        "suggested_reply": "Obrigado pelo contato",
+        "reasoning": "Pedido de status",
+    }
+
+    def setup_method(self):
+        from src.services.security_service import rate_limiter
+
+        rate_limiter.clear()
+
+    def test_analyze_single_email(self):
+        """Test classifying one email sent as a JSON object"""
+        with patch(
+            "src.services.ai_service.AIService.classify_email",
+            new_callable=AsyncMock,
+        ) as mock_classify:
+            mock_classify.return_value = self.CLASSIFICATION
+
+            response = client.post(
+                "/api/analyze/text", json={"content": "  Qual o status   do meu pedido?  "}
+            )
+
+            assert response.status_code == 200
+            assert response.json()["category"] == "importante"
+            mock_classify.assert_awaited_once_with("Qual o status do meu pedido?")
+            assert response.headers["X-RateLimit-Remaining-5min"] == "9"
+
+    def test_analyze_list_of_emails(self):
+        """Test classifying several emails in one call"""
+        with patch(
+            "src.services.ai_service.AIService.classify_email",
+            new_callable=AsyncMock,
+        ) as mock_classify:
+            mock_classify.return_value = self.CLASSIFICATION
+
+            response = client.post(
+                "/api/analyze/text", json=[{"content": "Email um"}, {"content": "Email dois"}]
+            )
+
+            assert response.status_code == 200
+            assert len(response.json()) == 2
+            assert mock_classify.await_count == 2
+
+    def test_analyze_list_runs_concurrently(self):
+        """Test that the emails of a list are classified concurrently, in input order"""
+        import asyncio
+
+        in_flight = peak = 0
+
+        async def classify(content):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            # O primeiro email termina por último
+            await asyncio.sleep(0.05 if content == "Email um" else 0.01)
+            in_flight -= 1
+            return {**self.CLASSIFICATION, "suggested_reply": f"Resposta para {content}"}
+
+        with patch(
+            "src.services.ai_service.AIService.classify_email",
+            new_callable=AsyncMock,
+            side_effect=classify,
+        ):
+            response = client.post(
+                "/api/analyze/text", json=[{"content": "Email um"}, {"content": "Email dois"}]
+            )
+
+        assert response.status_code == 200
+        assert [item["suggested_reply"] for item in response.json()] == [
+            "Resposta para Email um",
+            "Resposta para Email dois",
+        ]
+        assert peak > 1
+
+    def test_analyze_list_with_failing_email(self):
+        """Test that one failing email fails the request and cancels the others"""
+        import asyncio
+
+        cancelled = []
+
+        async def classify(content):
+            if content == "Email ruim":
+                raise ValueError("Falha na classificação")
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                cancelled.append(content)
+                raise
+            return self.CLASSIFICATION
+
+        with patch(
+            "src.services.ai_service.AIService.classify_email",
+            new_callable=AsyncMock,
+            side_effect=classify,
+        ):
+            response = client.post(
+                "/api/analyze/text", json=[{"content": "Email lento"}, {"content": "Email ruim"}]
+            )
+
+        assert response.status_code == 400
+        assert cancelled == ["Email lento"]
+
+    def test_analyze_gzip_body(self):
+        """Test that gzip-compressed JSON bodies are accepted"""
+        import gzip
+        import json
+
+        from src.services.metrics import HTTP_REQUEST_DURATION
+
+        requests = HTTP_REQUEST_DURATION.count(handler="analyze_text", method="POST", status="200")
+        body = gzip.compress(json.dumps({"content": "Email comprimido"}).encode())
+        with patch(
+            "src.services.ai_service.AIService.classify_email",
+            new_callable=AsyncMock,
+        ) as mock_classify:
+            mock_classify.return_value = self.CLASSIFICATION
+
+            response = client.post(
+                "/api/analyze/text",
+                content=body,
+                headers={"content-type": "application/json", "content-encoding": "gzip"},
+            )
+
+            assert response.status_code == 200
+            mock_classify.assert_awaited_once_with("Email comprimido")
+        # Métricas rotuladas pela rota, não "none"
+        assert (
+            HTTP_REQUEST_DURATION.count(handler="analyze_text", method="POST", status="200")
+            == requests + 1
+        )
+
+    def test_analyze_empty_text(self):
+        """Test that empty text is rejected"""
+        response = client.post("/api/analyze/text", json={"content": "   "})
+
+        assert response.status_code == 400
+        assert "vazio" in response.json()["detail"]
+
+    def test_analyze_suspicious_text(self):
+        """Test that text failing security validation is rejected"""
+        response = client.post("/api/analyze/text", json={"content": "1 UNION SELECT senha"})
+
+        assert response.status_code == 400
+        assert "suspeitos" in response.json()["detail"]
+
+    def test_analyze_too_many_emails(self):
+        """Test that lists above the per-request limit are rejected"""
+        emails = [{"content": f"Email {i}"} for i in range(11)]
+
+        response = client.post("/api/analyze/text", json=emails)
+
+        assert response.status_code == 400
+        assert "Máximo" in response.json()["detail"]
+
+    def test_analyze_list_exceeding_rate_limit(self):
+        """Test that a list larger than the remaining rate limit is rejected"""
+        from src.services.security_service import rate_limiter
+
+        for _ in range(8):
+            rate_limiter.add_request("testclient")
+        emails = [{"content": f"Email {i}"} for i in range(3)]
+
+        response = client.post("/api/analyze/text", json=emails)
+
+        assert response.status_code == 429
+
+
+class TestAnalyzeBatchRoute:
+    """Test cases for the concurrent batch endpoint"""
+
+    def setup_method(self):
+        from src.services.security_service import rate_limiter
+
+        rate_limiter.clear()
+
+    @staticmethod
+    def _lines(response):
+        import json
+
+        return [json.loads(line) for line in response.text.splitlines()]
+
+    def test_batch_streams_results_as_completed(self):
+        """Test that files run concurrently and lines arrive in completion order"""
+        import asyncio
+
+        in_flight = peak = 0
+
+        async def classify(content):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            # "lento" demora mais que os outros e deve chegar por último
+            await asyncio.sleep(0.3 if "lento" in content else 0.05)
+            in_flight -= 1
+            return {
+                "category": "importante",
+                "confidence": 0.9,
+                "suggested_reply": f"Resposta para {content}",
+            }
+
+        files = [
+            ("files", ("lento.txt", io.BytesIO(b"email lento"), "text/plain")),
+            ("files", ("a.txt", io.BytesIO(b"email a"), "text/plain")),
+            ("files", ("b.txt", io.BytesIO(b"email b"), "text/plain")),
+        ]
+        with patch(
+            "src.services.ai_service.AIService.classify_email",
+            new_callable=AsyncMock,
+            side_effect=classify,
+        ):
+            response = client.post("/api/analyze/batch", files=files)
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        # Stream comprimido pelo ResponseCompressionMiddleware (Accept-Encoding do cliente)
+        assert response.headers["content-encoding"] in ("gzip", "br")
+        lines = self._lines(response)
+        assert [line["status"] for line in lines] == ["ok", "ok", "ok"]
+        assert lines[-1]["filename"] == "lento.txt"
+        assert lines[-1]["index"] == 0
+        assert peak > 1
+
+    def test_batch_reports_per_item_errors(self):
+        """Test that a failing file produces an error line without failing the batch"""
+        files = [
+            ("files", ("ok.txt", io.BytesIO(b"email valido"), "text/plain")),
+            ("files", ("vazio.txt", io.BytesIO(b""), "text/plain")),
+            ("files", ("doc.docx", io.BytesIO(b"x"), "application/msword")),
+        ]
+        with patch(
+            "src.services.ai_service.AIService.classify_email",
+            new_callable=AsyncMock,
+        ) as mock_classify:
+            mock_classify.return_value = {
+                "category": "importante",
+                "confidence": 0.9,
+                "suggested_reply": "Ok",
+            }
+            response = client.post("/api/analyze/batch", files=files)
+
+        assert response.status_code == 200
+        lines = {line["filename"]: line for line in self._lines(response)}
+        assert lines["ok.txt"]["status"] == "ok"
+        assert lines["ok.txt"]["result"]["category"] == "importante"
+        assert lines["vazio.txt"]["status"] == "error"
+        assert lines["vazio.txt"]["status_code"] == 400
+        assert "não suportado" in lines["doc.docx"]["error"]
+        # Só o arquivo classificado conta no rate limit
+        from src.services.security_service import rate_limiter
+
+        assert rate_limiter.get_counts("testclient") == (1, 1)
+
+    def test_batch_exceeding_rate_limit(self):
+        """Test that a batch larger than the remaining rate limit is rejected upfront"""
+        from src.services.security_service import rate_limiter
+
+        for _ in range(9):
+            rate_limiter.add_request("testclient")
+        files = [("files", (f"{i}.txt", io.BytesIO(b"email"), "text/plain")) for i in range(2)]
+
+        response = client.post("/api/analyze/batch", files=files)
+
+        assert response.status_code == 429
+
+    def test_batch_too_many_files(self):
+        """Test that batches above the file limit are rejected"""
+        from src.services.security_service import SecurityService
+
+        files = [("files", (f"{i}.txt", io.BytesIO(b"email"), "text/plain")) for i in range(3)]
+        with patch.object(SecurityService, "MAX_FILES_PER_BATCH", 2):
+            response = client.post("/api/analyze/batch", files=files)
+
+        assert response.status_code == 400
+        assert "Máximo 2 arquivos" in response.json()["detail"]
@@ -0,0 +1,119 @@
+"""
+Tests for the classification history routes
+"""
+
+import csv
+import io
+import json
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+os.environ.setdefault("GEMINI_API_KEY", "test-key-12345")
+
+from src.main import app  # noqa: E402
+from src.services.history_store import FIELDS, HistoryRecord, HistoryStore  # noqa: E402
+
+client = TestClient(app, headers={"Authorization": "Bearer admin-token"})
+
+
+def make_record(created_at, category="importante"):
+    return HistoryRecord(
+        created_at=created_at,
+        content_hash="a" * 64,
+        source="txt",
+        category=category,
+        confidence=0.75,
+        model="gemini-test",
+        total_ms=150.0,
+        ai_ms=120.0,
+    )
+
+
+@pytest.fixture(autouse=True)
+def history_store(tmp_path, monkeypatch):
+    """Use a fresh history store with five records"""
+    store = HistoryStore(str(tmp_path / "history.db"))
+    store.insert_many(
+        [make_record(1000.0 + i, "spam" if i % 2 else "importante") for i in range(5)]
+    )
+    monkeypatch.setattr("src.routes.history.get_history_store", lambda: store)
+    monkeypatch.setattr("src.routes.history.HISTORY_API_TOKEN", "admin-token")
+    yield store
+    store.close()
+
+
+class TestHistoryRoutes:
+    """Test cases for /api/history"""
+
+    def test_disabled_without_token(self, monkeypatch):
+        """Test that the routes do not exist unless an admin token is configured"""
+        monkeypatch.setattr("src.routes.history.HISTORY_API_TOKEN", "")
+
+        assert client.get("/api/history").status_code == 404
+        assert client.get("/api/history/export").status_code == 404
+
+    def test_requires_admin_token(self):
+        """Test that requests without the admin token are rejected"""
+        anonymous = TestClient(app)
+
+        response = anonymous.get("/api/history")
+        assert response.status_code == 401
+        assert response.headers["www-authenticate"] == "Bearer"
+        wrong = {"Authorization": "Bearer outro-token"}
+        assert anonymous.get("/api/history/export", headers=wrong).status_code == 401
+
+    def test_list_paginates(self):
+        """Test that pages follow next_cursor until the last one"""
+        first = client.get("/api/history", params={"limit": 3}).json()
+        second = client.get(
+            "/api/history", params={"limit": 3, "cursor": first["next_cursor"]}
+        ).json()
+
+        assert [item["created_at"] for item in first["items"]] == [1004.0, 1003.0, 1002.0]
+        assert [item["created_at"] for item in second["items"]] == [1001.0, 1000.0]
+        assert second["next_cursor"] is None
+
+    def test_list_filters(self):
+        """Test filtering by category and time range"""
+        response = client.get(
+            "/api/history", params={"category": "spam", "since": 1002.0, "until": 1004.0}
+        )
+
+        assert response.status_code == 200
+        assert [item["created_at"] for item in response.json()["items"]] == [1003.0]
+
+    def test_invalid_cursor_and_limit(self):
+        """Test that a malformed cursor gives 400 and an out-of-range limit 422"""
+        assert client.get("/api/history", params={"cursor": "x"}).status_code == 400
+        assert client.get("/api/history", params={"limit": 0}).status_code == 422
+
+    def test_export_jsonl(self, monkeypatch):
+        """Test that the JSONL export streams every record across pages"""
+        monkeypatch.setattr("src.routes.history.EXPORT_PAGE_SIZE", 2)
+
+        response = client.get("/api/history/export", params={"format": "jsonl"})
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [line["created_at"] for line in lines] == [1004.0, 1003.0, 1002.0, 1001.0, 1000.0]
+
+    def test_export_csv(self, monkeypatch):
+        """Test that the CSV export has a header row and one row per record"""
+        monkeypatch.setattr("src.routes.history.EXPORT_PAGE_SIZE", 2)
+
+        response = client.get(
+            "/api/history/export", params={"format": "csv", "category": "importante"}
+        )
+
+        assert response.headers["content-type"].startswith("text/csv")
+        assert 'filename="history.csv"' in response.headers["content-disposition"]
+        rows = list(csv.reader(io.StringIO(response.text)))
+        assert tuple(rows[0]) == FIELDS
+        assert [row[0] for row in rows[1:]] == ["1004.0", "1002.0", "1000.0"]
+
+    def test_export_invalid_format(self):
+        """Test that unknown export formats are rejected"""
+        assert client.get("/api/history/export", params={"format": "xml"}).status_code == 422
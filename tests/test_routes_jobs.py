@@ -0,0 +1,102 @@
+"""
+Tests for the asynchronous job routes
+"""
+
+import io
+import os
+from unittest.mock import AsyncMock
+
+import pytest
+from fastapi.testclient import TestClient
+
+os.environ.setdefault("GEMINI_API_KEY", "test-key-12345")
+
+from src.main import app  # noqa: E402
+from src.services.job_store import FAILED, QUEUED, JobStore  # noqa: E402
+from src.services.security_service import rate_limiter  # noqa: E402
+
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def job_store(tmp_path, monkeypatch):
+    """Use a fresh job store; workers are not started (no lifespan)"""
+    store = JobStore(str(tmp_path / "jobs.db"))
+    monkeypatch.setattr("src.routes.jobs.get_job_store", lambda: store)
+    # Sem DNS nos testes: webhooks resolvem para um endereço público
+    monkeypatch.setattr(
+        "src.services.webhook_guard._resolve", AsyncMock(return_value=["93.184.216.34"])
+    )
+    rate_limiter.clear()
+    yield store
+    store.close()
+
+
+class TestJobRoutes:
+    """Test cases for /api/jobs"""
+
+    def test_create_job_returns_immediately(self, job_store):
+        """Test that a job is enqueued and its id returned with 202"""
+        files = {"file": ("email.txt", io.BytesIO(b"Email de teste"), "text/plain")}
+
+        response = client.post(
+            "/api/jobs", files=files, data={"webhook_url": "https://example.com/hook"}
+        )
+
+        assert response.status_code == 202
+        data = response.json()
+        assert data["status"] == QUEUED
+        assert response.headers["Location"] == f"/api/jobs/{data['id']}"
+        assert job_store.get(data["id"]).webhook_url == "https://example.com/hook"
+
+    def test_get_job(self, job_store):
+        """Test reading a job's status and result"""
+        job = job_store.create("email.txt", "text/plain", b"x")
+        job_store.claim_next()
+        job_store.complete(job.id, {"category": "spam"})
+
+        response = client.get(f"/api/jobs/{job.id}")
+
+        assert response.status_code == 200
+        assert response.json()["status"] == "done"
+        assert response.json()["result"] == {"category": "spam"}
+        assert "content" not in response.json()
+
+    def test_get_unknown_job(self):
+        """Test that unknown ids return 404"""
+        assert client.get("/api/jobs/missing").status_code == 404
+
+    def test_create_job_validation(self):
+        """Test that invalid files and webhook URLs are rejected"""
+        empty = {"file": ("email.txt", io.BytesIO(b""), "text/plain")}
+        assert client.post("/api/jobs", files=empty).status_code == 400
+
+        files = {"file": ("email.txt", io.BytesIO(b"Email"), "text/plain")}
+        response = client.post("/api/jobs", files=files, data={"webhook_url": "file:///etc"})
+        assert response.status_code == 400
+
+    def test_create_job_rejects_internal_webhook(self, monkeypatch):
+        """Test that webhooks resolving to internal addresses are rejected (SSRF)"""
+        monkeypatch.setattr(
+            "src.services.webhook_guard._resolve", AsyncMock(return_value=["169.254.169.254"])
+        )
+        files = {"file": ("email.txt", io.BytesIO(b"Email"), "text/plain")}
+
+        response = client.post(
+            "/api/jobs", files=files, data={"webhook_url": "http://metadata.example.com/"}
+        )
+
+        assert response.status_code == 400
+
+    def test_retry_failed_job(self, job_store):
+        """Test that failed jobs can be retried and others cannot"""
+        job = job_store.create("email.txt", "text/plain", b"x")
+        assert client.post(f"/api/jobs/{job.id}/retry").status_code == 409
+
+        job_store.fail(job_store.claim_next(), "erro", 500, retryable=False)
+        assert job_store.get(job.id).status == FAILED
+
+        response = client.post(f"/api/jobs/{job.id}/retry")
+        assert response.status_code == 202
+        assert response.json()["status"] == QUEUED
+        assert client.post("/api/jobs/missing/retry").status_code == 404
@@ -0,0 +1,63 @@
+"""
+Tests for lazy imports and startup warm-up
+"""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+from src.services import http_client, warmup
+from src.services.ocr_backends import TesseractBackend
+from src.services.warmup import HEAVY_MODULES, import_heavy_modules, warm_up
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# O tempo de import em si é medido com `python -m benchmarks.import_time --budget`,
+# fora da suíte: depende demais da máquina para um teste
+LAZY_MODULES = HEAVY_MODULES + TesseractBackend.REQUIRED_PACKAGES
+
+
+def run_python(code: str) -> str:
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    return output.stdout.strip().splitlines()[-1]
+
+
+class TestStartup:
+    """Test cases for cold start"""
+
+    def test_import_does_not_load_heavy_dependencies(self):
+        """Test that importing the app leaves the Gemini SDK, pypdf, httpx and OCR packages unloaded"""
+        loaded = run_python(
+            "import json, sys, src.main; "
+            f"print(json.dumps([name for name in {list(LAZY_MODULES)!r} if name in sys.modules]))"
+        )
+        assert json.loads(loaded) == []
+
+
+class TestWarmUp:
+    """Test cases for the background warm-up"""
+
+    def test_import_heavy_modules(self):
+        """Test that every heavy module is imported and timed"""
+        timings = import_heavy_modules()
+        assert set(timings) == set(HEAVY_MODULES)
+        assert all(name in sys.modules for name in HEAVY_MODULES)
+
+    async def test_warm_up_creates_shared_clients(self):
+        """Test that the warm-up creates the shared HTTP client"""
+        await http_client.close_http_client()
+        await warm_up()
+        try:
+            assert http_client._client is not None
+        finally:
+            await http_client.close_http_client()
+
+    async def test_warm_up_failure_is_logged(self, caplog):
+        """Test that a failing warm-up is logged instead of breaking startup"""
+        with patch.object(warmup, "get_ai_service", side_effect=RuntimeError("boom")):
+            await warm_up()
+        assert "Startup warm-up failed" in caplog.text
@@ -0,0 +1,178 @@
+"""
+Tests for the precompressed static frontend assets
+"""
+
+import gzip
+import shutil
+from pathlib import Path
+
+import pytest
+from starlette.testclient import TestClient
+
+from src.services.static_assets import (
+    IMMUTABLE,
+    REVALIDATE,
+    StaticAssets,
+    choose_encoding,
+)
+
+ROOT = Path(__file__).resolve().parent.parent
+SCRIPT = b"console.log('classificador de emails');\n" * 40
+INDEX = (
+    b'<html><body><script src="/static/app.js"></script>' + b"<p>ok</p>" * 40 + b"</body></html>"
+)
+
+
+@pytest.fixture
+def frontend(tmp_path):
+    (tmp_path / "index.html").write_bytes(INDEX)
+    (tmp_path / "app.js").write_bytes(SCRIPT)
+    return tmp_path
+
+
+@pytest.fixture
+def assets(frontend):
+    return StaticAssets.from_directory(frontend, use_brotli=False)
+
+
+@pytest.fixture
+def client(assets):
+    return TestClient(assets)
+
+
+class TestStaticAssets:
+    """Test cases for StaticAssets"""
+
+    def test_index_references_hashed_urls(self, assets):
+        """Test that index.html is rewritten to the content-hashed asset URLs"""
+        hashed_url = assets.url_for("app.js")
+        assert hashed_url.startswith("/static/app.") and hashed_url.endswith(".js")
+        assert hashed_url.encode() in assets.index.variants["identity"]
+
+    def test_frontend_serves_pdfjs(self, tmp_path):
+        """Test that the real frontend loads PDF.js from the hashed catalog URLs"""
+        frontend = tmp_path / "frontend"
+        shutil.copytree(ROOT / "frontend", frontend)
+        (frontend / "pdf.min.js").write_bytes(SCRIPT)
+        (frontend / "pdf.worker.min.js").write_bytes(SCRIPT + b"// worker\n")
+
+        assets = StaticAssets.from_directory(frontend, use_brotli=False)
+
+        index = assets.index.variants["identity"]
+        assert f'name="pdfjs-url" content="{assets.url_for("pdf.min.js")}"'.encode() in index
+        worker_url = assets.url_for("pdf.worker.min.js")
+        assert f'name="pdfjs-worker-url" content="{worker_url}"'.encode() in index
+        assert b"pdfjs-dist" not in assets._routes["script.js"][0].variants["identity"]
+
+    def test_hashed_url_is_immutable(self, assets, client):
+        """Test that hashed URLs are cached for a year and original URLs are revalidated"""
+        hashed = client.get(assets.url_for("app.js").removeprefix("/static"))
+        original = client.get("/app.js")
+
+        assert hashed.status_code == original.status_code == 200
+        assert hashed.headers["cache-control"] == IMMUTABLE
+        assert original.headers["cache-control"] == REVALIDATE
+        assert "javascript" in hashed.headers["content-type"]
+
+    def test_serves_gzip_variant(self, client):
+        """Test that gzip is served to clients that accept it"""
+        response = client.get("/app.js", headers={"Accept-Encoding": "gzip, deflate"})
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert int(response.headers["content-length"]) < len(SCRIPT)
+        assert response.content == SCRIPT  # descomprimido pelo cliente
+
+    def test_serves_identity_without_accept_encoding(self, client):
+        """Test that the uncompressed file is served when no coding is accepted"""
+        response = client.get("/app.js", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in response.headers
+        assert response.content == SCRIPT
+
+    def test_not_modified_with_matching_etag(self, client):
+        """Test that If-None-Match with the current ETag gets a 304 without body"""
+        etag = client.get("/app.js", headers={"Accept-Encoding": "gzip"}).headers["etag"]
+        response = client.get(
+            "/app.js", headers={"Accept-Encoding": "gzip", "If-None-Match": f"W/{etag}"}
+        )
+
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+
+    def test_etag_differs_per_encoding(self, client):
+        """Test that each encoding has its own strong ETag"""
+        plain = client.get("/app.js", headers={"Accept-Encoding": "identity"}).headers["etag"]
+        gzipped = client.get("/app.js", headers={"Accept-Encoding": "gzip"}).headers["etag"]
+        assert plain != gzipped
+        assert not plain.startswith("W/")
+
+    def test_changed_content_gets_new_url_and_etag(self, frontend, assets):
+        """Test that a changed file gets a new hashed URL and ETag"""
+        (frontend / "app.js").write_bytes(SCRIPT + b"// v2\n")
+        updated = StaticAssets.from_directory(frontend, use_brotli=False)
+        assert updated.url_for("app.js") != assets.url_for("app.js")
+
+    def test_unknown_asset_and_method(self, client):
+        """Test 404 for unknown assets and 405 for other methods"""
+        assert client.get("/missing.js").status_code == 404
+        assert client.post("/app.js").status_code == 405
+
+    def test_head_has_no_body(self, client):
+        """Test that HEAD returns the headers with the full length and no body"""
+        response = client.head("/app.js", headers={"Accept-Encoding": "identity"})
+        assert response.status_code == 200
+        assert response.headers["content-length"] == str(len(SCRIPT))
+        assert response.content == b""
+
+    def test_uses_valid_prebuilt_variant(self, frontend):
+        """Test that a precompressed file is used when it matches the content"""
+        prebuilt = gzip.compress(SCRIPT, compresslevel=1)
+        (frontend / "app.js.gz").write_bytes(prebuilt)
+        assets = StaticAssets.from_directory(frontend, use_brotli=False)
+        asset = assets._routes["app.js"][0]
+        assert asset.variants["gzip"] == prebuilt
+        assert "app.js.gz" not in assets._routes
+
+    def test_ignores_stale_prebuilt_variant(self, frontend):
+        """Test that a precompressed file of an older version is rebuilt"""
+        (frontend / "app.js.gz").write_bytes(gzip.compress(b"old version" * 100))
+        assets = StaticAssets.from_directory(frontend, use_brotli=False)
+        asset = assets._routes["app.js"][0]
+        assert gzip.decompress(asset.variants["gzip"]) == SCRIPT
+
+    def test_write_precompressed(self, frontend, assets):
+        """Test that the build step writes the variants next to the files"""
+        written = assets.write_precompressed(frontend)
+        assert {path.name for path in written} == {"app.js.gz", "index.html.gz"}
+
+    def test_missing_directory(self, tmp_path):
+        """Test that a missing frontend gives an empty catalog"""
+        assets = StaticAssets.from_directory(tmp_path / "missing", use_brotli=False)
+        assert assets.index is None
+
+    def test_brotli_preferred(self, frontend):
+        """Test that brotli is preferred when available and accepted"""
+        pytest.importorskip("brotli")
+        client = TestClient(StaticAssets.from_directory(frontend, use_brotli=True))
+        response = client.get("/app.js", headers={"Accept-Encoding": "gzip, br"})
+        assert response.headers["content-encoding"] == "br"
+
+
+class TestChooseEncoding:
+    """Test cases for Accept-Encoding negotiation"""
+
+    @pytest.mark.parametrize(
+        "accept, expected",
+        [
+            ("gzip, deflate, br", "br"),
+            ("gzip", "gzip"),
+            ("br;q=0, gzip", "gzip"),
+            ("*", "br"),
+            ("gzip;q=0", "identity"),
+            ("", "identity"),
+        ],
+    )
+    def test_choose_encoding(self, accept, expected):
+        """Test the preferred encoding for each Accept-Encoding header"""
+        assert choose_encoding(accept, ["identity", "gzip", "br"]) == expected
@@ -0,0 +1,154 @@
+"""
+Tests for structured logging and the request id middleware
+"""
+
+import io
+import json
+import logging
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.middleware.request_id import RequestIdMiddleware
+from src.services.structured_logging import (
+    JsonFormatter,
+    RequestIdFilter,
+    SamplingFilter,
+    configure_logging,
+    loggable_content,
+    request_id,
+    shutdown_logging,
+)
+
+
+def make_record(level=logging.INFO, msg="hello %s", args=("world",), **extra):
+    record = logging.LogRecord("test", level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+class TestJsonFormatter:
+    """Test cases for JsonFormatter"""
+
+    def test_formats_record_as_json(self):
+        """Test the JSON fields, including the request id and extra fields"""
+        record = make_record(request_id="abc123", job_id="j1")
+
+        data = json.loads(JsonFormatter().format(record))
+
+        assert data["message"] == "hello world"
+        assert data["level"] == "INFO"
+        assert data["logger"] == "test"
+        assert data["request_id"] == "abc123"
+        assert data["job_id"] == "j1"
+        assert data["time"].endswith("+00:00")
+
+
+class TestSamplingFilter:
+    """Test cases for SamplingFilter"""
+
+    def test_keeps_warnings(self):
+        """Test that warnings are never sampled out"""
+        sampler = SamplingFilter(0.0)
+        assert sampler.filter(make_record(logging.WARNING))
+        assert not sampler.filter(make_record(logging.INFO, request_id="r1"))
+
+    def test_decision_is_per_request(self):
+        """Test that all records of a request share the sampling decision"""
+        sampler = SamplingFilter(0.5)
+        for index in range(50):
+            decisions = {
+                sampler.filter(make_record(request_id=f"request-{index}")) for _ in range(3)
+            }
+            assert len(decisions) == 1
+
+    def test_rate_is_approximate(self):
+        """Test that roughly the configured fraction of requests is kept"""
+        sampler = SamplingFilter(0.25)
+        kept = sum(sampler.filter(make_record(request_id=f"r{index}")) for index in range(4000))
+        assert 800 < kept < 1200
+
+
+class TestConfigureLogging:
+    """Test cases for the queue-based setup"""
+
+    @pytest.fixture(autouse=True)
+    def restore_root_level(self):
+        level = logging.getLogger().level
+        yield
+        shutdown_logging()
+        logging.getLogger().setLevel(level)
+
+    def test_records_are_written_by_listener(self):
+        """Test that records reach the stream with the request id after shutdown flushes them"""
+        stream = io.StringIO()
+        configure_logging(level="INFO", fmt="json", sample_rate=1.0, stream=stream)
+
+        token = request_id.set("req-1")
+        try:
+            logging.getLogger("src.test").info("classified %d emails", 3)
+        finally:
+            request_id.reset(token)
+        shutdown_logging()
+
+        data = json.loads(stream.getvalue().strip())
+        assert data["message"] == "classified 3 emails"
+        assert data["request_id"] == "req-1"
+
+    def test_reconfigure_replaces_handler(self):
+        """Test that configuring twice does not duplicate records"""
+        stream = io.StringIO()
+        configure_logging(level="INFO", fmt="text", stream=io.StringIO())
+        configure_logging(level="INFO", fmt="text", stream=stream)
+
+        logging.getLogger("src.test").warning("once")
+        shutdown_logging()
+
+        assert stream.getvalue().count("once") == 1
+
+
+def test_loggable_content_hides_email_text():
+    """Test that email content is replaced by its size by default"""
+    assert loggable_content("Olá, segue o contrato") == "<21 chars>"
+
+
+def test_request_id_filter():
+    """Test that the filter stamps the current request id"""
+    token = request_id.set("abc")
+    try:
+        record = make_record()
+        RequestIdFilter().filter(record)
+    finally:
+        request_id.reset(token)
+    assert record.request_id == "abc"
+
+
+class TestRequestIdMiddleware:
+    """Test cases for RequestIdMiddleware"""
+
+    @pytest.fixture
+    def client(self):
+        async def app(scope, receive, send):
+            body = (request_id.get() or "").encode()
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": body})
+
+        return TestClient(RequestIdMiddleware(app))
+
+    def test_generates_id(self, client):
+        """Test that requests without an id get a new one, echoed in the response"""
+        response = client.get("/")
+        assert len(response.text) == 32
+        assert response.headers["x-request-id"] == response.text
+
+    def test_keeps_client_id(self, client):
+        """Test that a valid client id is propagated"""
+        response = client.get("/", headers={"X-Request-ID": "lb-123.abc"})
+        assert response.text == "lb-123.abc"
+        assert response.headers["x-request-id"] == "lb-123.abc"
+
+    def test_replaces_invalid_id(self, client):
+        """Test that ids with unexpected characters are replaced"""
+        response = client.get("/", headers={"X-Request-ID": "bad id\\n"})
+        assert response.text != "bad id\\n"
+        assert len(response.text) == 32
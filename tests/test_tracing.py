@@ -0,0 +1,227 @@
+"""
+Tests for tracing, span exporters and the tracing middleware
+"""
+
+import json
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from src.middleware.tracing import TracingMiddleware
+from src.services.metrics import track_stage
+from src.services.tracing import (
+    NOOP_SPAN,
+    BatchSpanProcessor,
+    JsonlSpanExporter,
+    OTLPHttpSpanExporter,
+    SpanExporter,
+    Tracer,
+    create_span_exporter,
+    current_span,
+    parse_traceparent,
+)
+
+TRACEPARENT = "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"
+
+
+class ListExporter(SpanExporter):
+    """Keeps exported spans in memory"""
+
+    def __init__(self):
+        self.spans = []
+        self.closed = False
+
+    def export(self, spans):
+        self.spans.extend(spans)
+
+    def shutdown(self):
+        self.closed = True
+
+
+@pytest.fixture
+def exporter():
+    return ListExporter()
+
+
+@pytest.fixture
+def tracer(exporter):
+    return Tracer(BatchSpanProcessor(exporter, flush_interval=0.01), sample_rate=1.0)
+
+
+class TestTracer:
+    """Test cases for Tracer"""
+
+    def test_children_share_the_trace(self, tracer, exporter):
+        """Test that child spans are linked to the root and exported with it"""
+        with tracer.start_trace("POST /api/analyze") as root:
+            with tracer.span("ocr", backend="ocrspace") as ocr:
+                with tracer.span("ocr.request") as request:
+                    request.set("bytes", 10)
+        tracer.shutdown()
+
+        names = {span.name: span for span in exporter.spans}
+        assert set(names) == {"POST /api/analyze", "ocr", "ocr.request"}
+        assert {span.trace_id for span in exporter.spans} == {root.trace_id}
+        assert ocr.parent_id == root.span_id
+        assert request.parent_id == ocr.span_id
+        assert names["ocr.request"].attributes == {"bytes": 10}
+        assert names["ocr"].attributes == {"backend": "ocrspace"}
+        assert all(span.end_ns >= span.start_ns for span in exporter.spans)
+        assert exporter.closed
+
+    def test_error_status(self, tracer, exporter):
+        """Test that a span ending with an exception is marked as an error"""
+        with pytest.raises(ValueError):
+            with tracer.start_trace("root"):
+                with tracer.span("parse_pdf"):
+                    raise ValueError("PDF inválido")
+        tracer.shutdown()
+
+        span = next(span for span in exporter.spans if span.name == "parse_pdf")
+        assert span.status == "error"
+        assert span.error == "ValueError: PDF inválido"
+
+    def test_unsampled_traces_are_noop(self, exporter):
+        """Test that unsampled traces record nothing"""
+        tracer = Tracer(BatchSpanProcessor(exporter), sample_rate=0.0)
+        with tracer.start_trace("root") as root:
+            with tracer.span("child") as child:
+                child.set("bytes", 1)
+        tracer.shutdown()
+
+        assert root is NOOP_SPAN
+        assert child is NOOP_SPAN
+        assert exporter.spans == []
+
+    def test_spans_outside_a_trace_are_noop(self, tracer):
+        """Test that instrumented code run outside a request costs nothing"""
+        with tracer.span("llm") as span:
+            assert span is NOOP_SPAN
+        assert current_span.get() is None
+
+    def test_continues_remote_trace(self, exporter):
+        """Test that a sampled traceparent continues the caller's trace, even at rate 0"""
+        tracer = Tracer(BatchSpanProcessor(exporter), sample_rate=0.0)
+        with tracer.start_trace("root", traceparent=TRACEPARENT) as root:
+            pass
+        tracer.shutdown()
+
+        assert root.trace_id == "0af7651916cd43dd8448eb211c80319c"
+        assert root.parent_id == "b7ad6b7169203331"
+        assert exporter.spans == [root]
+
+    def test_no_exporter_disables_tracing(self):
+        """Test that a tracer without processor never samples"""
+        with Tracer(None, sample_rate=1.0).start_trace("root") as root:
+            assert root is NOOP_SPAN
+
+    def test_track_stage_opens_span(self, tracer, exporter, monkeypatch):
+        """Test that pipeline stages are traced"""
+        monkeypatch.setattr("src.services.metrics.get_tracer", lambda: tracer)
+        with tracer.start_trace("root"):
+            with track_stage("parse_response", chars=12) as span:
+                span.set("ok", True)
+        tracer.shutdown()
+
+        span = next(span for span in exporter.spans if span.name == "parse_response")
+        assert span.attributes == {"chars": 12, "ok": True}
+
+
+class TestTraceparent:
+    """Test cases for parse_traceparent"""
+
+    def test_valid(self):
+        assert parse_traceparent(TRACEPARENT) == (
+            "0af7651916cd43dd8448eb211c80319c",
+            "b7ad6b7169203331",
+            True,
+        )
+
+    @pytest.mark.parametrize(
+        "header",
+        [None, "", "garbage", "00-xyz-b7ad6b7169203331-01", f"00-{'0' * 32}-b7ad6b7169203331-01"],
+    )
+    def test_invalid(self, header):
+        assert parse_traceparent(header) is None
+
+
+class TestExporters:
+    """Test cases for the span exporters"""
+
+    def test_jsonl_exporter(self, tmp_path):
+        """Test that each span is written as one JSON line"""
+        path = tmp_path / "traces" / "spans.jsonl"
+        tracer = Tracer(BatchSpanProcessor(JsonlSpanExporter(str(path))), sample_rate=1.0)
+        with tracer.start_trace("root"):
+            with tracer.span("llm", prompt_tokens_estimated=120):
+                pass
+        tracer.shutdown()
+
+        lines = [json.loads(line) for line in path.read_text().splitlines()]
+        assert [line["name"] for line in lines] == ["llm", "root"]
+        assert lines[0]["attributes"] == {"prompt_tokens_estimated": 120}
+        assert lines[0]["parent_id"] == lines[1]["span_id"]
+        assert lines[0]["duration_ms"] >= 0
+
+    def test_otlp_exporter_posts_json(self, tracer):
+        """Test the OTLP/HTTP JSON payload"""
+        requests = []
+
+        def handler(request):
+            requests.append(json.loads(request.content))
+            return httpx.Response(200)
+
+        exporter = OTLPHttpSpanExporter(
+            "http://collector/v1/traces",
+            service_name="classifier",
+            client=httpx.Client(transport=httpx.MockTransport(handler)),
+        )
+        otlp_tracer = Tracer(BatchSpanProcessor(exporter), sample_rate=1.0)
+        with pytest.raises(RuntimeError):
+            with otlp_tracer.start_trace("root"):
+                with otlp_tracer.span("llm", pages=3, ratio=0.5, cached=False):
+                    raise RuntimeError("timeout")
+        otlp_tracer.shutdown()
+
+        resource = requests[0]["resourceSpans"][0]
+        assert resource["resource"]["attributes"][0]["value"] == {"stringValue": "classifier"}
+        spans = {span["name"]: span for span in resource["scopeSpans"][0]["spans"]}
+        assert spans["root"]["kind"] == 2
+        assert spans["llm"]["kind"] == 1
+        assert spans["llm"]["parentSpanId"] == spans["root"]["spanId"]
+        assert spans["llm"]["status"] == {"code": 2, "message": "RuntimeError: timeout"}
+        assert {"key": "pages", "value": {"intValue": "3"}} in spans["llm"]["attributes"]
+        assert {"key": "ratio", "value": {"doubleValue": 0.5}} in spans["llm"]["attributes"]
+        assert {"key": "cached", "value": {"boolValue": False}} in spans["llm"]["attributes"]
+
+    def test_create_span_exporter(self):
+        """Test exporter selection by name"""
+        assert create_span_exporter("none") is None
+        assert isinstance(create_span_exporter("jsonl"), JsonlSpanExporter)
+        with pytest.raises(ValueError):
+            create_span_exporter("zipkin")
+
+
+class TestTracingMiddleware:
+    """Test cases for TracingMiddleware"""
+
+    def test_traces_api_requests(self, tracer, exporter):
+        """Test that API requests get a root span with the response status"""
+
+        async def app(scope, receive, send):
+            with tracer.span("upload.read"):
+                pass
+            await send({"type": "http.response.start", "status": 202, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+
+        client = TestClient(TracingMiddleware(app, tracer=tracer))
+        client.post("/api/jobs")
+        client.get("/health")
+        tracer.shutdown()
+
+        names = [span.name for span in exporter.spans]
+        assert sorted(names) == ["POST /api/jobs", "upload.read"]
+        root = next(span for span in exporter.spans if span.name == "POST /api/jobs")
+        assert root.attributes["http.status_code"] == 202
+        assert root.attributes["http.method"] == "POST"
@@ -0,0 +1,72 @@
+"""
+Tests for webhook URL validation
+"""
+
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from src.services.webhook_guard import UnsafeWebhookError, validate_webhook_url
+
+
+def resolving_to(*addresses):
+    return patch("src.services.webhook_guard._resolve", new=AsyncMock(return_value=list(addresses)))
+
+
+class TestValidateWebhookUrl:
+    """Test cases for validate_webhook_url"""
+
+    async def test_public_address_accepted(self):
+        """Test that a host resolving to a public address is accepted"""
+        with resolving_to("93.184.216.34"):
+            await validate_webhook_url("https://example.com/hook")
+
+    @pytest.mark.parametrize(
+        "address",
+        [
+            "127.0.0.1",
+            "10.0.0.5",
+            "192.168.1.10",
+            "172.16.0.1",
+            "169.254.169.254",
+            "100.64.0.1",
+            "0.0.0.0",
+            "::1",
+            "fe80::1",
+            "fd00::1",
+            "::ffff:127.0.0.1",
+        ],
+    )
+    async def test_non_public_addresses_rejected(self, address):
+        """Test that loopback, private, link-local and reserved addresses are rejected"""
+        with resolving_to(address), pytest.raises(UnsafeWebhookError):
+            await validate_webhook_url("http://hook.example.com/")
+
+    async def test_any_non_public_address_rejects(self):
+        """Test that one private address among public ones is enough to reject"""
+        with resolving_to("93.184.216.34", "10.0.0.1"), pytest.raises(UnsafeWebhookError):
+            await validate_webhook_url("https://example.com/hook")
+
+    @pytest.mark.parametrize("url", ["file:///etc/passwd", "ftp://example.com", "https://"])
+    async def test_invalid_urls_rejected(self, url):
+        """Test that non-http(s) URLs and URLs without host are rejected"""
+        with pytest.raises(UnsafeWebhookError):
+            await validate_webhook_url(url)
+
+    async def test_unresolvable_host_rejected(self):
+        """Test that hosts that do not resolve are rejected"""
+        with (
+            patch("src.services.webhook_guard._resolve", new=AsyncMock(side_effect=OSError)),
+            pytest.raises(UnsafeWebhookError),
+        ):
+            await validate_webhook_url("https://missing.invalid/hook")
+
+    async def test_allowlist(self):
+        """Test that only allowlisted hosts are accepted when the list is set"""
+        with (
+            patch("src.services.webhook_guard.WEBHOOK_ALLOWED_HOSTS", {"hooks.example.com"}),
+            resolving_to("93.184.216.34"),
+        ):
+            await validate_webhook_url("https://hooks.example.com/x")
+            with pytest.raises(UnsafeWebhookError):
+                await validate_webhook_url("https://other.example.com/x")